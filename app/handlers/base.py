@@ -19,8 +19,17 @@ except ImportError:
     import json
 
 import bson
+import cProfile
+import cStringIO
+import functools
+import hashlib
 import httplib
+import os
+import pstats
+import time
+import uuid
 import tornado
+import tornado.concurrent
 import tornado.escape
 import tornado.gen
 import tornado.web
@@ -30,8 +39,11 @@ import handlers.common as hcommon
 import handlers.response as hresponse
 import models
 import utils
+import utils.asyncdb
 import utils.db
+import utils.kjson
 import utils.log
+import utils.metrics
 import utils.validator as validator
 
 
@@ -45,6 +57,9 @@ STATUS_MESSAGES = {
     506: "Wrong response type from database"
 }
 
+# How many functions are listed in the profiling report.
+PROFILE_REPORT_LINES = 40
+
 
 # pylint: disable=unused-argument
 # pylint: disable=too-many-public-methods
@@ -55,6 +70,9 @@ class BaseHandler(tornado.web.RequestHandler):
     def __init__(self, application, request, **kwargs):
         super(BaseHandler, self).__init__(application, request, **kwargs)
         self._db = None
+        self._async_db = None
+        self._connection_closed = False
+        self._pending_flush = None
 
     @property
     def executor(self):
@@ -89,11 +107,149 @@ class BaseHandler(tornado.web.RequestHandler):
 
         return self._db
 
+    @property
+    def async_db(self):
+        """The asynchronous database instance associated with the object.
+
+        It is available only if the application has been started with an
+        asynchronous database client.
+        """
+        if self._async_db is None:
+            client = self.settings.get("async_client", None)
+            if client is not None:
+                self._async_db = client[models.DB_NAME]
+
+        return self._async_db
+
+    @property
+    def async_get(self):
+        """If GET requests can be executed directly on the IOLoop.
+
+        Subclasses that implement `_get_async` and `_get_one_async` should
+        return True here.
+        """
+        return False
+
+    @property
+    def async_collection(self):
+        """The asynchronous database collection for this object."""
+        return None
+
+    @property
+    def count_mode(self):
+        """How the documents should be counted when listing a collection.
+
+        One of the `utils.db.COUNT_*` values.
+        """
+        return self.settings.get("count_mode", utils.db.COUNT_EXACT)
+
+    @property
+    def stream_chunk_size(self):
+        """How many documents to send in each chunk of a streamed response.
+
+        A value of 0 disables streaming.
+        """
+        return self.settings.get("stream_chunk_size", 0)
+
+    @property
+    def cache_collections(self):
+        """The collections the GET responses are built from.
+
+        If not empty, the GET responses are cached and invalidated when the
+        documents of one of these collections change.
+        """
+        return []
+
     @property
     def log(self):
         """The logger of this object."""
         return utils.log.get_log(debug=self.settings["debug"])
 
+    @property
+    def metrics_name(self):
+        """The name of the requests of this handler in the metrics."""
+        return "%s %s" % (self.request.method, self.__class__.__name__)
+
+    @property
+    def profile_requested(self):
+        """If the request asked to be profiled.
+
+        Only requests made with an admin token are actually profiled.
+        """
+        return models.PROFILE_KEY in self.request.query_arguments
+
+    def _submit(self, func, *args, **kwargs):
+        """Run a function in the executor.
+
+        The time spent waiting for a thread and running there are measured.
+
+        :param func: The function to run.
+        :type func: function
+        :return A future resolved with what the function returns.
+        """
+        return self.executor.submit(
+            utils.metrics.executor_call,
+            self.metrics_name,
+            time.time(), functools.partial(func, *args, **kwargs))
+
+    def _submit_operation(self, func, *args, **kwargs):
+        """Run the operation of the request in the executor.
+
+        If the request asked to be profiled, the operation is run under the
+        profiler. Only the top-level operation of a request must be run with
+        this method, not its intermediate steps.
+
+        :param func: The function to run.
+        :type func: function
+        :return A future resolved with what the function returns.
+        """
+        if self.profile_requested:
+            return self._submit(self._run_profiled, func, *args, **kwargs)
+        return self._submit(func, *args, **kwargs)
+
+    def _run_profiled(self, func, *args, **kwargs):
+        """Run a function under the profiler, if the token is an admin one.
+
+        The profiling report is added to the response. If the `profile_dir`
+        setting is defined, the profiling data is saved there as well.
+
+        :param func: The function to run.
+        :type func: function
+        :return What the function returns.
+        """
+        valid_token, token = self.validate_req_token(self.request.method)
+        if not all([valid_token, getattr(token, "is_admin", False)]):
+            return func(*args, **kwargs)
+
+        profiler = cProfile.Profile()
+        response = profiler.runcall(func, *args, **kwargs)
+
+        profile_dir = self.settings.get("profile_dir", None)
+        if profile_dir:
+            profile_file = os.path.join(
+                profile_dir,
+                "%s-%s-%s.prof" % (
+                    self.__class__.__name__,
+                    time.strftime("%Y%m%d%H%M%S"), uuid.uuid4().hex[:8])
+            )
+            profiler.dump_stats(profile_file)
+            self.log.info(
+                "Profile of %s %s saved in %s",
+                self.request.method, self.request.uri, profile_file)
+
+        if isinstance(response, hresponse.HandlerResponse):
+            report = cStringIO.StringIO()
+            pstats.Stats(profiler, stream=report).sort_stats(
+                "cumulative").print_stats(PROFILE_REPORT_LINES)
+            response.profile = report.getvalue()
+
+        return response
+
+    def on_finish(self):
+        utils.metrics.METRICS.observe(
+            utils.metrics.REQUESTS,
+            self.metrics_name, self.request.request_time())
+
     @staticmethod
     def _valid_keys(method):
         """The accepted keys for the valid sent content type.
@@ -131,13 +287,17 @@ class BaseHandler(tornado.web.RequestHandler):
         """Write the response back to the requestor."""
         status_code = 200
         headers = {}
-        result = {}
+        result = None
+        etag = None
 
         if isinstance(future, hresponse.HandlerResponse):
             status_code = future.status_code
             reason = future.reason or self._get_status_message(status_code)
             headers = future.headers
-            to_dump = future.to_dict()
+            result = future.body
+            etag = future.etag
+            if result is None:
+                to_dump = future.to_dict()
         elif isinstance(future, types.DictionaryType):
             status_code = future.get("code", 200)
             reason = future.get(
@@ -148,23 +308,141 @@ class BaseHandler(tornado.web.RequestHandler):
             reason = self._get_status_message(status_code)
             to_dump = dict(code=status_code, reason=reason)
 
-        result = json.dumps(
-            to_dump,
-            default=bson.json_util.default,
-            ensure_ascii=False,
-            separators=(",", ":")
-        )
+        if result is None:
+            result = self._json_dumps(to_dump)
+        result = tornado.escape.utf8(result)
 
         self.set_status(status_code=status_code, reason=reason)
-        self._write_buffer.append(tornado.escape.utf8(result))
         self.set_header("Content-Type", hcommon.DEFAULT_RESPONSE_TYPE)
 
+        if all([status_code == 200, self.request.method in ("GET", "HEAD")]):
+            self.set_header("Etag", etag or self._compute_etag(result))
+            if self.check_etag_header():
+                self.set_status(304)
+                result = None
+
+        if result is not None:
+            self._write_buffer.append(result)
+
         if headers:
             for key, val in headers.iteritems():
                 self.add_header(key, val)
 
         self.finish()
 
+    @staticmethod
+    def _compute_etag(body):
+        """Compute the entity tag of a response body.
+
+        It is the same value Tornado would compute.
+
+        :param body: The response body.
+        :type body: str
+        :return The quoted entity tag.
+        """
+        return '"%s"' % hashlib.sha1(tornado.escape.utf8(body)).hexdigest()
+
+    @staticmethod
+    def _json_dumps(obj):
+        """Serialize an object into a JSON string.
+
+        :param obj: The object to serialize.
+        :return The JSON string.
+        """
+        return utils.kjson.dumps(obj)
+
+    @tornado.gen.coroutine
+    def write_stream(self, response):
+        """Stream the response back to the requestor.
+
+        The response envelope is sent first, then the documents from the
+        `stream` attribute of the response are serialized in the executor
+        and sent in chunks of `stream_chunk_size` documents. Each chunk is
+        flushed to the network before the next one is prepared, so the
+        memory used is bounded by the chunk size.
+
+        :param response: The response to send.
+        :type response: HandlerResponse
+        """
+        reason = response.reason or self._get_status_message(
+            response.status_code)
+
+        self.set_status(status_code=response.status_code, reason=reason)
+        self.set_header("Content-Type", hcommon.DEFAULT_RESPONSE_TYPE)
+
+        if response.headers:
+            for key, val in response.headers.iteritems():
+                self.add_header(key, val)
+
+        # The envelope without the closing brace, the result is appended.
+        envelope = self._json_dumps(response.to_dict())[:-1]
+        self._write_buffer.append(
+            tornado.escape.utf8(envelope + ",\"result\":["))
+
+        iterator = iter(response.stream)
+        separator = ""
+        while not self._connection_closed:
+            chunk = yield self._submit(
+                self._encode_chunk, iterator, separator)
+            if not chunk:
+                break
+
+            self._write_buffer.append(chunk)
+            yield self._flush_and_wait()
+            separator = ","
+
+        if self._connection_closed:
+            self.log.warn(
+                "Connection closed while streaming the response to %s",
+                self.request.remote_ip)
+        else:
+            self._write_buffer.append(b"]}")
+            self.finish()
+
+    def _encode_chunk(self, iterator, separator):
+        """Serialize the next chunk of documents.
+
+        :param iterator: The iterator over the documents.
+        :param separator: What to put before the first document.
+        :type separator: str
+        :return The serialized documents as UTF-8 bytes, or None if there are
+        no more documents.
+        """
+        documents = []
+        for document in iterator:
+            documents.append(self._json_dumps(document))
+            if len(documents) >= self.stream_chunk_size:
+                break
+
+        chunk = None
+        if documents:
+            chunk = tornado.escape.utf8(separator + ",".join(documents))
+
+        return chunk
+
+    def _flush_and_wait(self):
+        """Flush the output buffer.
+
+        :return A future resolved when the data has been written to the
+        socket or the connection has been closed.
+        """
+        future = tornado.concurrent.Future()
+        self._pending_flush = future
+
+        def _flushed():
+            self._pending_flush = None
+            if not future.done():
+                future.set_result(None)
+
+        self.flush(callback=_flushed)
+        return future
+
+    def on_connection_close(self):
+        self._connection_closed = True
+        if self._pending_flush is not None:
+            self._pending_flush.set_result(None)
+            self._pending_flush = None
+
     def write_error(self, status_code, **kwargs):
         if kwargs.get("message", None):
             status_message = kwargs["message"]
@@ -200,9 +478,26 @@ class BaseHandler(tornado.web.RequestHandler):
 
     @tornado.gen.coroutine
     def put(self, *args, **kwargs):
-        future = yield self.executor.submit(self.execute_put, *args, **kwargs)
+        future = yield self._submit_operation(
+            self._execute_write, self.execute_put, *args, **kwargs)
         self.write(future)
 
+    def _execute_write(self, execute_func, *args, **kwargs):
+        """Execute a write operation and invalidate the cached responses.
+
+        :param execute_func: The function that performs the operation.
+        :type execute_func: function
+        :return A `HandlerResponse` object.
+        """
+        response = execute_func(*args, **kwargs)
+
+        if all([self.cache_collections,
+                isinstance(response, hresponse.HandlerResponse),
+                200 <= response.status_code < 300]):
+            hcommon.invalidate_responses(self.db, self.cache_collections)
+
+        return response
+
     def execute_put(self, *args, **kwargs):
         """Execute the PUT pre-operations."""
         response = None
@@ -232,7 +527,8 @@ class BaseHandler(tornado.web.RequestHandler):
 
     @tornado.gen.coroutine
     def post(self, *args, **kwargs):
-        future = yield self.executor.submit(self.execute_post, *args, **kwargs)
+        future = yield self._submit_operation(
+            self._execute_write, self.execute_post, *args, **kwargs)
         self.write(future)
 
     def execute_post(self, *args, **kwargs):
@@ -316,8 +612,8 @@ class BaseHandler(tornado.web.RequestHandler):
 
     @tornado.gen.coroutine
     def delete(self, *args, **kwargs):
-        future = yield self.executor.submit(
-            self.execute_delete, *args, **kwargs)
+        future = yield self._submit_operation(
+            self._execute_write, self.execute_delete, *args, **kwargs)
         self.write(future)
 
     def execute_delete(self, *args, **kwargs):
@@ -359,8 +655,19 @@ class BaseHandler(tornado.web.RequestHandler):
 
     @tornado.gen.coroutine
     def get(self, *args, **kwargs):
-        future = yield self.executor.submit(self.execute_get, *args, **kwargs)
-        self.write(future)
+        # Profiled requests are always executed in the executor.
+        if all([self.async_get,
+                self.async_db is not None, not self.profile_requested]):
+            future = yield self.execute_get_async(*args, **kwargs)
+        else:
+            future = yield self._submit_operation(
+                self.execute_get, *args, **kwargs)
+
+        if (isinstance(future, hresponse.HandlerResponse) and
+                future.stream is not None):
+            yield self.write_stream(future)
+        else:
+            self.write(future)
 
     def execute_get(self, *args, **kwargs):
         """This is the actual GET operation.
@@ -372,17 +679,117 @@ class BaseHandler(tornado.web.RequestHandler):
         valid_token, token = self.validate_req_token("GET")
 
         if valid_token:
-            kwargs["token"] = token
-            get_id = kwargs.get("id", None)
+            cache_key = None
+            if self._use_response_cache():
+                cache_key = self._response_cache_key(
+                    token,
+                    kwargs,
+                    hcommon.get_cache_versions(
+                        self.db, self.cache_collections))
+                response = hcommon.RESPONSE_CACHE.get(cache_key)
+
+            if response is None:
+                kwargs["token"] = token
+                get_id = kwargs.get("id", None)
+
+                if get_id:
+                    response = self._get_one(get_id, **kwargs)
+                else:
+                    response = self._get(**kwargs)
+
+                if cache_key is not None:
+                    response = self._cache_response(cache_key, response)
+        else:
+            response = hresponse.HandlerResponse(403)
+            response.reason = hcommon.NOT_VALID_TOKEN
 
-            if get_id:
-                response = self._get_one(get_id, **kwargs)
-            else:
-                response = self._get(**kwargs)
+        return response
+
+    @tornado.gen.coroutine
+    def execute_get_async(self, *args, **kwargs):
+        """The GET operation executed on the IOLoop.
+
+        It uses the asynchronous database client and does not block the
+        IOLoop. It is the equivalent of `execute_get`.
+        """
+        response = None
+        valid_token, token = yield self.validate_req_token_async("GET")
+
+        if valid_token:
+            cache_key = None
+            if self._use_response_cache():
+                versions = yield hcommon.get_cache_versions_async(
+                    self.async_db, self.cache_collections)
+                cache_key = self._response_cache_key(token, kwargs, versions)
+                response = hcommon.RESPONSE_CACHE.get(cache_key)
+
+            if response is None:
+                kwargs["token"] = token
+                get_id = kwargs.get("id", None)
+
+                if get_id:
+                    response = yield self._get_one_async(get_id, **kwargs)
+                else:
+                    response = yield self._get_async(**kwargs)
+
+                if cache_key is not None:
+                    response = self._cache_response(cache_key, response)
         else:
             response = hresponse.HandlerResponse(403)
             response.reason = hcommon.NOT_VALID_TOKEN
 
+        raise tornado.gen.Return(response)
+
+    def _use_response_cache(self):
+        """If the response of this request can be cached.
+
+        :return True or False.
+        """
+        return all([
+            hcommon.RESPONSE_CACHE.enabled,
+            self.cache_collections, not self.profile_requested])
+
+    def _response_cache_key(self, token, path_args, versions):
+        """Create the key of the response in the response cache.
+
+        :param token: The token of the request.
+        :type token: `models.Token`
+        :param path_args: The arguments taken from the URL path.
+        :type path_args: dict
+        :param versions: The versions of the cached collections.
+        :type versions: tuple
+        :return The cache key.
+        """
+        return hcommon.response_cache_key(
+            versions,
+            self.__class__.__name__,
+            path_args, self.request.query_arguments, token)
+
+    def _cache_response(self, cache_key, response):
+        """Serialize a GET response and store it in the response cache.
+
+        Only successful and not streamed responses are cached.
+
+        :param cache_key: The key of the response.
+        :type cache_key: tuple
+        :param response: The response to cache.
+        :type response: HandlerResponse
+        :return The response to send.
+        """
+        if all([
+                isinstance(response, hresponse.HandlerResponse),
+                response.status_code == 200, response.stream is None]):
+            cached = hresponse.HandlerResponse()
+            if response.reason:
+                cached.reason = response.reason
+            if response.headers:
+                cached.headers = response.headers
+            cached.body = self._json_dumps(response.to_dict())
+            cached.etag = self._compute_etag(cached.body)
+
+            hcommon.RESPONSE_CACHE.set(cache_key, cached)
+            response = cached
+
         return response
 
     def _get_one(self, doc_id, **kwargs):
@@ -420,10 +827,45 @@ class BaseHandler(tornado.web.RequestHandler):
 
         return response
 
+    @tornado.gen.coroutine
+    def _get_one_async(self, doc_id, **kwargs):
+        """Get just one single document from the collection.
+
+        This is the asynchronous equivalent of `_get_one`.
+
+        :return A `HandlerResponse` object.
+        """
+        response = hresponse.HandlerResponse()
+        result = None
+
+        try:
+            obj_id = bson.objectid.ObjectId(doc_id)
+            result = yield utils.asyncdb.find_one(
+                self.async_collection,
+                [obj_id],
+                fields=hcommon.get_query_fields(self.get_query_arguments)
+            )
+
+            if result:
+                response.result = result
+            else:
+                response.status_code = 404
+                response.reason = "Resource '%s' not found" % doc_id
+        except bson.errors.InvalidId, ex:
+            self.log.exception(ex)
+            self.log.error("Provided doc ID '%s' is not valid", doc_id)
+            response.status_code = 400
+            response.reason = "Wrong ID value provided"
+
+        raise tornado.gen.Return(response)
+
     def _get(self, **kwargs):
         """Get all the documents in the collection.
 
         The returned results can be tweaked with the supported query arguments.
+        With the `after` argument, keyset pagination is used instead of
+        `skip`: the response contains the `next` token to retrieve the next
+        page.
 
         Subclasses should override this method and implement their own
         search functionalities. This is a general one.
@@ -434,6 +876,7 @@ class BaseHandler(tornado.web.RequestHandler):
         """
         response = hresponse.HandlerResponse()
         spec, sort, fields, skip, limit, unique = self._get_query_args()
+        after = hcommon.get_after_value(self.get_query_arguments)
 
         if unique:
             response.result = utils.db.aggregate(
@@ -444,6 +887,21 @@ class BaseHandler(tornado.web.RequestHandler):
                 fields=fields,
                 limit=limit
             )
+        elif after is not None:
+            try:
+                response.result, response.count, response.next = \
+                    utils.db.find_page(
+                        self.collection,
+                        limit,
+                        after,
+                        spec=spec,
+                        fields=fields,
+                        sort=sort,
+                        count_mode=self.count_mode
+                    )
+            except ValueError, ex:
+                response.status_code = 400
+                response.reason = "Wrong 'after' value provided: %s" % ex
         else:
             result, count = utils.db.find_and_count(
                 self.collection,
@@ -451,19 +909,101 @@ class BaseHandler(tornado.web.RequestHandler):
                 skip,
                 spec=spec,
                 fields=fields,
-                sort=sort
+                sort=sort,
+                count_mode=self.count_mode
             )
 
-            if count > 0:
-                response.result = result
+            if count is None:
+                # The count has been skipped.
+                self._set_result(response, result, limit)
+            elif count > 0:
+                self._set_result(response, result, limit)
+                response.count = count
             else:
                 response.result = []
-
-            response.count = count
+                response.count = count
 
         response.limit = limit
         return response
 
+    def _set_result(self, response, result, limit):
+        """Set the result of a GET operation on the response.
+
+        If streaming is enabled and many documents might be returned, the
+        result is set to be streamed.
+
+        :param response: The response object.
+        :type response: HandlerResponse
+        :param result: The documents found.
+        :param limit: The maximum number of documents requested.
+        :type limit: int
+        """
+        chunk_size = self.stream_chunk_size
+        if all([chunk_size > 0, limit == 0 or limit > chunk_size]):
+            response.stream = result
+        else:
+            response.result = result
+
+    @tornado.gen.coroutine
+    def _get_async(self, **kwargs):
+        """Get all the documents in the collection.
+
+        This is the asynchronous equivalent of `_get`.
+
+        :return A `HandlerResponse` object.
+        """
+        response = hresponse.HandlerResponse()
+        spec, sort, fields, skip, limit, unique = self._get_query_args()
+        after = hcommon.get_after_value(self.get_query_arguments)
+
+        if unique:
+            response.result = yield utils.asyncdb.aggregate(
+                self.async_collection,
+                unique,
+                match=spec,
+                sort=sort,
+                fields=fields,
+                limit=limit
+            )
+        elif after is not None:
+            try:
+                response.result, response.count, response.next = \
+                    yield utils.asyncdb.find_page(
+                        self.async_collection,
+                        limit,
+                        after,
+                        spec=spec,
+                        fields=fields,
+                        sort=sort,
+                        count_mode=self.count_mode
+                    )
+            except ValueError, ex:
+                response.status_code = 400
+                response.reason = "Wrong 'after' value provided: %s" % ex
+        else:
+            result, count = yield utils.asyncdb.find_and_count(
+                self.async_collection,
+                limit,
+                skip,
+                spec=spec,
+                fields=fields,
+                sort=sort,
+                count_mode=self.count_mode
+            )
+
+            if count is None:
+                # The count has been skipped.
+                response.result = result
+            elif count > 0:
+                response.result = result
+                response.count = count
+            else:
+                response.result = []
+                response.count = count
+
+        response.limit = limit
+        raise tornado.gen.Return(response)
+
     def _get_query_args(self, method="GET"):
         """Retrieve all the arguments from the query string.
 
@@ -488,7 +1028,6 @@ class BaseHandler(tornado.web.RequestHandler):
 
         return spec, sort, fields, skip, limit, unique
 
-    # TODO: cache the validated token.
     def validate_req_token(self, method):
         """Validate the request token.
 
@@ -513,6 +1052,36 @@ class BaseHandler(tornado.web.RequestHandler):
 
         return valid_token, token
 
+    @tornado.gen.coroutine
+    def validate_req_token_async(self, method):
+        """Validate the request token using the asynchronous database client.
+
+        :param method: The HTTP verb we are validating.
+        :return A 2-tuple: True or False; the token object.
+        """
+        valid_token = False
+        token = None
+
+        req_token = self.request.headers.get(hcommon.API_TOKEN_HEADER, None)
+
+        if req_token:
+            token_obj = yield self._find_token_async(req_token, self.async_db)
+
+            if token_obj:
+                valid_token, token = hcommon.validate_token(
+                    token_obj,
+                    method,
+                    self.request.remote_ip,
+                    self._token_validation_func()
+                )
+
+        if not valid_token:
+            self.log.info(
+                "Token not authorized for IP address %s - Token: %s",
+                self.request.remote_ip, req_token)
+
+        raise tornado.gen.Return((valid_token, token))
+
     def _token_validation(self, req_token, method, remote_ip, master_key):
         """Perform the real token validation.
 
@@ -538,13 +1107,39 @@ class BaseHandler(tornado.web.RequestHandler):
 
         return valid_token, token
 
-    # TODO: cache the token from the DB.
     @staticmethod
     def _find_token(token, db_conn):
-        """Find a token in the database.
+        """Find a token in the token cache or in the database.
+
+        Only tokens that exist in the database are cached.
+
+        :param token: The token to find.
+        :return A json object, or nothing.
+        """
+        token_obj = hcommon.TOKEN_CACHE.get(token)
+        if token_obj is None:
+            token_obj = utils.db.find_one2(
+                db_conn[models.TOKEN_COLLECTION], {models.TOKEN_KEY: token})
+            if token_obj:
+                hcommon.TOKEN_CACHE.set(token, token_obj)
+
+        return token_obj
+
+    @staticmethod
+    @tornado.gen.coroutine
+    def _find_token_async(token, db_conn):
+        """Find a token in the token cache or in the database.
+
+        This is the asynchronous equivalent of `_find_token`.
 
         :param token: The token to find.
         :return A json object, or nothing.
         """
-        return utils.db.find_one2(
-            db_conn[models.TOKEN_COLLECTION], {models.TOKEN_KEY: token})
+        token_obj = hcommon.TOKEN_CACHE.get(token)
+        if token_obj is None:
+            token_obj = yield utils.asyncdb.find_one2(
+                db_conn[models.TOKEN_COLLECTION], {models.TOKEN_KEY: token})
+            if token_obj:
+                hcommon.TOKEN_CACHE.set(token, token_obj)
+
+        raise tornado.gen.Return(token_obj)
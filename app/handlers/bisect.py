@@ -33,7 +33,8 @@ class BisectHandler(hbase.BaseHandler):
 
     @tornado.gen.coroutine
     def get(self, *args, **kwargs):
-        future = yield self.executor.submit(self.execute_get, *args, **kwargs)
+        future = yield self._submit_operation(
+            self.execute_get, *args, **kwargs)
         self.write(future)
 
     @property
@@ -125,6 +126,7 @@ class BisectHandler(hbase.BaseHandler):
                     # bisect calculations in the db.
                     spec[models.COMPARE_TO_KEY] = None
 
+                spec[models.TYPE_KEY] = "boot"
                 response = self._bisect(
                     models.BOOT_ID_KEY,
                     spec,
@@ -141,6 +143,7 @@ class BisectHandler(hbase.BaseHandler):
                     # bisect calculations in the db.
                     spec[models.COMPARE_TO_KEY] = None
 
+                spec[models.TYPE_KEY] = "build"
                 response = self._bisect(
                     models.DEFCONFIG_ID_KEY,
                     spec,
@@ -25,6 +25,7 @@ import models.lab as mlab
 import models.token as mtoken
 import taskqueue.tasks as taskq
 import utils.db
+import utils.summary
 
 
 class BootHandler(hbase.BaseHandler):
@@ -37,6 +38,18 @@ class BootHandler(hbase.BaseHandler):
     def collection(self):
         return self.db[models.BOOT_COLLECTION]
 
+    @property
+    def async_collection(self):
+        return self.async_db[models.BOOT_COLLECTION]
+
+    @property
+    def async_get(self):
+        return True
+
+    @property
+    def cache_collections(self):
+        return [models.BOOT_COLLECTION]
+
     @staticmethod
     def _valid_keys(method):
         return hcommon.BOOT_VALID_KEYS.get(method, None)
@@ -194,7 +207,13 @@ class BootHandler(hbase.BaseHandler):
 
     def _delete(self, spec_or_id, **kwargs):
         response = hresponse.HandlerResponse(200)
+        job_kernels = utils.summary.get_job_kernels(
+            self.db, utils.summary.BOOT_SUMMARY, spec_or_id)
         response.status_code = utils.db.delete(self.collection, spec_or_id)
         response.reason = self._get_status_message(response.status_code)
 
+        if response.status_code == 200:
+            utils.summary.invalidate_summaries(
+                self.db, utils.summary.BOOT_SUMMARY, job_kernels)
+
         return response
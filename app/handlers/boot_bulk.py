@@ -0,0 +1,171 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""The RequestHandler for /bulk/boot URLs."""
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+import types
+
+import handlers.boot as hboot
+import handlers.common as hcommon
+import handlers.response as hresponse
+import models
+import taskqueue.tasks as taskq
+import utils.validator as validator
+
+# How many boot reports can be sent with a single request.
+MAX_BOOT_REPORTS = 1000
+
+
+class BootBulkHandler(hboot.BootHandler):
+    """Handle the /bulk/boot URLs.
+
+    Import multiple boot reports with a single request: the JSON data is a
+    list of boot reports, each of them in the same format accepted by the
+    /boot URLs.
+    """
+
+    def __init__(self, application, request, **kwargs):
+        super(BootBulkHandler, self).__init__(application, request, **kwargs)
+
+    def execute_get(self, *args, **kwargs):
+        """Not implemented."""
+        return hresponse.HandlerResponse(501)
+
+    def execute_put(self, *args, **kwargs):
+        """Not implemented."""
+        return hresponse.HandlerResponse(501)
+
+    def execute_delete(self, *args, **kwargs):
+        """Not implemented."""
+        return hresponse.HandlerResponse(501)
+
+    def execute_post(self, *args, **kwargs):
+        response = None
+        valid_token, token = self.validate_req_token("POST")
+
+        if valid_token:
+            valid_request = self._valid_post_request()
+
+            if valid_request == 200:
+                try:
+                    json_obj = json.loads(self.request.body.decode("utf8"))
+                    response = self._post_boots(
+                        json_obj, token, self.settings["dboptions"])
+                except ValueError, ex:
+                    self.log.exception(ex)
+                    error = "No JSON data found in the POST request"
+                    self.log.error(error)
+                    response = hresponse.HandlerResponse(422)
+                    response.reason = error
+            else:
+                response = hresponse.HandlerResponse(valid_request)
+                response.reason = (
+                    "%s: %s" %
+                    (
+                        self._get_status_message(valid_request),
+                        "Use %s as the content type" % self.content_type
+                    )
+                )
+        else:
+            response = hresponse.HandlerResponse(403)
+            response.reason = hcommon.NOT_VALID_TOKEN
+
+        return response
+
+    def _post_boots(self, json_list, token, db_options):
+        """Validate the boot reports and start their import.
+
+        All the boot reports must be valid, and the token must be valid for
+        all their labs: the token is validated only once for each lab.
+
+        :param json_list: The boot reports.
+        :type json_list: list
+        :param token: The token of the request.
+        :type token: models.token.Token
+        :param db_options: The mongodb database connection parameters.
+        :type db_options: dict
+        :return A `HandlerResponse` object.
+        """
+        response = None
+        errors = []
+
+        if not all([isinstance(json_list, types.ListType), json_list]):
+            response = hresponse.HandlerResponse(400)
+            response.reason = "Provided JSON is not a list of boot reports"
+        elif len(json_list) > MAX_BOOT_REPORTS:
+            response = hresponse.HandlerResponse(400)
+            response.reason = (
+                "Too many boot reports: at most %d can be sent with a "
+                "single request" % MAX_BOOT_REPORTS)
+        else:
+            invalid = False
+            for idx, json_obj in enumerate(json_list):
+                valid_json, error = validator.is_valid_json(
+                    json_obj, self._valid_keys("POST"))
+                if error:
+                    errors.append("Boot report %d: %s" % (idx, error))
+                if not valid_json:
+                    invalid = True
+
+            if invalid:
+                response = hresponse.HandlerResponse(400)
+                response.reason = "Provided JSON is not valid"
+            else:
+                response = self._check_labs_and_import(
+                    json_list, token, db_options)
+
+        response.errors = errors
+        return response
+
+    def _check_labs_and_import(self, json_list, token, db_options):
+        """Validate the token for all the labs and start the import.
+
+        :param json_list: The valid boot reports.
+        :type json_list: list
+        :param token: The token of the request.
+        :type token: models.token.Token
+        :param db_options: The mongodb database connection parameters.
+        :type db_options: dict
+        :return A `HandlerResponse` object.
+        """
+        response = None
+        errors = []
+
+        for lab_name in sorted(set(
+                [json_obj[models.LAB_NAME_KEY] for json_obj in json_list])):
+            valid_lab, error = self._is_valid_token(token, lab_name)
+            if valid_lab:
+                if error and error not in errors:
+                    errors.append(error)
+            else:
+                response = hresponse.HandlerResponse(403)
+                response.reason = (
+                    "Provided authentication token is not associated with "
+                    "lab '%s' or is not valid" % lab_name)
+                break
+
+        if response is None:
+            response = hresponse.HandlerResponse(202)
+            response.reason = (
+                "Request accepted and being imported: %d boot reports" %
+                len(json_list))
+
+            taskq.import_boots.apply_async([json_list, db_options])
+
+        response.errors = errors
+        return response
@@ -108,21 +108,22 @@ class BootTriggerHandler(hbase.BaseHandler):
 
                 # First get all the defconfigs with the spec as specified
                 # in the query parameters.
-                all_defconfigs, all_count = utils.db.find_and_count(
+                all_defconfigs, _ = utils.db.find_and_count(
                     self.collection,
                     0,
                     0,
                     spec=spec,
                     fields=[models.ID_KEY],
-                    sort=sort
+                    sort=sort,
+                    count_mode=utils.db.COUNT_SKIP
                 )
+                all_distinct_def = all_defconfigs.distinct(models.ID_KEY)
 
                 # If we have defconfigs, search for all the boot reports with
                 # almost the same specified query, excluding the boots
                 # performed by the querying lab, and looking only for the
                 # defconfings similar to the ones retrieved above.
-                if all_count > 0:
-                    all_distinct_def = all_defconfigs.distinct(models.ID_KEY)
+                if all_distinct_def:
 
                     # Make a copy of the spec used to retrieve the defconfing
                     # since we need it later as well.
@@ -138,19 +139,17 @@ class BootTriggerHandler(hbase.BaseHandler):
                     boot_spec[models.DEFCONFIG_ID_KEY] = {
                         "$in": all_distinct_def}
 
-                    already_booted, booted_count = utils.db.find_and_count(
+                    already_booted, _ = utils.db.find_and_count(
                         self.db[models.BOOT_COLLECTION],
                         0,
                         0,
                         spec=boot_spec,
                         fields=[models.DEFCONFIG_ID_KEY],
-                        sort=[(models.CREATED_KEY, pymongo.DESCENDING)]
+                        sort=[(models.CREATED_KEY, pymongo.DESCENDING)],
+                        count_mode=utils.db.COUNT_SKIP
                     )
-
-                    booted_defconfigs = []
-                    if booted_count > 0:
-                        booted_defconfigs = already_booted.distinct(
-                            models.DEFCONFIG_ID_KEY)
+                    booted_defconfigs = already_booted.distinct(
+                        models.DEFCONFIG_ID_KEY)
 
                     # Do a set difference to get the not booted ones.
                     not_booted = set(all_distinct_def).difference(
@@ -16,11 +16,15 @@
 import bson
 import datetime
 import pymongo
+import tornado.gen
 import types
 
 import models
 import models.token as mtoken
 import utils
+import utils.asyncdb
+import utils.cache
+import utils.db
 
 # Default value to calculate a date range in case the provided value is
 # out of range.
@@ -562,6 +566,33 @@ MIDNIGHT = datetime.time(tzinfo=bson.tz_util.utc)
 ALMOST_MIDNIGHT = datetime.time(23, 59, 59, tzinfo=bson.tz_util.utc)
 EPOCH = datetime.datetime(1970, 1, 1, tzinfo=bson.tz_util.utc)
 
+# Default size and TTL (in seconds) of the token cache.
+TOKEN_CACHE_SIZE = 512
+TOKEN_CACHE_TTL = 60
+# The token documents as retrieved from the database, keyed on the token value.
+TOKEN_CACHE = utils.cache.LRUCache(
+    max_size=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+
+# Default size and TTL (in seconds) of the response cache.
+RESPONSE_CACHE_SIZE = 1024
+RESPONSE_CACHE_TTL = 60
+# The serialized GET responses, keyed on the versions of the collections they
+# are built from, the handler, the request arguments and the token scope.
+# It is disabled until the server configures it.
+RESPONSE_CACHE = utils.cache.LRUCache(max_size=0, ttl=RESPONSE_CACHE_TTL)
+# How long, in seconds, the collection versions are kept in memory: changes
+# made by other processes are seen after at most this delay.
+CACHE_VERSIONS_TTL = 1
+CACHE_VERSIONS = utils.cache.LRUCache(max_size=1, ttl=CACHE_VERSIONS_TTL)
+
+# Default size and TTL (in seconds) of the count cache.
+COUNT_CACHE_SIZE = 512
+COUNT_CACHE_TTL = 10
+# The number of documents matching a query, keyed on the collection name and
+# the normalized query spec.
+COUNT_CACHE = utils.cache.LRUCache(
+    max_size=COUNT_CACHE_SIZE, ttl=COUNT_CACHE_TTL)
+
 
 def get_all_query_values(query_args_func, valid_keys):
     """Handy function to get all query args in a batch.
@@ -787,6 +818,26 @@ def get_aggregate_value(query_args_func):
     return aggregate
 
 
+def get_after_value(query_args_func):
+    """Get the value of the after key, used for keyset pagination.
+
+    The value is the token returned as `next` with the previous page. An
+    empty value requests the first page.
+
+    :param query_args_func: A function used to return a list of the query
+    arguments.
+    :type query_args_func: function
+    :return The token as a string, an empty string for the first page, or
+    None if keyset pagination has not been requested.
+    """
+    after = query_args_func(models.AFTER_KEY)
+    if after and isinstance(after, types.ListType):
+        after = after[-1]
+    else:
+        after = None
+    return after
+
+
 def get_compared_value(query_args_func):
     """Get the value of the compared key.
 
@@ -1211,6 +1262,114 @@ def valid_token_tests(token, method):
     return valid_token
 
 
+def invalidate_token(*tokens):
+    """Remove the provided tokens from the token cache.
+
+    Must be called every time a token document is updated or removed.
+
+    :param tokens: The token values to remove.
+    :type tokens: list
+    """
+    for token in tokens:
+        if token:
+            TOKEN_CACHE.invalidate(token)
+
+
+def _select_cache_versions(versions, collections):
+    """Select the versions of the provided collections.
+
+    :param versions: The versions of all the collections.
+    :type versions: dict
+    :param collections: The names of the collections.
+    :type collections: list
+    :return A tuple of (collection, version) tuples.
+    """
+    return tuple((coll, versions.get(coll, 0)) for coll in collections)
+
+
+def get_cache_versions(database, collections):
+    """Get the current versions of the provided collections.
+
+    :param database: The database connection.
+    :param collections: The names of the collections.
+    :type collections: list
+    :return A tuple of (collection, version) tuples.
+    """
+    versions = CACHE_VERSIONS.get("versions")
+    if versions is None:
+        versions = utils.db.get_cache_versions(database)
+        CACHE_VERSIONS.set("versions", versions)
+
+    return _select_cache_versions(versions, collections)
+
+
+@tornado.gen.coroutine
+def get_cache_versions_async(database, collections):
+    """Get the current versions of the provided collections.
+
+    This is the asynchronous equivalent of `get_cache_versions`.
+
+    :param database: The asynchronous database connection.
+    :param collections: The names of the collections.
+    :type collections: list
+    :return A tuple of (collection, version) tuples.
+    """
+    versions = CACHE_VERSIONS.get("versions")
+    if versions is None:
+        versions = yield utils.asyncdb.get_cache_versions(database)
+        CACHE_VERSIONS.set("versions", versions)
+
+    raise tornado.gen.Return(_select_cache_versions(versions, collections))
+
+
+def response_cache_key(versions, handler, path_args, query_args, token):
+    """Create the key of a response in the response cache.
+
+    :param versions: The versions of the collections the response is built
+    from, as returned by `get_cache_versions`.
+    :type versions: tuple
+    :param handler: The name of the handler.
+    :type handler: str
+    :param path_args: The arguments taken from the URL path.
+    :type path_args: dict
+    :param query_args: The query string arguments.
+    :type query_args: dict
+    :param token: The token of the request.
+    :type token: `models.Token`
+    :return The cache key, a tuple.
+    """
+    scope = None
+    if token is not None:
+        scope = tuple(token.properties)
+
+    return (
+        versions,
+        handler,
+        tuple(sorted(path_args.iteritems())),
+        tuple(sorted(
+            (key, tuple(values)) for key, values in query_args.iteritems())),
+        scope
+    )
+
+
+def invalidate_responses(database, collections):
+    """Invalidate the cached responses built from the provided collections.
+
+    The versions of the collections are increased, so that the other
+    processes do not use their cached responses either.
+
+    Must be called every time the documents of a collection are changed.
+
+    :param database: The database connection.
+    :param collections: The names of the changed collections.
+    :type collections: list
+    """
+    utils.db.bump_cache_versions(database, collections)
+    CACHE_VERSIONS.invalidate("versions")
+    RESPONSE_CACHE.invalidate_if(
+        lambda key: any(coll in collections for coll, _ in key[0]))
+
+
 def validate_token(token_obj, method, remote_ip, validate_func):
     """Make sure the passed token is valid.
 
@@ -15,18 +15,28 @@
 
 """Handle the /count URLs used to count objects in the database."""
 
+import concurrent.futures
+import threading
 import tornado.gen
+import types
 
 import handlers.base as hbase
 import handlers.common as hcommon
 import handlers.response as hresponse
 import models
+import utils.asyncdb
 import utils.db
+import utils.summary
 
-# Internally used only. It is used to retrieve just one field for
-# the query results since we only need to count the results, we are
-# not interested in the values.
-COUNT_FIELDS = {models.ID_KEY: True}
+# How many collections are counted in parallel by `count_all_collections`,
+# 1 to count them one after the other.
+COUNT_WORKERS = len(hcommon.COLLECTIONS)
+
+# The executor used to count the collections in parallel, created when first
+# needed so that its threads are started after the server processes are
+# forked.
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
 
 
 class CountHandler(hbase.BaseHandler):
@@ -47,7 +57,8 @@ class CountHandler(hbase.BaseHandler):
                 self.db[hcommon.COLLECTIONS[collection]],
                 collection,
                 self.get_query_arguments,
-                self._valid_keys("GET")
+                self._valid_keys("GET"),
+                summaries=self.db[models.SUMMARY_COLLECTION]
             )
         else:
             response.status_code = 404
@@ -65,6 +76,39 @@ class CountHandler(hbase.BaseHandler):
 
         return response
 
+    @property
+    def async_get(self):
+        return True
+
+    @tornado.gen.coroutine
+    def _get_one_async(self, collection, **kwargs):
+        response = hresponse.HandlerResponse()
+
+        if collection in hcommon.COLLECTIONS.keys():
+            response.result = yield count_one_collection_async(
+                self.async_db[hcommon.COLLECTIONS[collection]],
+                collection,
+                self.get_query_arguments,
+                self._valid_keys("GET"),
+                summaries=self.async_db[models.SUMMARY_COLLECTION]
+            )
+        else:
+            response.status_code = 404
+            response.reason = "Collection %s not found" % collection
+
+        raise tornado.gen.Return(response)
+
+    @tornado.gen.coroutine
+    def _get_async(self, **kwargs):
+        response = hresponse.HandlerResponse()
+        response.result = yield count_all_collections_async(
+            self.async_db,
+            self.get_query_arguments,
+            self._valid_keys("GET")
+        )
+
+        raise tornado.gen.Return(response)
+
     @tornado.gen.coroutine
     def post(self, *args, **kwargs):
         """Not implemented."""
@@ -76,8 +120,131 @@ class CountHandler(hbase.BaseHandler):
         self.write_error(status_code=501)
 
 
+def _get_count_spec(query_args_func, valid_keys):
+    """Build the spec used to count the documents.
+
+    :param query_args_func: A function used to return a list of the query
+    arguments.
+    :type query_args_func: function
+    :param valid_keys: A list containing the valid keys that should be
+    retrieved.
+    :type valid_keys: list
+    :return The spec as a dictionary.
+    """
+    spec = hcommon.get_query_spec(query_args_func, valid_keys)
+    hcommon.get_and_add_date_range(spec, query_args_func)
+    hcommon.update_id_fields(spec)
+
+    return spec
+
+
+def _get_executor():
+    """Get the executor used to count the collections in parallel.
+
+    :return A `concurrent.futures.ThreadPoolExecutor` instance.
+    """
+    global _EXECUTOR
+
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+                max_workers=COUNT_WORKERS)
+
+    return _EXECUTOR
+
+
+def _normalize(value):
+    """Convert a spec value into a hashable value.
+
+    Dictionaries and lists are converted into sorted tuples, so that two
+    equivalent specs have the same normalized value regardless of the order
+    of their keys or of the values of their `$in` lists.
+
+    :param value: The value to normalize.
+    :return The normalized value.
+    """
+    if isinstance(value, types.DictionaryType):
+        value = tuple(
+            sorted((key, _normalize(val)) for key, val in value.iteritems()))
+    elif isinstance(value, (types.ListType, types.TupleType)):
+        value = tuple(sorted(_normalize(val) for val in value))
+
+    return value
+
+
+def _count_key(collection_name, spec):
+    """The key of a count in the count cache.
+
+    :param collection_name: The name of the counted collection.
+    :type collection_name: str
+    :param spec: The spec of the documents to count.
+    :type spec: dict
+    :return The key as a tuple.
+    """
+    return (collection_name, _normalize(spec))
+
+
+def _summary_count(summaries, collection_name, spec):
+    """Count the documents with the pre-computed summaries.
+
+    :param summaries: The collection with the summaries.
+    :param collection_name: The name of the collection to count.
+    :type collection_name: str
+    :param spec: The spec of the documents to count.
+    :type spec: dict
+    :return The number of documents, or None if they cannot be counted with
+    a summary.
+    """
+    number = None
+
+    to_count = utils.summary.count_spec(
+        hcommon.COLLECTIONS.get(collection_name), spec)
+    if to_count is not None:
+        summary_spec, statuses = to_count
+        summary = utils.db.find_one2(summaries, summary_spec)
+        if summary:
+            number = utils.summary.summary_count(summary, statuses)
+
+    return number
+
+
+def _count(collection, collection_name, spec, summaries=None):
+    """Count the documents of a collection matching a spec.
+
+    Without a spec, the collection metadata is used through
+    `utils.db.estimated_count`. Otherwise, the count is retrieved from the
+    count cache, from the pre-computed summaries, or by querying the
+    collection, in this order.
+
+    :param collection: The collection whose elements should be counted.
+    :param collection_name: The name of the collection to count.
+    :type collection_name: str
+    :param spec: The spec to match, if empty all documents are counted.
+    :type spec: dict
+    :param summaries: The collection with the pre-computed summaries, used
+    to count the documents of a job-kernel.
+    :return The number of documents.
+    """
+    if not spec:
+        return utils.db.estimated_count(collection)
+
+    key = _count_key(collection_name, spec)
+    number = hcommon.COUNT_CACHE.get(key)
+
+    if number is None:
+        if summaries is not None:
+            number = _summary_count(summaries, collection_name, spec)
+        if number is None:
+            number = utils.db.count(collection, spec)
+        number = number or 0
+        hcommon.COUNT_CACHE.set(key, number)
+
+    return number
+
+
 def count_one_collection(
-        collection, collection_name, query_args_func, valid_keys):
+        collection,
+        collection_name, query_args_func, valid_keys, summaries=None):
     """Count all the available documents in the provide collection.
 
     :param collection: The collection whose elements should be counted.
@@ -89,34 +256,23 @@ def count_one_collection(
     :param valid_keys: A list containing the valid keys that should be
     retrieved.
     :type valid_keys: list
+    :param summaries: The collection with the pre-computed summaries, used
+    to count the documents of a job-kernel.
     :return A list containing a dictionary with the `collection`, `count` and
     optionally the `fields` fields.
     """
-    result = []
-    spec = hcommon.get_query_spec(query_args_func, valid_keys)
-    hcommon.get_and_add_date_range(spec, query_args_func)
-    hcommon.update_id_fields(spec)
-
-    if spec:
-        _, number = utils.db.find_and_count(
-            collection, 0, 0, spec, COUNT_FIELDS)
-        if not number:
-            number = 0
-
-        result.append(dict(collection=collection_name, count=number))
-    else:
-        result.append(
-            dict(
-                collection=collection_name,
-                count=utils.db.count(collection))
-        )
+    spec = _get_count_spec(query_args_func, valid_keys)
+    number = _count(collection, collection_name, spec, summaries)
 
-    return result
+    return [dict(collection=collection_name, count=number)]
 
 
 def count_all_collections(database, query_args_func, valid_keys):
     """Count all the available documents in the database collections.
 
+    The collections are counted in parallel, with up to `COUNT_WORKERS`
+    threads.
+
     :param database: The datase connection to use.
     :param query_args_func: A function used to return a list of the query
     arguments.
@@ -127,25 +283,102 @@ def count_all_collections(database, query_args_func, valid_keys):
     :return A list containing a dictionary with the `collection` and `count`
     fields.
     """
-    result = []
+    spec = _get_count_spec(query_args_func, valid_keys)
+    keys = hcommon.COLLECTIONS.keys()
+    summaries = database[models.SUMMARY_COLLECTION]
 
-    spec = hcommon.get_query_spec(query_args_func, valid_keys)
-    hcommon.get_and_add_date_range(spec, query_args_func)
-    hcommon.update_id_fields(spec)
+    args = [
+        (database[hcommon.COLLECTIONS[key]], key, spec, summaries)
+        for key in keys
+    ]
 
-    if spec:
-        for key, val in hcommon.COLLECTIONS.iteritems():
-            _, number = utils.db.find_and_count(
-                database[val], 0, 0, spec, COUNT_FIELDS)
-            if not number:
-                number = 0
-            result.append(dict(collection=key, count=number))
+    if COUNT_WORKERS > 1:
+        futures = [_get_executor().submit(_count, *arg) for arg in args]
+        numbers = [future.result() for future in futures]
     else:
-        for key, val in hcommon.COLLECTIONS.iteritems():
-            result.append(
-                dict(
-                    collection=key,
-                    count=utils.db.count(database[val]))
-            )
+        numbers = [_count(*arg) for arg in args]
+
+    return [dict(collection=key, count=num) for key, num in zip(keys, numbers)]
+
+
+@tornado.gen.coroutine
+def _count_async(collection, spec, collection_name=None, summaries=None):
+    """Count the documents of a collection matching a spec.
+
+    :param collection: The asynchronous collection whose elements should be
+    counted.
+    :param spec: The spec to match, if empty all documents are counted.
+    :type spec: dict
+    :param collection_name: The name of the collection to count.
+    :type collection_name: str
+    :param summaries: The asynchronous collection with the pre-computed
+    summaries, used to count the documents of a job-kernel.
+    :return The number of documents.
+    """
+    if not spec:
+        number = yield utils.asyncdb.estimated_count(collection)
+        raise tornado.gen.Return(number)
+
+    key = _count_key(collection_name, spec)
+    number = hcommon.COUNT_CACHE.get(key)
+
+    if number is None:
+        to_count = None
+        if summaries is not None:
+            to_count = utils.summary.count_spec(
+                hcommon.COLLECTIONS.get(collection_name), spec)
+        if to_count is not None:
+            summary_spec, statuses = to_count
+            summary = yield utils.asyncdb.find_one2(summaries, summary_spec)
+            if summary:
+                number = utils.summary.summary_count(summary, statuses)
+
+        if number is None:
+            number = yield utils.asyncdb.count(collection, spec)
+        number = number or 0
+        hcommon.COUNT_CACHE.set(key, number)
+
+    raise tornado.gen.Return(number)
+
+
+@tornado.gen.coroutine
+def count_one_collection_async(
+        collection,
+        collection_name, query_args_func, valid_keys, summaries=None):
+    """Count all the available documents in the provide collection.
+
+    This is the asynchronous equivalent of `count_one_collection`.
+
+    :return A list containing a dictionary with the `collection` and `count`
+    fields.
+    """
+    spec = _get_count_spec(query_args_func, valid_keys)
+    number = yield _count_async(
+        collection, spec, collection_name, summaries)
+
+    raise tornado.gen.Return([dict(collection=collection_name, count=number)])
+
+
+@tornado.gen.coroutine
+def count_all_collections_async(database, query_args_func, valid_keys):
+    """Count all the available documents in the database collections.
+
+    This is the asynchronous equivalent of `count_all_collections`: all the
+    collections are counted in parallel.
+
+    :return A list containing a dictionary with the `collection` and `count`
+    fields.
+    """
+    spec = _get_count_spec(query_args_func, valid_keys)
+    keys = hcommon.COLLECTIONS.keys()
+
+    summaries = database[models.SUMMARY_COLLECTION]
+
+    numbers = yield [
+        _count_async(
+            database[hcommon.COLLECTIONS[key]], spec, key, summaries)
+        for key in keys
+    ]
 
-    return result
+    raise tornado.gen.Return(
+        [dict(collection=key, count=num) for key, num in zip(keys, numbers)])
@@ -18,6 +18,7 @@
 import pymongo
 
 import models
+import utils.metrics
 
 
 def ensure_indexes(client, db_options):
@@ -42,6 +43,8 @@ def ensure_indexes(client, db_options):
     _ensure_token_indexes(database)
     _ensure_lab_indexes(database)
     _ensure_bisect_indexes(database)
+    _ensure_metrics_indexes(database)
+    _ensure_summary_indexes(database)
 
 
 def _ensure_job_indexes(database):
@@ -154,6 +157,17 @@ def _ensure_defconfig_indexes(database):
         ],
         background=True
     )
+    # Used by the bisect to scan the builds of a defconfig by date.
+    collection.ensure_index(
+        [
+            (models.JOB_KEY, pymongo.ASCENDING),
+            (models.ARCHITECTURE_KEY, pymongo.ASCENDING),
+            (models.DEFCONFIG_FULL_KEY, pymongo.ASCENDING),
+            (models.DEFCONFIG_KEY, pymongo.ASCENDING),
+            (models.CREATED_KEY, pymongo.DESCENDING)
+        ],
+        background=True
+    )
 
 
 def _ensure_token_indexes(database):
@@ -195,3 +209,57 @@ def _ensure_bisect_indexes(database):
         [(models.NAME_KEY, pymongo.DESCENDING)],
         background=True
     )
+    collection.ensure_index(
+        [
+            (models.BOOT_ID_KEY, pymongo.ASCENDING),
+            (models.COMPARE_TO_KEY, pymongo.ASCENDING)
+        ],
+        background=True
+    )
+    collection.ensure_index(
+        [
+            (models.DEFCONFIG_ID_KEY, pymongo.ASCENDING),
+            (models.COMPARE_TO_KEY, pymongo.ASCENDING)
+        ],
+        background=True
+    )
+    # Used to find the bisects to update when new data is imported.
+    collection.ensure_index(
+        [
+            (models.TYPE_KEY, pymongo.ASCENDING),
+            (models.ARCHITECTURE_KEY, pymongo.ASCENDING),
+            (models.DEFCONFIG_FULL_KEY, pymongo.ASCENDING)
+        ],
+        background=True
+    )
+
+
+def _ensure_metrics_indexes(database):
+    """Ensure indexes exists for the 'metrics' collection.
+
+    The snapshots of the processes that are not running anymore expire.
+
+    :param database: The database connection.
+    """
+    collection = database[models.METRICS_COLLECTION]
+    collection.ensure_index(
+        [(models.UPDATED_KEY, pymongo.ASCENDING)],
+        expireAfterSeconds=utils.metrics.SNAPSHOT_TTL, background=True
+    )
+
+
+def _ensure_summary_indexes(database):
+    """Ensure indexes exists for the 'summary' collection.
+
+    :param database: The database connection.
+    """
+    collection = database[models.SUMMARY_COLLECTION]
+    collection.ensure_index(
+        [
+            (models.JOB_KEY, pymongo.ASCENDING),
+            (models.KERNEL_KEY, pymongo.ASCENDING),
+            (models.TYPE_KEY, pymongo.ASCENDING),
+            (models.LAB_NAME_KEY, pymongo.ASCENDING)
+        ],
+        unique=True, background=True
+    )
@@ -20,6 +20,7 @@ import handlers.common as hcommon
 import handlers.response as hresponse
 import models
 import utils.db
+import utils.summary
 
 
 class DefConfHandler(hbase.BaseHandler):
@@ -32,6 +33,18 @@ class DefConfHandler(hbase.BaseHandler):
     def collection(self):
         return self.db[models.DEFCONFIG_COLLECTION]
 
+    @property
+    def async_collection(self):
+        return self.async_db[models.DEFCONFIG_COLLECTION]
+
+    @property
+    def async_get(self):
+        return True
+
+    @property
+    def cache_collections(self):
+        return [models.DEFCONFIG_COLLECTION]
+
     @staticmethod
     def _valid_keys(method):
         return hcommon.DEFCONFIG_VALID_KEYS.get(method, None)
@@ -54,9 +67,13 @@ class DefConfHandler(hbase.BaseHandler):
 
     def _delete(self, defconf_id, **kwargs):
         response = hresponse.HandlerResponse()
+        job_kernels = utils.summary.get_job_kernels(
+            self.db, utils.summary.BUILD_SUMMARY, defconf_id)
         response.status_code = utils.db.delete(self.collection, defconf_id)
 
         if response.status_code == 200:
+            utils.summary.invalidate_summaries(
+                self.db, utils.summary.BUILD_SUMMARY, job_kernels)
             response.reason = "Resource '%s' deleted" % defconf_id
 
         return response
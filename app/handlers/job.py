@@ -21,6 +21,7 @@ import handlers.response as hresponse
 import models
 import taskqueue.tasks as taskq
 import utils.db
+import utils.summary
 
 
 class JobHandler(hbase.BaseHandler):
@@ -33,6 +34,18 @@ class JobHandler(hbase.BaseHandler):
     def collection(self):
         return self.db[models.JOB_COLLECTION]
 
+    @property
+    def async_collection(self):
+        return self.async_db[models.JOB_COLLECTION]
+
+    @property
+    def async_get(self):
+        return True
+
+    @property
+    def cache_collections(self):
+        return [models.JOB_COLLECTION]
+
     @staticmethod
     def _valid_keys(method):
         return hcommon.JOB_VALID_KEYS.get(method, None)
@@ -48,12 +61,9 @@ class JobHandler(hbase.BaseHandler):
             "Importing defconfigs for %s-%s",
             json_obj[models.JOB_KEY], json_obj[models.KERNEL_KEY])
 
-        taskq.import_job.apply_async(
-            [json_obj, db_options],
-            link=[
-                taskq.parse_build_log.s(json_obj, db_options)
-            ]
-        )
+        if not taskq.request_job_import(self.db, json_obj, db_options):
+            response.reason = (
+                "Request accepted and merged with the import in progress")
 
         return response
 
@@ -74,15 +84,34 @@ class JobHandler(hbase.BaseHandler):
 
         try:
             job_obj = bson.objectid.ObjectId(job_id)
-            if utils.db.find_one(self.collection, [job_obj]):
-                utils.db.delete(
+            job_doc = utils.db.find_one(self.collection, [job_obj])
+            if job_doc:
+                job_kernels = utils.summary.get_job_kernels(
+                    self.db,
+                    utils.summary.BUILD_SUMMARY,
+                    {models.JOB_ID_KEY: {"$in": [job_obj]}})
+                job_kernels.add(
+                    (job_doc.get(models.JOB_KEY),
+                     job_doc.get(models.KERNEL_KEY)))
+
+                ret_val = utils.db.delete(
                     self.db[models.DEFCONFIG_COLLECTION],
                     {models.JOB_ID_KEY: {"$in": [job_obj]}}
                 )
+                hcommon.invalidate_responses(
+                    self.db, [models.DEFCONFIG_COLLECTION])
+
+                if ret_val == 200:
+                    utils.summary.invalidate_summaries(
+                        self.db, utils.summary.BUILD_SUMMARY, job_kernels)
 
                 response.status_code = utils.db.delete(
                     self.collection, job_obj)
                 if response.status_code == 200:
+                    # No summary of the job must outlive it: the boot ones
+                    # are rebuilt from the boot reports when needed.
+                    utils.summary.invalidate_summaries(
+                        self.db, utils.summary.BOOT_SUMMARY, job_kernels)
                     response.reason = "Resource '%s' deleted" % job_id
             else:
                 response.status_code = 404
@@ -234,6 +234,13 @@ class LabHandler(handlers.base.BaseHandler):
             if ret_code != 201:
                 self.log.warn("Error updating old token '%s'", old_token.id)
 
+        # The old token might have been expired or modified: make sure the
+        # cached copies are not used anymore.
+        if old_token:
+            handlers.common.invalidate_token(old_token.token)
+        if new_token:
+            handlers.common.invalidate_token(new_token.token)
+
     def _create_new_lab(self, json_obj):
         """Create a new lab in the database.
 
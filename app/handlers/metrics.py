@@ -0,0 +1,58 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Provide the /metrics handler."""
+
+import handlers.base as hbase
+import handlers.common as hcommon
+import handlers.response as hresponse
+import utils.db
+import utils.metrics
+
+
+# pylint: disable=too-many-public-methods
+class MetricsHandler(hbase.BaseHandler):
+    """Handle request to the /metrics URL.
+
+    Provide the latency metrics collected by the server process that handles
+    the request, the statistics of its caches, and the metrics saved by the
+    Celery worker processes.
+    """
+
+    def __init__(self, application, request, **kwargs):
+        super(MetricsHandler, self).__init__(application, request, **kwargs)
+
+    def _get(self, **kwargs):
+        response = hresponse.HandlerResponse()
+
+        server = utils.metrics.METRICS.to_dict()
+        server["caches"] = {
+            "count": hcommon.COUNT_CACHE.stats,
+            "estimated_count": utils.db.ESTIMATED_COUNT_CACHE.stats,
+            "response": hcommon.RESPONSE_CACHE.stats,
+            "token": hcommon.TOKEN_CACHE.stats
+        }
+
+        response.result = [
+            {
+                "server": server,
+                "workers": utils.metrics.get_snapshots(self.db)
+            }
+        ]
+        return response
+
+    def execute_post(self, *args, **kwargs):
+        return hresponse.HandlerResponse(501)
+
+    def execute_delete(self, *args, **kwargs):
+        return hresponse.HandlerResponse(501)
@@ -51,6 +51,11 @@ class HandlerResponse(object):
         self._headers = None
         self._errors = []
         self._messages = []
+        self._stream = None
+        self._body = None
+        self._etag = None
+        self._next = None
+        self._profile = None
 
     @property
     def status_code(self):
@@ -152,6 +157,88 @@ class HandlerResponse(object):
                 value = [r for r in value]
             self._result = value
 
+    @property
+    def stream(self):
+        """The results that should be streamed back to the requestor.
+
+        If set, `result` is ignored: the handler will iterate over this value
+        and send its elements in chunks.
+        """
+        return self._stream
+
+    @stream.setter
+    def stream(self, value):
+        """Set the results that should be streamed.
+
+        :param value: An iterable: a list or a pymongo cursor.
+        """
+        self._stream = value
+
+    @property
+    def next(self):
+        """The token to retrieve the next page of results.
+
+        It is set only with keyset pagination, when more results might be
+        available.
+        """
+        return self._next
+
+    @next.setter
+    def next(self, value):
+        """Set the token of the next page.
+
+        :param value: The token.
+        :type value: str
+        """
+        self._next = value
+
+    @property
+    def profile(self):
+        """The profiling report of the request.
+
+        It is set only when an admin token requested the request to be
+        profiled.
+        """
+        return self._profile
+
+    @profile.setter
+    def profile(self, value):
+        """Set the profiling report.
+
+        :param value: The report.
+        :type value: str
+        """
+        self._profile = value
+
+    @property
+    def body(self):
+        """The already serialized response.
+
+        If set, it is sent as is: `to_dict()` is not used.
+        """
+        return self._body
+
+    @body.setter
+    def body(self, value):
+        """Set the serialized response.
+
+        :param value: The JSON string.
+        """
+        self._body = value
+
+    @property
+    def etag(self):
+        """The entity tag of the serialized response."""
+        return self._etag
+
+    @etag.setter
+    def etag(self, value):
+        """Set the entity tag of the serialized response.
+
+        :param value: The quoted entity tag.
+        """
+        self._etag = value
+
     @property
     def errors(self):
         """The errors that this response might have."""
@@ -183,7 +270,8 @@ class HandlerResponse(object):
     def to_dict(self):
         """Create a view of this object as a dictionary.
 
-        The `headers` property is not included.
+        The `headers`, `stream`, `body` and `etag` properties are not
+        included.
 
         :return The object as a dictionary.
         """
@@ -196,6 +284,9 @@ class HandlerResponse(object):
         if self.limit is not None:
             dict_obj["limit"] = self.limit
 
+        if self.next is not None:
+            dict_obj["next"] = self.next
+
         if self.result is not None:
             dict_obj["result"] = self.result
 
@@ -208,6 +299,9 @@ class HandlerResponse(object):
         if self.messages:
             dict_obj["messages"] = self.messages
 
+        if self.profile is not None:
+            dict_obj["profile"] = self.profile
+
         return dict_obj
 
     def __repr__(self):
@@ -0,0 +1,246 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Test module for the BootBulkHandler handler."""
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+import concurrent.futures
+import mock
+import mongomock
+import tornado
+import tornado.testing
+
+import handlers.app
+import models.token as mtoken
+import urls
+
+# Default Content-Type header returned by Tornado.
+DEFAULT_CONTENT_TYPE = "application/json; charset=UTF-8"
+
+
+class TestBootBulkHandler(
+        tornado.testing.AsyncHTTPTestCase, tornado.testing.LogTrapTestCase):
+
+    def setUp(self):
+        self.mongodb_client = mongomock.Connection()
+
+        super(TestBootBulkHandler, self).setUp()
+
+        patched_find_token = mock.patch(
+            "handlers.base.BaseHandler._find_token")
+        self.find_token = patched_find_token.start()
+        self.req_token = mtoken.Token()
+        self.find_token.return_value = self.req_token
+
+        patched_validate_token = mock.patch("handlers.common.validate_token")
+        self.validate_token = patched_validate_token.start()
+        self.validate_token.return_value = (True, self.req_token)
+
+        patched_import = mock.patch("taskqueue.tasks.import_boots")
+        self.import_boots = patched_import.start()
+
+        self.addCleanup(patched_find_token.stop)
+        self.addCleanup(patched_validate_token.stop)
+        self.addCleanup(patched_import.stop)
+
+        self.headers = {
+            "Authorization": "foo", "Content-Type": "application/json"}
+
+    def get_app(self):
+        dboptions = {
+            "dbpassword": "",
+            "dbuser": ""
+        }
+
+        settings = {
+            "dboptions": dboptions,
+            "client": self.mongodb_client,
+            "executor": concurrent.futures.ThreadPoolExecutor(max_workers=2),
+            "default_handler_class": handlers.app.AppHandler,
+            "debug": False
+        }
+
+        return tornado.web.Application([urls._BOOT_BULK_URL], **settings)
+
+    def get_new_ioloop(self):
+        return tornado.ioloop.IOLoop.instance()
+
+    @staticmethod
+    def _boot_report(board, lab_name="lab-name"):
+        return {
+            "version": "1.0",
+            "board": board,
+            "job": "job",
+            "kernel": "kernel",
+            "defconfig": "defconfig",
+            "lab_name": lab_name,
+            "arch": "arm"
+        }
+
+    def test_get(self):
+        response = self.fetch("/bulk/boot", headers=self.headers)
+
+        self.assertEqual(response.code, 501)
+
+    def test_delete(self):
+        response = self.fetch(
+            "/bulk/boot", method="DELETE", headers=self.headers)
+
+        self.assertEqual(response.code, 501)
+
+    def test_post_no_token(self):
+        self.find_token.return_value = None
+
+        response = self.fetch("/bulk/boot", method="POST", body="")
+
+        self.assertEqual(response.code, 403)
+
+    def test_post_wrong_content_type(self):
+        headers = {"Authorization": "foo"}
+
+        response = self.fetch(
+            "/bulk/boot", method="POST", body="[]", headers=headers)
+
+        self.assertEqual(response.code, 415)
+
+    def test_post_no_json(self):
+        response = self.fetch(
+            "/bulk/boot", method="POST", body="foo", headers=self.headers)
+
+        self.assertEqual(response.code, 422)
+
+    def test_post_not_a_list(self):
+        body = self._boot_report("board")
+
+        response = self.fetch(
+            "/bulk/boot",
+            method="POST", body=json.dumps(body), headers=self.headers)
+
+        self.assertEqual(response.code, 400)
+        self.assertFalse(self.import_boots.apply_async.called)
+
+    def test_post_empty_list(self):
+        response = self.fetch(
+            "/bulk/boot", method="POST", body="[]", headers=self.headers)
+
+        self.assertEqual(response.code, 400)
+
+    @mock.patch("handlers.boot_bulk.MAX_BOOT_REPORTS", 2)
+    def test_post_too_many(self):
+        body = [
+            self._boot_report("board0"),
+            self._boot_report("board1"),
+            self._boot_report("board2")
+        ]
+
+        response = self.fetch(
+            "/bulk/boot",
+            method="POST", body=json.dumps(body), headers=self.headers)
+
+        self.assertEqual(response.code, 400)
+        self.assertFalse(self.import_boots.apply_async.called)
+
+    def test_post_not_valid_report(self):
+        body = [self._boot_report("board0"), {"board": "board1"}]
+
+        response = self.fetch(
+            "/bulk/boot",
+            method="POST", body=json.dumps(body), headers=self.headers)
+
+        self.assertEqual(response.code, 400)
+        self.assertFalse(self.import_boots.apply_async.called)
+
+        errors = json.loads(response.body)["errors"]
+        self.assertEqual(1, len(errors))
+        self.assertTrue(errors[0].startswith("Boot report 1:"))
+
+    @mock.patch("utils.db.find_one2")
+    def test_post_valid_same_token(self, find_one):
+        self.req_token.token = "foo"
+        find_one.side_effect = [
+            {"name": "lab-name", "token": "id-token"},
+            {"_id": "id-token", "token": "foo", "expired": False}
+        ]
+        body = [
+            self._boot_report("board0"),
+            self._boot_report("board1"),
+            self._boot_report("board2")
+        ]
+
+        response = self.fetch(
+            "/bulk/boot",
+            method="POST", body=json.dumps(body), headers=self.headers)
+
+        self.assertEqual(response.code, 202)
+        self.assertEqual(
+            response.headers["Content-Type"], DEFAULT_CONTENT_TYPE)
+        # The lab token is validated only once.
+        self.assertEqual(2, find_one.call_count)
+        self.assertEqual(1, self.import_boots.apply_async.call_count)
+
+        args = self.import_boots.apply_async.call_args[0][0]
+        self.assertEqual(3, len(args[0]))
+
+    @mock.patch("utils.db.find_one2")
+    def test_post_valid_different_token(self, find_one):
+        find_one.side_effect = [
+            {"token": "bar"}, {"token": "bar", "expired": False}
+        ]
+        body = [self._boot_report("board0"), self._boot_report("board1")]
+
+        response = self.fetch(
+            "/bulk/boot",
+            method="POST", body=json.dumps(body), headers=self.headers)
+
+        self.assertEqual(response.code, 403)
+        self.assertFalse(self.import_boots.apply_async.called)
+
+    @mock.patch("utils.db.find_one2")
+    def test_post_valid_one_lab_not_valid(self, find_one):
+        self.req_token.token = "foo"
+        find_one.side_effect = [
+            {"name": "lab-0", "token": "id-token"},
+            {"_id": "id-token", "token": "foo", "expired": False},
+            None
+        ]
+        body = [
+            self._boot_report("board0", lab_name="lab-0"),
+            self._boot_report("board1", lab_name="lab-1")
+        ]
+
+        response = self.fetch(
+            "/bulk/boot",
+            method="POST", body=json.dumps(body), headers=self.headers)
+
+        self.assertEqual(response.code, 403)
+        self.assertFalse(self.import_boots.apply_async.called)
+
+    @mock.patch("utils.db.find_one2")
+    def test_post_valid_admin_token(self, find_one):
+        self.req_token.is_admin = True
+        find_one.side_effect = [
+            {"token": "id-lab-token", "name": "lab-name"},
+            {"_id": "id-lab-token", "token": "bar"}
+        ]
+        body = [self._boot_report("board0"), self._boot_report("board1")]
+
+        response = self.fetch(
+            "/bulk/boot",
+            method="POST", body=json.dumps(body), headers=self.headers)
+
+        self.assertEqual(response.code, 202)
+        self.assertEqual(1, len(json.loads(response.body)["errors"]))
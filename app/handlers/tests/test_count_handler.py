@@ -20,10 +20,16 @@ import json
 import mock
 import mongomock
 import tornado
+import tornado.concurrent
 import tornado.testing
+import unittest
 
 import handlers.app
+import handlers.common
+import handlers.count
+import models
 import urls
+import utils.db
 
 # Default Content-Type header returned by Tornado.
 DEFAULT_CONTENT_TYPE = "application/json; charset=UTF-8"
@@ -37,6 +43,9 @@ class TestCountHandler(
 
         super(TestCountHandler, self).setUp()
 
+        handlers.common.COUNT_CACHE.clear()
+        utils.db.ESTIMATED_COUNT_CACHE.clear()
+
         patched_find_token = mock.patch(
             "handlers.base.BaseHandler._find_token")
         self.find_token = patched_find_token.start()
@@ -125,3 +134,203 @@ class TestCountHandler(
         self.assertEqual(response.code, 200)
         self.assertEqual(
             response.headers["Content-Type"], DEFAULT_CONTENT_TYPE)
+
+
+def _done_future(result):
+    """Create an already resolved future."""
+    future = tornado.concurrent.Future()
+    future.set_result(result)
+    return future
+
+
+class TestCountHandlerAsync(
+        tornado.testing.AsyncHTTPTestCase, tornado.testing.LogTrapTestCase):
+
+    def setUp(self):
+        self.mongodb_client = mongomock.Connection()
+
+        super(TestCountHandlerAsync, self).setUp()
+
+        handlers.common.COUNT_CACHE.clear()
+        utils.db.ESTIMATED_COUNT_CACHE.clear()
+
+        patched_find_token = mock.patch(
+            "handlers.base.BaseHandler._find_token_async")
+        self.find_token = patched_find_token.start()
+        self.find_token.return_value = _done_future("token")
+
+        patched_validate_token = mock.patch("handlers.common.validate_token")
+        self.validate_token = patched_validate_token.start()
+        self.validate_token.return_value = (True, "token")
+
+        self.addCleanup(patched_find_token.stop)
+        self.addCleanup(patched_validate_token.stop)
+
+    def get_app(self):
+        settings = {
+            "dboptions": {"dbpassword": "", "dbuser": ""},
+            "client": self.mongodb_client,
+            "async_client": mock.MagicMock(),
+            "executor": mock.MagicMock(),
+            "default_handler_class": handlers.app.AppHandler,
+            "debug": False
+        }
+
+        return tornado.web.Application([urls._COUNT_URL], **settings)
+
+    def get_new_ioloop(self):
+        return tornado.ioloop.IOLoop.instance()
+
+    @mock.patch("utils.asyncdb.estimated_count")
+    def test_get_count_all(self, mock_count):
+        mock_count.return_value = _done_future(3)
+
+        headers = {"Authorization": "foo"}
+        response = self.fetch("/count", headers=headers)
+
+        self.assertEqual(response.code, 200)
+        result = json.loads(response.body)["result"]
+        self.assertEqual(
+            len(handlers.common.COLLECTIONS), mock_count.call_count)
+        self.assertTrue(all([r["count"] == 3 for r in result]))
+
+    @mock.patch("utils.asyncdb.count")
+    def test_get_count_collection_with_query(self, mock_find):
+        mock_find.return_value = _done_future(2)
+
+        headers = {"Authorization": "foo"}
+        response = self.fetch("/count/boot?board=foo", headers=headers)
+
+        self.assertEqual(response.code, 200)
+        self.assertEqual(
+            [{"collection": "boot", "count": 2}],
+            json.loads(response.body)["result"])
+
+    @mock.patch("utils.asyncdb.count")
+    def test_get_count_collection_with_query_cached(self, mock_find):
+        mock_find.return_value = _done_future(2)
+
+        headers = {"Authorization": "foo"}
+        self.fetch("/count/boot?board=foo", headers=headers)
+        response = self.fetch("/count/boot?board=foo", headers=headers)
+
+        self.assertEqual(response.code, 200)
+        self.assertEqual(1, mock_find.call_count)
+        self.assertEqual(
+            [{"collection": "boot", "count": 2}],
+            json.loads(response.body)["result"])
+
+    def test_get_count_wrong_collection(self):
+        headers = {"Authorization": "foo"}
+        response = self.fetch("/count/foo", headers=headers)
+
+        self.assertEqual(response.code, 404)
+
+
+class TestCountFunctions(unittest.TestCase):
+
+    def setUp(self):
+        self.database = mongomock.Connection()["kernel-ci"]
+
+        handlers.common.COUNT_CACHE.clear()
+        utils.db.ESTIMATED_COUNT_CACHE.clear()
+
+        self.database[models.BOOT_COLLECTION].insert([
+            {"board": "foo", "status": "PASS"},
+            {"board": "foo", "status": "FAIL"},
+            {"board": "bar", "status": "PASS"}
+        ])
+        self.database[models.JOB_COLLECTION].insert([{"job": "job"}])
+
+    def tearDown(self):
+        handlers.common.COUNT_CACHE.clear()
+        utils.db.ESTIMATED_COUNT_CACHE.clear()
+
+    @staticmethod
+    def _query_args(**kwargs):
+        def query_args_func(key):
+            return kwargs.get(key, [])
+        return query_args_func
+
+    def _count_all(self, **kwargs):
+        result = handlers.count.count_all_collections(
+            self.database,
+            self._query_args(**kwargs),
+            handlers.common.COUNT_VALID_KEYS["GET"])
+        return dict((r["collection"], r["count"]) for r in result)
+
+    def test_normalize_key_order(self):
+        self.assertEqual(
+            handlers.count._count_key(
+                "boot", {"board": "foo", "status": {"$in": ["B", "A"]}}),
+            handlers.count._count_key(
+                "boot", {"status": {"$in": ["A", "B"]}, "board": "foo"})
+        )
+
+    def test_count_all_no_spec(self):
+        counts = self._count_all()
+
+        self.assertEqual(3, counts["boot"])
+        self.assertEqual(1, counts["job"])
+        self.assertEqual(0, counts["defconfig"])
+        self.assertEqual(
+            len(handlers.common.COLLECTIONS), len(counts))
+
+    @mock.patch("utils.db.estimated_count")
+    @mock.patch("handlers.count.COUNT_WORKERS", 1)
+    def test_count_all_no_spec_estimated(self, mock_count):
+        mock_count.return_value = 5
+
+        counts = self._count_all()
+
+        self.assertEqual(
+            len(handlers.common.COLLECTIONS), mock_count.call_count)
+        self.assertTrue(all([c == 5 for c in counts.values()]))
+
+    def test_count_all_with_spec(self):
+        counts = self._count_all(board=["foo"])
+
+        self.assertEqual(2, counts["boot"])
+        self.assertEqual(0, counts["job"])
+
+    def test_count_all_with_spec_sequential(self):
+        with mock.patch("handlers.count.COUNT_WORKERS", 1):
+            counts = self._count_all(board=["foo"])
+
+        self.assertEqual(counts, self._count_all(board=["foo"]))
+
+    @mock.patch("handlers.count._get_executor")
+    def test_count_all_parallel(self, mock_executor):
+        mock_executor.return_value = concurrent.futures.ThreadPoolExecutor(
+            max_workers=2)
+
+        counts = self._count_all(board=["foo"])
+
+        self.assertTrue(mock_executor.called)
+        self.assertEqual(2, counts["boot"])
+
+    @mock.patch("utils.db.count")
+    @mock.patch("handlers.count.COUNT_WORKERS", 1)
+    def test_count_all_with_spec_cached(self, mock_find):
+        mock_find.return_value = 2
+
+        self._count_all(board=["foo"])
+        counts = self._count_all(board=["foo"])
+
+        self.assertEqual(
+            len(handlers.common.COLLECTIONS), mock_find.call_count)
+        self.assertEqual(2, counts["boot"])
+
+    @mock.patch("utils.db.count")
+    @mock.patch("handlers.count.COUNT_WORKERS", 1)
+    def test_count_all_with_spec_cache_disabled(self, mock_find):
+        mock_find.return_value = 2
+        ttl = handlers.common.COUNT_CACHE.ttl
+        handlers.common.COUNT_CACHE.configure(ttl=0)
+        self.addCleanup(handlers.common.COUNT_CACHE.configure, ttl=ttl)
+
+        self._count_all(board=["foo"])
+        self._count_all(board=["foo"])
+
+        self.assertEqual(
+            2 * len(handlers.common.COLLECTIONS), mock_find.call_count)
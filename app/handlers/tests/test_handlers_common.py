@@ -26,7 +26,9 @@ from bson import (
     tz_util
 )
 
+from handlers.base import BaseHandler
 from handlers.common import (
+    TOKEN_CACHE,
     _is_expired_token,
     add_created_on_date,
     calculate_date_range,
@@ -41,6 +43,7 @@ from handlers.common import (
     get_trigger_query_values,
     get_query_spec,
     get_skip_and_limit,
+    invalidate_token,
     update_id_fields,
     valid_token_bh,
     valid_token_general,
@@ -938,6 +941,36 @@ class TestHandlersCommon(unittest.TestCase):
 
         self.assertFalse(_is_expired_token(token))
 
+    @mock.patch("utils.db.find_one2")
+    def test_find_token_cached(self, mock_find):
+        TOKEN_CACHE.clear()
+        self.addCleanup(TOKEN_CACHE.clear)
+        mock_find.return_value = {"token": "foo"}
+        db_conn = mock.MagicMock()
+
+        self.assertDictEqual(
+            {"token": "foo"}, BaseHandler._find_token("foo", db_conn))
+        self.assertDictEqual(
+            {"token": "foo"}, BaseHandler._find_token("foo", db_conn))
+        self.assertEqual(1, mock_find.call_count)
+        self.assertEqual(1, TOKEN_CACHE.hits)
+
+        invalidate_token("foo", None)
+        BaseHandler._find_token("foo", db_conn)
+        self.assertEqual(2, mock_find.call_count)
+
+    @mock.patch("utils.db.find_one2")
+    def test_find_token_not_found_not_cached(self, mock_find):
+        TOKEN_CACHE.clear()
+        self.addCleanup(TOKEN_CACHE.clear)
+        mock_find.return_value = None
+        db_conn = mock.MagicMock()
+
+        self.assertIsNone(BaseHandler._find_token("foo", db_conn))
+        self.assertIsNone(BaseHandler._find_token("foo", db_conn))
+        self.assertEqual(2, mock_find.call_count)
+        self.assertEqual(0, len(TOKEN_CACHE))
+
     @mock.patch("models.token.Token.from_json")
     def test_validate_token_wrong_class(self, mock_from_json):
         mock_from_json.return_value = mock.Mock()
@@ -19,11 +19,18 @@ import concurrent.futures
 import json
 import mock
 import mongomock
+import os
+import shutil
+import tempfile
 import tornado
+import tornado.concurrent
 import tornado.testing
 
 import handlers.app
+import handlers.common as hcommon
+import models.token as mtoken
 import urls
+import utils.db
 
 # Default Content-Type header returned by Tornado.
 DEFAULT_CONTENT_TYPE = "application/json; charset=UTF-8"
@@ -183,7 +190,7 @@ class TestJobHandler(
         self.assertEqual(
             response.headers["Content-Type"], DEFAULT_CONTENT_TYPE)
 
-    @mock.patch("taskqueue.tasks.import_job")
+    @mock.patch("taskqueue.tasks.import_and_parse_job")
     def test_post_correct(self, mock_import_job):
         mock_import_job.apply_async = mock.MagicMock()
         headers = {"Authorization": "foo", "Content-Type": "application/json"}
@@ -195,6 +202,23 @@ class TestJobHandler(
         self.assertEqual(response.code, 202)
         self.assertEqual(
             response.headers["Content-Type"], DEFAULT_CONTENT_TYPE)
+        self.assertEqual(1, mock_import_job.apply_async.call_count)
+
+    @mock.patch("taskqueue.tasks.import_and_parse_job")
+    def test_post_correct_coalesced(self, mock_import_job):
+        mock_import_job.apply_async = mock.MagicMock()
+        headers = {"Authorization": "foo", "Content-Type": "application/json"}
+        body = json.dumps(dict(job="job", kernel="kernel"))
+
+        for _ in range(3):
+            response = self.fetch(
+                "/job", method="POST", headers=headers, body=body)
+            self.assertEqual(response.code, 202)
+
+        self.assertEqual(1, mock_import_job.apply_async.call_count)
+        self.assertEqual(
+            "Request accepted and merged with the import in progress",
+            response.reason)
 
     def test_delete_no_token(self):
         response = self.fetch("/job/job", method="DELETE")
@@ -226,6 +250,31 @@ class TestJobHandler(
         self.assertEqual(
             response.headers["Content-Type"], DEFAULT_CONTENT_TYPE)
 
+    @mock.patch("bson.objectid.ObjectId")
+    def test_delete_with_summaries(self, mock_id):
+        mock_id.return_value = "job"
+        db = self.mongodb_client["kernel-ci"]
+        db["job"].insert(dict(_id="job", job="job", kernel="kernel"))
+        db["defconfig"].insert(
+            dict(_id="defconfig", job_id="job", job="job", kernel="kernel"))
+        # The ObjectId class is mocked: the IDs must be provided.
+        for summary_type in ["build", "boot"]:
+            db["summary"].insert(
+                dict(
+                    _id=summary_type,
+                    type=summary_type, job="job", kernel="kernel"))
+        db["summary"].insert(
+            dict(_id="other", type="boot", job="job", kernel="other"))
+        headers = {"Authorization": "foo"}
+
+        response = self.fetch(
+            "/job/job", method="DELETE", headers=headers)
+
+        self.assertEqual(response.code, 200)
+        self.assertEqual(0, db["defconfig"].count())
+        self.assertListEqual(
+            ["other"], [s["kernel"] for s in db["summary"].find()])
+
     def test_delete_no_id(self):
         headers = {"Authorization": "foo"}
 
@@ -251,7 +300,7 @@ class TestJobHandler(
     @mock.patch("bson.objectid.ObjectId")
     def test_delete_db_error(self, mock_id, mock_find, mock_delete):
         mock_id.return_value = "job"
-        mock_find.return_value = "job"
+        mock_find.return_value = {"_id": "job", "job": "job", "kernel": "k"}
         mock_delete.return_value = 500
         headers = {"Authorization": "foo"}
 
@@ -262,6 +311,240 @@ class TestJobHandler(
         self.assertEqual(
             response.headers["Content-Type"], DEFAULT_CONTENT_TYPE)
 
+    def test_get_streamed(self):
+        self._app.settings["stream_chunk_size"] = 2
+        self.addCleanup(self._app.settings.pop, "stream_chunk_size")
+        collection = self.mongodb_client["kernel-ci"]["job"]
+        for idx in range(5):
+            collection.insert({"_id": idx, "job": "job", "kernel": str(idx)})
+
+        headers = {"Authorization": "foo"}
+        response = self.fetch(
+            "/job?job=job&sort=_id&sort_order=1", headers=headers)
+
+        self.assertEqual(response.code, 200)
+        self.assertEqual(
+            response.headers["Content-Type"], DEFAULT_CONTENT_TYPE)
+        self.assertEqual(
+            response.headers["Transfer-Encoding"], "chunked")
+
+        body = json.loads(response.body)
+        self.assertEqual(200, body["code"])
+        self.assertEqual(5, body["count"])
+        self.assertEqual(0, body["limit"])
+        self.assertEqual(
+            [str(idx) for idx in range(5)],
+            [r["kernel"] for r in body["result"]])
+
+    def test_get_keyset_pages(self):
+        collection = self.mongodb_client["kernel-ci"]["job"]
+        for idx in range(5):
+            collection.insert({"_id": idx, "job": "job", "kernel": str(idx)})
+
+        headers = {"Authorization": "foo"}
+        response = self.fetch(
+            "/job?job=job&sort=_id&sort_order=1&limit=3&after=",
+            headers=headers)
+
+        self.assertEqual(response.code, 200)
+        body = json.loads(response.body)
+        self.assertEqual(5, body["count"])
+        self.assertEqual(["0", "1", "2"], [r["kernel"] for r in body["result"]])
+        self.assertIn("next", body)
+
+        response = self.fetch(
+            "/job?job=job&sort=_id&sort_order=1&limit=3&after=" +
+            body["next"], headers=headers)
+
+        self.assertEqual(response.code, 200)
+        body = json.loads(response.body)
+        self.assertEqual(["3", "4"], [r["kernel"] for r in body["result"]])
+        self.assertNotIn("next", body)
+
+    def test_get_keyset_wrong_token(self):
+        headers = {"Authorization": "foo"}
+        response = self.fetch("/job?limit=3&after=foo", headers=headers)
+
+        self.assertEqual(response.code, 400)
+
+    def test_get_profile_admin(self):
+        token = mtoken.Token()
+        token.is_admin = True
+        self.validate_token.return_value = (True, token)
+
+        response = self.fetch(
+            "/job?profile=1", headers={"Authorization": "foo"})
+
+        self.assertEqual(response.code, 200)
+        body = json.loads(response.body)
+        self.assertIn("function calls", body["profile"])
+        self.assertEqual([], body["result"])
+
+    def test_get_profile_not_admin(self):
+        self.validate_token.return_value = (True, mtoken.Token())
+
+        response = self.fetch(
+            "/job?profile=1", headers={"Authorization": "foo"})
+
+        self.assertEqual(response.code, 200)
+        self.assertNotIn("profile", json.loads(response.body))
+
+    def test_get_profile_saved(self):
+        token = mtoken.Token()
+        token.is_admin = True
+        self.validate_token.return_value = (True, token)
+
+        profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, profile_dir)
+        self._app.settings["profile_dir"] = profile_dir
+        self.addCleanup(self._app.settings.pop, "profile_dir")
+
+        response = self.fetch(
+            "/job?profile=1", headers={"Authorization": "foo"})
+
+        self.assertEqual(response.code, 200)
+        profiles = os.listdir(profile_dir)
+        self.assertEqual(1, len(profiles))
+        self.assertTrue(profiles[0].startswith("JobHandler-"))
+
+    def test_get_profile_streamed(self):
+        token = mtoken.Token()
+        token.is_admin = True
+        self.validate_token.return_value = (True, token)
+
+        self._app.settings["stream_chunk_size"] = 2
+        self.addCleanup(self._app.settings.pop, "stream_chunk_size")
+        profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, profile_dir)
+        self._app.settings["profile_dir"] = profile_dir
+        self.addCleanup(self._app.settings.pop, "profile_dir")
+
+        collection = self.mongodb_client["kernel-ci"]["job"]
+        for idx in range(5):
+            collection.insert({"_id": idx, "job": "job", "kernel": str(idx)})
+
+        response = self.fetch(
+            "/job?job=job&profile=1", headers={"Authorization": "foo"})
+
+        self.assertEqual(response.code, 200)
+        self.assertEqual(5, len(json.loads(response.body)["result"]))
+        # Only the operation is profiled, not each streamed chunk: the token
+        # is validated by the profiler and by the operation.
+        self.assertEqual(1, len(os.listdir(profile_dir)))
+        self.assertEqual(2, self.validate_token.call_count)
+
+    def _enable_response_cache(self):
+        hcommon.RESPONSE_CACHE.configure(max_size=10, ttl=60)
+        hcommon.RESPONSE_CACHE.clear()
+        hcommon.CACHE_VERSIONS.clear()
+        self.addCleanup(hcommon.RESPONSE_CACHE.configure, max_size=0)
+        self.validate_token.return_value = (True, mtoken.Token())
+
+    @mock.patch("utils.db.find_and_count")
+    def test_get_etag_not_modified(self, mock_find):
+        mock_find.return_value = ([{"job": "job"}], 1)
+        headers = {"Authorization": "foo"}
+
+        response = self.fetch("/job?job=job", headers=headers)
+
+        self.assertEqual(response.code, 200)
+        etag = response.headers["Etag"]
+
+        headers["If-None-Match"] = etag
+        response = self.fetch("/job?job=job", headers=headers)
+
+        self.assertEqual(response.code, 304)
+        self.assertEqual(response.body, "")
+
+        mock_find.return_value = ([{"job": "other"}], 1)
+        response = self.fetch("/job?job=job", headers=headers)
+
+        self.assertEqual(response.code, 200)
+        self.assertNotEqual(etag, response.headers["Etag"])
+
+    @mock.patch("utils.db.find_and_count")
+    def test_get_cached(self, mock_find):
+        self._enable_response_cache()
+        mock_find.return_value = ([{"job": "job"}], 1)
+        headers = {"Authorization": "foo"}
+
+        first = self.fetch("/job?job=job&limit=10", headers=headers)
+        second = self.fetch("/job?limit=10&job=job", headers=headers)
+
+        self.assertEqual(first.code, 200)
+        self.assertEqual(second.code, 200)
+        self.assertEqual(first.body, second.body)
+        self.assertEqual(first.headers["Etag"], second.headers["Etag"])
+        self.assertEqual(mock_find.call_count, 1)
+        self.assertEqual(hcommon.RESPONSE_CACHE.stats["hits"], 1)
+
+        self.fetch("/job?job=other&limit=10", headers=headers)
+        self.assertEqual(mock_find.call_count, 2)
+
+    @mock.patch("utils.db.find_and_count")
+    def test_get_cached_error_not_cached(self, mock_find):
+        self._enable_response_cache()
+        mock_find.return_value = ([], 0)
+        headers = {"Authorization": "foo"}
+
+        self.fetch("/job/foo", headers=headers)
+        self.fetch("/job/foo", headers=headers)
+
+        self.assertEqual(len(hcommon.RESPONSE_CACHE), 0)
+
+    @mock.patch("taskqueue.tasks.import_and_parse_job")
+    @mock.patch("utils.db.find_and_count")
+    def test_get_cache_invalidated_by_post(self, mock_find, mock_import_job):
+        self._enable_response_cache()
+        mock_find.return_value = ([{"job": "job"}], 1)
+        headers = {"Authorization": "foo"}
+
+        self.fetch("/job?job=job", headers=headers)
+        self.fetch("/job?job=job", headers=headers)
+        self.assertEqual(mock_find.call_count, 1)
+
+        response = self.fetch(
+            "/job",
+            method="POST",
+            headers={
+                "Authorization": "foo", "Content-Type": "application/json"},
+            body=json.dumps(dict(job="job", kernel="kernel"))
+        )
+        self.assertEqual(response.code, 202)
+
+        self.fetch("/job?job=job", headers=headers)
+        self.assertEqual(mock_find.call_count, 2)
+
+    @mock.patch("utils.db.find_and_count")
+    def test_get_cache_invalidated_by_other_process(self, mock_find):
+        self._enable_response_cache()
+        mock_find.return_value = ([{"job": "job"}], 1)
+        headers = {"Authorization": "foo"}
+
+        self.fetch("/job?job=job", headers=headers)
+
+        # Another process changed the collection, and the cached versions
+        # expired.
+        utils.db.bump_cache_versions(
+            self.mongodb_client["kernel-ci"], ["job"])
+        hcommon.CACHE_VERSIONS.clear()
+
+        self.fetch("/job?job=job", headers=headers)
+        self.assertEqual(mock_find.call_count, 2)
+
+    @mock.patch("utils.db.find_and_count")
+    def test_get_not_streamed_small_limit(self, mock_find):
+        self._app.settings["stream_chunk_size"] = 2
+        self.addCleanup(self._app.settings.pop, "stream_chunk_size")
+        mock_find.return_value = ([{"job": "job"}, {"job": "job"}], 5)
+
+        headers = {"Authorization": "foo"}
+        response = self.fetch("/job?limit=2", headers=headers)
+
+        self.assertEqual(response.code, 200)
+        self.assertNotIn("Transfer-Encoding", response.headers)
+        self.assertEqual(2, len(json.loads(response.body)["result"]))
+
     @mock.patch("handlers.base.BaseHandler._get_one")
     def test_get_wrong_handler_response(self, mock_get_one):
         mock_get_one.return_value = ""
@@ -272,3 +555,102 @@ class TestJobHandler(
         self.assertEqual(response.code, 506)
         self.assertEqual(
             response.headers["Content-Type"], DEFAULT_CONTENT_TYPE)
+
+
+def _done_future(result):
+    """Create an already resolved future."""
+    future = tornado.concurrent.Future()
+    future.set_result(result)
+    return future
+
+
+class TestJobHandlerAsync(
+        tornado.testing.AsyncHTTPTestCase, tornado.testing.LogTrapTestCase):
+
+    def setUp(self):
+        self.mongodb_client = mongomock.Connection()
+
+        super(TestJobHandlerAsync, self).setUp()
+
+        patched_find_token = mock.patch(
+            "handlers.base.BaseHandler._find_token_async")
+        self.find_token = patched_find_token.start()
+        self.find_token.return_value = _done_future("token")
+
+        patched_validate_token = mock.patch("handlers.common.validate_token")
+        self.validate_token = patched_validate_token.start()
+        self.validate_token.return_value = (True, "token")
+
+        self.addCleanup(patched_find_token.stop)
+        self.addCleanup(patched_validate_token.stop)
+
+    def get_app(self):
+        settings = {
+            "dboptions": {"dbpassword": "", "dbuser": ""},
+            "mailoptions": {},
+            "client": self.mongodb_client,
+            "async_client": mock.MagicMock(),
+            "executor": mock.MagicMock(),
+            "default_handler_class": handlers.app.AppHandler,
+            "debug": False
+        }
+
+        return tornado.web.Application([urls._JOB_URL], **settings)
+
+    def get_new_ioloop(self):
+        return tornado.ioloop.IOLoop.instance()
+
+    @mock.patch("utils.asyncdb.find_and_count")
+    def test_get(self, mock_find):
+        mock_find.return_value = _done_future(([{"job": "job"}], 1))
+
+        expected_body = (
+            '{"count":1,"code":200,"limit":0,"result":[{"job":"job"}]}')
+
+        headers = {"Authorization": "foo"}
+        response = self.fetch("/job?job=job", headers=headers)
+
+        self.assertEqual(response.code, 200)
+        self.assertEqual(response.body, expected_body)
+        self.assertEqual(mock_find.call_count, 1)
+        self.assertFalse(self._app.settings["executor"].submit.called)
+
+    @mock.patch("utils.db.get_cache_versions")
+    @mock.patch("utils.asyncdb.get_cache_versions")
+    @mock.patch("utils.asyncdb.find_and_count")
+    def test_get_cached(self, mock_find, mock_versions, mock_sync_versions):
+        hcommon.RESPONSE_CACHE.configure(max_size=10, ttl=60)
+        hcommon.RESPONSE_CACHE.clear()
+        hcommon.CACHE_VERSIONS.clear()
+        self.addCleanup(hcommon.RESPONSE_CACHE.configure, max_size=0)
+        self.validate_token.return_value = (True, mtoken.Token())
+        mock_find.return_value = _done_future(([{"job": "job"}], 1))
+        mock_versions.return_value = _done_future({"job": 1})
+
+        headers = {"Authorization": "foo"}
+        first = self.fetch("/job?job=job", headers=headers)
+        second = self.fetch("/job?job=job", headers=headers)
+
+        self.assertEqual(first.code, 200)
+        self.assertEqual(first.body, second.body)
+        self.assertEqual(mock_find.call_count, 1)
+        self.assertEqual(mock_versions.call_count, 1)
+        self.assertFalse(mock_sync_versions.called)
+
+    @mock.patch("utils.asyncdb.find_one")
+    def test_get_by_id_not_found(self, mock_find):
+        mock_find.return_value = _done_future(None)
+
+        headers = {"Authorization": "foo"}
+        response = self.fetch(
+            "/job/%s" % "0123456789ab0123456789ab", headers=headers)
+
+        self.assertEqual(response.code, 404)
+
+    def test_get_wrong_token(self):
+        self.validate_token.return_value = (False, None)
+
+        headers = {"Authorization": "foo"}
+        response = self.fetch("/job", headers=headers)
+
+        self.assertEqual(response.code, 403)
@@ -0,0 +1,107 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Test module for the MetricsHandler handler."""
+
+import concurrent.futures
+import json
+import mock
+import mongomock
+import tornado
+import tornado.testing
+
+import handlers.app
+import urls
+import utils.metrics
+
+
+class TestMetricsHandler(
+        tornado.testing.AsyncHTTPTestCase, tornado.testing.LogTrapTestCase):
+
+    def setUp(self):
+        self.mongodb_client = mongomock.Connection()
+
+        super(TestMetricsHandler, self).setUp()
+
+        patched_find_token = mock.patch(
+            "handlers.base.BaseHandler._find_token")
+        self.find_token = patched_find_token.start()
+        self.find_token.return_value = "token"
+
+        patched_validate_token = mock.patch("handlers.common.validate_token")
+        self.validate_token = patched_validate_token.start()
+        self.validate_token.return_value = (True, "token")
+
+        self.addCleanup(patched_find_token.stop)
+        self.addCleanup(patched_validate_token.stop)
+
+        utils.metrics.METRICS.clear()
+        self.addCleanup(utils.metrics.METRICS.clear)
+
+    def get_app(self):
+        dboptions = {"dbpassword": "", "dbuser": ""}
+
+        settings = {
+            "dboptions": dboptions,
+            "client": self.mongodb_client,
+            "executor": concurrent.futures.ThreadPoolExecutor(max_workers=2),
+            "default_handler_class": handlers.app.AppHandler,
+            "debug": False
+        }
+
+        return tornado.web.Application(
+            [urls._METRICS_URL, urls._JOB_URL], **settings)
+
+    def get_new_ioloop(self):
+        return tornado.ioloop.IOLoop.instance()
+
+    def test_get(self):
+        headers = {"Authorization": "foo"}
+        self.fetch("/job", headers=headers)
+
+        response = self.fetch("/metrics", headers=headers)
+
+        self.assertEqual(response.code, 200)
+        result = json.loads(response.body)["result"][0]
+        metrics = result["server"]["metrics"]
+
+        self.assertEqual(1, metrics["requests"]["GET JobHandler"]["count"])
+        self.assertEqual(
+            1, metrics["executor_queue"]["GET JobHandler"]["count"])
+        self.assertEqual(
+            1, metrics["executor_run"]["GET JobHandler"]["count"])
+        self.assertIn("find_and_count job", metrics["db"])
+        self.assertIn("response", result["server"]["caches"])
+        self.assertEqual([], result["workers"])
+
+    def test_get_worker_snapshots(self):
+        database = self.mongodb_client["kernel-ci"]
+        utils.metrics.METRICS.observe(utils.metrics.TASKS, "import-job", 1)
+        utils.metrics.save_snapshot(database, "worker:1")
+
+        response = self.fetch("/metrics", headers={"Authorization": "foo"})
+
+        self.assertEqual(response.code, 200)
+        workers = json.loads(response.body)["result"][0]["workers"]
+        self.assertEqual(1, len(workers))
+        self.assertEqual("worker:1", workers[0]["_id"])
+        self.assertEqual(
+            1, workers[0]["metrics"]["tasks"]["import-job"]["count"])
+
+    def test_post(self):
+        response = self.fetch("/metrics", method="POST", body="")
+        self.assertEqual(response.code, 501)
+
+    def test_delete(self):
+        response = self.fetch("/metrics", method="DELETE")
+        self.assertEqual(response.code, 501)
@@ -25,6 +25,7 @@ from tornado import (
 
 import handlers.app as happ
 import urls
+import utils.httpserver
 
 # Default Content-Type header returned by Tornado.
 DEFAULT_CONTENT_TYPE = "application/json; charset=UTF-8"
@@ -65,7 +66,8 @@ class TestUploadHandler(testing.AsyncHTTPTestCase, testing.LogTrapTestCase):
             "master_key": "bar",
             "debug": False,
             "mailoptions": mailoptions,
-            "senddelay": 60*60
+            "senddelay": 60*60,
+            "storage_url": None
         }
 
         return web.Application([urls._UPLOAD_URL], **settings)
@@ -127,3 +129,194 @@ class TestUploadHandler(testing.AsyncHTTPTestCase, testing.LogTrapTestCase):
         self.assertEqual(response.code, 400)
         self.assertEqual(
             response.headers["Content-Type"], DEFAULT_CONTENT_TYPE)
+
+    @mock.patch("utils.upload.create_or_update_file")
+    @mock.patch("utils.upload.check_or_create_upload_dir")
+    def test_put(self, mock_check, mock_create):
+        mock_check.return_value = (200, None)
+        mock_create.return_value = {
+            "status": 201,
+            "error": None,
+            "bytes": 3,
+            "filename": "bar.txt",
+            "sha256": "fake"
+        }
+
+        headers = {"Authorization": "foo"}
+        response = self.fetch(
+            "/upload/foo/bar.txt", method="PUT", body="baz", headers=headers)
+
+        self.assertEqual(response.code, 201)
+        mock_check.assert_called_once_with("foo")
+        mock_create.assert_called_once_with(
+            "foo", "bar.txt", None, "baz", blob_path=None)
+
+    @mock.patch("utils.upload.check_or_create_upload_dir")
+    def test_put_replace(self, mock_check):
+        mock_check.return_value = (200, None)
+
+        with mock.patch("utils.upload.create_or_update_file") as mock_create:
+            mock_create.return_value = {
+                "status": 200,
+                "error": None,
+                "bytes": 3,
+                "filename": "bar.txt",
+                "sha256": "fake"
+            }
+            headers = {"Authorization": "foo"}
+            response = self.fetch(
+                "/upload/foo/bar.txt",
+                method="PUT", body="baz", headers=headers)
+
+        self.assertEqual(response.code, 200)
+
+    def test_put_no_path(self):
+        headers = {"Authorization": "foo"}
+        response = self.fetch(
+            "/upload", method="PUT", body="baz", headers=headers)
+
+        self.assertEqual(response.code, 400)
+
+
+class TestUploadHandlerStreamed(
+        testing.AsyncHTTPTestCase, testing.LogTrapTestCase):
+    """Test the UploadHandler with the request bodies streamed."""
+
+    def setUp(self):
+        self.mongodb_client = mongomock.Connection()
+
+        super(TestUploadHandlerStreamed, self).setUp()
+
+        patched_find_token = mock.patch(
+            "handlers.base.BaseHandler._find_token")
+        self.find_token = patched_find_token.start()
+        self.find_token.return_value = "token"
+
+        patched_validate_token = mock.patch("handlers.common.validate_token")
+        self.validate_token = patched_validate_token.start()
+        self.validate_token.return_value = (True, "token")
+
+        patched_check = mock.patch("utils.upload.check_or_create_upload_dir")
+        self.check_dir = patched_check.start()
+        self.check_dir.return_value = (200, None)
+
+        patched_upload_file = mock.patch("utils.upload.UploadFile")
+        self.upload_file = patched_upload_file.start()
+        self.upload_file.return_value.file_path = "foo/bar.txt"
+        self.upload_file.return_value.open.return_value = True
+        self.upload_file.return_value.close.return_value = {
+            "status": 201,
+            "error": None,
+            "bytes": 3,
+            "filename": "bar.txt",
+            "sha256": "fake"
+        }
+
+        self.addCleanup(patched_find_token.stop)
+        self.addCleanup(patched_validate_token.stop)
+        self.addCleanup(patched_check.stop)
+        self.addCleanup(patched_upload_file.stop)
+
+    def get_app(self):
+        settings = {
+            "dboptions": {"dbpassword": "", "dbuser": ""},
+            "client": self.mongodb_client,
+            "executor": ThreadPoolExecutor(max_workers=2),
+            "default_handler_class": happ.AppHandler,
+            "master_key": "bar",
+            "debug": False,
+            "mailoptions": {},
+            "senddelay": 60*60,
+            "storage_url": None
+        }
+
+        return web.Application([urls._UPLOAD_URL], **settings)
+
+    def get_http_server(self):
+        return utils.httpserver.HTTPServer(
+            self._app, io_loop=self.io_loop, **self.get_httpserver_options())
+
+    def get_new_ioloop(self):
+        return ioloop.IOLoop.instance()
+
+    def _written(self):
+        write = self.upload_file.return_value.write
+        return "".join(c[0][0] for c in write.call_args_list)
+
+    def test_put(self):
+        headers = {"Authorization": "foo"}
+        response = self.fetch(
+            "/upload/foo/bar.txt", method="PUT", body="baz", headers=headers)
+
+        self.assertEqual(response.code, 201)
+        self.upload_file.assert_called_once_with(
+            "foo", "bar.txt", blob_path=None)
+        self.assertEqual("baz", self._written())
+        self.assertTrue(self.upload_file.return_value.close.called)
+        self.assertFalse(self.upload_file.return_value.abort.called)
+
+    def test_put_no_token(self):
+        self.validate_token.return_value = (False, None)
+
+        headers = {"Authorization": "foo"}
+        response = self.fetch(
+            "/upload/foo/bar.txt", method="PUT", body="baz", headers=headers)
+
+        self.assertEqual(response.code, 403)
+        self.assertFalse(self.upload_file.called)
+
+    def test_put_open_error(self):
+        self.upload_file.return_value.open.return_value = False
+        self.upload_file.return_value.result = {
+            "status": 500,
+            "error": "Error writing file 'bar.txt'",
+            "bytes": 0,
+            "filename": "bar.txt",
+            "sha256": None
+        }
+
+        headers = {"Authorization": "foo"}
+        response = self.fetch(
+            "/upload/foo/bar.txt", method="PUT", body="baz", headers=headers)
+
+        self.assertEqual(response.code, 500)
+        self.assertFalse(self.upload_file.return_value.write.called)
+
+    def test_put_no_path(self):
+        headers = {"Authorization": "foo"}
+        response = self.fetch(
+            "/upload", method="PUT", body="baz", headers=headers)
+
+        self.assertEqual(response.code, 400)
+        self.assertFalse(self.upload_file.called)
+
+    @mock.patch("utils.upload.create_or_update_file")
+    def test_post(self, mock_create):
+        mock_create.return_value = {
+            "status": 201,
+            "error": None,
+            "bytes": 3,
+            "filename": "bar.txt",
+            "sha256": "fake"
+        }
+        body = "\r\n".join([
+            "--boundary",
+            'Content-Disposition: form-data; name="file"; filename="bar.txt"',
+            "Content-Type: text/plain",
+            "",
+            "baz",
+            "--boundary--",
+            ""
+        ])
+        headers = {
+            "Authorization": "foo",
+            "Content-Type": "multipart/form-data; boundary=boundary"
+        }
+
+        response = self.fetch(
+            "/upload?path=foo", method="POST", body=body, headers=headers)
+
+        self.assertEqual(response.code, 200)
+        mock_create.assert_called_once_with(
+            "foo/", "bar.txt", "text/plain", "baz", blob_path=None)
+        self.assertFalse(self.upload_file.called)
@@ -205,6 +205,7 @@ class TokenHandler(hbase.BaseHandler):
                     {models.ID_KEY: token_oid},
                     token.to_dict()
                 )
+                hcommon.invalidate_token(token.token)
                 if response.status_code == 200:
                     response.result = {models.TOKEN_KEY: token.token}
             else:
@@ -315,12 +316,14 @@ class TokenHandler(hbase.BaseHandler):
 
         try:
             token_oid = bson.objectid.ObjectId(doc_id)
-            if utils.db.find_one2(self.collection, token_oid):
+            result = utils.db.find_one2(self.collection, token_oid)
+            if result:
                 self.log.info(
                     "Token (%s) deletion from IP '%s'",
                     doc_id, self.request.remote_ip)
                 ret_val = utils.db.delete(self.collection, token_oid)
                 response.status_code = ret_val
+                hcommon.invalidate_token(result.get(models.TOKEN_KEY, None))
 
                 if ret_val == 200:
                     response.reason = "Resource '%s' deleted" % doc_id
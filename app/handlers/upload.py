@@ -14,6 +14,8 @@
 """The RequestHandler for /upload URLs."""
 
 import os
+import tornado.gen
+import tornado.httputil
 import tornado.web
 import urlparse
 
@@ -21,14 +23,29 @@ import handlers.base as hbase
 import handlers.common as hcommon
 import handlers.response as hresponse
 import models
+import utils.httpserver
 import utils.upload
 
 
+@utils.httpserver.stream_request_body
 class UploadHandler(hbase.BaseHandler):
-    """Handler the /upload URLs."""
+    """Handler the /upload URLs.
+
+    When the server streams the request body, see `utils.httpserver`, the
+    body of a PUT request is written to disk as it arrives: the memory used
+    does not depend on the size of the file. The body of the other requests
+    is still collected in memory.
+    """
 
     def __init__(self, application, request, **kwargs):
         super(UploadHandler, self).__init__(application, request, **kwargs)
+        # The file being written with the body of a streamed PUT request.
+        self._upload_file = None
+
+    @property
+    def blob_path(self):
+        """The path of the blob store, None if not used."""
+        return self.settings.get("blob_path", None)
 
     @property
     def collection(self):
@@ -143,10 +160,89 @@ class UploadHandler(hbase.BaseHandler):
 
         return response
 
-    def _put(self, *args, **kwargs):
-        response = hresponse.HandlerResponse(201)
+    @tornado.gen.coroutine
+    def prepare(self):
+        if utils.httpserver.body_streamed(self.request):
+            if self.request.method == "PUT":
+                response = yield self._submit(
+                    self._open_upload_file, self.path_kwargs.get("path", None))
+                if response is None:
+                    yield utils.httpserver.read_body(
+                        self.request, self._upload_file.write)
+                else:
+                    self.write(response)
+            else:
+                chunks = []
+                yield utils.httpserver.read_body(self.request, chunks.append)
+                self._parse_body(b"".join(chunks))
+
+    def on_connection_close(self):
+        super(UploadHandler, self).on_connection_close()
+        if self._upload_file is not None:
+            self._upload_file.abort()
+
+    def on_finish(self):
+        # Remove what is left of an upload that has not been completed.
+        if self._upload_file is not None:
+            self._upload_file.abort()
+        super(UploadHandler, self).on_finish()
+
+    def _parse_body(self, body):
+        """Parse the collected body of a streamed request.
+
+        Fill the request arguments and files as Tornado does when the body
+        is not streamed.
+
+        :param body: The request body.
+        :type body: str
+        """
+        self.request.body = body
+        tornado.httputil.parse_body_arguments(
+            self.request.headers.get("Content-Type", ""),
+            body, self.request.body_arguments, self.request.files)
+
+        for key, values in self.request.body_arguments.iteritems():
+            self.request.arguments.setdefault(key, []).extend(values)
+
+    def _open_upload_file(self, path):
+        """Validate a streamed PUT request and open the destination file.
+
+        :param path: The destination path of the file.
+        :type path: str
+        :return None if the request body can be written, a `HandlerResponse`
+        with the error otherwise.
+        """
+        valid_token, _ = self.validate_req_token("PUT")
+
+        if valid_token:
+            response, path = self._check_put_path(path)
+            if response is None:
+                upload_file = utils.upload.UploadFile(
+                    os.path.dirname(path),
+                    os.path.basename(path), blob_path=self.blob_path)
+                if upload_file.open():
+                    self._upload_file = upload_file
+                else:
+                    response = self._put_response(path, upload_file.result)
+        else:
+            response = hresponse.HandlerResponse(403)
+            response.reason = hcommon.NOT_VALID_TOKEN
+
+        return response
+
+    @staticmethod
+    def _check_put_path(path):
+        """Check the destination path of a PUT request.
+
+        The destination directory is created if it does not exist.
+
+        :param path: The destination path of the file.
+        :type path: str
+        :return A tuple: a `HandlerResponse` with the error or None if the
+        path is valid, and the normalized path.
+        """
+        response = None
 
-        path = kwargs.get("path", None)
         if path:
             # Path points to a file, treat it like that.
             if path[-1] == "/":
@@ -154,46 +250,69 @@ class UploadHandler(hbase.BaseHandler):
             if path[0] == "/":
                 path = path[1:]
 
-            filename = os.path.basename(path)
             dir_path = os.path.dirname(path)
 
             if utils.upload.is_valid_dir_path(dir_path):
                 ret_val, error = \
                     utils.upload.check_or_create_upload_dir(dir_path)
 
-                if ret_val == 200:
-                    prev_file = utils.upload.file_exists(path)
-
-                    ret_dict = utils.upload.create_or_update_file(
-                        dir_path, filename, None, self.request.body)
-
-                    if ret_dict["status"] == 200 or ret_dict["status"] == 201:
-                        if prev_file:
-                            response.status_code = 200
-                            response.reason = (
-                                "File '%s' replaced with new content" %
-                                filename)
-                        else:
-                            response.reason = "File '%s' saved" % filename
-                            location = self._create_storage_url(path)
-                            if location is not None:
-                                response.headers = {"Location": location}
-                    else:
-                        response.status_code = ret_dict["status"]
-                        response.reason = "Unable to save file"
-
-                    response.result = [ret_dict]
-                else:
-                    response.status_code = ret_val
+                if ret_val != 200:
+                    response = hresponse.HandlerResponse(ret_val)
                     response.reason = error
             else:
-                response.status_code = 500
+                response = hresponse.HandlerResponse(500)
                 response.reason = (
                     "Cannot save file at the provided '%s' destination" % path)
         else:
-            response.status_code = 400
+            response = hresponse.HandlerResponse(400)
             response.reason = "Missing destination path"
 
+        return response, path
+
+    def _put_response(self, path, ret_dict):
+        """Create the response of a PUT request.
+
+        :param path: The path of the file.
+        :type path: str
+        :param ret_dict: The result of the upload.
+        :type ret_dict: dict
+        :return A `HandlerResponse` object.
+        """
+        response = hresponse.HandlerResponse(201)
+        filename = os.path.basename(path)
+
+        if ret_dict["status"] == 200:
+            response.status_code = 200
+            response.reason = "File '%s' replaced with new content" % filename
+        elif ret_dict["status"] == 201:
+            response.reason = "File '%s' saved" % filename
+            location = self._create_storage_url(path)
+            if location is not None:
+                response.headers = {"Location": location}
+        else:
+            response.status_code = ret_dict["status"]
+            response.reason = "Unable to save file"
+
+        response.result = [ret_dict]
+        return response
+
+    def _put(self, *args, **kwargs):
+        if self._upload_file is not None:
+            # The body has already been written.
+            response = self._put_response(
+                self._upload_file.file_path, self._upload_file.close())
+            self._upload_file = None
+        else:
+            response, path = self._check_put_path(kwargs.get("path", None))
+            if response is None:
+                response = self._put_response(
+                    path,
+                    utils.upload.create_or_update_file(
+                        os.path.dirname(path),
+                        os.path.basename(path),
+                        None, self.request.body, blob_path=self.blob_path)
+                )
+
         return response
 
     def _create_storage_url(self, path):
@@ -232,7 +351,7 @@ class UploadHandler(hbase.BaseHandler):
                     path,
                     u_file[0]["filename"],
                     u_file[0]["content_type"],
-                    u_file[0]["body"]
+                    u_file[0]["body"], blob_path=self.blob_path
                 )
                 for u_file in self.request.files.itervalues()
             ]
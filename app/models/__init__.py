@@ -22,6 +22,7 @@ I18N_DOMAIN = "kernelci-backend"
 # The default ID key, and other keys, for mongodb documents and queries.
 ACCEPTED_KEYS = "accepted"
 ADDRESS_KEY = "address"
+AFTER_KEY = "after"
 AGGREGATE_KEY = "aggregate"
 ARCHITECTURE_KEY = "arch"
 ARM64_ARCHITECTURE_KEY = "arm64"
@@ -109,9 +110,11 @@ MISMATCHES_KEY = "mismatches"
 MODULES_DIR_KEY = "modules_dir"
 MODULES_KEY = "modules"
 NAME_KEY = "name"
+NEXT_KEY = "next"
 NOT_FIELD_KEY = "nfield"
 PARAMETERS_KEY = "parameters"
 PRIVATE_KEY = "private"
+PROFILE_KEY = "profile"
 PROPERTIES_KEY = "properties"
 QEMU_COMMAND_KEY = "qemu_command"
 QEMU_KEY = "qemu"
@@ -209,6 +212,10 @@ TEST_CASE_COLLECTION = "test_case"
 TEST_SET_COLLECTION = "test_set"
 ERROR_LOGS_COLLECTION = "error_logs"
 ERRORS_SUMMARY_COLLECTION = "errors_summary"
+CACHE_VERSION_COLLECTION = "cache_version"
+METRICS_COLLECTION = "metrics"
+TASK_LEASE_COLLECTION = "task_lease"
+SUMMARY_COLLECTION = "summary"
 
 # Report types.
 BUILD_REPORT = "build"
@@ -20,18 +20,23 @@ import concurrent.futures
 import os
 import pymongo
 import tornado
-import tornado.httpserver
 import tornado.netutil
 import tornado.options as topt
 import tornado.web
 import uuid
 
 import handlers.app as happ
+import handlers.common as hcommon
 import handlers.dbindexes as hdbindexes
 import urls
+import utils.asyncdb
+import utils.db
+import utils.httpserver
+import utils.prefork
 
 
 DEFAULT_CONFIG_FILE = "/etc/linaro/kernelci-backend.cfg"
+UNIX_SOCKET = "/tmp/kernelci-backend.socket"
 
 topt.define(
     "master_key", default=str(uuid.uuid4()), type=str, help="The master key")
@@ -67,6 +72,39 @@ topt.define(
     "unixsocket", default=False, type=bool,
     help="If unix socket should be used"
 )
+topt.define(
+    "processes", default=1, type=int,
+    help="The number of server processes to fork, all listening on the same "
+         "port or unix socket; 0 to use the number of CPUs. With more than "
+         "one process, debug and autoreload are disabled"
+)
+topt.define(
+    "max_restarts", default=utils.prefork.DEFAULT_MAX_RESTARTS, type=int,
+    help="How many times server processes can die unexpectedly before "
+         "giving up"
+)
+topt.define(
+    "shutdown_timeout", default=utils.prefork.DEFAULT_SHUTDOWN_TIMEOUT,
+    type=int,
+    help="How long, in seconds, requests in progress have to complete when "
+         "a forked server process is stopped with SIGTERM; it has no effect "
+         "with a single process"
+)
+topt.define(
+    "count_mode", default=utils.db.COUNT_EXACT, type=str,
+    help="How documents are counted when listing a collection: one of %s" %
+         ", ".join(utils.db.COUNT_MODES)
+)
+topt.define(
+    "stream_chunk_size", default=1000, type=int,
+    help="How many documents to send in each chunk when streaming large "
+         "list results, 0 to disable streaming"
+)
+topt.define(
+    "async_db", default=False, type=bool,
+    help="If GET requests should use the asynchronous mongodb driver "
+         "(requires motor) instead of the thread pool executor"
+)
 topt.define(
     "smtp_host", default="", type=str, help="The SMTP host to connect to")
 topt.define("smtp_user", default="", type=str, help="SMTP connection user")
@@ -94,7 +132,39 @@ topt.define(
     help="The URL of the storage system")
 topt.define(
     "buffer_size", default=1024*1024*500, type=int,
-    help="The body buffer size for uploading files")
+    help="The maximum size of a request body; the body of a PUT upload is "
+         "written to disk as it arrives instead of being buffered")
+topt.define(
+    "count_cache_ttl", default=hcommon.COUNT_CACHE_TTL, type=int,
+    help="How long, in seconds, the result of a filtered count request is "
+         "cached, 0 to disable the cache")
+topt.define(
+    "blob_path", default=None, type=str,
+    help="The path of the content-addressed store used to deduplicate the "
+         "uploaded files, it must be on the same file system of the storage; "
+         "if not set, uploaded files are not deduplicated")
+topt.define(
+    "response_cache_size", default=hcommon.RESPONSE_CACHE_SIZE, type=int,
+    help="The number of GET responses to keep in the in-process cache, "
+         "0 to disable the cache")
+topt.define(
+    "response_cache_ttl", default=hcommon.RESPONSE_CACHE_TTL, type=int,
+    help="How long, in seconds, a cached GET response is valid")
+topt.define(
+    "slow_query_threshold", default=0, type=int,
+    help="Log the database read operations slower than this value, in "
+         "milliseconds, with their query plan; 0 to disable the log")
+topt.define(
+    "profile_dir", default=None, type=str,
+    help="Where to save the profiling data of the requests profiled with the "
+         "'profile' query argument (admin tokens only)")
+topt.define(
+    "token_cache_size", default=hcommon.TOKEN_CACHE_SIZE, type=int,
+    help="The number of API tokens to keep in the in-process cache, "
+         "0 to disable the cache")
+topt.define(
+    "token_cache_ttl", default=hcommon.TOKEN_CACHE_TTL, type=int,
+    help="How long, in seconds, a cached API token is valid")
 
 
 class KernelCiBackend(tornado.web.Application):
@@ -132,8 +202,22 @@ class KernelCiBackend(tornado.web.Application):
                 w="majority"
             )
 
+        count_mode = topt.options.count_mode
+        if count_mode not in utils.db.COUNT_MODES:
+            utils.LOG.warn(
+                "Unknown count mode '%s', using '%s'",
+                count_mode, utils.db.COUNT_EXACT)
+            count_mode = utils.db.COUNT_EXACT
+
+        async_client = None
+        if topt.options.async_db:
+            async_client = utils.asyncdb.get_client(db_options)
+
         settings = {
+            "async_client": async_client,
+            "blob_path": topt.options.blob_path,
             "client": self.mongodb_client,
+            "count_mode": count_mode,
             "dboptions": db_options,
             "mailoptions": mail_options,
             "default_handler_class": happ.AppHandler,
@@ -142,13 +226,24 @@ class KernelCiBackend(tornado.web.Application):
             "gzip": topt.options.gzip,
             "debug": topt.options.debug,
             "master_key": topt.options.master_key,
+            "profile_dir": topt.options.profile_dir,
             "autoreload": topt.options.autoreload,
             "senddelay": topt.options.send_delay,
             "storage_url": topt.options.storage_url,
+            "stream_chunk_size": topt.options.stream_chunk_size,
             "max_buffer_size": topt.options.buffer_size
         }
 
         hdbindexes.ensure_indexes(self.mongodb_client, db_options)
+        hcommon.TOKEN_CACHE.configure(
+            max_size=topt.options.token_cache_size,
+            ttl=topt.options.token_cache_ttl)
+        hcommon.RESPONSE_CACHE.configure(
+            max_size=topt.options.response_cache_size,
+            ttl=topt.options.response_cache_ttl)
+        hcommon.COUNT_CACHE.configure(ttl=topt.options.count_cache_ttl)
+        utils.db.set_slow_operation_threshold(
+            topt.options.slow_query_threshold)
 
         super(KernelCiBackend, self).__init__(urls.APP_URLS, **settings)
 
@@ -165,14 +260,33 @@ if __name__ == "__main__":
         "max_buffer_size": topt.options.buffer_size
     }
 
+    # Bind the sockets before forking: all the processes share them.
     if topt.options.unixsocket:
-        application = KernelCiBackend()
-
-        server = tornado.httpserver.HTTPServer(application, **HTTP_SETTINGS)
-        unix_socket = tornado.netutil.bind_unix_socket(
-            "/tmp/kernelci-backend.socket")
-        server.add_socket(unix_socket)
+        sockets = [tornado.netutil.bind_unix_socket(UNIX_SOCKET)]
     else:
-        KernelCiBackend().listen(topt.options.port, **HTTP_SETTINGS)
+        sockets = tornado.netutil.bind_sockets(topt.options.port)
+
+    processes = utils.prefork.num_processes(topt.options.processes)
+    if processes > 1:
+        topt.options.debug = False
+        topt.options.autoreload = False
+        utils.prefork.fork_workers(
+            processes, max_restarts=topt.options.max_restarts)
+
+    # The application, with its database clients and executor, has to be
+    # created after the fork.
+    application = KernelCiBackend()
+
+    # The server streams the request bodies of the uploads to disk.
+    server = utils.httpserver.HTTPServer(application, **HTTP_SETTINGS)
+    server.add_sockets(sockets)
+
+    # Only the forked workers stop gracefully: a single process keeps the
+    # default SIGTERM behavior.
+    if processes > 1:
+        utils.prefork.install_shutdown_handler(
+            server,
+            executor=application.settings["executor"],
+            timeout=topt.options.shutdown_timeout)
 
     tornado.ioloop.IOLoop.instance().start()
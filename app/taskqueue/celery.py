@@ -16,15 +16,30 @@
 from __future__ import absolute_import
 
 import celery
+import celery.signals
 import kombu.serialization
 import os
+import pymongo.errors
+import socket
+import time
 
 import taskqueue.celeryconfig as celeryconfig
 import taskqueue.serializer as serializer
+import utils
+import utils.db
+import utils.metrics
 
 
 TASKS_LIST = ["taskqueue.tasks"]
 
+# How often, in seconds, a worker process saves its metrics.
+METRICS_SNAPSHOT_INTERVAL = 60
+
+# When the running tasks started, by task ID.
+TASK_START_TIMES = {}
+# When the metrics have been saved the last time.
+_LAST_SNAPSHOT = [0]
+
 # Register the custom decoder/encoder for celery with the name "kjson".
 # This is in all effect a JSON format, with some extensions.
 kombu.serialization.register(
@@ -46,5 +61,40 @@ if os.environ.get("CELERY_CONFIG_MODULE", None):
     app.config_from_envar("CELERY_CONFIG_MODULE")
 
 
+@celery.signals.task_prerun.connect
+def _task_prerun(task_id=None, **kwargs):
+    """Record when a task starts."""
+    TASK_START_TIMES[task_id] = time.time()
+
+
+@celery.signals.task_postrun.connect
+def _task_postrun(task_id=None, task=None, state=None, **kwargs):
+    """Measure how long a task took and save the metrics.
+
+    The metrics are saved at most every `METRICS_SNAPSHOT_INTERVAL` seconds,
+    using the database connection of the tasks: if no task has connected to
+    the database yet, nothing is saved.
+    """
+    start = TASK_START_TIMES.pop(task_id, None)
+    if start is not None:
+        now = time.time()
+        utils.metrics.METRICS.observe(
+            utils.metrics.TASKS, task.name, now - start)
+        utils.LOG.info(
+            "Task '%s' (%s) finished with state %s in %.3f seconds",
+            task.name, task_id, state, now - start)
+
+        database = utils.db.DB_CONNECTION
+        if all([database is not None,
+                now - _LAST_SNAPSHOT[0] >= METRICS_SNAPSHOT_INTERVAL]):
+            _LAST_SNAPSHOT[0] = now
+            try:
+                utils.metrics.save_snapshot(
+                    database,
+                    "%s:%d" % (socket.gethostname(), os.getpid()))
+            except pymongo.errors.PyMongoError, ex:
+                utils.LOG.warn("Error saving the worker metrics: %s", ex)
+
+
 if __name__ == "__main__":
     app.start()
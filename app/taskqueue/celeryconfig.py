@@ -30,3 +30,19 @@ CELERY_IGNORE_RESULT = True
 CELERY_DISABLE_RATE_LIMITS = True
 # Use a different DB than the redis default one.
 CELERY_RESULT_BACKEND = "redis://localhost/1"
+# How many processes each parse-build-log task can use to parse the logs of
+# the different defconfigs in parallel. 1 disables the parallel parsing.
+BUILD_LOG_PARSER_PROCESSES = 1
+# How many test cases are saved with a single bulk write when importing the
+# test cases of a test suite or a test set.
+TEST_CASES_BULK_CHUNK_SIZE = 1000
+# How long, in seconds, a job import can hold the lease on its job-kernel
+# before another worker is allowed to take it over.
+TASK_LEASE_TIME = 60 * 60
+# The bisects calculated after the imports run on their own queue: the
+# workers must consume it as well, with "-Q celery,bisect", or dedicated
+# workers must be started with "-Q bisect".
+CELERY_ROUTES = {
+    "update-boot-bisects": {"queue": "bisect"},
+    "update-defconfig-bisects": {"queue": "bisect"}
+}
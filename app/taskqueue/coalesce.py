@@ -0,0 +1,227 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Coalescing of the task runs for the same resource.
+
+A task that should never run more than once at the same time for the same
+resource (for example, the import of a job-kernel) takes a lease on it: a
+document in the database, identified by a key built from the resource.
+
+While a run is pending or in progress, new requests to run the task are
+counted on the lease document instead of being queued. When the running task
+releases the lease, if new requests came in the meantime, a single
+follow-up run is queued with the arguments of the last request.
+
+Leases expire: if a worker dies while holding one, a new request or another
+worker can take it over after `lease_time` seconds.
+"""
+
+import bson.tz_util
+import datetime
+import pymongo.errors
+
+import models
+import utils
+
+# How long, in seconds, a lease is valid.
+DEFAULT_LEASE_TIME = 60 * 60
+
+# The fields of the lease documents.
+ARGUMENTS_KEY = "arguments"
+EXPIRES_KEY = "expires_on"
+OWNER_KEY = "owner"
+REQUESTS_KEY = "requests"
+
+# How many times the request of a run is attempted if the lease is released
+# at the same time.
+_REQUEST_ATTEMPTS = 3
+
+
+def job_key(job, kernel):
+    """The lease key of the import of a job-kernel.
+
+    :param job: The job name.
+    :type job: str
+    :param kernel: The kernel name.
+    :type kernel: str
+    :return The key as a string.
+    """
+    return "import-job:%s-%s" % (job, kernel)
+
+
+def _now():
+    """The current time, in UTC.
+
+    :return A datetime.
+    """
+    return datetime.datetime.now(tz=bson.tz_util.utc)
+
+
+def _expires_on(lease_time):
+    """When a lease taken now expires.
+
+    :param lease_time: The lease duration in seconds.
+    :type lease_time: int
+    :return A datetime.
+    """
+    return _now() + datetime.timedelta(seconds=lease_time)
+
+
+def request_run(database, key, arguments, lease_time=DEFAULT_LEASE_TIME):
+    """Request a run of the task identified by the key.
+
+    :param database: The database connection.
+    :param key: The lease key.
+    :type key: str
+    :param arguments: The arguments of the task, used for the follow-up run.
+    :param lease_time: The lease duration in seconds.
+    :type lease_time: int
+    :return True if the caller has to queue the task, False if the request
+    has been merged with a run already pending or in progress.
+    """
+    collection = database[models.TASK_LEASE_COLLECTION]
+
+    for _ in range(_REQUEST_ATTEMPTS):
+        try:
+            collection.insert({
+                models.ID_KEY: key,
+                ARGUMENTS_KEY: arguments,
+                EXPIRES_KEY: _expires_on(lease_time),
+                OWNER_KEY: None,
+                REQUESTS_KEY: 1
+            })
+            return True
+        except pymongo.errors.DuplicateKeyError:
+            pass
+
+        # The pending or running task has been lost.
+        prev_doc = collection.find_and_modify(
+            {models.ID_KEY: key, EXPIRES_KEY: {"$lt": _now()}},
+            {
+                "$set": {
+                    ARGUMENTS_KEY: arguments,
+                    EXPIRES_KEY: _expires_on(lease_time),
+                    OWNER_KEY: None
+                },
+                "$inc": {REQUESTS_KEY: 1}
+            }
+        )
+        if prev_doc:
+            utils.LOG.warn("Lease '%s' expired, taking it over", key)
+            return True
+
+        prev_doc = collection.find_and_modify(
+            {models.ID_KEY: key},
+            {"$set": {ARGUMENTS_KEY: arguments}, "$inc": {REQUESTS_KEY: 1}}
+        )
+        if prev_doc:
+            utils.LOG.info("Run of '%s' already pending, request merged", key)
+            return False
+
+    # The lease keeps being released: queue the task anyway, it will take
+    # the lease before running.
+    return True
+
+
+def acquire(database, key, owner, lease_time=DEFAULT_LEASE_TIME):
+    """Take the lease before running the task.
+
+    If the lease is held by someone else, the request is counted on it so
+    that the holder runs the task again when done.
+
+    :param database: The database connection.
+    :param key: The lease key.
+    :type key: str
+    :param owner: The unique name of who takes the lease.
+    :type owner: str
+    :param lease_time: The lease duration in seconds.
+    :type lease_time: int
+    :return The lease document, or None if the lease is held by someone
+    else.
+    """
+    collection = database[models.TASK_LEASE_COLLECTION]
+
+    lease = collection.find_and_modify(
+        {
+            models.ID_KEY: key,
+            "$or": [{OWNER_KEY: None}, {EXPIRES_KEY: {"$lt": _now()}}]
+        },
+        {"$set": {OWNER_KEY: owner, EXPIRES_KEY: _expires_on(lease_time)}},
+        new=True
+    )
+
+    if lease is None:
+        # No run has been requested, the task has been queued directly.
+        lease = {
+            models.ID_KEY: key,
+            ARGUMENTS_KEY: None,
+            EXPIRES_KEY: _expires_on(lease_time),
+            OWNER_KEY: owner,
+            REQUESTS_KEY: 0
+        }
+        try:
+            collection.insert(lease)
+        except pymongo.errors.DuplicateKeyError:
+            lease = None
+            utils.LOG.info("Lease '%s' held by another worker", key)
+            collection.update(
+                {models.ID_KEY: key}, {"$inc": {REQUESTS_KEY: 1}})
+
+    return lease
+
+
+def release(database, key, lease, lease_time=DEFAULT_LEASE_TIME):
+    """Release the lease after the task has run.
+
+    :param database: The database connection.
+    :param key: The lease key.
+    :type key: str
+    :param lease: The lease document as returned by `acquire`.
+    :type lease: dict
+    :param lease_time: The lease duration in seconds.
+    :type lease_time: int
+    :return The lease document if a follow-up run has to be queued, None
+    otherwise. The arguments of the last request are in the document.
+    """
+    collection = database[models.TASK_LEASE_COLLECTION]
+    owner = lease[OWNER_KEY]
+    seen = lease[REQUESTS_KEY]
+
+    removed = collection.find_and_modify(
+        {models.ID_KEY: key, OWNER_KEY: owner, REQUESTS_KEY: seen},
+        remove=True
+    )
+
+    if not removed:
+        # New requests came in while running: the lease is kept for the
+        # follow-up run.
+        lease = collection.find_and_modify(
+            {models.ID_KEY: key, OWNER_KEY: owner},
+            {
+                "$set": {
+                    OWNER_KEY: None, EXPIRES_KEY: _expires_on(lease_time)},
+                "$inc": {REQUESTS_KEY: -seen}
+            },
+            new=True
+        )
+
+        if lease:
+            utils.LOG.info(
+                "%d requests for '%s' while running, queueing a new run",
+                lease[REQUESTS_KEY], key)
+        else:
+            utils.LOG.warn("Lease '%s' expired while running", key)
+    else:
+        lease = None
+
+    return lease
@@ -16,14 +16,11 @@
 The following module defines two custom functions to serialize and deserialize
 JSON objects that use BSON notation. These functions are intended to be used
 as the defual encoder/decoder functions that Celery uses to send messages.
-"""
 
-try:
-    import simplejson as json
-except ImportError:
-    import json
+The BSON types use the `bson.json_util` format, see `utils.kjson`.
+"""
 
-import bson
+import utils.kjson
 
 
 def kernelci_json_encoder(obj):
@@ -33,12 +30,7 @@ def kernelci_json_encoder(obj):
     :type obj: dict
     :return A unicode string.
     """
-    return json.dumps(
-        obj,
-        default=bson.json_util.default,
-        ensure_ascii=False,
-        separators=(",", ":")
-    )
+    return utils.kjson.dumps(obj)
 
 
 def kernelci_json_decoder(obj):
@@ -48,4 +40,4 @@ def kernelci_json_decoder(obj):
     :type obj: string or unicode
     :return A JSON object.
     """
-    return json.loads(obj, object_hook=bson.json_util.object_hook)
+    return utils.kjson.loads(obj)
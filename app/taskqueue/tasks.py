@@ -16,9 +16,13 @@
 from __future__ import absolute_import
 
 import celery
+import celery.exceptions
+import time
+import uuid
 
 import models
 import taskqueue.celery as taskc
+import taskqueue.coalesce as coalesce
 import utils
 import utils.batch.common
 import utils.bisect.boot as bootb
@@ -33,6 +37,23 @@ import utils.report.build
 import utils.report.common
 import utils.tests_import as tests_import
 
+# Default time, in seconds, to wait for the results of a batch request.
+BATCH_TIMEOUT = 60
+# Interval, in seconds, between each check for the result of a batch operation.
+BATCH_POLL_INTERVAL = 0.05
+
+
+def _invalidate_responses(db_options, collections):
+    """Invalidate the responses the API servers cached for the collections.
+
+    :param db_options: The database connection parameters.
+    :type db_options: dictionary
+    :param collections: The names of the changed collections.
+    :type collections: list
+    """
+    utils.db.bump_cache_versions(
+        utils.db.get_db_connection(db_options), collections)
+
 
 @taskc.app.task(name="import-job")
 def import_job(json_obj, db_options, mail_options=None):
@@ -48,7 +69,13 @@ def import_job(json_obj, db_options, mail_options=None):
     :param mail_options: The options necessary to connect to the SMTP server.
     :type mail_options: dictionary
     """
-    return utils.docimport.import_and_save_job(json_obj, db_options)
+    job_id = utils.docimport.import_and_save_job(json_obj, db_options)
+    if job_id is not None:
+        _invalidate_responses(
+            db_options, [models.JOB_COLLECTION, models.DEFCONFIG_COLLECTION])
+        update_defconfig_bisects.apply_async([job_id, db_options])
+
+    return job_id
 
 
 @taskc.app.task(name="parse-build-log")
@@ -67,7 +94,88 @@ def parse_build_log(job_id, json_obj, db_options, mail_options=None):
     :param mail_options: The options necessary to connect to the SMTP server.
     :type mail_options: dictionary
     """
-    return utils.log_parser.parse_build_log(job_id, json_obj, db_options)
+    return utils.log_parser.parse_build_log(
+        job_id,
+        json_obj,
+        db_options,
+        processes=taskc.app.conf.get("BUILD_LOG_PARSER_PROCESSES", 1))
+
+
+def request_job_import(database, json_obj, db_options):
+    """Queue the import of a job and the parsing of its build logs.
+
+    If an import of the same job-kernel is already pending or in progress,
+    the request is merged with it: a single follow-up import is run when the
+    current one is done.
+
+    :param database: The database connection.
+    :param json_obj: The JSON object with the values necessary to import the
+    job.
+    :type json_obj: dictionary
+    :param db_options: The database connection parameters.
+    :type db_options: dictionary
+    :return True if the import has been queued, False if it has been merged
+    with a pending one.
+    """
+    key = coalesce.job_key(
+        json_obj[models.JOB_KEY], json_obj[models.KERNEL_KEY])
+
+    queued = coalesce.request_run(
+        database, key, json_obj, lease_time=_lease_time())
+    if queued:
+        import_and_parse_job.apply_async([json_obj, db_options])
+
+    return queued
+
+
+def _lease_time():
+    """The duration, in seconds, of the leases taken by the tasks."""
+    return taskc.app.conf.get("TASK_LEASE_TIME", coalesce.DEFAULT_LEASE_TIME)
+
+
+def _bulk_chunk_size():
+    """How many test cases are saved with a single bulk write."""
+    return taskc.app.conf.get(
+        "TEST_CASES_BULK_CHUNK_SIZE", tests_import.BULK_CHUNK_SIZE)
+
+
+@taskc.app.task(name="import-and-parse-job")
+def import_and_parse_job(json_obj, db_options, mail_options=None):
+    """Import a job and parse its build logs.
+
+    Only one worker at a time imports the same job-kernel: the import runs
+    while holding a lease on it. If other imports have been requested in the
+    meantime, a single new one is queued at the end.
+
+    :param json_obj: The JSON object with the values necessary to import the
+    job.
+    :type json_obj: dictionary
+    :param db_options: The database connection parameters.
+    :type db_options: dictionary
+    :param mail_options: The options necessary to connect to the SMTP server.
+    :type mail_options: dictionary
+    :return The ID of the job, or None if it has not been imported.
+    """
+    job_id = None
+    database = utils.db.get_db_connection(db_options)
+    key = coalesce.job_key(
+        json_obj[models.JOB_KEY], json_obj[models.KERNEL_KEY])
+    lease_time = _lease_time()
+
+    lease = coalesce.acquire(database, key, uuid.uuid4().hex, lease_time)
+    if lease:
+        try:
+            job_id = import_job(json_obj, db_options, mail_options)
+            parse_build_log(job_id, json_obj, db_options, mail_options)
+        finally:
+            lease = coalesce.release(database, key, lease, lease_time)
+            if lease:
+                import_and_parse_job.apply_async(
+                    [lease[coalesce.ARGUMENTS_KEY] or json_obj, db_options])
+    else:
+        utils.LOG.info("Import of '%s' already in progress", key)
+
+    return job_id
 
 
 @taskc.app.task(name="import-boot")
@@ -84,7 +192,37 @@ def import_boot(json_obj, db_options, mail_options=None):
     :param mail_options: The options necessary to connect to the SMTP server.
     :type mail_options: dictionary
     """
-    return utils.bootimport.import_and_save_boot(json_obj, db_options)
+    ret_code, doc_id = utils.bootimport.import_and_save_boot(
+        json_obj, db_options)
+    if doc_id is not None:
+        _invalidate_responses(db_options, [models.BOOT_COLLECTION])
+        update_boot_bisects.apply_async([[doc_id], db_options])
+
+    return ret_code, doc_id
+
+
+@taskc.app.task(name="import-boots")
+def import_boots(json_list, db_options, mail_options=None):
+    """Just a wrapper around the real multiple boots import function.
+
+    This is used to provide a Celery-task access to the import function.
+
+    :param json_list: The list of JSON objects with the values necessary to
+    import the boot reports.
+    :type json_list: list
+    :param db_options: The database connection parameters.
+    :type db_options: dictionary
+    :param mail_options: The options necessary to connect to the SMTP server.
+    :type mail_options: dictionary
+    """
+    ret_code, doc_ids = utils.bootimport.import_and_save_boots(
+        json_list, db_options)
+    saved_ids = [doc_id for doc_id in doc_ids if doc_id is not None]
+    if saved_ids:
+        _invalidate_responses(db_options, [models.BOOT_COLLECTION])
+        update_boot_bisects.apply_async([saved_ids, db_options])
+
+    return ret_code, doc_ids
 
 
 @taskc.app.task(name="batch-executor", ignore_result=False)
@@ -100,6 +238,40 @@ def execute_batch(json_obj, db_options):
     return utils.batch.common.execute_batch_operation(json_obj, db_options)
 
 
+@taskc.app.task(name="update-boot-bisects")
+def update_boot_bisects(boot_ids, db_options):
+    """Update the saved boot bisects after boot reports have been imported.
+
+    The bisects of the failed boot reports are calculated in advance, so that
+    they can be retrieved without waiting. This task runs on the `bisect`
+    queue.
+
+    :param boot_ids: The IDs of the imported boot reports.
+    :type boot_ids: list
+    :param db_options: The database connection parameters.
+    :type db_options: dictionary
+    :return The number of bisects calculated.
+    """
+    return bootb.update_boot_bisections(boot_ids, db_options)
+
+
+@taskc.app.task(name="update-defconfig-bisects")
+def update_defconfig_bisects(job_id, db_options):
+    """Update the saved defconfig bisects after a job has been imported.
+
+    The bisects of the failed defconfigs are calculated in advance, so that
+    they can be retrieved without waiting. This task runs on the `bisect`
+    queue.
+
+    :param job_id: The ID of the imported job.
+    :type job_id: string
+    :param db_options: The database connection parameters.
+    :type db_options: dictionary
+    :return The number of bisects calculated.
+    """
+    return defconfigb.update_defconfig_bisections(job_id, db_options)
+
+
 @taskc.app.task(name="boot-bisect", ignore_result=False)
 def boot_bisect(doc_id, db_options, fields=None):
     """Run a boot bisect operation on the passed boot document id.
@@ -343,7 +515,9 @@ def import_test_sets_from_test_suite(
 
     if all([prev_val == 200, suite_id]):
         test_ids, errors = tests_import.import_multi_test_sets(
-            tests_list, suite_id, db_options, **other_args)
+            tests_list,
+            suite_id,
+            db_options, chunk_size=_bulk_chunk_size(), **other_args)
 
         if test_ids:
             utils.LOG.info(
@@ -395,8 +569,10 @@ def import_test_cases_from_test_suite(
     other_args = prev_results[1]
 
     if all([prev_val == 200, suite_id]):
-        test_ids, errors = tests_import.import_multi_test_cases(
-            tests_list, suite_id, db_options, **other_args)
+        test_ids, errors = tests_import.import_multi_test_cases_bulk(
+            tests_list,
+            suite_id,
+            db_options, chunk_size=_bulk_chunk_size(), **other_args)
 
         if test_ids:
             utils.LOG.info(
@@ -437,25 +613,109 @@ def import_test_cases_from_test_set(
     empty one.
     """
     return tests_import.import_test_cases_from_test_set(
-        set_id, suite_id, tests_list, db_options, **kwargs)
+        set_id,
+        suite_id,
+        tests_list, db_options, chunk_size=_bulk_chunk_size(), **kwargs)
 
 
-def run_batch_group(batch_op_list, db_options):
+def run_batch_group(batch_op_list, db_options, timeout=BATCH_TIMEOUT):
     """Execute a list of batch operations.
 
+    Cheap read-only operations are executed directly, all the others are
+    sent to the Celery workers as a group.
+
+    The results of the group are collected waiting on each sub-task until the
+    overall `timeout` expires: operations that have not completed by then, or
+    that failed, are returned as errors together with the completed ones.
+
     :param batch_op_list: List of JSON object used to build the batch
     operation.
     :type batch_op_list: list
     :param db_options: The database connection parameters.
     :type db_options: dictionary
+    :param timeout: How long, in seconds, to wait for all the results.
+    :type timeout: int, float
+    :return A list with the results of each operation, in the same order as
+    the provided operations.
+    """
+    results = [None] * len(batch_op_list)
+    remote_ops = []
+
+    for idx, batch_op in enumerate(batch_op_list):
+        if utils.batch.common.is_inline_operation(batch_op):
+            results[idx] = _run_batch_inline(batch_op, db_options)
+        else:
+            remote_ops.append((idx, batch_op))
+
+    if remote_ops:
+        deadline = time.time() + timeout
+        job = celery.group(
+            [
+                execute_batch.s(batch_op, db_options)
+                for _, batch_op in remote_ops
+            ]
+        )
+        group_result = job.apply_async()
+
+        for (idx, batch_op), result in zip(remote_ops, group_result.results):
+            results[idx] = _wait_batch_result(result, batch_op, deadline)
+
+    return results
+
+
+def _run_batch_inline(batch_op, db_options):
+    """Execute a batch operation in the current thread.
+
+    :param batch_op: The JSON object of the batch operation.
+    :type batch_op: dictionary
+    :param db_options: The database connection parameters.
+    :type db_options: dictionary
+    :return The result of the operation, or an error response.
+    """
+    try:
+        result = utils.batch.common.execute_batch_operation(
+            batch_op, db_options)
+    # pylint: disable=broad-except
+    except Exception, ex:
+        utils.LOG.exception(ex)
+        result = utils.batch.common.create_error_response(
+            batch_op, 500, "Error executing the operation")
+
+    return result
+
+
+def _wait_batch_result(result, batch_op, deadline):
+    """Wait for the result of a batch operation sent to the workers.
+
+    The result backend is polled every `BATCH_POLL_INTERVAL` seconds, without
+    spinning, until the result is available or the `deadline` is passed.
+
+    :param result: The result of the Celery task.
+    :type result: celery.result.AsyncResult
+    :param batch_op: The JSON object of the batch operation.
+    :type batch_op: dictionary
+    :param deadline: The time, in seconds since the epoch, after which to stop
+    waiting.
+    :type deadline: float
+    :return The result of the operation, or an error response.
     """
-    job = celery.group(
-        [
-            execute_batch.s(batch_op, db_options)
-            for batch_op in batch_op_list
-        ]
-    )
-    result = job.apply_async()
-    while not result.ready():
-        pass
-    return result.get()
+    # Celery waits forever with a zero timeout: always wait a little bit.
+    timeout = max(deadline - time.time(), BATCH_POLL_INTERVAL)
+
+    try:
+        op_result = result.get(
+            timeout=timeout, interval=BATCH_POLL_INTERVAL, propagate=True)
+    except celery.exceptions.TimeoutError:
+        utils.LOG.warn(
+            "Batch operation '%s' timed out",
+            batch_op.get(models.OP_ID_KEY, None))
+        result.revoke()
+        op_result = utils.batch.common.create_error_response(
+            batch_op, 504, "Operation timed out")
+    # pylint: disable=broad-except
+    except Exception, ex:
+        utils.LOG.exception(ex)
+        op_result = utils.batch.common.create_error_response(
+            batch_op, 500, "Error executing the operation")
+
+    return op_result
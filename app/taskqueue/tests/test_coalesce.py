@@ -0,0 +1,219 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Test module for the task coalescing functions."""
+
+import bson.tz_util
+import datetime
+import logging
+import mock
+import mongomock
+import unittest
+
+import models
+import taskqueue.coalesce as coalesce
+import taskqueue.tasks as taskq
+
+
+class TestCoalesce(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.db = mongomock.Database(mongomock.Connection(), "kernel-ci")
+        self.collection = self.db[models.TASK_LEASE_COLLECTION]
+        self.key = coalesce.job_key("job", "kernel")
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def _expire_lease(self):
+        self.collection.update(
+            {models.ID_KEY: self.key},
+            {
+                "$set": {
+                    coalesce.EXPIRES_KEY: datetime.datetime(
+                        2015, 1, 1, tzinfo=bson.tz_util.utc)
+                }
+            }
+        )
+
+    def test_job_key(self):
+        self.assertEqual("import-job:job-kernel", self.key)
+
+    def test_request_run_first(self):
+        self.assertTrue(coalesce.request_run(self.db, self.key, {"a": 1}))
+
+        lease = self.collection.find_one(self.key)
+        self.assertEqual(1, lease[coalesce.REQUESTS_KEY])
+        self.assertIsNone(lease[coalesce.OWNER_KEY])
+        self.assertDictEqual({"a": 1}, lease[coalesce.ARGUMENTS_KEY])
+
+    def test_request_run_merged(self):
+        self.assertTrue(coalesce.request_run(self.db, self.key, {"a": 1}))
+        self.assertFalse(coalesce.request_run(self.db, self.key, {"a": 2}))
+        self.assertFalse(coalesce.request_run(self.db, self.key, {"a": 3}))
+
+        lease = self.collection.find_one(self.key)
+        self.assertEqual(3, lease[coalesce.REQUESTS_KEY])
+        self.assertDictEqual({"a": 3}, lease[coalesce.ARGUMENTS_KEY])
+
+    def test_request_run_expired(self):
+        coalesce.request_run(self.db, self.key, {"a": 1})
+        self._expire_lease()
+
+        self.assertTrue(coalesce.request_run(self.db, self.key, {"a": 2}))
+        self.assertFalse(coalesce.request_run(self.db, self.key, {"a": 3}))
+
+    def test_acquire_and_release(self):
+        coalesce.request_run(self.db, self.key, {"a": 1})
+
+        lease = coalesce.acquire(self.db, self.key, "worker")
+        self.assertEqual("worker", lease[coalesce.OWNER_KEY])
+        self.assertEqual(1, lease[coalesce.REQUESTS_KEY])
+
+        self.assertIsNone(coalesce.release(self.db, self.key, lease))
+        self.assertIsNone(self.collection.find_one(self.key))
+
+    def test_acquire_without_request(self):
+        lease = coalesce.acquire(self.db, self.key, "worker")
+
+        self.assertEqual("worker", lease[coalesce.OWNER_KEY])
+        self.assertEqual(0, lease[coalesce.REQUESTS_KEY])
+        self.assertIsNone(coalesce.release(self.db, self.key, lease))
+
+    def test_acquire_held(self):
+        coalesce.request_run(self.db, self.key, {"a": 1})
+        lease = coalesce.acquire(self.db, self.key, "worker0")
+
+        self.assertIsNone(coalesce.acquire(self.db, self.key, "worker1"))
+
+        # The holder has to run again.
+        lease = coalesce.release(self.db, self.key, lease)
+        self.assertIsNotNone(lease)
+        self.assertEqual(1, lease[coalesce.REQUESTS_KEY])
+
+    def test_acquire_expired(self):
+        coalesce.request_run(self.db, self.key, {"a": 1})
+        coalesce.acquire(self.db, self.key, "worker0")
+        self._expire_lease()
+
+        lease = coalesce.acquire(self.db, self.key, "worker1")
+        self.assertEqual("worker1", lease[coalesce.OWNER_KEY])
+
+    def test_release_with_new_requests(self):
+        coalesce.request_run(self.db, self.key, {"a": 1})
+        lease = coalesce.acquire(self.db, self.key, "worker")
+
+        self.assertFalse(coalesce.request_run(self.db, self.key, {"a": 2}))
+        self.assertFalse(coalesce.request_run(self.db, self.key, {"a": 3}))
+
+        lease = coalesce.release(self.db, self.key, lease)
+        self.assertEqual(2, lease[coalesce.REQUESTS_KEY])
+        self.assertIsNone(lease[coalesce.OWNER_KEY])
+        self.assertDictEqual({"a": 3}, lease[coalesce.ARGUMENTS_KEY])
+
+        # The follow-up run takes all the pending requests.
+        self.assertFalse(coalesce.request_run(self.db, self.key, {"a": 4}))
+        lease = coalesce.acquire(self.db, self.key, "worker")
+        self.assertEqual(3, lease[coalesce.REQUESTS_KEY])
+        self.assertIsNone(coalesce.release(self.db, self.key, lease))
+
+    def test_release_lost_lease(self):
+        coalesce.request_run(self.db, self.key, {"a": 1})
+        lease = coalesce.acquire(self.db, self.key, "worker0")
+        self._expire_lease()
+        coalesce.acquire(self.db, self.key, "worker1")
+
+        self.assertIsNone(coalesce.release(self.db, self.key, lease))
+        self.assertEqual(
+            "worker1",
+            self.collection.find_one(self.key)[coalesce.OWNER_KEY])
+
+
+class TestImportAndParseJob(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.db = mongomock.Database(mongomock.Connection(), "kernel-ci")
+        self.json_obj = {"job": "job", "kernel": "kernel"}
+
+        patched_db = mock.patch("utils.db.get_db_connection")
+        self.get_db = patched_db.start()
+        self.get_db.return_value = self.db
+
+        patched_import = mock.patch("taskqueue.tasks.import_job")
+        self.import_job = patched_import.start()
+        self.import_job.return_value = "job-id"
+
+        patched_parse = mock.patch("taskqueue.tasks.parse_build_log")
+        self.parse_build_log = patched_parse.start()
+
+        patched_async = mock.patch(
+            "taskqueue.tasks.import_and_parse_job.apply_async")
+        self.apply_async = patched_async.start()
+
+        self.addCleanup(patched_db.stop)
+        self.addCleanup(patched_import.stop)
+        self.addCleanup(patched_parse.stop)
+        self.addCleanup(patched_async.stop)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def test_request_and_run(self):
+        self.assertTrue(taskq.request_job_import(self.db, self.json_obj, {}))
+        self.assertFalse(
+            taskq.request_job_import(self.db, self.json_obj, {}))
+        self.assertEqual(1, self.apply_async.call_count)
+
+        job_id = taskq.import_and_parse_job(self.json_obj, {})
+
+        self.assertEqual("job-id", job_id)
+        self.import_job.assert_called_once_with(self.json_obj, {}, None)
+        self.parse_build_log.assert_called_once_with(
+            "job-id", self.json_obj, {}, None)
+        # All the requests have been served by the same run.
+        self.assertEqual(1, self.apply_async.call_count)
+        self.assertEqual(
+            0, self.db[models.TASK_LEASE_COLLECTION].count())
+
+    def test_follow_up_run(self):
+        taskq.request_job_import(self.db, self.json_obj, {})
+
+        def _new_request(*args):
+            new_obj = {"job": "job", "kernel": "kernel", "git_branch": "b"}
+            self.assertFalse(taskq.request_job_import(self.db, new_obj, {}))
+            return "job-id"
+
+        self.import_job.side_effect = _new_request
+
+        taskq.import_and_parse_job(self.json_obj, {})
+
+        self.assertEqual(2, self.apply_async.call_count)
+        self.assertEqual(
+            "b", self.apply_async.call_args[0][0][0]["git_branch"])
+
+    def test_release_on_error(self):
+        self.parse_build_log.side_effect = ValueError
+
+        self.assertRaises(
+            ValueError, taskq.import_and_parse_job, self.json_obj, {})
+        self.assertEqual(
+            0, self.db[models.TASK_LEASE_COLLECTION].count())
+
+    def test_lease_held(self):
+        coalesce.acquire(
+            self.db, coalesce.job_key("job", "kernel"), "other-worker")
+
+        self.assertIsNone(taskq.import_and_parse_job(self.json_obj, {}))
+        self.assertFalse(self.import_job.called)
@@ -23,6 +23,7 @@ def test_modules():
         "handlers.tests.test_batch_handler",
         "handlers.tests.test_bisect_handler",
         "handlers.tests.test_boot_handler",
+        "handlers.tests.test_boot_bulk_handler",
         "handlers.tests.test_boot_trigger_handler",
         "handlers.tests.test_count_handler",
         "handlers.tests.test_defconf_handler",
@@ -30,6 +31,7 @@ def test_modules():
         "handlers.tests.test_handlers_common",
         "handlers.tests.test_job_handler",
         "handlers.tests.test_lab_handler",
+        "handlers.tests.test_metrics_handler",
         "handlers.tests.test_report_handler",
         "handlers.tests.test_send_handler",
         "handlers.tests.test_test_case_handler",
@@ -50,6 +52,7 @@ def test_modules():
         "models.tests.test_test_set_model",
         "models.tests.test_test_suite_model",
         "models.tests.test_token_model",
+        "taskqueue.tests.test_coalesce",
         "utils.batch.tests.test_batch_common",
         "utils.bisect.tests.test_bisect",
         "utils.report.tests.test_boot_report",
@@ -57,8 +60,15 @@ def test_modules():
         "utils.report.tests.test_report_common",
         "utils.tests.test_base",
         "utils.tests.test_bootimport",
+        "utils.tests.test_cache",
+        "utils.tests.test_db",
         "utils.tests.test_docimport",
+        "utils.tests.test_httpserver",
+        "utils.tests.test_kjson",
         "utils.tests.test_log_parser",
+        "utils.tests.test_metrics",
+        "utils.tests.test_prefork",
+        "utils.tests.test_summary",
         "utils.tests.test_tests_import",
         "utils.tests.test_upload",
         "utils.tests.test_validator"
@@ -18,11 +18,13 @@ import tornado.web
 import handlers.batch
 import handlers.bisect
 import handlers.boot
+import handlers.boot_bulk
 import handlers.boot_trigger
 import handlers.count
 import handlers.defconf
 import handlers.job
 import handlers.lab
+import handlers.metrics
 import handlers.report
 import handlers.send
 import handlers.test_case
@@ -44,6 +46,11 @@ _DEFCONF_URL = tornado.web.url(
 _BOOT_URL = tornado.web.url(
     r"/boot[s]?/?(?P<id>.*)", handlers.boot.BootHandler, name="boot"
 )
+_BOOT_BULK_URL = tornado.web.url(
+    r"/bulk/boot[s]?/?",
+    handlers.boot_bulk.BootBulkHandler,
+    name="boot-bulk"
+)
 _COUNT_URL = tornado.web.url(
     r"/count[s]?/?(?P<id>.*)", handlers.count.CountHandler, name="count"
 )
@@ -64,6 +71,9 @@ _LAB_URL = tornado.web.url(
 _VERSION_URL = tornado.web.url(
     r"/version", handlers.version.VersionHandler, name="version"
 )
+_METRICS_URL = tornado.web.url(
+    r"/metrics", handlers.metrics.MetricsHandler, name="metrics"
+)
 _REPORT_URL = tornado.web.url(
     r"/report[s]?/?(?P<id>.*)",
     handlers.report.ReportHandler,
@@ -105,12 +115,14 @@ APP_URLS = [
     _BATCH_URL,
     _BISECT_URL,
     _BOOT_URL,
+    _BOOT_BULK_URL,
     _COUNT_URL,
     _DEFCONF_URL,
     _JOB_URL,
     _LAB_URL,
     _TOKEN_URL,
     _VERSION_URL,
+    _METRICS_URL,
     _REPORT_URL,
     _UPLOAD_URL,
     _SEND_URL,
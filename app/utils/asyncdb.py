@@ -0,0 +1,373 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Non-blocking mongodb database operations.
+
+These are the coroutine equivalents of the functions in `utils.db`, they
+have to be used with a `motor` client and run on the Tornado IOLoop.
+
+`motor` is an optional dependency: if it is not installed, `get_client`
+returns None and the handlers fall back to the thread-pool executor.
+"""
+
+import pymongo.errors
+import tornado.gen
+import types
+import urllib
+
+try:
+    import motor
+except ImportError:
+    motor = None
+
+import models
+import models.base as mbase
+import utils
+import utils.db
+import utils.metrics
+
+
+def is_available():
+    """Check if the asynchronous driver is installed.
+
+    :return True or False.
+    """
+    return motor is not None
+
+
+def get_client(db_options):
+    """Create a new asynchronous mongodb client.
+
+    :param db_options: The mongodb database connection parameters.
+    :type db_options: dict
+    :return A `motor.MotorClient` instance, or None if `motor` is not
+    available.
+    """
+    client = None
+
+    if is_available():
+        db_options_get = db_options.get
+
+        db_host = db_options_get("dbhost", utils.DEFAULT_MONGODB_URL)
+        db_port = db_options_get("dbport", utils.DEFAULT_MONGODB_PORT)
+        db_pool = db_options_get("dbpool", utils.DEFAULT_MONGODB_POOL)
+        db_user = db_options_get("dbuser", "")
+        db_pwd = db_options_get("dbpassword", "")
+
+        credentials = ""
+        if all([db_user, db_pwd]):
+            credentials = "%s:%s@" % (
+                urllib.quote_plus(db_user), urllib.quote_plus(db_pwd))
+
+        client = motor.MotorClient(
+            "mongodb://%s%s:%s/%s" % (
+                credentials, db_host, db_port, models.DB_NAME),
+            max_pool_size=db_pool,
+            w="majority"
+        )
+    else:
+        utils.LOG.warn("Asynchronous mongodb driver (motor) not available")
+
+    return client
+
+
+@utils.metrics.db_operation("find_one")
+@tornado.gen.coroutine
+def find_one(collection,
+             value,
+             field="_id",
+             operator="$in",
+             fields=None):
+    """Search for a specific document.
+
+    See `utils.db.find_one`.
+
+    :return None or the search result as a dictionary.
+    """
+    result = None
+    if all([operator == '$in', not isinstance(value, types.ListType)]):
+        utils.LOG.error(
+            "Provided value (%s) is not of type list, got: %s",
+            value,
+            type(value)
+        )
+    else:
+        result = yield collection.find_one(
+            {
+                field: {operator: value}
+            },
+            fields=fields,
+        )
+
+    raise tornado.gen.Return(result)
+
+
+@utils.metrics.db_operation("find_one")
+@tornado.gen.coroutine
+def find_one2(collection, spec_or_id, fields=None):
+    """Search for a single document.
+
+    See `utils.db.find_one2`.
+
+    :return None or the search result as a dictionary.
+    """
+    result = yield collection.find_one(spec_or_id, fields=fields)
+    raise tornado.gen.Return(result)
+
+
+@utils.metrics.db_operation("find")
+@tornado.gen.coroutine
+def find(collection, limit, skip, spec=None, fields=None, sort=None):
+    """Find documents in a collection with optional specified values.
+
+    See `utils.db.find`.
+
+    Different from the synchronous version, all the documents are retrieved
+    from the database: a list is returned, not a cursor.
+
+    :return A list of documents matching the specified values.
+    """
+    cursor = collection.find(
+        limit=limit, skip=skip, fields=fields, sort=sort, spec=spec)
+    result = yield cursor.to_list(None)
+
+    raise tornado.gen.Return(result)
+
+
+@utils.metrics.db_operation("find_and_count")
+@tornado.gen.coroutine
+def find_and_count(collection,
+                   limit,
+                   skip, spec=None, fields=None, sort=None, count_mode=None):
+    """Find all the documents in a collection, and return the total count.
+
+    See `utils.db.find_and_count`.
+
+    The count and the retrieval of the documents are executed in parallel.
+    Only the `utils.db.COUNT_SKIP` mode is supported, all the other modes
+    perform an exact count.
+
+    :return The list of documents found and the total count.
+    """
+    cursor = collection.find(
+        spec=spec, limit=limit, skip=skip, fields=fields, sort=sort)
+
+    if count_mode == utils.db.COUNT_SKIP:
+        result = yield cursor.to_list(None)
+        res_count = None
+    else:
+        count_cursor = collection.find(
+            spec=spec, fields={models.ID_KEY: True})
+        result, res_count = yield [
+            cursor.to_list(None), count_cursor.count()]
+
+    raise tornado.gen.Return((result, res_count))
+
+
+@utils.metrics.db_operation("find_page")
+@tornado.gen.coroutine
+def find_page(collection,
+              limit,
+              after, spec=None, fields=None, sort=None, count_mode=None):
+    """Find a page of documents with keyset pagination.
+
+    See `utils.db.find_page`.
+
+    The count and the retrieval of the documents are executed in parallel.
+    Only the `utils.db.COUNT_SKIP` mode is supported, all the other modes
+    perform an exact count.
+
+    :return A list with the documents found, the total count and the token
+    of the next page.
+    """
+    sort = utils.db.keyset_sort(sort)
+
+    find_spec = spec
+    if after:
+        find_spec = utils.db.keyset_spec(
+            spec, sort, utils.db.decode_page_token(after, sort))
+
+    cursor = collection.find(
+        spec=find_spec,
+        limit=limit, fields=utils.db.keyset_fields(fields, sort), sort=sort)
+
+    if count_mode == utils.db.COUNT_SKIP:
+        result = yield cursor.to_list(None)
+        res_count = None
+    else:
+        count_cursor = collection.find(
+            spec=spec, fields={models.ID_KEY: True})
+        result, res_count = yield [
+            cursor.to_list(None), count_cursor.count()]
+
+    next_token = None
+    if all([limit > 0, len(result) == limit]):
+        next_token = utils.db.encode_page_token(result[-1], sort)
+
+    raise tornado.gen.Return((result, res_count, next_token))
+
+
+@utils.metrics.db_operation("count")
+@tornado.gen.coroutine
+def count(collection, spec=None):
+    """Count the documents in a collection.
+
+    See `utils.db.count`.
+
+    :return The number of documents.
+    """
+    if spec:
+        result = yield collection.find(
+            spec=spec, fields={models.ID_KEY: True}).count()
+    else:
+        result = yield collection.count()
+    raise tornado.gen.Return(result)
+
+
+@tornado.gen.coroutine
+def estimated_count(collection):
+    """Count all the documents in a collection using a cached value.
+
+    See `utils.db.estimated_count`: the same cache is used.
+
+    :param collection: The collection whose documents should be counted.
+    :return The number of documents in the collection.
+    """
+    key = collection.full_name
+    res_count = utils.db.ESTIMATED_COUNT_CACHE.get(key)
+
+    if res_count is None:
+        res_count = yield count(collection)
+        utils.db.ESTIMATED_COUNT_CACHE.set(key, res_count)
+
+    raise tornado.gen.Return(res_count)
+
+
+@tornado.gen.coroutine
+def get_cache_versions(database):
+    """Get the versions of the collections whose documents are cached.
+
+    See `utils.db.get_cache_versions`.
+
+    :return A dictionary: the collection names and their versions.
+    """
+    versions = {}
+
+    try:
+        documents = yield database[
+            models.CACHE_VERSION_COLLECTION].find().to_list(None)
+        for doc in documents:
+            versions[doc[models.ID_KEY]] = doc[models.VERSION_KEY]
+    except pymongo.errors.OperationFailure, ex:
+        utils.LOG.error("Error retrieving the cache versions")
+        utils.LOG.exception(ex)
+
+    raise tornado.gen.Return(versions)
+
+
+@utils.metrics.db_operation(
+    "save", collection_func=utils.db.documents_collection)
+@tornado.gen.coroutine
+def save(database, document, manipulate=False):
+    """Save one document into the database.
+
+    See `utils.db.save`.
+
+    :return A tuple: first element is the operation code (201 if the save has
+    success, 500 in case of an error), second element is the mongodb created
+    `_id` value if manipulate is True, or None.
+    """
+    ret_value = 201
+    doc_id = None
+
+    if isinstance(document, mbase.BaseDocument):
+        try:
+            doc_id = yield database[document.collection].save(
+                document.to_dict(), manipulate=manipulate)
+            utils.LOG.info(
+                "Document '%s' saved (%s)", document.name, document.collection)
+        except pymongo.errors.OperationFailure, ex:
+            utils.LOG.error(
+                "Error saving the following document: %s (%s)",
+                document.name, document.collection
+            )
+            utils.LOG.exception(ex)
+            ret_value = 500
+    else:
+        utils.LOG.error(
+            "Cannot save document, it is not of type BaseDocument, got %s",
+            type(document))
+        ret_value = 500
+
+    raise tornado.gen.Return((ret_value, doc_id))
+
+
+@utils.metrics.db_operation("update")
+@tornado.gen.coroutine
+def update(collection, spec, document, operation="$set"):
+    """Update a document with the provided values.
+
+    See `utils.db.update`.
+
+    :return 200 if the update has success, 500 in case of an error.
+    """
+    ret_val = 200
+
+    try:
+        yield collection.update(spec, {operation: document})
+    except pymongo.errors.OperationFailure, ex:
+        utils.LOG.error(
+            "Error updating the following document: %s", str(document))
+        utils.LOG.exception(str(ex))
+        ret_val = 500
+
+    raise tornado.gen.Return(ret_val)
+
+
+@utils.metrics.db_operation("delete")
+@tornado.gen.coroutine
+def delete(collection, spec_or_id):
+    """Remove a document or multiple documents from the collection.
+
+    See `utils.db.delete`.
+
+    :return 200 if the deletion has success, 500 in case of an error.
+    """
+    ret_val = 200
+
+    try:
+        yield collection.remove(spec_or_id)
+    except pymongo.errors.OperationFailure, ex:
+        utils.LOG.error(
+            "Error removing the following document: %s", str(spec_or_id))
+        utils.LOG.exception(str(ex))
+        ret_val = 500
+
+    raise tornado.gen.Return(ret_val)
+
+
+@utils.metrics.db_operation("aggregate")
+@tornado.gen.coroutine
+def aggregate(
+        collection, unique, match=None, sort=None, fields=None, limit=None):
+    """Perform an aggregate `group` action on the collection.
+
+    See `utils.db.aggregate`.
+
+    :return A list with the results.
+    """
+    pipeline = utils.db.aggregate_pipeline(
+        unique, match=match, sort=sort, fields=fields, limit=limit)
+    result = yield collection.aggregate(pipeline)
+
+    raise tornado.gen.Return(utils.db.aggregate_result(result))
@@ -123,6 +123,7 @@ class BatchOperation(object):
                 hcommon.get_all_query_values(
                     self.query_args_func, self.valid_keys.get(self.method)
                 )
+            after = hcommon.get_after_value(self.query_args_func)
 
             if unique:
                 # Perform an aggregate
@@ -137,6 +138,19 @@ class BatchOperation(object):
                     "match": spec,
                     "limit": self._limit
                 }
+            elif after is not None:
+                # Keyset pagination.
+                self.operation = utils.db.find_page
+                self.args = [
+                    self._database[self._collection],
+                    self._limit,
+                    after
+                ]
+                self.kwargs = {
+                    "spec": spec,
+                    "fields": fields,
+                    "sort": sort
+                }
             else:
                 self.operation = utils.db.find_and_count
                 self.args = [
@@ -169,7 +183,7 @@ class BatchOperation(object):
             response[models.OP_ID_KEY] = self.operation_id
 
         # find_and_count returns 2 results: the mongodb cursor and the
-        # results count.
+        # results count; find_page also returns the token of the next page.
         if isinstance(result, tuple):
             count = result[1]
             res = []
@@ -183,6 +197,9 @@ class BatchOperation(object):
             if self._limit is not None:
                 json_obj[models.LIMIT_KEY] = self._limit
 
+            if len(result) > 2 and result[2] is not None:
+                json_obj[models.NEXT_KEY] = result[2]
+
             response[models.RESULT_KEY] = [json_obj]
         else:
             response[models.RESULT_KEY] = result
@@ -247,7 +264,8 @@ class BatchCountOperation(BatchOperation):
                 self._database[self.document_id],
                 self.document_id,
                 self.query_args_func,
-                self.valid_keys.get(self.method)
+                self.valid_keys.get(self.method),
+                self._database[models.SUMMARY_COLLECTION]
             ]
         else:
             self.operation = hcount.count_all_collections
@@ -85,6 +85,55 @@ def execute_batch_operation(json_obj, db_options):
     return result
 
 
+def is_inline_operation(json_obj):
+    """Check if a batch operation is cheap enough to be run directly.
+
+    A cheap operation is a GET for a single document, identified by its ID,
+    on a collection that is not the `count` one: it is a single indexed
+    look up and does not need a round trip through the task queue.
+
+    :param json_obj: The JSON object of the batch operation.
+    :type json_obj: dict
+    :return True or False.
+    """
+    is_inline = False
+
+    if json_obj:
+        get_func = json_obj.get
+        if all([
+                get_func(models.METHOD_KEY, None) == "GET",
+                get_func(models.DOCUMENT_ID_KEY, None),
+                get_func(models.COLLECTION_KEY, None) not in [
+                    None, models.COUNT_COLLECTION]]):
+            is_inline = True
+
+    return is_inline
+
+
+def create_error_response(json_obj, status_code, reason):
+    """Create the response for a batch operation that did not complete.
+
+    :param json_obj: The JSON object of the batch operation.
+    :type json_obj: dict
+    :param status_code: The status code of the operation.
+    :type status_code: int
+    :param reason: The reason of the error.
+    :type reason: string
+    :return A dictionary.
+    """
+    response = {
+        models.RESULT_KEY: [],
+        "code": status_code,
+        "reason": reason
+    }
+
+    operation_id = json_obj.get(models.OP_ID_KEY, None)
+    if operation_id:
+        response[models.OP_ID_KEY] = operation_id
+
+    return response
+
+
 def get_batch_query_args(query):
     """From a query string, retrieve the key-value pairs.
 
@@ -12,9 +12,14 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
+import celery.exceptions
+import mongomock
 import unittest
 
-from mock import patch
+from mock import (
+    MagicMock,
+    patch,
+)
 
 from utils.batch.batch_op import (
     BatchBootOperation,
@@ -25,8 +30,12 @@ from utils.batch.batch_op import (
 )
 from utils.batch.common import (
     create_batch_operation,
+    create_error_response,
     get_batch_query_args,
+    is_inline_operation,
 )
+import models
+import taskqueue.tasks
 
 
 class TestBatch(unittest.TestCase):
@@ -93,6 +102,31 @@ class TestBatch(unittest.TestCase):
         op = create_batch_operation(json_obj, {})
         self.assertIsInstance(op, BatchCountOperation)
 
+    @patch("utils.db.get_db_connection")
+    def test_batch_op_get_keyset_pages(self, mock_db):
+        database = mongomock.Connection()["kernel-ci"]
+        mock_db.return_value = database
+        for idx in range(5):
+            database["job"].insert({"_id": idx, "job": "job"})
+
+        ids = []
+        after = ""
+        while after is not None:
+            op = create_batch_operation(
+                {
+                    "method": "GET",
+                    "collection": "job",
+                    "query": "job=job&limit=2&after=%s" % after
+                },
+                {}
+            )
+            result = op.run()[models.RESULT_KEY][0]
+            self.assertEqual(5, result[models.COUNT_KEY])
+            ids.extend([r["_id"] for r in result[models.RESULT_KEY]])
+            after = result.get(models.NEXT_KEY, None)
+
+        self.assertEqual([4, 3, 2, 1, 0], ids)
+
     def test_create_batch_op_none(self):
         op = create_batch_operation(None, None)
         self.assertIsNone(op)
@@ -150,3 +184,76 @@ class TestBatch(unittest.TestCase):
 
         op = create_batch_operation(json_obj, {})
         self.assertIsInstance(op, BatchOperation)
+
+    def test_is_inline_operation(self):
+        self.assertTrue(is_inline_operation(
+            {"method": "GET", "collection": "boot", "document_id": "foo"}))
+        self.assertFalse(is_inline_operation(
+            {"method": "GET", "collection": "boot"}))
+        self.assertFalse(is_inline_operation(
+            {"method": "GET", "collection": "count", "document_id": "boot"}))
+        self.assertFalse(is_inline_operation({}))
+        self.assertFalse(is_inline_operation(None))
+
+    def test_create_error_response(self):
+        self.assertDictEqual(
+            {
+                "operation_id": "foo",
+                "result": [], "code": 504, "reason": "Operation timed out"
+            },
+            create_error_response(
+                {"operation_id": "foo"}, 504, "Operation timed out"))
+        self.assertDictEqual(
+            {"result": [], "code": 500, "reason": "Error"},
+            create_error_response({}, 500, "Error"))
+
+
+class TestRunBatchGroup(unittest.TestCase):
+
+    @patch("utils.batch.common.execute_batch_operation")
+    @patch("celery.group")
+    def test_run_batch_group(self, mock_group, mock_execute):
+        mock_execute.return_value = {"result": "inline"}
+
+        done = MagicMock()
+        done.get.return_value = {"result": "done"}
+        failed = MagicMock()
+        failed.get.side_effect = ValueError("Error")
+        late = MagicMock()
+        late.get.side_effect = celery.exceptions.TimeoutError()
+
+        mock_group.return_value.apply_async.return_value.results = [
+            done, failed, late]
+
+        batch = [
+            {"method": "GET", "collection": "count", "operation_id": "a"},
+            {"method": "GET", "collection": "job", "document_id": "b"},
+            {"method": "GET", "collection": "boot", "operation_id": "c"},
+            {"method": "GET", "collection": "job", "operation_id": "d"}
+        ]
+
+        results = taskqueue.tasks.run_batch_group(batch, {}, timeout=1)
+
+        self.assertEqual(4, len(results))
+        self.assertDictEqual({"result": "done"}, results[0])
+        self.assertDictEqual({"result": "inline"}, results[1])
+        self.assertEqual(500, results[2]["code"])
+        self.assertEqual("c", results[2]["operation_id"])
+        self.assertEqual(504, results[3]["code"])
+        self.assertEqual("d", results[3]["operation_id"])
+        late.revoke.assert_called_once_with()
+        mock_execute.assert_called_once_with(batch[1], {})
+        self.assertTrue(
+            all([r.get.call_args[1]["interval"] > 0
+                 for r in [done, failed, late]]))
+
+    @patch("celery.group")
+    def test_run_batch_group_all_inline(self, mock_group):
+        with patch("utils.batch.common.execute_batch_operation") as mock_exe:
+            mock_exe.return_value = {"result": []}
+            results = taskqueue.tasks.run_batch_group(
+                [{"method": "GET", "collection": "job", "document_id": "a"}],
+                {})
+
+        self.assertEqual([{"result": []}], results)
+        self.assertFalse(mock_group.called)
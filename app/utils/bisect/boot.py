@@ -137,22 +137,10 @@ def _find_boot_bisect_data(obj_id, start_doc, database, db_options):
         models.CREATED_KEY: {"$lt": created_on}
     }
 
-    # The function to apply to each boot document to find its defconfig
-    # one and combine the values.
-    func = bcommon.combine_defconfig_values
-
-    bad_doc = func(start_doc, db_options)
-    bad_doc_get = bad_doc.get
-
-    bisect_doc.bad_commit_date = bad_doc_get(
-        models.BISECT_DEFCONFIG_CREATED_KEY)
-    bisect_doc.bad_commit = bad_doc_get(models.GIT_COMMIT_KEY)
-    bisect_doc.bad_commit_url = bad_doc_get(models.GIT_URL_KEY)
-
-    all_valid_docs = [bad_doc]
+    boot_docs = [start_doc]
 
     # Search through all the previous boot reports, until one that
-    # passed is found, and combine them with their defconfig document.
+    # passed is found.
     all_prev_docs = utils.db.find(
         database[models.BOOT_COLLECTION],
         0,
@@ -163,24 +151,30 @@ def _find_boot_bisect_data(obj_id, start_doc, database, db_options):
     )
 
     if all_prev_docs:
-        all_valid_docs.extend(
-            [
-                func(doc, db_options)
-                for doc in bcommon.get_docs_until_pass(all_prev_docs)
-            ]
-        )
-        # The last doc should be the good one, in case it is, add the
-        # values to the bisect_doc.
-        good_doc = all_valid_docs[-1]
-        if (good_doc[models.BISECT_BOOT_STATUS_KEY] ==
-                models.PASS_STATUS):
-            good_doc_get = good_doc.get
-            bisect_doc.good_commit = good_doc_get(
-                models.GIT_COMMIT_KEY)
-            bisect_doc.good_commit_url = good_doc_get(
-                models.GIT_URL_KEY)
-            bisect_doc.good_commit_date = good_doc_get(
-                models.BISECT_DEFCONFIG_CREATED_KEY)
+        boot_docs.extend(bcommon.get_docs_until_pass(all_prev_docs))
+
+    # Combine all the boot documents with their defconfig document.
+    all_valid_docs = bcommon.combine_all_defconfig_values(
+        boot_docs, db_options)
+
+    bad_doc_get = all_valid_docs[0].get
+    bisect_doc.bad_commit_date = bad_doc_get(
+        models.BISECT_DEFCONFIG_CREATED_KEY)
+    bisect_doc.bad_commit = bad_doc_get(models.GIT_COMMIT_KEY)
+    bisect_doc.bad_commit_url = bad_doc_get(models.GIT_URL_KEY)
+
+    # The last doc should be the good one, in case it is, add the
+    # values to the bisect_doc.
+    good_doc = all_valid_docs[-1]
+    if len(all_valid_docs) > 1 and \
+            good_doc[models.BISECT_BOOT_STATUS_KEY] == models.PASS_STATUS:
+        good_doc_get = good_doc.get
+        bisect_doc.good_commit = good_doc_get(
+            models.GIT_COMMIT_KEY)
+        bisect_doc.good_commit_url = good_doc_get(
+            models.GIT_URL_KEY)
+        bisect_doc.good_commit_date = good_doc_get(
+            models.BISECT_DEFCONFIG_CREATED_KEY)
 
     # Store everything in the bisect_data list of the bisect_doc.
     bisect_doc.bisect_data = all_valid_docs
@@ -277,15 +271,9 @@ def execute_boot_bisection_compared_to(
 
             all_valid_docs = []
             if prev_docs:
-                # The function to apply to each boot document to find its
-                # defconfig one and combine the values.
-                func = bcommon.combine_defconfig_values
-
-                all_valid_docs.extend(
-                    [
-                        func(doc, db_options) for doc in prev_docs
-                    ]
-                )
+                # Combine all the boot documents with their defconfig one.
+                all_valid_docs = bcommon.combine_all_defconfig_values(
+                    prev_docs, db_options)
 
             bisect_doc.bisect_data = all_valid_docs
             bcommon.save_bisect_doc(database, bisect_doc, doc_id)
@@ -297,3 +285,68 @@ def execute_boot_bisection_compared_to(
         result = None
 
     return code, result
+
+
+def _boot_window_spec(boot_doc):
+    """Create the spec to search the boot bisects that include a boot report.
+
+    :param boot_doc: The boot report.
+    :type boot_doc: dictionary
+    :return The spec as a dictionary.
+    """
+    boot_doc_get = boot_doc.get
+    defconfig = boot_doc_get(models.DEFCONFIG_KEY)
+
+    return bcommon.window_spec(
+        "boot",
+        {
+            models.ARCHITECTURE_KEY: (
+                boot_doc_get(models.ARCHITECTURE_KEY) or
+                models.ARM_ARCHITECTURE_KEY),
+            models.BOARD_KEY: boot_doc_get(models.BOARD_KEY),
+            models.DEFCONFIG_FULL_KEY: (
+                boot_doc_get(models.DEFCONFIG_FULL_KEY) or defconfig)
+        },
+        boot_doc_get(models.JOB_KEY),
+        models.BISECT_BOOT_CREATED_KEY,
+        boot_doc_get(models.CREATED_KEY)
+    )
+
+
+def update_boot_bisections(boot_ids, db_options):
+    """Update the saved boot bisections after boot reports have been imported.
+
+    The saved bisections whose window includes one of the boot reports are
+    removed: the ones not compared to another tree are calculated again.
+    The bisections of the failed boot reports are calculated as well.
+
+    :param boot_ids: The IDs of the imported boot reports.
+    :type boot_ids: list
+    :param db_options: The mongodb database connection parameters.
+    :type db_options: dict
+    :return The number of bisections calculated.
+    """
+    database = utils.db.get_db_connection(db_options)
+    to_bisect = set()
+
+    boot_docs = utils.db.find(
+        database[models.BOOT_COLLECTION],
+        0,
+        0,
+        spec={models.ID_KEY: {"$in": list(boot_ids)}},
+        fields=BOOT_SEARCH_FIELDS
+    )
+
+    for boot_doc in boot_docs:
+        to_bisect.update(
+            bcommon.invalidate_bisects(
+                database, _boot_window_spec(boot_doc), models.BOOT_ID_KEY))
+        if boot_doc.get(models.STATUS_KEY) == models.FAIL_STATUS:
+            to_bisect.add(boot_doc[models.ID_KEY])
+
+    for boot_id in to_bisect:
+        bcommon.remove_bisect(
+            database, "boot", models.BOOT_ID_KEY, boot_id)
+        execute_boot_bisection(boot_id, db_options)
+
+    return len(to_bisect)
@@ -17,6 +17,7 @@ import types
 
 import models
 import utils
+import utils.cache
 import utils.db
 
 
@@ -32,6 +33,14 @@ BOOT_DEFCONFIG_SEARCH_FIELDS = [
     models.STATUS_KEY
 ]
 
+# Per-process cache of the defconfig values combined with the boot ones,
+# keyed by the defconfig ID or name. Consecutive bisections on the same
+# board, or family of boards, look up the same defconfigs again.
+DEFCONFIG_CACHE_SIZE = 2048
+DEFCONFIG_CACHE_TTL = 300
+DEFCONFIG_CACHE = utils.cache.LRUCache(
+    max_size=DEFCONFIG_CACHE_SIZE, ttl=DEFCONFIG_CACHE_TTL)
+
 
 def save_bisect_doc(database, bisect_doc, doc_id):
     """Save the provided bisect document.
@@ -48,28 +57,43 @@ def save_bisect_doc(database, bisect_doc, doc_id):
         utils.LOG.error("Error saving bisect data %s", doc_id)
 
 
-def combine_defconfig_values(boot_doc, db_options):
-    """Combine the boot document values with their own defconfing.
+def _defconfig_cache_key(boot_doc):
+    """Create the key to look up the defconfig of a boot document.
 
-    It returns a dictionary whose structure is a combination
-    of the values from the boot document and its associated defconfing.
+    :param boot_doc: The boot document.
+    :type boot_doc: dict
+    :return A 2-tuple: the kind of key (the defconfig ID or name) and its
+    value.
+    """
+    boot_doc_get = boot_doc.get
+    defconfig_id = boot_doc_get(models.DEFCONFIG_ID_KEY, None)
 
-    :param boot_doc: The boot document to retrieve the defconfig of.
+    if defconfig_id:
+        key = (models.ID_KEY, defconfig_id)
+    else:
+        defconfig = boot_doc_get(models.DEFCONFIG_KEY)
+        defconfig_full = boot_doc_get(models.DEFCONFIG_FULL_KEY) or defconfig
+        key = (
+            models.NAME_KEY,
+            boot_doc_get(models.JOB_KEY) + "-" +
+            boot_doc_get(models.KERNEL_KEY) + "-" + defconfig_full
+        )
+
+    return key
+
+
+def _combine_values(boot_doc, defconf_doc):
+    """Combine the boot document values with the defconfig ones.
+
+    :param boot_doc: The boot document.
     :type boot_doc: dict
-    :param db_options: The mongodb database connection parameters.
-    :type db_options: dict
+    :param defconf_doc: The defconfig document, or None.
+    :type defconf_doc: dict
     :return A dictionary.
     """
-    database = utils.db.get_db_connection(db_options)
-
     boot_doc_get = boot_doc.get
 
-    job = boot_doc_get(models.JOB_KEY)
-    kernel = boot_doc_get(models.KERNEL_KEY)
     defconfig = boot_doc_get(models.DEFCONFIG_KEY)
-    defconfig_full = boot_doc_get(models.DEFCONFIG_FULL_KEY) or defconfig
-    defconfig_id = boot_doc_get(models.DEFCONFIG_ID_KEY, None)
-    job_id = boot_doc_get(models.JOB_ID_KEY, None)
 
     combined_values = {
         models.BISECT_BOOT_CREATED_KEY: boot_doc_get(models.CREATED_KEY),
@@ -78,34 +102,20 @@ def combine_defconfig_values(boot_doc, db_options):
         models.BISECT_DEFCONFIG_ARCHITECTURE_KEY: "",
         models.BISECT_DEFCONFIG_CREATED_KEY: "",
         models.BISECT_DEFCONFIG_STATUS_KEY: "",
-        models.DEFCONFIG_FULL_KEY: defconfig_full,
-        models.DEFCONFIG_ID_KEY: defconfig_id,
+        models.DEFCONFIG_FULL_KEY: (
+            boot_doc_get(models.DEFCONFIG_FULL_KEY) or defconfig),
+        models.DEFCONFIG_ID_KEY: boot_doc_get(models.DEFCONFIG_ID_KEY, None),
         models.DEFCONFIG_KEY: defconfig,
         models.DIRNAME_KEY: "",
         models.GIT_BRANCH_KEY: "",
         models.GIT_COMMIT_KEY: "",
         models.GIT_DESCRIBE_KEY: "",
         models.GIT_URL_KEY: "",
-        models.JOB_ID_KEY: job_id,
-        models.JOB_KEY: job,
-        models.KERNEL_KEY: kernel
+        models.JOB_ID_KEY: boot_doc_get(models.JOB_ID_KEY, None),
+        models.JOB_KEY: boot_doc_get(models.JOB_KEY),
+        models.KERNEL_KEY: boot_doc_get(models.KERNEL_KEY)
     }
 
-    if defconfig_id:
-        defconf_doc = utils.db.find_one2(
-            database[models.DEFCONFIG_COLLECTION],
-            defconfig_id,
-            fields=BOOT_DEFCONFIG_SEARCH_FIELDS
-        )
-    else:
-        defconfig_name = job + "-" + kernel + "-" + defconfig_full
-        defconf_doc = utils.db.find_one(
-            database[models.DEFCONFIG_COLLECTION],
-            [defconfig_name],
-            field=models.NAME_KEY,
-            fields=BOOT_DEFCONFIG_SEARCH_FIELDS
-        )
-
     if defconf_doc:
         defconf_doc_get = defconf_doc.get
         combined_values[models.DIRNAME_KEY] = defconf_doc_get(
@@ -128,6 +138,170 @@ def combine_defconfig_values(boot_doc, db_options):
     return combined_values
 
 
+def combine_defconfig_values(boot_doc, db_options):
+    """Combine the boot document values with their own defconfing.
+
+    It returns a dictionary whose structure is a combination
+    of the values from the boot document and its associated defconfing.
+
+    :param boot_doc: The boot document to retrieve the defconfig of.
+    :type boot_doc: dict
+    :param db_options: The mongodb database connection parameters.
+    :type db_options: dict
+    :return A dictionary.
+    """
+    return combine_all_defconfig_values([boot_doc], db_options)[0]
+
+
+def combine_all_defconfig_values(boot_docs, db_options):
+    """Combine a list of boot documents with their own defconfig.
+
+    Like `combine_defconfig_values`, but all the defconfig documents not
+    already cached are retrieved with at most two queries: one on their
+    IDs and one on their names.
+
+    :param boot_docs: The boot documents to retrieve the defconfig of.
+    :type boot_docs: list
+    :param db_options: The mongodb database connection parameters.
+    :type db_options: dict
+    :return A list of dictionaries, in the same order as the boot documents.
+    """
+    boot_docs = list(boot_docs)
+    keys = [_defconfig_cache_key(boot_doc) for boot_doc in boot_docs]
+
+    defconf_docs = {}
+    missing = {models.ID_KEY: set(), models.NAME_KEY: set()}
+
+    for key in keys:
+        if key not in defconf_docs:
+            defconf_doc = DEFCONFIG_CACHE.get(key)
+            if defconf_doc is None:
+                missing[key[0]].add(key[1])
+            else:
+                defconf_docs[key] = defconf_doc
+
+    if any(missing.itervalues()):
+        database = utils.db.get_db_connection(db_options)
+
+        for field, values in missing.iteritems():
+            if not values:
+                continue
+
+            found = utils.db.find(
+                database[models.DEFCONFIG_COLLECTION],
+                0,
+                0,
+                spec={field: {"$in": list(values)}},
+                fields=BOOT_DEFCONFIG_SEARCH_FIELDS + [models.NAME_KEY]
+            )
+            for defconf_doc in found:
+                key = (field, defconf_doc.get(field))
+                # As with `find_one`, the first document found is used.
+                if key not in defconf_docs:
+                    defconf_docs[key] = defconf_doc
+                    DEFCONFIG_CACHE.set(key, defconf_doc)
+
+    return [
+        _combine_values(boot_doc, defconf_docs.get(key))
+        for boot_doc, key in zip(boot_docs, keys)
+    ]
+
+
+def window_spec(bisect_type, series, job, date_key, created_on):
+    """Create the spec to search the bisects whose window contains a date.
+
+    The window of a bisect goes from its oldest to its newest document, as
+    stored in the `bisect_data` list.
+
+    :param bisect_type: The type of the bisect documents.
+    :type bisect_type: string
+    :param series: The values that identify the series of documents
+    bisected, as found in the bisect documents.
+    :type series: dictionary
+    :param job: The name of the job of the bisected documents.
+    :type job: string
+    :param date_key: The name of the date field in the `bisect_data` list.
+    :type date_key: string
+    :param created_on: The date that has to be in the window.
+    :type created_on: datetime
+    :return The spec as a dictionary.
+    """
+    spec = {models.TYPE_KEY: bisect_type}
+    spec.update(series)
+    spec["$and"] = [
+        {
+            models.BISECT_DATA_KEY: {
+                "$elemMatch": {
+                    models.JOB_KEY: job, date_key: {"$lte": created_on}}
+            }
+        },
+        {
+            models.BISECT_DATA_KEY: {
+                "$elemMatch": {
+                    models.JOB_KEY: job, date_key: {"$gte": created_on}}
+            }
+        }
+    ]
+
+    return spec
+
+
+def invalidate_bisects(database, spec, id_key):
+    """Remove the saved bisects that are not valid anymore.
+
+    :param database: The database connection.
+    :param spec: The spec to search the bisects to remove.
+    :type spec: dictionary
+    :param id_key: The name of the field with the ID of the bisected
+    document.
+    :type id_key: string
+    :return A list with the IDs of the bisected documents whose bisect,
+    not compared to another tree, has been removed.
+    """
+    to_bisect = []
+    bisect_ids = []
+
+    for bisect_doc in utils.db.find(
+            database[models.BISECT_COLLECTION],
+            0,
+            0,
+            spec=spec,
+            fields=[models.ID_KEY, models.COMPARE_TO_KEY, id_key]):
+        bisect_ids.append(bisect_doc[models.ID_KEY])
+        if not bisect_doc.get(models.COMPARE_TO_KEY, None):
+            to_bisect.append(bisect_doc[id_key])
+
+    if bisect_ids:
+        utils.LOG.info("Removing %d outdated bisects", len(bisect_ids))
+        utils.db.delete(
+            database[models.BISECT_COLLECTION],
+            {models.ID_KEY: {"$in": bisect_ids}})
+
+    return to_bisect
+
+
+def remove_bisect(database, bisect_type, id_key, doc_id):
+    """Remove the saved bisect, not compared to another tree, of a document.
+
+    :param database: The database connection.
+    :param bisect_type: The type of the bisect document.
+    :type bisect_type: string
+    :param id_key: The name of the field with the ID of the bisected
+    document.
+    :type id_key: string
+    :param doc_id: The ID of the bisected document.
+    :type doc_id: bson.objectid.ObjectId
+    """
+    utils.db.delete(
+        database[models.BISECT_COLLECTION],
+        {
+            models.TYPE_KEY: bisect_type,
+            id_key: doc_id,
+            models.COMPARE_TO_KEY: None
+        }
+    )
+
+
 def search_previous_bisect(database, spec_or_id, date_field):
     """Search for a previous saved bisect saved.
 
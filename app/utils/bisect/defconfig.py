@@ -15,7 +15,6 @@
 
 import bson
 import bson.json_util
-import copy
 import datetime
 import pymongo
 import types
@@ -106,55 +105,21 @@ def execute_defconfig_bisection(doc_id, db_options, fields=None):
 
             all_valid_docs = [start_doc]
 
-            # Search for the first passed defconfig so that we can limit the
-            # next search. Doing this to cut down search and load time on
-            # mongodb side: there are a lot of defconfig documents to search
-            # for and the mongodb Cursor can get quite big.
-            # Tweak the spec to search for PASS status and limit also the
-            # result found: we are only interested in the first found one.
-            # Need to use copy.deepcoy here since for some strange reasons,
-            # just adding and removing the keys from the spec is not working
-            # as expected.
-            pass_spec = copy.deepcopy(spec)
-            pass_spec[models.STATUS_KEY] = models.PASS_STATUS
-            # Only interested in older builds.
-            pass_spec[models.CREATED_KEY] = \
-                {"$lt": start_doc_get(models.CREATED_KEY)}
-
-            passed_builds = utils.db.find(
-                database[models.DEFCONFIG_COLLECTION],
-                10,
-                0,
-                spec=pass_spec,
-                fields=DEFCONFIG_SEARCH_FIELDS,
-                sort=DEFCONFIG_SORT
-            )
-
-            # In case we have a passed doc, tweak the spec to search between
-            # the valid dates.
-            passed_build = None
-            if passed_builds.count() > 0:
-                passed_build = _search_passed_doc(passed_builds)
+            # Search for the first passed build older than this one, then
+            # retrieve only the builds between the two: the window is
+            # bounded on the server side, instead of walking all the older
+            # builds until a passed one is found.
+            passed_build = _find_first_pass(
+                database, spec, start_doc_get(models.CREATED_KEY))
 
+            end_date = None
             if passed_build is not None:
-                spec[models.CREATED_KEY] = {
-                    "$gte": passed_build.get(models.CREATED_KEY),
-                    "$lt": start_doc_get(models.CREATED_KEY)
-                }
+                end_date = passed_build.get(models.CREATED_KEY)
             else:
                 utils.LOG.warn("No passed build found for '%s'", obj_id)
-                spec[models.CREATED_KEY] = {
-                    "$lt": start_doc_get(models.CREATED_KEY)
-                }
-
-            all_prev_docs = utils.db.find(
-                database[models.DEFCONFIG_COLLECTION],
-                0,
-                0,
-                spec=spec,
-                fields=DEFCONFIG_SEARCH_FIELDS,
-                sort=DEFCONFIG_SORT
-            )
+
+            all_prev_docs = _find_builds_window(
+                database, spec, start_doc_get(models.CREATED_KEY), end_date)
 
             if all_prev_docs:
                 all_valid_docs.extend(
@@ -164,20 +129,17 @@ def execute_defconfig_bisection(doc_id, db_options, fields=None):
                     ]
                 )
 
-                if all([passed_build, all_valid_docs[-1] != passed_build]):
-                    all_valid_docs.append(passed_build)
-
-                # The last doc should be the good one, in case it is, add the
-                # values to the bisect_doc.
-                good_doc = all_valid_docs[-1]
-                if good_doc[models.STATUS_KEY] == models.PASS_STATUS:
-                    good_doc_get = good_doc.get
-                    bisect_doc.good_commit = good_doc_get(
-                        models.GIT_COMMIT_KEY)
-                    bisect_doc.good_commit_url = good_doc_get(
-                        models.GIT_URL_KEY)
-                    bisect_doc.good_commit_date = good_doc_get(
-                        models.CREATED_KEY)
+            if all([passed_build, all_valid_docs[-1] != passed_build]):
+                all_valid_docs.append(passed_build)
+
+            # The last doc should be the good one, in case it is, add the
+            # values to the bisect_doc.
+            good_doc = all_valid_docs[-1]
+            if good_doc[models.STATUS_KEY] == models.PASS_STATUS:
+                good_doc_get = good_doc.get
+                bisect_doc.good_commit = good_doc_get(models.GIT_COMMIT_KEY)
+                bisect_doc.good_commit_url = good_doc_get(models.GIT_URL_KEY)
+                bisect_doc.good_commit_date = good_doc_get(models.CREATED_KEY)
 
             # Store everything in the bisect data.
             bisect_doc.bisect_data = all_valid_docs
@@ -192,24 +154,63 @@ def execute_defconfig_bisection(doc_id, db_options, fields=None):
     return code, result
 
 
-def _search_passed_doc(passed_builds):
-    """Search for a document with PASS status.
+def _find_first_pass(database, spec, created_on):
+    """Search for the most recent passed build older than a date.
 
-    :param passed_builds: The list or an iterator of docs to parse.
-    :return A doc with PASS status or None.
+    :param database: The database connection.
+    :param spec: The spec that identifies the builds of the same defconfig.
+    :type spec: dict
+    :param created_on: The date of the failed build.
+    :type created_on: datetime.datetime
+    :return The passed build document or None.
     """
-    passed_build = passed_builds[0]
-
-    if passed_build.get(models.STATUS_KEY) != models.PASS_STATUS:
-        passed_build = None
-        for doc in passed_builds:
-            if doc.get(models.STATUS_KEY) == models.PASS_STATUS:
-                passed_build = doc
-                break
+    pass_spec = dict(spec)
+    pass_spec[models.STATUS_KEY] = models.PASS_STATUS
+    pass_spec[models.CREATED_KEY] = {"$lt": created_on}
+
+    passed_build = None
+    for doc in utils.db.find(
+            database[models.DEFCONFIG_COLLECTION],
+            1,
+            0,
+            spec=pass_spec,
+            fields=DEFCONFIG_SEARCH_FIELDS, sort=DEFCONFIG_SORT):
+        passed_build = doc
 
     return passed_build
 
 
+def _find_builds_window(database, spec, created_on, end_date=None, limit=0):
+    """Retrieve the builds older than a date, within a bounded window.
+
+    :param database: The database connection.
+    :param spec: The spec that identifies the builds of the same defconfig.
+    :type spec: dict
+    :param created_on: The date of the failed build, the builds retrieved
+    are older than it.
+    :type created_on: datetime.datetime
+    :param end_date: The oldest date to include in the window.
+    :type end_date: datetime.datetime
+    :param limit: The maximum number of builds to retrieve, 0 for no limit.
+    :type limit: int
+    :return A cursor with the builds, most recent first.
+    """
+    if end_date:
+        date_range = {"$lt": created_on, "$gte": end_date}
+    else:
+        date_range = {"$lt": created_on}
+
+    window_spec = dict(spec)
+    window_spec[models.CREATED_KEY] = date_range
+
+    return utils.db.find(
+        database[models.DEFCONFIG_COLLECTION],
+        limit,
+        0,
+        spec=window_spec,
+        fields=DEFCONFIG_SEARCH_FIELDS, sort=DEFCONFIG_SORT)
+
+
 # pylint: disable=invalid-name
 def execute_defconfig_bisection_compared_to(
         doc_id, compare_to, db_options, fields=None):
@@ -273,29 +274,15 @@ def execute_defconfig_bisection_compared_to(
             bisect_doc.created_on = datetime.datetime.now(tz=bson.tz_util.utc)
             bisect_doc.arch = arch
 
-            if end_date:
-                date_range = {
-                    "$lt": created_on,
-                    "$gte": end_date
-                }
-            else:
-                date_range = {"$lt": created_on}
-
             spec = {
                 models.DEFCONFIG_KEY: defconfig,
                 models.DEFCONFIG_FULL_KEY: defconfig_full,
                 models.JOB_KEY: compare_to,
-                models.ARCHITECTURE_KEY: arch,
-                models.CREATED_KEY: date_range
+                models.ARCHITECTURE_KEY: arch
             }
 
-            prev_docs = utils.db.find(
-                database[models.DEFCONFIG_COLLECTION],
-                limit,
-                0,
-                spec=spec,
-                fields=DEFCONFIG_SEARCH_FIELDS,
-                sort=DEFCONFIG_SORT)
+            prev_docs = _find_builds_window(
+                database, spec, created_on, end_date, limit)
 
             all_valid_docs = []
             if prev_docs:
@@ -312,3 +299,68 @@ def execute_defconfig_bisection_compared_to(
         result = None
 
     return code, result
+
+
+def _defconfig_window_spec(defconfig_doc):
+    """Create the spec to search the defconfig bisects that include a build.
+
+    :param defconfig_doc: The defconfig document.
+    :type defconfig_doc: dictionary
+    :return The spec as a dictionary.
+    """
+    defconfig_doc_get = defconfig_doc.get
+
+    return bcommon.window_spec(
+        "build",
+        {
+            models.ARCHITECTURE_KEY: defconfig_doc_get(
+                models.ARCHITECTURE_KEY),
+            models.DEFCONFIG_FULL_KEY: defconfig_doc_get(
+                models.DEFCONFIG_FULL_KEY),
+            models.DEFCONFIG_KEY: defconfig_doc_get(models.DEFCONFIG_KEY)
+        },
+        defconfig_doc_get(models.JOB_KEY),
+        models.CREATED_KEY,
+        defconfig_doc_get(models.CREATED_KEY)
+    )
+
+
+def update_defconfig_bisections(job_id, db_options):
+    """Update the saved defconfig bisections after a job has been imported.
+
+    The saved bisections whose window includes one of the defconfigs of the
+    job are removed: the ones not compared to another tree are calculated
+    again. The bisections of the failed defconfigs are calculated as well.
+
+    :param job_id: The ID of the imported job.
+    :type job_id: bson.objectid.ObjectId
+    :param db_options: The mongodb database connection parameters.
+    :type db_options: dict
+    :return The number of bisections calculated.
+    """
+    database = utils.db.get_db_connection(db_options)
+    to_bisect = set()
+
+    defconfig_docs = utils.db.find(
+        database[models.DEFCONFIG_COLLECTION],
+        0,
+        0,
+        spec={models.JOB_ID_KEY: job_id},
+        fields=DEFCONFIG_SEARCH_FIELDS
+    )
+
+    for defconfig_doc in defconfig_docs:
+        to_bisect.update(
+            bcommon.invalidate_bisects(
+                database,
+                _defconfig_window_spec(defconfig_doc),
+                models.DEFCONFIG_ID_KEY))
+        if defconfig_doc.get(models.STATUS_KEY) == models.FAIL_STATUS:
+            to_bisect.add(defconfig_doc[models.ID_KEY])
+
+    for defconfig_id in to_bisect:
+        bcommon.remove_bisect(
+            database, "build", models.DEFCONFIG_ID_KEY, defconfig_id)
+        execute_defconfig_bisection(defconfig_id, db_options)
+
+    return len(to_bisect)
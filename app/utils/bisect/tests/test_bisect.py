@@ -11,10 +11,19 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import bson.objectid
+import bson.tz_util
+import datetime
+import logging
+import mock
+import mongomock
 import unittest
 
 import models.bisect as mbisect
+import utils.bisect.boot as bootb
 import utils.bisect.common as bcommon
+import utils.bisect.defconfig as defconfigb
+import utils.db
 
 
 class BisectUtilsTest(unittest.TestCase):
@@ -109,3 +118,323 @@ class BisectUtilsTest(unittest.TestCase):
             bisect_doc.to_dict(),
             bcommon.update_doc_fields(bisect_doc, ("None", None))
         )
+
+
+class CombineDefconfigValuesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.database = mongomock.Connection()["kernel-ci"]
+
+        patcher = mock.patch("utils.db.get_db_connection")
+        patcher.start().return_value = self.database
+        self.addCleanup(patcher.stop)
+
+        bcommon.DEFCONFIG_CACHE.clear()
+        self.addCleanup(bcommon.DEFCONFIG_CACHE.clear)
+
+        for idx in range(3):
+            self.database["defconfig"].insert({
+                "_id": "defconfig-%d" % idx,
+                "name": "job-kernel-%d-defconfig" % idx,
+                "job": "job",
+                "kernel": "kernel-%d" % idx,
+                "defconfig": "defconfig",
+                "defconfig_full": "defconfig",
+                "arch": "arm",
+                "status": "PASS",
+                "git_commit": "commit-%d" % idx
+            })
+
+        self.boot_docs = [
+            {
+                "job": "job",
+                "kernel": "kernel-0",
+                "defconfig": "defconfig",
+                "defconfig_id": "defconfig-0",
+                "status": "FAIL"
+            },
+            {
+                "job": "job",
+                "kernel": "kernel-1",
+                "defconfig": "defconfig",
+                "status": "FAIL"
+            },
+            {
+                "job": "job",
+                "kernel": "kernel-2",
+                "defconfig": "defconfig",
+                "defconfig_id": "defconfig-2",
+                "status": "PASS"
+            },
+            {
+                "job": "job",
+                "kernel": "kernel-3",
+                "defconfig": "defconfig",
+                "defconfig_id": "missing",
+                "status": "PASS"
+            }
+        ]
+
+    def test_combine_all(self):
+        with mock.patch("utils.db.find", wraps=utils.db.find) as mock_find:
+            combined = bcommon.combine_all_defconfig_values(
+                self.boot_docs, {})
+            # One query on the IDs, one on the names.
+            self.assertEqual(2, mock_find.call_count)
+
+        self.assertEqual(4, len(combined))
+        self.assertEqual("commit-0", combined[0]["git_commit"])
+        self.assertEqual("commit-1", combined[1]["git_commit"])
+        self.assertEqual("commit-2", combined[2]["git_commit"])
+        self.assertEqual("", combined[3]["git_commit"])
+        self.assertEqual("FAIL", combined[0]["boot_status"])
+        self.assertEqual("PASS", combined[0]["defconfig_status"])
+
+        for boot_doc, values in zip(self.boot_docs, combined):
+            self.assertDictEqual(
+                bcommon.combine_defconfig_values(boot_doc, {}), values)
+
+    def test_combine_all_cached(self):
+        bcommon.combine_all_defconfig_values(self.boot_docs[:3], {})
+
+        with mock.patch("utils.db.find") as mock_find:
+            combined = bcommon.combine_all_defconfig_values(
+                self.boot_docs[:3], {})
+            self.assertFalse(mock_find.called)
+
+        self.assertEqual("commit-1", combined[1]["git_commit"])
+
+
+class BisectUpdateTest(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.db = mongomock.Database(mongomock.Connection(), "kernel-ci")
+
+        patched_db = mock.patch("utils.db.get_db_connection")
+        self.get_db = patched_db.start()
+        self.get_db.return_value = self.db
+        self.addCleanup(patched_db.stop)
+
+        self.now = datetime.datetime(2015, 6, 1, tzinfo=bson.tz_util.utc)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def _date(self, days):
+        return self.now - datetime.timedelta(days=days)
+
+    def _boot(self, boot_id, days, status, board="board"):
+        boot_doc = {
+            "_id": boot_id,
+            "arch": "arm",
+            "board": board,
+            "created_on": self._date(days),
+            "defconfig": "defconfig",
+            "defconfig_full": "defconfig",
+            "job": "job",
+            "kernel": "kernel-%d" % days,
+            "lab_name": "lab",
+            "status": status
+        }
+        self.db["boot"].insert(boot_doc)
+        return boot_doc
+
+    def _boot_bisect(self, boot_id, days, compare_to=None):
+        self.db["bisect"].insert({
+            "type": "boot",
+            "arch": "arm",
+            "board": "board",
+            "boot_id": boot_id,
+            "compare_to": compare_to,
+            "defconfig_full": "defconfig",
+            "bisect_data": [
+                {"job": compare_to or "job", "boot_created_on": self._date(d)}
+                for d in days
+            ]
+        })
+
+    def test_window_spec_match(self):
+        self._boot_bisect("boot-3", [3, 4, 5])
+
+        spec = bcommon.window_spec(
+            "boot",
+            {"board": "board"}, "job", "boot_created_on", self._date(4))
+        self.assertEqual(1, self.db["bisect"].find(spec).count())
+
+        spec = bcommon.window_spec(
+            "boot",
+            {"board": "board"}, "job", "boot_created_on", self._date(1))
+        self.assertEqual(0, self.db["bisect"].find(spec).count())
+
+        spec = bcommon.window_spec(
+            "boot",
+            {"board": "other"}, "job", "boot_created_on", self._date(4))
+        self.assertEqual(0, self.db["bisect"].find(spec).count())
+
+        spec = bcommon.window_spec(
+            "build",
+            {"board": "board"}, "job", "boot_created_on", self._date(4))
+        self.assertEqual(0, self.db["bisect"].find(spec).count())
+
+    def test_invalidate_bisects(self):
+        self._boot_bisect("boot-3", [3, 4, 5])
+        self._boot_bisect("boot-3", [3, 4, 5], compare_to="other")
+        self._boot_bisect("boot-8", [8, 9])
+
+        spec = bcommon.window_spec(
+            "boot", {}, "job", "boot_created_on", self._date(4))
+        self.assertListEqual(
+            ["boot-3"],
+            bcommon.invalidate_bisects(self.db, spec, "boot_id"))
+
+        self.assertListEqual(
+            ["boot-3", "boot-8"],
+            sorted([b["boot_id"] for b in self.db["bisect"].find()]))
+
+    @mock.patch("utils.bisect.boot.execute_boot_bisection")
+    def test_update_boot_bisections_new_fail(self, mock_bisect):
+        self._boot("boot-0", 0, "FAIL")
+        self._boot("boot-1", 1, "PASS")
+        self._boot_bisect("boot-3", [3, 4])
+
+        self.assertEqual(
+            1, bootb.update_boot_bisections(["boot-0", "boot-1"], {}))
+        mock_bisect.assert_called_once_with("boot-0", {})
+        # The older bisect is not affected.
+        self.assertEqual(1, self.db["bisect"].count())
+
+    @mock.patch("utils.bisect.boot.execute_boot_bisection")
+    def test_update_boot_bisections_window_changed(self, mock_bisect):
+        self._boot_bisect("boot-3", [3, 4, 5])
+        self._boot_bisect("boot-3", [3, 4, 5], compare_to="other")
+        # A boot report in the window has been updated.
+        self._boot("boot-4", 4, "PASS")
+
+        self.assertEqual(1, bootb.update_boot_bisections(["boot-4"], {}))
+        mock_bisect.assert_called_once_with("boot-3", {})
+        # The comparison with the other tree is not affected.
+        self.assertListEqual(
+            ["other"], [b["compare_to"] for b in self.db["bisect"].find()])
+
+    @mock.patch("utils.bisect.defconfig.execute_defconfig_bisection")
+    def test_update_defconfig_bisections(self, mock_bisect):
+        for defconfig_id, days, status in [
+                ("def-0", 0, "FAIL"), ("def-1", 0, "PASS")]:
+            self.db["defconfig"].insert({
+                "_id": defconfig_id,
+                "arch": "arm",
+                "created_on": self._date(days),
+                "defconfig": defconfig_id,
+                "defconfig_full": defconfig_id,
+                "job": "job",
+                "job_id": "job-id",
+                "status": status
+            })
+        self.db["bisect"].insert({
+            "type": "build",
+            "arch": "arm",
+            "compare_to": None,
+            "defconfig": "def-1",
+            "defconfig_full": "def-1",
+            "defconfig_id": "def-old",
+            "bisect_data": [
+                {"job": "job", "created_on": self._date(0)},
+                {"job": "job", "created_on": self._date(2)}
+            ]
+        })
+
+        self.assertEqual(
+            2, defconfigb.update_defconfig_bisections("job-id", {}))
+        self.assertListEqual(
+            [mock.call("def-0", {}), mock.call("def-old", {})],
+            sorted(mock_bisect.call_args_list))
+        self.assertEqual(0, self.db["bisect"].count())
+
+
+class DefconfigBisectionTest(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.db = mongomock.Database(mongomock.Connection(), "kernel-ci")
+
+        patched_db = mock.patch("utils.db.get_db_connection")
+        self.get_db = patched_db.start()
+        self.get_db.return_value = self.db
+        self.addCleanup(patched_db.stop)
+
+        self.now = datetime.datetime(2015, 6, 1, tzinfo=bson.tz_util.utc)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def _build(self, days, status, job="job"):
+        doc_id = bson.objectid.ObjectId()
+        self.db["defconfig"].insert({
+            "_id": doc_id,
+            "arch": "arm",
+            "created_on": self.now - datetime.timedelta(days=days),
+            "defconfig": "defconfig",
+            "defconfig_full": "defconfig",
+            "git_commit": "commit-%d" % days,
+            "job": job,
+            "job_id": "job-id",
+            "kernel": "kernel-%d" % days,
+            "status": status
+        })
+        return doc_id
+
+    def test_bisection_until_pass(self):
+        bad_id = self._build(0, "FAIL")
+        fail_ids = [self._build(1, "FAIL"), self._build(2, "FAIL")]
+        pass_id = self._build(3, "PASS")
+        self._build(4, "FAIL")
+        self._build(5, "PASS")
+        self._build(1, "PASS", job="other")
+
+        with mock.patch("utils.db.find", wraps=utils.db.find) as mock_find:
+            code, result = defconfigb.execute_defconfig_bisection(
+                str(bad_id), {})
+            # Only the builds in the window are requested.
+            self.assertEqual(1, mock_find.call_args_list[0][0][1])
+
+        self.assertEqual(200, code)
+        self.assertListEqual(
+            [bad_id] + fail_ids + [pass_id],
+            [doc["_id"] for doc in result[0]["bisect_data"]])
+        self.assertEqual("commit-3", result[0]["good_commit"])
+        self.assertEqual(1, self.db["bisect"].count())
+
+    def test_bisection_no_pass(self):
+        bad_id = self._build(0, "FAIL")
+        fail_ids = [self._build(1, "FAIL"), self._build(2, "FAIL")]
+
+        code, result = defconfigb.execute_defconfig_bisection(str(bad_id), {})
+
+        self.assertEqual(200, code)
+        self.assertListEqual(
+            [bad_id] + fail_ids,
+            [doc["_id"] for doc in result[0]["bisect_data"]])
+        self.assertIsNone(result[0]["good_commit"])
+
+    def test_bisection_passed_build(self):
+        pass_id = self._build(0, "PASS")
+
+        code, result = defconfigb.execute_defconfig_bisection(
+            str(pass_id), {})
+
+        self.assertEqual(400, code)
+        self.assertIsNone(result)
+
+    def test_bisection_compared_to_limit(self):
+        bad_id = self._build(0, "FAIL")
+        other_ids = [self._build(days, "PASS", job="other")
+                     for days in range(1, 15)]
+
+        code, result = defconfigb.execute_defconfig_bisection_compared_to(
+            str(bad_id), "other", {})
+
+        self.assertEqual(200, code)
+        self.assertListEqual(
+            other_ids[:10],
+            [doc["_id"] for doc in result[0]["bisect_data"]])
@@ -31,6 +31,8 @@ import models
 import models.boot as modbt
 import utils
 import utils.db
+import utils.summary
+import utils.upload
 
 # Some dtb appears to be in a temp directory like 'tmp', and will results in
 # some weird names.
@@ -45,6 +47,16 @@ NON_NULL_KEYS = [
 ]
 
 
+# The defconfig fields copied into the boot documents.
+DEFCONFIG_REFERENCE_FIELDS = [
+    models.GIT_BRANCH_KEY,
+    models.GIT_COMMIT_KEY,
+    models.GIT_DESCRIBE_KEY,
+    models.GIT_URL_KEY,
+    models.ID_KEY
+]
+
+
 class BootImportError(Exception):
     """General boot import exceptions class."""
 
@@ -78,6 +90,108 @@ def import_and_save_boot(json_obj, db_options, base_path=utils.BASE_PATH):
     return ret_code, doc_id
 
 
+def import_and_save_boots(json_list, db_options, base_path=utils.BASE_PATH):
+    """Wrapper function to import multiple boot reports at once.
+
+    This function should only be called by Celery or other task managers.
+    All the boot reports are parsed, their job and defconfig references are
+    resolved with a single query for each collection, and they are all saved
+    with a single bulk write.
+
+    If the same boot report is found more than once, only the last one is
+    saved.
+
+    :param json_list: The list of JSON objects with the values that identify
+    the boot reports.
+    :type json_list: list
+    :param db_options: The mongodb database connection parameters.
+    :type db_options: dict
+    :return The save action return code and the list of the doc IDs, None for
+    the boot reports that have not been saved.
+    """
+    database = utils.db.get_db_connection(db_options)
+    ret_code = None
+    doc_ids = []
+
+    # The boot reports by lab name and boot name: the last one wins.
+    boots = {}
+    for json_obj in json_list:
+        doc = _parse_boot_json(copy.deepcopy(json_obj))
+        if doc:
+            boots[(doc.lab_name, doc.name)] = (doc, json_obj)
+
+    if boots:
+        boot_docs = [doc for doc, _ in boots.itervalues()]
+
+        _update_boots_doc_ids(boot_docs, database)
+        prev_statuses = _update_boots_from_previous(boot_docs, database)
+
+        ret_code, doc_ids = utils.db.bulk_save(database, boot_docs)
+
+        saved_docs = []
+        for (doc, json_obj), doc_id in zip(boots.itervalues(), doc_ids):
+            if doc_id is not None:
+                save_to_disk(doc, json_obj, base_path)
+                saved_doc = doc.to_dict()
+                saved_doc[models.ID_KEY] = doc_id
+                saved_docs.append(saved_doc)
+
+        utils.summary.update_summaries(
+            database, utils.summary.BOOT_SUMMARY, saved_docs, prev_statuses)
+    else:
+        utils.LOG.info("No boot reports imported nor saved")
+
+    return ret_code, doc_ids
+
+
+def _update_boots_from_previous(boot_docs, database):
+    """Update the boot documents with the values of the already saved ones.
+
+    The ID and the creation date of the boot reports already in the database
+    are retrieved with a single query, so that the boot documents replace
+    them when saved.
+
+    :param boot_docs: The boot documents to update.
+    :type boot_docs: list
+    :param database: The database connection.
+    :return A dictionary with the status of the boot reports already in the
+    database, by document ID.
+    """
+    spec = {
+        models.LAB_NAME_KEY: {
+            "$in": list(set([doc.lab_name for doc in boot_docs]))},
+        models.NAME_KEY: {"$in": list(set([doc.name for doc in boot_docs]))}
+    }
+
+    fields = [
+        models.CREATED_KEY,
+        models.ID_KEY,
+        models.LAB_NAME_KEY,
+        models.NAME_KEY,
+        models.STATUS_KEY
+    ]
+
+    prev_docs = {}
+    for prev_doc in utils.db.find(
+            database[models.BOOT_COLLECTION], 0, 0, spec=spec, fields=fields):
+        prev_docs[
+            (prev_doc[models.LAB_NAME_KEY], prev_doc[models.NAME_KEY])] = \
+            prev_doc
+
+    prev_statuses = {}
+    for boot_doc in boot_docs:
+        prev_doc = prev_docs.get((boot_doc.lab_name, boot_doc.name), None)
+        if prev_doc:
+            doc_get = prev_doc.get
+            boot_doc.id = doc_get(models.ID_KEY)
+            boot_doc.created_on = doc_get(models.CREATED_KEY)
+            prev_statuses[boot_doc.id] = doc_get(models.STATUS_KEY)
+            utils.LOG.info(
+                "Updating boot document with id '%s'", boot_doc.id)
+
+    return prev_statuses
+
+
 def save_or_update(boot_doc, database):
     """Save or update the document in the database.
 
@@ -97,12 +211,14 @@ def save_or_update(boot_doc, database):
     fields = [
         models.CREATED_KEY,
         models.ID_KEY,
+        models.STATUS_KEY
     ]
 
     found_doc = utils.db.find(
         database[models.BOOT_COLLECTION], 1, 0, spec=spec, fields=fields)
 
     prev_doc = None
+    prev_statuses = {}
     doc_len = found_doc.count()
     if doc_len == 1:
         prev_doc = found_doc[0]
@@ -112,12 +228,19 @@ def save_or_update(boot_doc, database):
         doc_id = doc_get(models.ID_KEY)
         boot_doc.id = doc_id
         boot_doc.created_on = doc_get(models.CREATED_KEY)
+        prev_statuses[doc_id] = doc_get(models.STATUS_KEY)
 
         utils.LOG.info("Updating boot document with id '%s'", doc_id)
         ret_val, _ = utils.db.save(database, boot_doc)
     else:
         ret_val, doc_id = utils.db.save(database, boot_doc, manipulate=True)
 
+    if ret_val == 201:
+        saved_doc = boot_doc.to_dict()
+        saved_doc[models.ID_KEY] = doc_id
+        utils.summary.update_summaries(
+            database, utils.summary.BOOT_SUMMARY, [saved_doc], prev_statuses)
+
     return ret_val, doc_id
 
 
@@ -151,6 +274,7 @@ def save_to_disk(boot_doc, json_obj, base_path):
                 if ex.errno != errno.EEXIST:
                     raise ex
 
+        utils.upload.unshare_file(file_path)
         with open(file_path, mode="w") as write_json:
             write_json.write(
                 json.dumps(json_obj, ensure_ascii=False, indent="  "))
@@ -221,6 +345,24 @@ def _parse_boot_from_file(boot_log, database):
 def _parse_boot_from_json(boot_json, database):
     """Parse the boot report from a JSON object.
 
+    :param boot_json: The JSON object.
+    :type boot_json: dict
+    :return A `models.boot.BootDocument` instance, or None if the JSON cannot
+    be parsed correctly.
+    """
+    boot_doc = _parse_boot_json(boot_json)
+    if boot_doc:
+        _update_boot_doc_ids(boot_doc, database)
+
+    return boot_doc
+
+
+def _parse_boot_json(boot_json):
+    """Parse the boot report from a JSON object.
+
+    Different from `_parse_boot_from_json`, the job and defconfig references
+    are not resolved.
+
     :param boot_json: The JSON object.
     :type boot_json: dict
     :return A `models.boot.BootDocument` instance, or None if the JSON cannot
@@ -246,7 +388,6 @@ def _parse_boot_from_json(boot_json, database):
             board, job, kernel, defconfig, lab_name, defconfig_full, arch)
         boot_doc.created_on = datetime.datetime.now(tz=bson.tz_util.utc)
         _update_boot_doc_from_json(boot_doc, boot_json, json_pop_f)
-        _update_boot_doc_ids(boot_doc, database)
     except KeyError, ex:
         utils.LOG.error(
             "Missing key in boot report: import failed")
@@ -276,12 +417,12 @@ def _check_for_null(boot_json, get_func=None):
                 key, str(val), type(val))
 
 
-def _update_boot_doc_ids(boot_doc, database):
-    """Update boot document job and defconfig IDs references.
+def _get_reference_names(boot_doc):
+    """Get the names of the job and defconfig documents of a boot report.
 
-    :param boot_doc: The boot document to update.
+    :param boot_doc: The boot document.
     :type boot_doc: BootDocument
-    :param database: The database connection to use.
+    :return A tuple with the job name and the defconfig name.
     """
     job = boot_doc.job
     kernel = boot_doc.kernel
@@ -297,6 +438,18 @@ def _update_boot_doc_ids(boot_doc, database):
         models.DEFCONFIG_KEY: defconfig
     }
 
+    return job_name, defconfig_name
+
+
+def _update_boot_doc_ids(boot_doc, database):
+    """Update boot document job and defconfig IDs references.
+
+    :param boot_doc: The boot document to update.
+    :type boot_doc: BootDocument
+    :param database: The database connection to use.
+    """
+    job_name, defconfig_name = _get_reference_names(boot_doc)
+
     job_doc = utils.db.find_one(
         database[models.JOB_COLLECTION],
         [job_name],
@@ -308,15 +461,71 @@ def _update_boot_doc_ids(boot_doc, database):
         database[models.DEFCONFIG_COLLECTION],
         [defconfig_name],
         field=models.NAME_KEY,
-        fields=[
-            models.GIT_BRANCH_KEY,
-            models.GIT_COMMIT_KEY,
-            models.GIT_DESCRIBE_KEY,
-            models.GIT_URL_KEY,
-            models.ID_KEY
-        ]
+        fields=DEFCONFIG_REFERENCE_FIELDS
+    )
+
+    _set_boot_doc_ids(boot_doc, job_doc, defconfig_doc)
+
+
+def _update_boots_doc_ids(boot_docs, database):
+    """Update the job and defconfig IDs references of many boot documents.
+
+    The job and defconfig documents are retrieved with a single query for
+    each collection.
+
+    :param boot_docs: The boot documents to update.
+    :type boot_docs: list
+    :param database: The database connection to use.
+    """
+    names = [_get_reference_names(boot_doc) for boot_doc in boot_docs]
+
+    job_docs = _find_by_name(
+        database[models.JOB_COLLECTION],
+        set([job_name for job_name, _ in names]), [models.ID_KEY])
+    defconfig_docs = _find_by_name(
+        database[models.DEFCONFIG_COLLECTION],
+        set([defconfig_name for _, defconfig_name in names]),
+        DEFCONFIG_REFERENCE_FIELDS)
+
+    for boot_doc, (job_name, defconfig_name) in zip(boot_docs, names):
+        _set_boot_doc_ids(
+            boot_doc,
+            job_docs.get(job_name, None),
+            defconfig_docs.get(defconfig_name, None))
+
+
+def _find_by_name(collection, names, fields):
+    """Find all the documents with the provided names.
+
+    :param collection: The collection where to search.
+    :param names: The names of the documents.
+    :type names: set
+    :param fields: The fields to retrieve.
+    :type fields: list
+    :return A dictionary with the documents by name.
+    """
+    return dict(
+        (doc[models.NAME_KEY], doc)
+        for doc in utils.db.find(
+            collection,
+            0,
+            0,
+            spec={models.NAME_KEY: {"$in": list(names)}},
+            fields=fields + [models.NAME_KEY]
+        )
     )
 
+
+def _set_boot_doc_ids(boot_doc, job_doc, defconfig_doc):
+    """Set the job and defconfig references of a boot document.
+
+    :param boot_doc: The boot document to update.
+    :type boot_doc: BootDocument
+    :param job_doc: The job document or None.
+    :type job_doc: dict
+    :param defconfig_doc: The defconfig document or None.
+    :type defconfig_doc: dict
+    """
     if job_doc:
         boot_doc.job_id = job_doc.get(models.ID_KEY, None)
     if defconfig_doc:
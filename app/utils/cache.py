@@ -0,0 +1,170 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""In-process caches shared by the handler threads."""
+
+import collections
+import threading
+import time
+
+# Default number of elements a cache can hold.
+DEFAULT_MAX_SIZE = 1024
+# Default time-to-live of each element, in seconds.
+DEFAULT_TTL = 60
+
+
+class LRUCache(object):
+    """A bounded, thread-safe, LRU cache with per-element TTL.
+
+    When the cache is full, the least recently used element is evicted.
+    Elements older than the TTL value are treated as missing.
+
+    It keeps track of the number of hits, misses and evictions.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, ttl=DEFAULT_TTL,
+                 timer=time.time):
+        """Create a new cache.
+
+        :param max_size: The maximum number of elements to keep.
+        :type max_size: int
+        :param ttl: The time-to-live of each element, in seconds.
+        :type ttl: int, float
+        :param timer: The function used to retrieve the current time.
+        :type timer: function
+        """
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._timer = timer
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def configure(self, max_size=None, ttl=None):
+        """Change the size and TTL values of the cache.
+
+        Changing these values clears the cache.
+
+        :param max_size: The maximum number of elements to keep.
+        :type max_size: int
+        :param ttl: The time-to-live of each element, in seconds.
+        :type ttl: int, float
+        """
+        with self._lock:
+            if max_size is not None:
+                self.max_size = max_size
+            if ttl is not None:
+                self.ttl = ttl
+            self._data.clear()
+
+    @property
+    def enabled(self):
+        """If the cache can actually store elements."""
+        return self.max_size > 0 and self.ttl > 0
+
+    def get(self, key, default=None):
+        """Retrieve an element from the cache.
+
+        :param key: The key of the element.
+        :param default: What to return if the element is not cached.
+        :return The cached value or the default one.
+        """
+        with self._lock:
+            try:
+                stored_at, value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+
+            if (self._timer() - stored_at) > self.ttl:
+                self.misses += 1
+                return default
+
+            # Re-insert to mark it as the most recently used.
+            self._data[key] = (stored_at, value)
+            self.hits += 1
+
+        return value
+
+    def set(self, key, value):
+        """Store an element in the cache.
+
+        :param key: The key of the element.
+        :param value: The value to store.
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (self._timer(), value)
+
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """Remove an element from the cache.
+
+        :param key: The key of the element to remove.
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate_if(self, func):
+        """Remove all the elements whose key satisfy a condition.
+
+        :param func: Function called with the key of each element, it must
+        return True if the element has to be removed.
+        :type func: function
+        """
+        with self._lock:
+            for key in [k for k in self._data.iterkeys() if func(k)]:
+                del self._data[key]
+
+    def clear(self):
+        """Remove all the elements from the cache and reset its counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def stats(self):
+        """The cache counters.
+
+        :return A dictionary with the cache size, hits, misses, evictions and
+        hit ratio.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            ratio = 0.0
+            if lookups > 0:
+                ratio = float(self.hits) / lookups
+
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": ratio
+            }
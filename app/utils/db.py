@@ -15,16 +15,201 @@
 
 """Collection of mongodb database operations."""
 
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+import base64
+import bson.json_util
+import bson.objectid
+import bson.son
+import functools
+import inspect
 import pymongo
 import pymongo.errors
+import time
 import types
 
 import models
 import models.base as mbase
 import utils
+import utils.cache
+import utils.metrics
 
 DB_CONNECTION = None
 
+# How `find_and_count` should count the documents.
+# Run a separate `count` on the same query, the default.
+COUNT_EXACT = "exact"
+# Like COUNT_EXACT, but when there is no query the number of documents in the
+# collection is taken from the collection metadata and cached.
+COUNT_ESTIMATED = "estimated"
+# Retrieve the documents and their count with a single aggregation: this
+# requires MongoDB 3.4 or later. When there is no query it behaves like
+# COUNT_ESTIMATED, without a limit or above FACET_MAX_LIMIT like COUNT_EXACT.
+COUNT_FACET = "facet"
+# Do not count the documents at all.
+COUNT_SKIP = "skip"
+COUNT_MODES = [COUNT_EXACT, COUNT_ESTIMATED, COUNT_FACET, COUNT_SKIP]
+
+# How long, in seconds, the total number of documents of a collection is
+# cached when using COUNT_ESTIMATED or COUNT_FACET.
+ESTIMATED_COUNT_TTL = 30
+ESTIMATED_COUNT_CACHE = utils.cache.LRUCache(
+    max_size=64, ttl=ESTIMATED_COUNT_TTL)
+
+# The biggest page retrieved with COUNT_FACET: the whole page is returned in
+# a single document, that cannot be bigger than 16MB.
+FACET_MAX_LIMIT = 1000
+
+# Read operations that take longer than this value, in seconds, are logged
+# with their query and query plan. None disables the slow operation log.
+SLOW_OPERATION_THRESHOLD = None
+
+
+def set_slow_operation_threshold(milliseconds):
+    """Set the threshold of the slow operation log.
+
+    :param milliseconds: The threshold in milliseconds, 0 or None to disable
+    the log.
+    :type milliseconds: int
+    """
+    global SLOW_OPERATION_THRESHOLD
+
+    if milliseconds:
+        SLOW_OPERATION_THRESHOLD = milliseconds / 1000.0
+    else:
+        SLOW_OPERATION_THRESHOLD = None
+
+
+def _get_query_plan(collection, spec, sort):
+    """Retrieve the plan MongoDB chooses for a query.
+
+    :param collection: The collection where to search.
+    :param spec: The `spec` data structure.
+    :type spec: dict
+    :param sort: The `sort` data structure.
+    :type sort: list
+    :return The winning plan, or the cursor type with MongoDB before 3.0.
+    """
+    explain = collection.find(spec=spec, sort=sort).explain()
+
+    plan = explain.get("queryPlanner", {}).get("winningPlan", None)
+    if plan is None:
+        plan = explain.get("cursor", None)
+
+    return plan
+
+
+def log_slow_operation(
+        operation, collection, elapsed, spec=None, sort=None, fields=None):
+    """Log a slow read operation, with its query plan.
+
+    The query is explained again to retrieve the plan: for an aggregation,
+    the plan of the `match` and `sort` stages is retrieved.
+
+    :param operation: The name of the operation.
+    :type operation: str
+    :param collection: The collection the operation was performed on.
+    :param elapsed: How long the operation took, in seconds.
+    :type elapsed: float
+    :param spec: The `spec` data structure.
+    :type spec: dict
+    :param sort: The `sort` data structure.
+    :type sort: list
+    :param fields: The `fields` data structure.
+    :type fields: list, dict
+    """
+    try:
+        plan = _get_query_plan(collection, spec, sort)
+    except pymongo.errors.PyMongoError, ex:
+        plan = "not available (%s)" % ex
+
+    def _dumps(obj):
+        return json.dumps(obj, default=bson.json_util.default)
+
+    utils.LOG.warn(
+        "Slow database operation: %s on '%s' took %.1f ms - spec: %s, "
+        "sort: %s, fields: %s, plan: %s",
+        operation,
+        getattr(collection, "name", None),
+        elapsed * 1000, _dumps(spec), _dumps(sort), _dumps(fields),
+        _dumps(plan)
+    )
+
+
+def _get_call_query(func, args, kwargs):
+    """Retrieve the query of a read operation from its arguments.
+
+    :param func: The function that performs the operation.
+    :type func: function
+    :param args: The positional arguments of the call.
+    :type args: list
+    :param kwargs: The named arguments of the call.
+    :type kwargs: dict
+    :return A tuple with the collection, the spec, the sort and the fields.
+    """
+    call_args = inspect.getcallargs(func, *args, **kwargs)
+    call_get = call_args.get
+
+    if "operator" in call_args:
+        # find_one builds the spec from its arguments.
+        spec = {call_get("field"): {call_get("operator"): call_get("value")}}
+    else:
+        spec = call_get("spec", None) or call_get("match", None) or \
+            call_get("spec_or_id", None)
+        if all([spec is not None,
+                not isinstance(spec, types.DictionaryType)]):
+            spec = {models.ID_KEY: spec}
+
+    return (
+        call_get("collection"), spec, call_get("sort", None),
+        call_get("fields", None))
+
+
+def log_slow(func):
+    """Decorator that logs the read operations slower than the threshold.
+
+    When the log is disabled it only checks the threshold value.
+
+    :param func: The function that performs the operation.
+    :type func: function
+    :return The decorated function.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if SLOW_OPERATION_THRESHOLD is None:
+            return func(*args, **kwargs)
+
+        start = time.time()
+        result = func(*args, **kwargs)
+        elapsed = time.time() - start
+
+        if elapsed >= SLOW_OPERATION_THRESHOLD:
+            collection, spec, sort, fields = _get_call_query(
+                func, args, kwargs)
+            log_slow_operation(
+                func.__name__,
+                collection, elapsed, spec=spec, sort=sort, fields=fields)
+
+        return result
+    return wrapper
+
+
+def documents_collection(database, documents, *args, **kwargs):
+    """The name of the collection where documents are saved.
+
+    Used to name the save operations in the metrics.
+
+    :param database: The database where to save.
+    :param documents: The document to save, or a list of them.
+    :return The collection name of the (first) document.
+    """
+    if isinstance(documents, types.ListType):
+        documents = documents[0] if documents else None
+    return getattr(documents, "collection", None) or "unknown"
+
 
 def get_db_connection(db_options):
     """Retrieve a mongodb database connection.
@@ -55,6 +240,8 @@ def get_db_connection(db_options):
     return DB_CONNECTION
 
 
+@utils.metrics.db_operation("find_one")
+@log_slow
 def find_one(collection,
              value,
              field="_id",
@@ -97,6 +284,8 @@ def find_one(collection,
     return result
 
 
+@utils.metrics.db_operation("find_one")
+@log_slow
 def find_one2(collection, spec_or_id, fields=None):
     """Search for a single document.
 
@@ -112,6 +301,7 @@ def find_one2(collection, spec_or_id, fields=None):
     return collection.find_one(spec_or_id, fields=fields)
 
 
+@utils.metrics.db_operation("find")
 def find(collection, limit, skip, spec=None, fields=None, sort=None):
     """Find documents in a collection with optional specified values.
 
@@ -137,12 +327,28 @@ def find(collection, limit, skip, spec=None, fields=None, sort=None):
         limit=limit, skip=skip, fields=fields, sort=sort, spec=spec)
 
 
-def find_and_count(collection, limit, skip, spec=None, fields=None, sort=None):
+@utils.metrics.db_operation("find_and_count")
+@log_slow
+def find_and_count(collection,
+                   limit,
+                   skip, spec=None, fields=None, sort=None, count_mode=None):
     """Find all the documents in a collection, and return the total count.
 
-    This will execute two operations: a `find` that will retrieve the documents
-    with the specified `limit` and `skip` values, and then a `count` on the
-    results found.
+    By default this will execute two operations: a `find` that will retrieve
+    the documents with the specified `limit` and `skip` values, and then a
+    `count` on the results found. How the count is performed can be changed
+    with the `count_mode` parameter:
+
+    - COUNT_EXACT: the default, described above.
+    - COUNT_ESTIMATED: if no `spec` is provided, the count is the total number
+      of documents in the collection, as stored in its metadata, and is cached
+      for `ESTIMATED_COUNT_TTL` seconds.
+    - COUNT_FACET: the documents and the count are retrieved with a single
+      aggregation, a list is returned instead of a cursor. Since the
+      documents must fit in the 16MB limit of a single BSON document, it
+      is used only when `limit` is between 1 and `FACET_MAX_LIMIT`:
+      otherwise COUNT_EXACT is used.
+    - COUNT_SKIP: no count is performed, None is returned as the count value.
 
     If just `limit` and `skip` are passed, the `count` will return the total
     number of documents in the collection.
@@ -159,24 +365,352 @@ def find_and_count(collection, limit, skip, spec=None, fields=None, sort=None):
     :type str, list, dict
     :param sort: Whose fields the result should be sorted on.
     :type list
+    :param count_mode: How the documents should be counted.
+    :type count_mode: str
     :return The search result and the total count.
     """
-    db_result = collection.find(
-        spec=spec, limit=limit, skip=skip, fields=fields, sort=sort)
-    res_count = db_result.count()
+    if not spec and count_mode in [COUNT_ESTIMATED, COUNT_FACET]:
+        db_result = collection.find(
+            spec=spec, limit=limit, skip=skip, fields=fields, sort=sort)
+        res_count = estimated_count(collection)
+    elif all([count_mode == COUNT_FACET, limit, limit <= FACET_MAX_LIMIT]):
+        db_result, res_count = _find_and_count_facet(
+            collection, limit, skip, spec, fields, sort)
+    else:
+        db_result = collection.find(
+            spec=spec, limit=limit, skip=skip, fields=fields, sort=sort)
+
+        res_count = None
+        if count_mode != COUNT_SKIP:
+            res_count = db_result.count()
 
     return db_result, res_count
 
 
-def count(collection):
-    """Count all the documents in a collection.
+def _find_and_count_facet(collection, limit, skip, spec, fields, sort):
+    """Find the documents and their total count with a single aggregation.
+
+    See `find_and_count` for the parameters.
+
+    :return A list with the documents found and the total count.
+    """
+    # The $skip stage is always added since a $facet pipeline cannot be empty.
+    page_stages = [{"$skip": skip or 0}, {"$limit": limit}]
+
+    projection = _fields_to_projection(fields)
+    if projection:
+        page_stages.append({"$project": projection})
+
+    pipeline = [{"$match": spec or {}}]
+    # Sort before the $facet stage: right after $match it can use an index,
+    # inside a $facet pipeline it cannot.
+    if sort:
+        pipeline.append({"$sort": bson.son.SON(sort)})
+    pipeline.append({
+        "$facet": {
+            models.RESULT_KEY: page_stages,
+            models.COUNT_KEY: [{"$count": models.COUNT_KEY}]
+        }
+    })
+
+    result = []
+    res_count = 0
+    for facet in collection.aggregate(
+            pipeline, cursor={}, allowDiskUse=True):
+        result = facet.get(models.RESULT_KEY, [])
+        counts = facet.get(models.COUNT_KEY, None)
+        if counts:
+            res_count = counts[0][models.COUNT_KEY]
+
+    return result, res_count
+
+
+def _fields_to_projection(fields):
+    """Convert a `fields` data structure into a `$project` one.
+
+    :param fields: The fields that should be returned or excluded from the
+        result.
+    :type str, list, dict
+    :return A dictionary, or None.
+    """
+    projection = None
+
+    if fields:
+        if isinstance(fields, types.StringTypes):
+            fields = [fields]
+
+        if isinstance(fields, types.DictionaryType):
+            projection = {k: int(bool(v)) for k, v in fields.iteritems()}
+        else:
+            projection = {k: 1 for k in fields}
+
+    return projection
+
+
+def keyset_sort(sort):
+    """Make a `sort` data structure usable for keyset pagination.
+
+    The documents must be in a total order: `_id` is added as the last sort
+    key, with the same order of the other ones. Since `_id` is unique, the
+    keys after it are dropped. Without a `sort`, the documents are sorted by
+    `_id` in descending order.
+
+    :param sort: The `sort` data structure.
+    :type sort: list
+    :return The new `sort` data structure.
+    """
+    new_sort = []
+
+    if sort:
+        for key, order in sort:
+            new_sort.append((key, order))
+            if key == models.ID_KEY:
+                break
+        else:
+            new_sort.append((models.ID_KEY, new_sort[-1][1]))
+    else:
+        new_sort.append((models.ID_KEY, pymongo.DESCENDING))
+
+    return new_sort
+
+
+def _get_field_value(document, field):
+    """Get the value of a field, following the dotted notation.
+
+    :param document: The document.
+    :type document: dict
+    :param field: The field name.
+    :type field: str
+    :return The value, None if the field does not exist.
+    """
+    value = document
+    for key in field.split("."):
+        if isinstance(value, types.DictionaryType):
+            value = value.get(key, None)
+        else:
+            value = None
+            break
+    return value
+
+
+def encode_page_token(document, sort):
+    """Create the opaque token that points right after a document.
+
+    The token encodes the values of the sort keys of the document. It is
+    URL safe.
+
+    :param document: The last document of a page.
+    :type document: dict
+    :param sort: The `sort` data structure, as returned by `keyset_sort`.
+    :type sort: list
+    :return The token, a string.
+    """
+    token = json.dumps(
+        [
+            [key for key, _ in sort],
+            [_get_field_value(document, key) for key, _ in sort]
+        ],
+        default=bson.json_util.default, separators=(",", ":"))
+
+    return base64.urlsafe_b64encode(token).rstrip("=")
+
+
+def decode_page_token(token, sort):
+    """Retrieve the values of the sort keys from a token.
+
+    :param token: The token created with `encode_page_token`.
+    :type token: str
+    :param sort: The `sort` data structure, as returned by `keyset_sort`.
+    :type sort: list
+    :return The list of the values of the sort keys.
+    :raise ValueError if the token is not valid, or it has been created with
+    a different `sort`.
+    """
+    try:
+        token = str(token)
+        keys, values = json.loads(
+            base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)),
+            object_hook=bson.json_util.object_hook)
+    except (TypeError, ValueError, UnicodeEncodeError):
+        raise ValueError("Invalid page token")
+
+    if keys != [key for key, _ in sort] or len(values) != len(keys):
+        raise ValueError("Page token created with a different sort order")
+
+    return values
+
+
+def keyset_spec(spec, sort, values):
+    """Add to the `spec` the condition to find the documents after a key.
+
+    With the sort keys k1, k2... and the last values seen v1, v2..., the
+    documents that come next have k1 > v1, or k1 == v1 and k2 > v2, and so
+    on ($lt instead of $gt for descending orders).
+
+    Null and missing values sort before all the other ones, but $gt and $lt
+    never match them: in ascending order, all the non-null values come after
+    a null one; in descending order, the null values come after a non-null
+    one and nothing comes after a null one. `_id` is never null.
+
+    :param spec: The `spec` data structure.
+    :type spec: dict
+    :param sort: The `sort` data structure, as returned by `keyset_sort`.
+    :type sort: list
+    :param values: The values of the sort keys of the last document seen.
+    :type values: list
+    :return The new `spec` data structure.
+    """
+    conditions = []
+    for idx, (key, order) in enumerate(sort):
+        value = values[idx]
+        prefix = dict(
+            (sort[prev][0], values[prev]) for prev in range(idx))
+
+        if order == pymongo.ASCENDING:
+            if value is None:
+                after_key = [{"$ne": None}]
+            else:
+                after_key = [{"$gt": value}]
+        elif value is None:
+            after_key = []
+        elif key == models.ID_KEY:
+            after_key = [{"$lt": value}]
+        else:
+            after_key = [{"$lt": value}, None]
+
+        for key_condition in after_key:
+            condition = dict(prefix)
+            condition[key] = key_condition
+            conditions.append(condition)
+
+    after = {"$or": conditions}
+    if spec:
+        after = {"$and": [spec, after]}
+
+    return after
+
+
+def keyset_fields(fields, sort):
+    """Make sure the sort keys are returned with the documents.
+
+    They are necessary to create the token of the next page.
+
+    :param fields: The `fields` data structure.
+    :type fields: list, dict
+    :param sort: The `sort` data structure.
+    :type sort: list
+    :return The new `fields` data structure.
+    """
+    if isinstance(fields, types.ListType):
+        fields = fields + [key for key, _ in sort if key not in fields]
+    elif isinstance(fields, types.DictionaryType):
+        fields = dict(fields)
+        included = any(fields.itervalues())
+        for key, _ in sort:
+            if included:
+                fields[key] = True
+            else:
+                fields.pop(key, None)
+
+    return fields
+
+
+@utils.metrics.db_operation("find_page")
+@log_slow
+def find_page(collection,
+              limit,
+              after, spec=None, fields=None, sort=None, count_mode=None):
+    """Find a page of documents with keyset pagination.
+
+    Instead of skipping the documents of the previous pages, the documents
+    after the last one seen are searched: the cost of each page does not
+    depend on its position, provided there is an index on the sort keys.
+
+    :param collection: The collection where to search.
+    :param limit: How many documents to return.
+    :type int
+    :param after: The token returned with the previous page, or None for the
+    first page.
+    :type after: str
+    :param spec: A dictionary object with key-value fields to be matched.
+    :type dict
+    :param fields: The fields that should be returned or excluded from the
+        result.
+    :type str, list, dict
+    :param sort: Whose fields the result should be sorted on.
+    :type list
+    :param count_mode: How the documents matching `spec` should be counted,
+    see `find_and_count`.
+    :type count_mode: str
+    :return A list with the documents found, the total count and the token
+    of the next page (None if this is the last page).
+    :raise ValueError if the `after` token is not valid.
+    """
+    sort = keyset_sort(sort)
+
+    find_spec = spec
+    if after:
+        find_spec = keyset_spec(spec, sort, decode_page_token(after, sort))
+
+    result = [
+        r for r in collection.find(
+            spec=find_spec,
+            limit=limit, fields=keyset_fields(fields, sort), sort=sort)
+    ]
+
+    res_count = None
+    if all([not spec, count_mode in [COUNT_ESTIMATED, COUNT_FACET]]):
+        res_count = estimated_count(collection)
+    elif count_mode != COUNT_SKIP:
+        res_count = collection.find(
+            spec=spec, fields={models.ID_KEY: True}).count()
+
+    next_token = None
+    if all([limit > 0, len(result) == limit]):
+        next_token = encode_page_token(result[-1], sort)
+
+    return result, res_count, next_token
+
+
+def estimated_count(collection):
+    """Count all the documents in a collection using a cached value.
+
+    The value is taken from the collection metadata and cached for
+    `ESTIMATED_COUNT_TTL` seconds.
 
     :param collection: The collection whose documents should be counted.
     :return The number of documents in the collection.
     """
+    key = collection.full_name
+    res_count = ESTIMATED_COUNT_CACHE.get(key)
+
+    if res_count is None:
+        res_count = collection.count()
+        ESTIMATED_COUNT_CACHE.set(key, res_count)
+
+    return res_count
+
+
+@utils.metrics.db_operation("count")
+def count(collection, spec=None):
+    """Count the documents in a collection.
+
+    No document is retrieved: use it instead of `find_and_count` when only
+    the count is needed.
+
+    :param collection: The collection whose documents should be counted.
+    :param spec: The documents to count, all of them if not provided.
+    :type spec: dict
+    :return The number of documents.
+    """
+    if spec:
+        return collection.find(
+            spec=spec, fields={models.ID_KEY: True}).count()
     return collection.count()
 
 
+@utils.metrics.db_operation(
+    "save", collection_func=documents_collection)
 def save(database, document, manipulate=False):
     """Save one document into the database.
 
@@ -261,6 +795,87 @@ def save_all(database, documents, manipulate=False, fail_on_err=False):
     return ret_value, doc_id
 
 
+@utils.metrics.db_operation(
+    "bulk_save", collection_func=documents_collection)
+def bulk_save(database, documents):
+    """Save a list of documents with unordered bulk operations.
+
+    Documents are grouped by their collection, and each group is saved with
+    a single bulk operation: documents with an `_id` replace the existing
+    ones (or are inserted if missing), the others are inserted with a new
+    `_id` value.
+
+    Since the bulk operations are unordered, a failing document does not stop
+    the others from being saved.
+
+    :param database: The database where to save.
+    :param documents: The list of `BaseDocument` documents.
+    :type documents: list
+    :return A tuple: first element is the operation code (201 if the save has
+    success, 500 in case of an error), second element is the list of the
+    `_id` values of each document, None for the ones that could not be saved.
+    """
+    ret_value = 201
+    doc_id = []
+    # For each collection, the bulk operation and the position in the
+    # documents list of each of its operations.
+    bulk_ops = {}
+
+    for idx, document in enumerate(documents):
+        if isinstance(document, mbase.BaseDocument):
+            to_save = document.to_dict()
+            save_id = to_save.get(models.ID_KEY)
+
+            if document.collection not in bulk_ops:
+                bulk_ops[document.collection] = (
+                    database[
+                        document.collection].initialize_unordered_bulk_op(),
+                    []
+                )
+            bulk_op, positions = bulk_ops[document.collection]
+
+            if save_id:
+                bulk_op.find({models.ID_KEY: save_id}).upsert().replace_one(
+                    to_save)
+            else:
+                save_id = bson.objectid.ObjectId()
+                to_save[models.ID_KEY] = save_id
+                bulk_op.insert(to_save)
+
+            positions.append(idx)
+            doc_id.append(save_id)
+        else:
+            utils.LOG.error(
+                "Cannot save document, it is not of type BaseDocument, got %s",
+                type(document))
+            doc_id.append(None)
+            ret_value = 500
+
+    for collection, (bulk_op, positions) in bulk_ops.iteritems():
+        try:
+            bulk_op.execute()
+            utils.LOG.info(
+                "%d documents saved (%s)", len(positions), collection)
+        except pymongo.errors.BulkWriteError, ex:
+            ret_value = 500
+            for error in ex.details.get("writeErrors", []):
+                idx = positions[error["index"]]
+                doc_id[idx] = None
+                utils.LOG.error(
+                    "Error saving the following document: %s (%s): %s",
+                    documents[idx].name, collection, error.get("errmsg"))
+        except pymongo.errors.OperationFailure, ex:
+            utils.LOG.error(
+                "Error saving documents in bulk (%s)", collection)
+            utils.LOG.exception(ex)
+            ret_value = 500
+            for idx in positions:
+                doc_id[idx] = None
+
+    return ret_value, doc_id
+
+
+@utils.metrics.db_operation("update")
 def update(collection, spec, document, operation="$set"):
     """Update a document with the provided values.
 
@@ -291,6 +906,7 @@ def update(collection, spec, document, operation="$set"):
     return ret_val
 
 
+@utils.metrics.db_operation("find_and_update")
 def find_and_update(collection, query, document, operation="$set"):
     """Search for a document in the provided collection and update it.
 
@@ -324,6 +940,7 @@ def find_and_update(collection, query, document, operation="$set"):
     return ret_val
 
 
+@utils.metrics.db_operation("delete")
 def delete(collection, spec_or_id):
     """Remove a document or multiple documents from the collection.
 
@@ -347,6 +964,8 @@ def delete(collection, spec_or_id):
     return ret_val
 
 
+@utils.metrics.db_operation("aggregate")
+@log_slow
 def aggregate(
         collection, unique, match=None, sort=None, fields=None, limit=None):
     """Perform an aggregate `group` action on the collection.
@@ -369,6 +988,19 @@ def aggregate(
     :type limit int, str
     :return A dictionary with the results.
     """
+    pipeline = aggregate_pipeline(
+        unique, match=match, sort=sort, fields=fields, limit=limit)
+
+    return aggregate_result(collection.aggregate(pipeline))
+
+
+def aggregate_pipeline(unique, match=None, sort=None, fields=None, limit=None):
+    """Create the pipeline for an aggregate `group` action.
+
+    See `aggregate` for the meaning of the parameters.
+
+    :return The pipeline as a list.
+    """
 
     def _starts_with_dollar(val):
         """Check if a value starts with the dollar sign.
@@ -434,8 +1066,15 @@ def aggregate(
 
     utils.LOG.debug(pipeline)
 
-    result = collection.aggregate(pipeline)
+    return pipeline
 
+
+def aggregate_result(result):
+    """Extract the documents from the result of an aggregate `group` action.
+
+    :param result: The result as returned by the database.
+    :return A list with the results.
+    """
     if result and isinstance(result, types.DictionaryType):
         element = result.get("result", None)
 
@@ -454,3 +1093,51 @@ def aggregate(
             result = []
 
     return result
+
+
+def get_cache_versions(database):
+    """Get the versions of the collections whose documents are cached.
+
+    The version of a collection is increased every time its documents are
+    changed: what has been cached with a previous version is stale.
+
+    :param database: The database connection.
+    :return A dictionary: the collection names and their versions. Missing
+    collections have never been changed.
+    """
+    versions = {}
+
+    try:
+        for doc in database[models.CACHE_VERSION_COLLECTION].find():
+            versions[doc[models.ID_KEY]] = doc[models.VERSION_KEY]
+    except pymongo.errors.OperationFailure, ex:
+        utils.LOG.error("Error retrieving the cache versions")
+        utils.LOG.exception(ex)
+
+    return versions
+
+
+def bump_cache_versions(database, collections):
+    """Increase the versions of the provided collections.
+
+    It must be called after the documents of a collection have been changed.
+
+    :param database: The database connection.
+    :param collections: The names of the changed collections.
+    :type collections: list
+    :return 200 if the update has success, 500 in case of an error.
+    """
+    ret_val = 200
+    versions = database[models.CACHE_VERSION_COLLECTION]
+
+    try:
+        for collection in collections:
+            versions.update(
+                {models.ID_KEY: collection},
+                {"$inc": {models.VERSION_KEY: 1}}, upsert=True)
+    except pymongo.errors.OperationFailure, ex:
+        utils.LOG.error("Error updating the cache versions")
+        utils.LOG.exception(ex)
+        ret_val = 500
+
+    return ret_val
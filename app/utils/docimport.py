@@ -29,6 +29,7 @@ import models.defconfig as mdefconfig
 import models.job as mjob
 import utils
 import utils.db
+import utils.summary
 
 
 def import_and_save_job(json_obj, db_options, base_path=utils.BASE_PATH):
@@ -48,13 +49,68 @@ def import_and_save_job(json_obj, db_options, base_path=utils.BASE_PATH):
     if docs:
         utils.LOG.info(
             "Importing %d documents with job ID: %s", len(docs), job_id)
-        utils.db.save_all(database, docs, manipulate=True)
+
+        _, doc_ids = save_documents_and_summaries(database, docs)
+
+        if doc_ids[0] is None:
+            utils.LOG.error("Unable to save job document %s", docs[0].name)
+            job_id = None
     else:
         utils.LOG.info("No jobs to save")
 
     return job_id
 
 
+def save_documents_and_summaries(database, docs):
+    """Save the documents created by the import and update the summaries.
+
+    The build summaries of the saved defconfig documents are updated with
+    their new results.
+
+    :param database: The database connection.
+    :param docs: The documents to save: the job document first, followed by
+    the defconfig ones.
+    :type docs: list
+    :return The same values of `save_documents`.
+    """
+    # The job document is always the first one.
+    build_docs = docs[1:]
+    prev_statuses = utils.summary.get_statuses(
+        database,
+        utils.summary.BUILD_SUMMARY,
+        [doc.id for doc in build_docs if doc and doc.id is not None])
+
+    ret_val, doc_ids = save_documents(database, docs)
+
+    saved_docs = []
+    for doc, doc_id in zip(build_docs, doc_ids[1:]):
+        if doc_id is not None:
+            saved_doc = doc.to_dict()
+            saved_doc[models.ID_KEY] = doc_id
+            saved_docs.append(saved_doc)
+
+    utils.summary.update_summaries(
+        database, utils.summary.BUILD_SUMMARY, saved_docs, prev_statuses)
+
+    return ret_val, doc_ids
+
+
+def save_documents(database, docs):
+    """Save the job and defconfig documents created by the import.
+
+    All the documents of a collection are written with a single unordered
+    bulk operation.
+
+    :param database: The database connection.
+    :param docs: The documents to save.
+    :type docs: list
+    :return A tuple: the operation code (201 if the save has success, 500 in
+    case of an error) and the list of the `_id` values of each document,
+    None for the ones that could not be saved.
+    """
+    return utils.db.bulk_save(database, docs)
+
+
 def import_job_from_json(json_obj, database, base_path=utils.BASE_PATH):
     """Import a job based on the provided JSON object.
 
@@ -78,20 +134,23 @@ def import_job_from_json(json_obj, database, base_path=utils.BASE_PATH):
 def _import_job(job, kernel, database, base_path=utils.BASE_PATH):
     """Traverse the job dir and create the documenst to save.
 
+    Nothing is saved in the database: the first of the returned documents is
+    the job one, followed by the defconfig ones. If the job document is new,
+    its ID is assigned here so that the defconfig documents can reference it.
+
     :param job: The name of the job.
     :param kernel: The name of the kernel.
     :param base_path: The base path where to strat the traversing.
     :return The documents to be saved, and the job document ID.
     """
     docs = []
-    ret_val = 201
     job_id = None
 
     job_dir = os.path.join(base_path, job)
     kernel_dir = os.path.join(job_dir, kernel)
 
     if utils.is_hidden(job) or utils.is_hidden(kernel):
-        return docs
+        return docs, job_id
 
     job_name = (
         models.JOB_DOCUMENT_NAME %
@@ -101,17 +160,13 @@ def _import_job(job, kernel, database, base_path=utils.BASE_PATH):
         database[models.JOB_COLLECTION], [job_name], field=models.NAME_KEY)
     if saved_doc:
         job_doc = mjob.JobDocument.from_json(saved_doc)
-        job_id = job_doc.id
     else:
         job_doc = mjob.JobDocument(job, kernel)
-        ret_val, job_id = utils.db.save(database, job_doc, manipulate=True)
+        job_doc.id = bson.objectid.ObjectId()
 
-    if all([ret_val == 201, job_id is not None]):
-        job_doc.id = job_id
-        docs = _traverse_kernel_dir(job_doc, kernel_dir, database)
-    else:
-        utils.LOG.error("Unable to save job document %s", job_name)
-        job_id = None
+    job_id = job_doc.id
+    docs.append(job_doc)
+    docs.extend(_traverse_kernel_dir(job_doc, kernel_dir, database))
 
     return docs, job_id
 
@@ -122,6 +177,7 @@ def _traverse_kernel_dir(job_doc, kernel_dir, database):
     :param job_doc: The created `JobDocument`.
     :param kernel_dir: The kernel directory to traverse.
     :param database: The database connection.
+    :return The list of `DefconfigDocument` found.
     """
     docs = []
 
@@ -138,7 +194,7 @@ def _traverse_kernel_dir(job_doc, kernel_dir, database):
         docs.extend(
             [
                 _traverse_defconf_dir(
-                    job_doc, kernel_dir, defconf_dir, database
+                    job_doc, kernel_dir, defconf_dir
                 ) for defconf_dir in os.listdir(kernel_dir)
                 if os.path.isdir(os.path.join(kernel_dir, defconf_dir))
                 if not utils.is_hidden(defconf_dir)
@@ -146,6 +202,8 @@ def _traverse_kernel_dir(job_doc, kernel_dir, database):
                 if not None
             ]
         )
+
+        _set_prev_defconfig_docs(job_doc, docs, database)
     else:
         job_doc.status = models.BUILD_STATUS
         job_doc.created_on = datetime.datetime.now(tz=bson.tz_util.utc)
@@ -155,37 +213,25 @@ def _traverse_kernel_dir(job_doc, kernel_dir, database):
     # git tree, git commit...
     # Since, at the moment, we do not have the metadata file at the job level
     # we need to pick one from the build documents, and extract some values.
-    docs_len = len(docs)
-    if docs_len > 1:
-        idx = 0
-        while idx < docs_len:
-            defconf_doc = docs[idx]
-            if isinstance(defconf_doc, mjob.JobDocument):
-                idx += 1
-            elif isinstance(defconf_doc, mdefconfig.DefconfigDocument):
-                if (defconf_doc.job == job_doc.job and
-                        defconf_doc.kernel == job_doc.kernel):
-                    job_doc.git_commit = defconf_doc.git_commit
-                    job_doc.git_describe = defconf_doc.git_describe
-                    job_doc.git_url = defconf_doc.git_url
-                    job_doc.git_branch = defconf_doc.git_branch
-                    break
-            else:
-                idx += 1
-        # Save, again, the job-doc or we end up without the git data.
-        utils.db.save(database, job_doc)
+    for defconf_doc in docs:
+        if isinstance(defconf_doc, mdefconfig.DefconfigDocument):
+            if (defconf_doc.job == job_doc.job and
+                    defconf_doc.kernel == job_doc.kernel):
+                job_doc.git_commit = defconf_doc.git_commit
+                job_doc.git_describe = defconf_doc.git_describe
+                job_doc.git_url = defconf_doc.git_url
+                job_doc.git_branch = defconf_doc.git_branch
+                break
 
     return docs
 
 
-def _traverse_defconf_dir(
-        job_doc, kernel_dir, defconfig_dir, database):
+def _traverse_defconf_dir(job_doc, kernel_dir, defconfig_dir):
     """Traverse the defconfig directory looking for files.
 
     :param job_doc: The created `JobDocument`.
     :param kernel_dir: The parent directory of this defconfig.
     :param defconfig_dir: The actual defconfig directory to parse.
-    :param database: The database connection.
     :return A `DefconfigDocument` instance.
     """
     job = job_doc.job
@@ -204,70 +250,87 @@ def _traverse_defconf_dir(
         if os.path.isfile(data_file):
             defconfig_doc = _parse_build_data(
                 data_file, job, kernel, dirname)
-            defconfig_doc.job_id = job_doc.id
-            # Search for previous defconfig doc. This is only useful when
-            # re-importing data and we want to have the same ID as before.
-            doc_id, c_date = _search_prev_defconfig_doc(
-                defconfig_doc, database)
-            defconfig_doc.id = doc_id
-            if c_date:
-                defconfig_doc.created_on = c_date
-            else:
-                # Give the defconfig doc the same date as the job one.
-                # In this way all defconfigs will have the same date regardless
-                # of when they were saved on the file system.
-                defconfig_doc.created_on = job_doc.created_on
+            if defconfig_doc:
+                defconfig_doc.job_id = job_doc.id
         else:
             utils.LOG.warn("No build data file found in '%s'", real_dir)
 
     return defconfig_doc
 
 
-def _search_prev_defconfig_doc(defconfig_doc, database):
-    """Search for a similar defconfig document in the database.
+def _set_prev_defconfig_docs(job_doc, defconfig_docs, database):
+    """Search for similar defconfig documents in the database.
 
-    Search for an already imported defconfig/build document in the database
-    and return its object ID and creation date. This is done to make sure
-    we do not create double documents when re-importing the same data or
-    updating it.
+    Search for the already imported defconfig/build documents in the
+    database and give the new documents their object ID and creation date.
+    This is done to make sure we do not create double documents when
+    re-importing the same data or updating it.
 
-    :param defconfig_doc: The new defconfig document.
+    All the previous documents are retrieved with a single query on their
+    names.
+
+    New documents get the same date as the job one: in this way all
+    defconfigs will have the same date regardless of when they were saved on
+    the file system.
+
+    :param job_doc: The `JobDocument` the defconfigs belong to.
+    :param defconfig_docs: The new defconfig documents.
+    :type defconfig_docs: list
     :param database: The db connection.
-    :return The previous doc ID and its creation date, or None.
     """
-    doc_id = None
-    c_date = None
+    defconfig_docs = [
+        doc for doc in defconfig_docs
+        if isinstance(doc, mdefconfig.DefconfigDocument)]
 
-    if all([defconfig_doc, database]):
+    prev_docs = {}
+    if defconfig_docs:
         spec = {
-            models.JOB_KEY: defconfig_doc.job,
-            models.KERNEL_KEY: defconfig_doc.kernel,
-            models.DEFCONFIG_KEY: defconfig_doc.defconfig,
-            models.DEFCONFIG_FULL_KEY: defconfig_doc.defconfig_full,
-            models.ARCHITECTURE_KEY: defconfig_doc.arch
+            models.NAME_KEY: {
+                "$in": list(set([doc.name for doc in defconfig_docs]))
+            }
         }
-        prev_doc = utils.db.find(
-            database[models.DEFCONFIG_COLLECTION],
-            10,
-            0,
-            spec=spec,
-            fields=[models.ID_KEY, models.CREATED_KEY]
+        for prev_doc in utils.db.find(
+                database[models.DEFCONFIG_COLLECTION],
+                0,
+                0,
+                spec=spec,
+                fields=[
+                    models.ID_KEY,
+                    models.CREATED_KEY,
+                    models.JOB_KEY,
+                    models.KERNEL_KEY,
+                    models.DEFCONFIG_KEY,
+                    models.DEFCONFIG_FULL_KEY, models.ARCHITECTURE_KEY]):
+            p_get = prev_doc.get
+            key = (
+                p_get(models.JOB_KEY),
+                p_get(models.KERNEL_KEY),
+                p_get(models.DEFCONFIG_KEY),
+                p_get(models.DEFCONFIG_FULL_KEY),
+                p_get(models.ARCHITECTURE_KEY)
+            )
+            prev_docs.setdefault(key, []).append(prev_doc)
+
+    for defconfig_doc in defconfig_docs:
+        c_date = None
+        key = (
+            defconfig_doc.job,
+            defconfig_doc.kernel,
+            defconfig_doc.defconfig,
+            defconfig_doc.defconfig_full, defconfig_doc.arch
         )
+        found = prev_docs.get(key, [])
+
+        if len(found) == 1:
+            defconfig_doc.id = found[0].get(models.ID_KEY, None)
+            c_date = found[0].get(models.CREATED_KEY, None)
+        elif len(found) > 1:
+            utils.LOG.warn(
+                "Found multiple defconfig docs matching: %s", key)
+            utils.LOG.error(
+                "Cannot keep old document ID, don't know which one to use!")
 
-        prev_doc_count = prev_doc.count()
-        if prev_doc_count > 0:
-            if prev_doc_count == 1:
-                doc_id = prev_doc[0].get(models.ID_KEY, None)
-                c_date = prev_doc[0].get(models.CREATED_KEY, None)
-            else:
-                utils.LOG.warn(
-                    "Found multiple defconfig docs matching: %s",
-                    spec)
-                utils.LOG.error(
-                    "Cannot keep old document ID, don't know which one to "
-                    "use!")
-
-    return doc_id, c_date
+        defconfig_doc.created_on = c_date or job_doc.created_on
 
 
 def _parse_build_data(data_file, job, kernel, defconfig_dir):
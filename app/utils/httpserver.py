@@ -0,0 +1,215 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""An HTTP server that can stream the request bodies to the handlers.
+
+The HTTP server of Tornado 3.2 reads the whole body of a request in memory
+before passing the request to the application. With `HTTPServer`, the
+requests for a handler decorated with `stream_request_body` are passed to
+the application as soon as their headers have been read: the handler then
+reads the body in chunks with `read_body`. Only the data received since the
+previous chunk is kept in memory, not the whole body.
+
+This is what `tornado.web.stream_request_body` does since Tornado 4.0.
+"""
+
+import socket
+
+import tornado.concurrent
+import tornado.escape
+import tornado.httpserver
+import tornado.httputil
+import tornado.iostream
+import tornado.log
+
+
+def stream_request_body(cls):
+    """Decorate a `RequestHandler` class to stream its request bodies.
+
+    The handler must read the body with `read_body` before its HTTP method
+    is executed, usually in `prepare`.
+    """
+    cls._stream_request_body = True
+    return cls
+
+
+def body_streamed(request):
+    """Check if the body of a request has to be read with `read_body`.
+
+    :param request: The HTTP request.
+    :type request: tornado.httpserver.HTTPRequest
+    :return True if the body has not been read yet, False if it is already
+    available in `request.body`.
+    """
+    streamed = False
+    connection = request.connection
+    if isinstance(connection, HTTPConnection):
+        streamed = connection.unread_body(request) > 0
+    return streamed
+
+
+def read_body(request, streaming_callback):
+    """Read the body of a request in chunks.
+
+    :param request: The HTTP request whose body has been streamed.
+    :type request: tornado.httpserver.HTTPRequest
+    :param streaming_callback: The function called with each chunk of the
+    body, as it arrives.
+    :type streaming_callback: function
+    :return A future resolved when the whole body has been read. If the
+    connection is closed before, the future is never resolved: the handler
+    is notified with `on_connection_close`.
+    """
+    return request.connection.read_body(streaming_callback)
+
+
+class HTTPServer(tornado.httpserver.HTTPServer):
+    """An HTTP server that can stream the request bodies to the handlers.
+
+    The `request_callback` must be a `tornado.web.Application`.
+    """
+
+    def handle_stream(self, stream, address):
+        HTTPConnection(
+            stream,
+            address,
+            self.request_callback,
+            self.no_keep_alive, self.xheaders, self.protocol)
+
+
+class HTTPConnection(tornado.httpserver.HTTPConnection):
+    """An HTTP connection that can stream the request bodies."""
+
+    def _clear_request_state(self):
+        super(HTTPConnection, self)._clear_request_state()
+        # How many bytes of a streamed body are still to be read.
+        self._unread_body = 0
+
+    def unread_body(self, request):
+        """How many bytes of the body of a request are still to be read.
+
+        :param request: The HTTP request.
+        :type request: tornado.httpserver.HTTPRequest
+        :return The number of bytes.
+        """
+        unread = 0
+        if request is self._request:
+            unread = self._unread_body
+        return unread
+
+    def read_body(self, streaming_callback):
+        """Read the streamed body of the current request.
+
+        See `read_body`.
+        """
+        future = tornado.concurrent.Future()
+
+        def _on_body(data):
+            self._unread_body = 0
+            future.set_result(None)
+
+        try:
+            self.stream.read_bytes(
+                self._unread_body,
+                _on_body, streaming_callback=streaming_callback)
+        except tornado.iostream.StreamClosedError:
+            # The handler has already been notified.
+            pass
+
+        return future
+
+    def _streams_body(self, request):
+        """Check if the handler of a request streams its body.
+
+        :param request: The HTTP request.
+        :type request: tornado.httpserver.HTTPRequest
+        :return True or False.
+        """
+        streams = False
+        get_handlers = getattr(
+            self.request_callback, "_get_host_handlers", None)
+
+        if get_handlers is not None:
+            # The first matching handler is the one the request goes to.
+            for spec in get_handlers(request) or []:
+                if spec.regex.match(request.path):
+                    streams = getattr(
+                        spec.handler_class, "_stream_request_body", False)
+                    break
+
+        return streams
+
+    def _on_headers(self, data):
+        # The same as the Tornado 3.2 method, except for the requests with a
+        # streamed body: they are passed to the application before the body
+        # is read.
+        try:
+            data = tornado.escape.native_str(data.decode("latin1"))
+            eol = data.find("\r\n")
+            start_line = data[:eol]
+            try:
+                method, uri, version = start_line.split(" ")
+            except ValueError:
+                raise tornado.httpserver._BadRequestException(
+                    "Malformed HTTP request line")
+            if not version.startswith("HTTP/"):
+                raise tornado.httpserver._BadRequestException(
+                    "Malformed HTTP version in HTTP Request-Line")
+            try:
+                headers = tornado.httputil.HTTPHeaders.parse(data[eol:])
+            except ValueError:
+                raise tornado.httpserver._BadRequestException(
+                    "Malformed HTTP headers")
+
+            # HTTPRequest wants an IP, not a full socket address.
+            if self.address_family in (socket.AF_INET, socket.AF_INET6):
+                remote_ip = self.address[0]
+            else:
+                remote_ip = "0.0.0.0"
+
+            self._request = tornado.httpserver.HTTPRequest(
+                connection=self,
+                method=method,
+                uri=uri,
+                version=version,
+                headers=headers, remote_ip=remote_ip, protocol=self.protocol)
+
+            content_length = headers.get("Content-Length")
+            if content_length:
+                content_length = int(content_length)
+                if content_length > self.stream.max_buffer_size:
+                    raise tornado.httpserver._BadRequestException(
+                        "Content-Length too long")
+                if headers.get("Expect") == "100-continue":
+                    self.stream.write(b"HTTP/1.1 100 (Continue)\r\n\r\n")
+
+                if self._streams_body(self._request):
+                    self._unread_body = content_length
+                else:
+                    self.stream.read_bytes(
+                        content_length, self._on_request_body)
+                    return
+
+            self.request_callback(self._request)
+        except tornado.httpserver._BadRequestException, ex:
+            tornado.log.gen_log.info(
+                "Malformed HTTP request from %r: %s", self.address, ex)
+            self.close()
+
+    def _finish_request(self):
+        if self._unread_body > 0:
+            # The response has been sent without reading the whole body: the
+            # connection cannot be used for other requests.
+            self.close()
+        else:
+            super(HTTPConnection, self)._finish_request()
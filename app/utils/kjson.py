@@ -0,0 +1,193 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Fast JSON serialization of documents with BSON types.
+
+The wire format is the one of `bson.json_util`: `ObjectId` values are
+serialized as `{"$oid": "..."}` and `datetime` values as
+`{"$date": <milliseconds since the epoch>}`.
+
+The most common BSON types are converted by functions looked up by their
+exact type, the other ones are left to `bson.json_util`. The serialized and
+deserialized `ObjectId` values are cached, since the same IDs (job, build,
+lab...) are repeated in many documents.
+
+`simplejson` is used if it is installed: its C extension is faster than the
+standard library one.
+"""
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+import bson
+import bson.json_util
+import bson.tz_util
+import datetime
+
+# The name of the JSON library used.
+BACKEND = json.__name__
+
+# How many serialized and deserialized `ObjectId` values are cached.
+OBJECT_ID_CACHE_SIZE = 4096
+
+EPOCH_AWARE = datetime.datetime.fromtimestamp(0, bson.tz_util.utc)
+EPOCH_NAIVE = datetime.datetime.utcfromtimestamp(0)
+
+_OBJECT_ID_CACHE = {}
+_OBJECT_ID_DECODE_CACHE = {}
+
+
+def _encode_object_id(obj):
+    """Convert an `ObjectId` into its JSON representation.
+
+    :param obj: The ObjectId to convert.
+    :type obj: bson.objectid.ObjectId
+    :return A dictionary.
+    """
+    encoded = _OBJECT_ID_CACHE.get(obj)
+
+    if encoded is None:
+        if len(_OBJECT_ID_CACHE) >= OBJECT_ID_CACHE_SIZE:
+            _OBJECT_ID_CACHE.clear()
+        encoded = _OBJECT_ID_CACHE[obj] = {"$oid": str(obj)}
+
+    return encoded
+
+
+def _encode_datetime(obj):
+    """Convert a `datetime` into its JSON representation.
+
+    Naive values are considered in UTC.
+
+    :param obj: The datetime to convert.
+    :type obj: datetime.datetime
+    :return A dictionary.
+    """
+    if obj.tzinfo is None:
+        delta = obj - EPOCH_NAIVE
+    else:
+        delta = obj - EPOCH_AWARE
+
+    return {
+        "$date": (
+            delta.days * 86400000 +
+            delta.seconds * 1000 + delta.microseconds // 1000)
+    }
+
+
+def _decode_object_id(value):
+    """Convert the value of an `$oid` object into an `ObjectId`.
+
+    :param value: The hexadecimal ObjectId.
+    :type value: str
+    :return An ObjectId.
+    """
+    decoded = _OBJECT_ID_DECODE_CACHE.get(value)
+
+    if decoded is None:
+        if len(_OBJECT_ID_DECODE_CACHE) >= OBJECT_ID_CACHE_SIZE:
+            _OBJECT_ID_DECODE_CACHE.clear()
+        decoded = _OBJECT_ID_DECODE_CACHE[value] = bson.objectid.ObjectId(
+            str(value))
+
+    return decoded
+
+
+def _decode_datetime(value):
+    """Convert the value of a `$date` object into a `datetime`.
+
+    :param value: The milliseconds since the epoch, or one of the other
+    formats supported by `bson.json_util`.
+    :return A timezone aware datetime in UTC.
+    """
+    if isinstance(value, (int, long)):
+        return EPOCH_AWARE + datetime.timedelta(milliseconds=value)
+    return bson.json_util.object_hook({"$date": value})
+
+
+# Conversion functions by type.
+ENCODERS = {
+    bson.objectid.ObjectId: _encode_object_id,
+    datetime.datetime: _encode_datetime
+}
+
+# Conversion functions by key, for the objects with one key.
+DECODERS = {
+    "$oid": _decode_object_id,
+    "$date": _decode_datetime
+}
+
+
+def default(obj):
+    """Convert an object that is not JSON serializable.
+
+    It can be used in place of `bson.json_util.default`.
+
+    :param obj: The object to convert.
+    :return A JSON serializable object.
+    """
+    encoder = ENCODERS.get(type(obj), None)
+    if encoder is None:
+        return bson.json_util.default(obj)
+    return encoder(obj)
+
+
+def object_hook(dct):
+    """Convert a JSON object into the BSON type it represents.
+
+    It can be used in place of `bson.json_util.object_hook`. Only the objects
+    with a key starting with "$" are converted, and never those with more
+    than three keys: none of the BSON types is represented with more keys.
+
+    :param dct: The JSON object.
+    :type dct: dict
+    :return The BSON value, or the object itself.
+    """
+    if len(dct) > 3:
+        return dct
+
+    for key in dct:
+        if key[:1] == "$":
+            decoder = DECODERS.get(key, None)
+            if decoder is not None:
+                return decoder(dct[key])
+            return bson.json_util.object_hook(dct)
+
+    return dct
+
+
+# Creating an encoder for each call is expensive: it is created only once.
+_ENCODER = json.JSONEncoder(
+    default=default, ensure_ascii=False, separators=(",", ":"))
+_DECODER = json.JSONDecoder(object_hook=object_hook)
+
+
+def dumps(obj):
+    """Serialize an object into a compact JSON string.
+
+    :param obj: The object to serialize.
+    :return A unicode string, or a str if it contains only ASCII characters.
+    """
+    return _ENCODER.encode(obj)
+
+
+def loads(value):
+    """Deserialize a JSON string, converting the BSON types.
+
+    :param value: The JSON string.
+    :type value: str or unicode
+    :return The deserialized object.
+    """
+    return _DECODER.decode(value)
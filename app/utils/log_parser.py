@@ -22,6 +22,7 @@ import bson
 import datetime
 import io
 import itertools
+import multiprocessing
 import os
 import re
 import types
@@ -30,6 +31,7 @@ import models
 import models.error_log as merrl
 import models.error_summary as mesumm
 import utils
+import utils.upload
 
 
 ERROR_PATTERN_1 = re.compile("[Ee]rror:")
@@ -57,12 +59,35 @@ ERROR_PATTERNS = [
     ERROR_PATTERN_2
 ]
 
+# The patterns above combined into single alternations, so that each line is
+# searched only once for each kind of match.
+ERROR_PATTERN = re.compile(
+    "|".join([pattern.pattern for pattern in ERROR_PATTERNS]))
+EXCLUDE_PATTERN = re.compile(
+    "|".join([pattern.pattern for pattern in EXCLUDE_PATTERNS]),
+    re.IGNORECASE)
+
+# Literal pre-filter: every line that can be classified contains at least one
+# of these strings. It is run on whole blocks of the log file, all the lines
+# without a match are skipped without being looked at.
+PREFILTER_PATTERN = re.compile(
+    r"error|warning|section mismatch", re.IGNORECASE)
+LINE_END_PATTERN = re.compile(r"[\r\n]")
+
+# How many bytes of the log file are read at once.
+LOG_BLOCK_SIZE = 1024 * 1024
+
+# The kinds of lines the classifier extracts.
+ERROR_LINE = "error"
+WARNING_LINE = "warning"
+MISMATCH_LINE = "mismatch"
+
 
 def parse_build_log(job_id,
                     json_obj,
                     db_options,
                     base_path=utils.BASE_PATH,
-                    build_log=utils.BUILD_LOG_FILE):
+                    build_log=utils.BUILD_LOG_FILE, processes=1):
     """Parse the build log file searching for errors and warnings.
 
     :param job_id: The ID of the job as saved in the database.
@@ -75,6 +100,10 @@ def parse_build_log(job_id,
     :type base_path: string
     :param build_log: The name of the build log file.
     :type build_log: string
+    :param processes: How many processes should parse the build logs. If
+    greater than 1, the logs of the different defconfigs are parsed in
+    parallel.
+    :type processes: integer
     :return A status code and a dictionary. 200 if everything is good, 500 in
     case of errors; an empty dictionary if there are no errors, otherwise the
     dictionary will contain error codes and messages lists.
@@ -88,7 +117,11 @@ def parse_build_log(job_id,
 
     if job_id:
         status, errors = _traverse_dir_and_parse(
-            job_id, job, kernel, base_path, build_log, db_options=db_options)
+            job_id,
+            job,
+            kernel,
+            base_path,
+            build_log, db_options=db_options, processes=processes)
     else:
         status = 500
         errors[500] = ["No job ID specified, cannot continue"]
@@ -96,12 +129,133 @@ def parse_build_log(job_id,
     return status, errors
 
 
+def _read_build_data(job, kernel, build_dir):
+    """Locally read the build JSON file to retrieve some values.
+
+    Search for the correct defconfig, defconfig_full and arch values.
+
+    :param job: The name of the job.
+    :type job: string
+    :param kernel: The name of the kernel.
+    :type kernel: string
+    :param build_dir: The directory containing the build JSON file.
+    :type build_dir: string
+    :return A 5-tuple: defconfig, defconfig_full, arch, build status and an
+    error message (None if there were no errors).
+    """
+    arch = defconfig = defconfig_full = kconfig_fragments = b_status = None
+    error = None
+    build_file = os.path.join(build_dir, models.BUILD_META_JSON_FILE)
+
+    if os.path.isfile(build_file):
+        build_data = None
+        with io.open(build_file, "r") as read_file:
+            build_data = json.load(read_file)
+
+        if all([build_data, isinstance(build_data, types.DictionaryType)]):
+            # pylint: disable=maybe-no-member
+            b_get = build_data.get
+            defconfig = b_get(models.DEFCONFIG_KEY)
+            arch = b_get(
+                models.ARCHITECTURE_KEY, models.ARM_ARCHITECTURE_KEY)
+            defconfig_full = b_get(models.DEFCONFIG_FULL_KEY, None)
+            kconfig_fragments = b_get(models.KCONFIG_FRAGMENTS_KEY, None)
+            b_status = b_get(models.BUILD_RESULT_KEY, None)
+
+            defconfig_full = utils.get_defconfig_full(
+                build_dir, defconfig, defconfig_full, kconfig_fragments)
+        else:
+            error = (
+                "No valid JSON data found in the build file for %s - %s (%s)")
+            utils.LOG.warn(error, job, kernel, build_dir)
+            error = error % (job, kernel, build_dir)
+    else:
+        error = "Missing build file for %s - %s (%s)"
+        utils.LOG.warn(error, job, kernel, build_dir)
+        error = error % (job, kernel, build_dir)
+
+    return defconfig, defconfig_full, arch, b_status, error
+
+
+def _parse_build_dir(args):
+    """Read the build data and parse the build log of a defconfig directory.
+
+    This is executed in the worker processes when parsing in parallel: it
+    does not access the database, and its argument and return value can be
+    pickled.
+
+    :param args: A 4-tuple with the job name, the kernel name, the defconfig
+    directory and the name of the build log file.
+    :type args: tuple
+    :return A dictionary with the build data, the parse status and errors,
+    and the extracted lines.
+    """
+    job, kernel, build_dir, build_log = args
+
+    defconfig, defconfig_full, arch, b_status, read_error = \
+        _read_build_data(job, kernel, build_dir)
+
+    status, errors, e_l, w_l, m_l = _parse_log(
+        job, kernel, defconfig, os.path.join(build_dir, build_log), build_dir)
+
+    return {
+        "arch": arch,
+        "build_status": b_status,
+        "defconfig": defconfig,
+        "defconfig_full": defconfig_full,
+        "error_lines": e_l,
+        "errors": errors,
+        "mismatch_lines": m_l,
+        "read_error": read_error,
+        "status": status,
+        "warning_lines": w_l
+    }
+
+
+def _iter_parsed_dirs(job, kernel, build_dirs, build_log, processes):
+    """Parse the defconfig directories, in parallel if requested.
+
+    :param job: The name of the job.
+    :type job: string
+    :param kernel: The name of the kernel.
+    :type kernel: string
+    :param build_dirs: The defconfig directories to parse.
+    :type build_dirs: list
+    :param build_log: The name of the build log file.
+    :type build_log: string
+    :param processes: How many processes to use.
+    :type processes: integer
+    :return An iterator over the results of `_parse_build_dir`, in the same
+    order as the directories.
+    """
+    args = [(job, kernel, build_dir, build_log) for build_dir in build_dirs]
+    processes = min(processes or 1, len(args))
+
+    if processes > 1:
+        utils.LOG.info(
+            "Parsing %d build logs with %d processes", len(args), processes)
+        pool = multiprocessing.Pool(processes=processes)
+        try:
+            for result in pool.imap(_parse_build_dir, args):
+                yield result
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+    else:
+        for result in itertools.imap(_parse_build_dir, args):
+            yield result
+
+
 # pylint: disable=too-many-arguments
 # pylint: disable=too-many-locals
-# pylint: disable=too-many-branches
 def _traverse_dir_and_parse(job_id,
                             job,
-                            kernel, base_path, build_log, db_options=None):
+                            kernel,
+                            base_path,
+                            build_log, db_options=None, processes=1):
     """Traverse the kernel directory and parse the build logs.
 
     :param job_id: The ID of the job.
@@ -116,6 +270,8 @@ def _traverse_dir_and_parse(job_id,
     :type build_log: string
     :param db_options: The database connection options.
     :type db_options: dictionary
+    :param processes: How many processes should parse the build logs.
+    :type processes: integer
     """
     if db_options is None:
         db_options = {}
@@ -150,22 +306,9 @@ def _traverse_dir_and_parse(job_id,
             else:
                 errors[err_code].append(err_msg)
 
-    def _save(defconfig,
-              defconfig_full,
-              arch, build_status, error_lines, warning_lines, mismatch_lines):
-        """Save the found errors/warnings/mismatched lines in the db.
-
-        Save for each defconfig the found values and update the summary data
-        structures that will contain all the found errors/warnings/mismatches.
-
-        :param defconfig: The defconfig value.
-        :type defconfig: string
-        :param defconfig_full: The full defconfig value.
-        :type defconfig_full: string
-        :param arch: The architecture type.
-        :type arch: string
-        :param build_status: The status of the build.
-        :type build_status: string
+    def _count_lines(error_lines, warning_lines, mismatch_lines):
+        """Update the summary data structures with the found lines.
+
         :param error_lines: The extracted error lines.
         :type error_lines: list
         :param warning_lines: The extracted warning lines.
@@ -173,76 +316,14 @@ def _traverse_dir_and_parse(job_id,
         :param mismatch_lines: The extracted mismatch lines.
         :type mismatch_lines: list
         """
-        # Store what we found for each defconfig in the db, only if we have
-        # something.
-        if any([error_lines, warning_lines, mismatch_lines]):
-            for err, warn, mism in itertools.izip_longest(
-                    error_lines, warning_lines, mismatch_lines):
-                if err:
-                    errors_all[err] = err_default(err, 0) + 1
-                if warn:
-                    warnings_all[warn] = warn_default(warn, 0) + 1
-                if mism:
-                    mismatches_all[mism] = mism_default(mism, 0) + 1
-
-            status = save_defconfig_errors(
-                job_id,
-                job,
-                kernel,
-                defconfig,
-                defconfig_full,
-                arch,
-                build_status,
-                error_lines, warning_lines, mismatch_lines, db_options
-            )
-
-            if status == 500:
-                error = "Error saving errors log document for %s-%s-%s (%s)"
-                utils.LOG.error(error, job, kernel, defconfig_full, arch)
-                _add_err_msg(
-                    status, error % (job, kernel, defconfig_full, arch))
-
-    def _read_build_data(build_dir):
-        """Locally read the build JSON file to retrieve some values.
-
-        Search for the correct defconfig, defconfig_full and arch values.
-
-        :param build_dir: The directory containing the build JSON file.
-        :type build_dir: string
-        :return A 4-tuple: defconfig, defconfig_full, arch and build status.
-        """
-        arch = defconfig = defconfig_full = kconfig_fragments = b_status = None
-        build_file = os.path.join(build_dir, models.BUILD_META_JSON_FILE)
-
-        if os.path.isfile(build_file):
-            build_data = None
-            with io.open(build_file, "r") as read_file:
-                build_data = json.load(read_file)
-
-            if all([build_data, isinstance(build_data, types.DictionaryType)]):
-                # pylint: disable=maybe-no-member
-                b_get = build_data.get
-                defconfig = b_get(models.DEFCONFIG_KEY)
-                arch = b_get(
-                    models.ARCHITECTURE_KEY, models.ARM_ARCHITECTURE_KEY)
-                defconfig_full = b_get(models.DEFCONFIG_FULL_KEY, None)
-                kconfig_fragments = b_get(models.KCONFIG_FRAGMENTS_KEY, None)
-                b_status = b_get(models.BUILD_RESULT_KEY, None)
-
-                defconfig_full = utils.get_defconfig_full(
-                    build_dir, defconfig, defconfig_full, kconfig_fragments)
-            else:
-                error = (
-                    "No valid JSON data found in the build file for "
-                    "%s - %s (%s)")
-                utils.LOG.warn(error, job, kernel, build_dir)
-                _add_err_msg(500, (error % (job, kernel, build_dir)))
-        else:
-            error = "Missing build file for %s - %s (%s)"
-            utils.LOG.warn(error, job, kernel, build_dir)
-            _add_err_msg(500, (error % (job, kernel, build_dir)))
-
-        return defconfig, defconfig_full, arch, b_status
+        for err, warn, mism in itertools.izip_longest(
+                error_lines, warning_lines, mismatch_lines):
+            if err:
+                errors_all[err] = err_default(err, 0) + 1
+            if warn:
+                warnings_all[warn] = warn_default(warn, 0) + 1
+            if mism:
+                mismatches_all[mism] = mism_default(mism, 0) + 1
 
     if any([hidden(job), hidden(kernel)]):
         utils.LOG.error(
@@ -254,30 +335,42 @@ def _traverse_dir_and_parse(job_id,
         kernel_dir = os.path.join(job_dir, kernel)
 
         if os.path.isdir(kernel_dir):
-            for dirname, subdirs, files in os.walk(kernel_dir):
+            build_dirs = []
+            for dirname, subdirs, _ in os.walk(kernel_dir):
                 if dirname == kernel_dir:
                     continue
 
                 subdirs[:] = []
-                build_dir = dirname
-                defconfig_dir = os.path.basename(build_dir)
-
-                if not hidden(defconfig_dir):
-                    log_file = os.path.join(build_dir, build_log)
-
-                    defconfig, defconfig_full, arch, b_status = \
-                        _read_build_data(build_dir)
-
-                    status, err, e_l, w_l, m_l = _parse_log(
-                        job, kernel, defconfig, log_file, build_dir)
-
-                    if status == 200:
-                        _save(
-                            defconfig,
-                            defconfig_full, arch, b_status, e_l, w_l, m_l
-                        )
-                    else:
-                        _add_err_msg(status, err)
+                if not hidden(os.path.basename(dirname)):
+                    build_dirs.append(dirname)
+
+            # Store what we found for each defconfig in the db, only if we
+            # have something.
+            to_save = []
+            for parsed in _iter_parsed_dirs(
+                    job, kernel, build_dirs, build_log, processes):
+                if parsed["read_error"]:
+                    _add_err_msg(500, parsed["read_error"])
+
+                if parsed["status"] == 200:
+                    e_l = parsed["error_lines"]
+                    w_l = parsed["warning_lines"]
+                    m_l = parsed["mismatch_lines"]
+
+                    if any([e_l, w_l, m_l]):
+                        _count_lines(e_l, w_l, m_l)
+                        to_save.append(parsed)
+                else:
+                    _add_err_msg(parsed["status"], parsed["errors"])
+
+            if to_save:
+                save_status = save_all_defconfig_errors(
+                    job_id, job, kernel, to_save, db_options)
+
+                if save_status == 500:
+                    error = "Error saving errors log documents for %s-%s"
+                    utils.LOG.error(error, job, kernel)
+                    _add_err_msg(save_status, error % (job, kernel))
 
             # Once done, save the summary.
             save_status = _save_summary(
@@ -348,7 +441,160 @@ def _save_summary(errors,
     return ret_val
 
 
-# pylint: disable=too-many-statements
+def _clean_path(line):
+    """Strip the beginning of the line if it contains a special sequence.
+
+    :param line: The line to clean.
+    :type line: string
+    :return The line without the special sequence.
+    """
+    if line.startswith("../"):
+        line = line[3:]
+    return line
+
+
+def _iter_candidate_lines(read_file, block_size=LOG_BLOCK_SIZE):
+    """Read a log file in blocks and return the lines worth classifying.
+
+    Only the lines that match the `PREFILTER_PATTERN` are returned, without
+    their line terminator. Lines are split on new line and carriage return
+    characters, as with universal newlines.
+
+    :param read_file: The log file, opened in binary mode.
+    :param block_size: How many bytes to read at once.
+    :type block_size: int
+    :return An iterator over the candidate lines, as byte strings.
+    """
+    search = PREFILTER_PATTERN.search
+    line_end = LINE_END_PATTERN.search
+    remainder = ""
+
+    def _candidates(block, end):
+        pos = 0
+        while pos < end:
+            match = search(block, pos, end)
+            if match is None:
+                break
+
+            match_start = match.start()
+            # pos is always at the beginning of a line.
+            start = max(
+                pos - 1,
+                block.rfind("\n", pos, match_start),
+                block.rfind("\r", pos, match_start)) + 1
+            stop_match = line_end(block, match.end(), end)
+            if stop_match is None:
+                stop = end
+            else:
+                stop = stop_match.start()
+
+            yield block[start:stop]
+            pos = stop + 1
+
+    while True:
+        block = read_file.read(block_size)
+        if not block:
+            break
+
+        if remainder:
+            block = remainder + block
+
+        # Only complete lines are looked at, the last partial one is kept
+        # for the next block.
+        last_end = max(block.rfind("\n"), block.rfind("\r")) + 1
+        remainder = block[last_end:]
+
+        for line in _candidates(block, last_end):
+            yield line
+
+    if remainder:
+        for line in _candidates(remainder, len(remainder)):
+            yield line
+
+
+def classify_build_log(read_file, block_size=LOG_BLOCK_SIZE):
+    """Extract the errors, warnings and mismatches lines from a build log.
+
+    A line is an error if it matches one of the `ERROR_PATTERNS`, otherwise
+    it is a warning if it matches the `WARNING_PATTERN` and none of the
+    `EXCLUDE_PATTERNS`. Independently, it is also a mismatch if it matches
+    the `MISMATCH_PATTERN`.
+
+    :param read_file: The log file, opened in binary mode.
+    :param block_size: How many bytes to read at once.
+    :type block_size: int
+    :return An iterator over 2-tuples: the kind of line (one of ERROR_LINE,
+    WARNING_LINE or MISMATCH_LINE) and the cleaned line.
+    """
+    is_error = ERROR_PATTERN.search
+    is_warning = WARNING_PATTERN.search
+    is_excluded = EXCLUDE_PATTERN.search
+    is_mismatch = MISMATCH_PATTERN.search
+
+    for line in _iter_candidate_lines(read_file, block_size=block_size):
+        line = line.decode("utf-8", "replace")
+        clean_line = None
+
+        if is_error(line):
+            clean_line = _clean_path(line.strip())
+            yield ERROR_LINE, clean_line
+        elif is_warning(line) and not is_excluded(line):
+            clean_line = _clean_path(line.strip())
+            yield WARNING_LINE, clean_line
+
+        if is_mismatch(line):
+            yield MISMATCH_LINE, clean_line or _clean_path(line.strip())
+
+
+class _ClassifiedLinesWriter(object):
+    """Write the classified lines to their files as soon as they are found.
+
+    Files are created only when the first line of their kind is written.
+    """
+
+    def __init__(self, paths):
+        """
+        :param paths: The path of the file for each kind of line.
+        :type paths: dictionary
+        """
+        self._paths = paths
+        self._files = {}
+        self.failed = False
+
+    def write(self, kind, line):
+        """Write a line to the file of its kind.
+
+        After the first failure, nothing else is written.
+
+        :param kind: The kind of line.
+        :type kind: string
+        :param line: The line to write.
+        :type line: unicode
+        """
+        if not self.failed:
+            try:
+                w_file = self._files.get(kind)
+                if w_file is None:
+                    utils.upload.unshare_file(self._paths[kind])
+                    w_file = io.open(self._paths[kind], mode="w")
+                    self._files[kind] = w_file
+                w_file.write(line)
+                w_file.write(u"\n")
+            except (IOError, OSError), ex:
+                utils.LOG.exception(ex)
+                self.failed = True
+
+    def close(self):
+        """Close all the opened files."""
+        for w_file in self._files.itervalues():
+            try:
+                w_file.close()
+            except IOError, ex:
+                utils.LOG.exception(ex)
+                self.failed = True
+        self._files = {}
+
+
 def _parse_log(job, kernel, defconfig, log_file, build_dir):
     """Read the build log and extract the correct strings.
 
@@ -365,17 +611,6 @@ def _parse_log(job, kernel, defconfig, log_file, build_dir):
     """
     utils.LOG.info("Parsing build log file '%s'", log_file)
 
-    def _clean_path(line):
-        """Strip the beginning of the line if it contains a special sequence.
-
-        :param line: The line to clean.
-        :type line: string
-        :return The line without the special sequence.
-        """
-        if line.startswith("../"):
-            line = line[3:]
-        return line
-
     errors = []
     status = 200
 
@@ -383,71 +618,38 @@ def _parse_log(job, kernel, defconfig, log_file, build_dir):
     warning_lines = []
     mismatch_lines = []
 
-    errors_file = os.path.join(build_dir, utils.BUILD_ERRORS_FILE)
-    warnings_file = os.path.join(build_dir, utils.BUILD_WARNINGS_FILE)
-    mismatches_file = os.path.join(build_dir, utils.BUILD_MISMATCHES_FILE)
-
     if os.path.isfile(log_file):
-        err_append = error_lines.append
-        warn_append = warning_lines.append
-        mismatch_append = mismatch_lines.append
+        lines = {
+            ERROR_LINE: error_lines,
+            WARNING_LINE: warning_lines,
+            MISMATCH_LINE: mismatch_lines
+        }
+        writer = _ClassifiedLinesWriter({
+            ERROR_LINE: os.path.join(build_dir, utils.BUILD_ERRORS_FILE),
+            WARNING_LINE: os.path.join(build_dir, utils.BUILD_WARNINGS_FILE),
+            MISMATCH_LINE: os.path.join(
+                build_dir, utils.BUILD_MISMATCHES_FILE)
+        })
 
         try:
-            with io.open(log_file) as read_file:
-                for line in read_file:
-                    has_err = has_warn = False
-                    for err_pattrn in ERROR_PATTERNS:
-                        if re.search(err_pattrn, line):
-                            line = line.strip()
-                            has_err = True
-                            err_append(_clean_path(line))
-                            break
-
-                    if not has_err:
-                        if re.search(WARNING_PATTERN, line):
-                            for warn_pattrn in EXCLUDE_PATTERNS:
-                                if re.search(warn_pattrn, line):
-                                    break
-                            else:
-                                has_warn = True
-                                line = line.strip()
-                                warn_append(_clean_path(line))
-
-                    if any([not has_err, not has_warn]):
-                        if re.search(MISMATCH_PATTERN, line):
-                            line = line.strip()
-                            mismatch_append(_clean_path(line))
+            with io.open(log_file, mode="rb") as read_file:
+                for kind, line in classify_build_log(read_file):
+                    lines[kind].append(line)
+                    writer.write(kind, line)
         except IOError, ex:
             error = "Cannot open build log file for %s-%s-%s"
             utils.LOG.exception(ex)
             utils.LOG.error(error, job, kernel, defconfig)
             status = 500
             errors.append(error % (job, kernel, defconfig))
-        else:
-            # Save only if we parsed something.
-            try:
-                # TODO: count the lines here.
-                if error_lines:
-                    with io.open(errors_file, mode="w") as w_file:
-                        for line in error_lines:
-                            w_file.write(line)
-                            w_file.write(u"\n")
-                if warning_lines:
-                    with io.open(warnings_file, mode="w") as w_file:
-                        for line in warning_lines:
-                            w_file.write(line)
-                            w_file.write(u"\n")
-                if mismatch_lines:
-                    with io.open(mismatches_file, mode="w") as w_file:
-                        for line in mismatch_lines:
-                            w_file.write(line)
-                            w_file.write(u"\n")
-            except IOError, ex:
-                error = "Error writing to errors/warnings file for %s-%s-%s"
-                utils.LOG.exception(ex)
-                utils.LOG.error(error, job, kernel, defconfig)
-                status = 500
-                errors.append(error % (job, kernel, defconfig))
+        finally:
+            writer.close()
+
+        if writer.failed:
+            error = "Error writing to errors/warnings file for %s-%s-%s"
+            utils.LOG.error(error, job, kernel, defconfig)
+            status = 500
+            errors.append(error % (job, kernel, defconfig))
     else:
         status = 500
         errors.append("Build dir %s does not have a build log" % defconfig)
@@ -528,6 +730,39 @@ def save_defconfig_errors(job_id,
         database[models.ERROR_LOGS_COLLECTION],
         prev_spec, fields=[models.ID_KEY])
 
+    err_doc = _create_error_log(
+        job_id,
+        job,
+        kernel,
+        defconfig,
+        defconfig_full,
+        arch,
+        build_status,
+        error_lines, warning_lines, mismatch_lines, defconfig_id)
+
+    manipulate = True
+    if prev_doc:
+        manipulate = False
+        err_doc._id = prev_doc[models.ID_KEY]
+
+    ret_val, _ = utils.db.save(database, err_doc, manipulate=manipulate)
+
+    return ret_val
+
+
+def _create_error_log(job_id,
+                      job,
+                      kernel,
+                      defconfig,
+                      defconfig_full,
+                      arch,
+                      build_status,
+                      error_lines,
+                      warning_lines, mismatch_lines, defconfig_id):
+    """Create the error log document for a defconfig.
+
+    :return An `ErrorLogDocument` instance.
+    """
     err_doc = merrl.ErrorLogDocument(job_id, "1.0")
     err_doc.arch = arch
     err_doc.created_on = datetime.datetime.now(tz=bson.tz_util.utc)
@@ -544,11 +779,124 @@ def save_defconfig_errors(job_id,
     err_doc.warnings = warning_lines
     err_doc.warnings_count = len(warning_lines)
 
-    manipulate = True
-    if prev_doc:
-        manipulate = False
-        err_doc._id = prev_doc[models.ID_KEY]
+    return err_doc
 
-    ret_val, _ = utils.db.save(database, err_doc, manipulate=manipulate)
+
+def _find_defconfig_id(defconfigs, arch, defconfig, defconfig_full):
+    """Search the ID of a defconfig among the ones of a job.
+
+    Same matching rules as the query in `save_defconfig_errors`: defconfig
+    and defconfig_full are matched only if they have a value.
+
+    :param defconfigs: The defconfig documents of the job.
+    :type defconfigs: list
+    :return The defconfig ID or None.
+    """
+    for doc in defconfigs:
+        d_get = doc.get
+        if all([
+                d_get(models.ARCHITECTURE_KEY) == arch,
+                not defconfig or d_get(models.DEFCONFIG_KEY) == defconfig,
+                not defconfig_full or
+                d_get(models.DEFCONFIG_FULL_KEY) == defconfig_full]):
+            return doc[models.ID_KEY]
+    return None
+
+
+def save_all_defconfig_errors(job_id, job, kernel, parsed, db_options):
+    """Save the build errors found for all the defconfigs of a job.
+
+    This is the bulk equivalent of `save_defconfig_errors`: the defconfig
+    and the previous error log documents are retrieved with one query each,
+    and all the error log documents are saved with a single bulk operation.
+
+    :param job_id: The ID of the job.
+    :type job_id: string
+    :param job: The name of the job.
+    :type job: string
+    :param kernel: The name of the kernel.
+    :type kernel: string
+    :param parsed: The results of `_parse_build_dir` for each defconfig.
+    :type parsed: list
+    :param db_options: The database connection options.
+    :type db_options: dictionary
+    :return 201 if saving has success, 500 otherwise.
+    """
+    database = utils.db.get_db_connection(db_options)
+
+    # Defconfigs are grouped by their arch and defconfig_full values, that
+    # identify them in almost all the cases.
+    defconfigs = {}
+    for doc in utils.db.find(
+            database[models.DEFCONFIG_COLLECTION],
+            0,
+            0,
+            spec={
+                models.JOB_ID_KEY: job_id,
+                models.JOB_KEY: job,
+                models.KERNEL_KEY: kernel
+            },
+            fields=[
+                models.ID_KEY,
+                models.ARCHITECTURE_KEY,
+                models.DEFCONFIG_FULL_KEY, models.DEFCONFIG_KEY]):
+        defconfigs.setdefault(
+            (doc.get(models.ARCHITECTURE_KEY),
+                doc.get(models.DEFCONFIG_FULL_KEY)), []).append(doc)
+
+    prev_docs = {}
+    for doc in utils.db.find(
+            database[models.ERROR_LOGS_COLLECTION],
+            0,
+            0,
+            spec={models.JOB_KEY: job, models.KERNEL_KEY: kernel},
+            fields=[
+                models.ID_KEY,
+                models.ARCHITECTURE_KEY,
+                models.DEFCONFIG_FULL_KEY,
+                models.DEFCONFIG_KEY, models.STATUS_KEY]):
+        d_get = doc.get
+        prev_docs.setdefault(
+            (
+                d_get(models.ARCHITECTURE_KEY),
+                d_get(models.DEFCONFIG_FULL_KEY),
+                d_get(models.DEFCONFIG_KEY), d_get(models.STATUS_KEY)
+            ),
+            doc[models.ID_KEY]
+        )
+
+    err_docs = []
+    for data in parsed:
+        arch = data["arch"]
+        defconfig = data["defconfig"]
+        defconfig_full = data["defconfig_full"]
+
+        if defconfig_full:
+            candidates = defconfigs.get((arch, defconfig_full), [])
+        else:
+            candidates = itertools.chain(*defconfigs.itervalues())
+
+        defconfig_id = _find_defconfig_id(
+            candidates, arch, defconfig, defconfig_full)
+        if not defconfig_id:
+            error = "No defconfig ID found for %s-%s-%s (%s)"
+            utils.LOG.warn(error, job, kernel, defconfig_full, arch)
+
+        err_doc = _create_error_log(
+            job_id,
+            job,
+            kernel,
+            defconfig,
+            defconfig_full,
+            arch,
+            data["build_status"],
+            data["error_lines"],
+            data["warning_lines"], data["mismatch_lines"], defconfig_id)
+        err_doc._id = prev_docs.get(
+            (arch, defconfig_full, defconfig, data["build_status"]))
+
+        err_docs.append(err_doc)
+
+    ret_val, _ = utils.db.bulk_save(database, err_docs)
 
     return ret_val
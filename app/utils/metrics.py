@@ -0,0 +1,312 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""In-process latency metrics.
+
+Durations are counted in histograms with fixed buckets, grouped by what has
+been measured:
+- `REQUESTS`: the HTTP requests, by method and handler;
+- `EXECUTOR_QUEUE` and `EXECUTOR_RUN`: the time a handler operation waited
+  for a thread of the executor, and the time it ran there;
+- `DB_OPERATIONS`: the database operations, by collection and operation;
+- `TASKS`: the Celery tasks, by task name.
+
+Each process has its own metrics: the server processes and the Celery
+workers do not share them. The Celery worker processes periodically save a
+snapshot of their metrics in the database.
+
+The database functions that return a cursor are measured until the cursor
+is returned, not until all the documents have been retrieved.
+"""
+
+import bson.tz_util
+import datetime
+import functools
+import os
+import threading
+import time
+
+import tornado.concurrent
+
+import models
+
+# Upper bounds of the histogram buckets, in milliseconds.
+BUCKETS = [
+    1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000]
+
+REQUESTS = "requests"
+EXECUTOR_QUEUE = "executor_queue"
+EXECUTOR_RUN = "executor_run"
+DB_OPERATIONS = "db"
+TASKS = "tasks"
+
+# How long, in seconds, the saved snapshots are kept.
+SNAPSHOT_TTL = 60 * 60 * 24
+
+
+class Histogram(object):
+    """Count durations, in milliseconds, in fixed buckets.
+
+    It is not thread-safe: `Metrics` takes care of the locking.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        """Create a new histogram.
+
+        :param buckets: The sorted upper bounds of the buckets.
+        :type buckets: list
+        """
+        self.buckets = buckets
+        # The last one counts the values above the last upper bound.
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        """Count a duration.
+
+        :param value: The duration in milliseconds.
+        :type value: float
+        """
+        # The buckets are few: a linear scan is enough.
+        idx = 0
+        for bound in self.buckets:
+            if value <= bound:
+                break
+            idx += 1
+        self.counts[idx] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        """Estimate a percentile of the durations.
+
+        The value is the upper bound of the bucket that holds the percentile,
+        or the maximum value if it is lower.
+
+        :param percent: The percentile to estimate, between 0 and 100.
+        :type percent: int
+        :return The estimated percentile in milliseconds.
+        """
+        value = 0.0
+
+        if self.count > 0:
+            rank = self.count * percent / 100.0
+            seen = 0
+            for idx, bucket_count in enumerate(self.counts):
+                seen += bucket_count
+                if seen >= rank:
+                    if idx < len(self.buckets):
+                        value = min(float(self.buckets[idx]), self.max)
+                    else:
+                        value = self.max
+                    break
+
+        return value
+
+    def to_dict(self):
+        """Create a dictionary with the histogram data.
+
+        :return A dictionary.
+        """
+        avg = 0.0
+        if self.count > 0:
+            avg = self.total / self.count
+
+        buckets = {}
+        for idx, bucket_count in enumerate(self.counts):
+            if bucket_count:
+                if idx < len(self.buckets):
+                    buckets[str(self.buckets[idx])] = bucket_count
+                else:
+                    buckets["inf"] = bucket_count
+
+        return {
+            "count": self.count,
+            "sum_ms": self.total,
+            "avg_ms": avg,
+            "max_ms": self.max,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "buckets": buckets
+        }
+
+
+class Metrics(object):
+    """A thread-safe collection of histograms, grouped by kind."""
+
+    def __init__(self, buckets=BUCKETS, timer=time.time):
+        """Create a new metrics collection.
+
+        :param buckets: The upper bounds of the histogram buckets.
+        :type buckets: list
+        :param timer: The function used to retrieve the current time.
+        :type timer: function
+        """
+        self._buckets = buckets
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._timer = timer
+        self.started = timer()
+
+    def observe(self, group, name, seconds):
+        """Count a duration.
+
+        :param group: The kind of what has been measured.
+        :type group: str
+        :param name: The name of what has been measured.
+        :type name: str
+        :param seconds: The duration in seconds.
+        :type seconds: float
+        """
+        with self._lock:
+            histograms = self._histograms.setdefault(group, {})
+            histogram = histograms.get(name, None)
+            if histogram is None:
+                histogram = histograms[name] = Histogram(self._buckets)
+            histogram.observe(seconds * 1000)
+
+    def clear(self):
+        """Remove all the histograms."""
+        with self._lock:
+            self._histograms.clear()
+            self.started = self._timer()
+
+    def to_dict(self):
+        """Create a dictionary with all the histograms.
+
+        :return A dictionary with the process ID, the seconds since the
+        metrics are collected, and the histograms by group and name.
+        """
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "uptime": self._timer() - self.started,
+                "metrics": dict(
+                    (group, dict(
+                        (name, histogram.to_dict())
+                        for name, histogram in histograms.iteritems()))
+                    for group, histograms in self._histograms.iteritems()
+                )
+            }
+
+
+METRICS = Metrics()
+
+
+def observe_since(group, name, start, *args):
+    """Count the time elapsed since `start`.
+
+    Extra arguments are ignored, so that it can be used as a callback.
+
+    :param group: The kind of what has been measured.
+    :type group: str
+    :param name: The name of what has been measured.
+    :type name: str
+    :param start: When the measured operation started.
+    :type start: float
+    """
+    METRICS.observe(group, name, time.time() - start)
+
+
+def executor_call(name, submitted, func):
+    """Run a function in the executor, measuring the queue and run time.
+
+    :param name: The name of the operation.
+    :type name: str
+    :param submitted: When the function has been submitted to the executor.
+    :type submitted: float
+    :param func: The function to run, without arguments.
+    :type func: function
+    :return What the function returns.
+    """
+    start = time.time()
+    METRICS.observe(EXECUTOR_QUEUE, name, start - submitted)
+    try:
+        return func()
+    finally:
+        observe_since(EXECUTOR_RUN, name, start)
+
+
+def _collection_name(collection, *args, **kwargs):
+    """The name of the collection an operation is performed on.
+
+    :param collection: The collection, the first argument of the operation.
+    :return The collection name.
+    """
+    return getattr(collection, "name", None) or "unknown"
+
+
+def db_operation(operation, collection_func=_collection_name):
+    """Decorator that measures a database operation.
+
+    It works with the synchronous functions and with the coroutines: for the
+    latter, the operation is measured until the future is resolved.
+
+    :param operation: The name of the operation.
+    :type operation: str
+    :param collection_func: The function that returns the collection name,
+    it is called with the arguments of the operation. By default, the name
+    of the first argument is used.
+    :type collection_func: function
+    :return The decorator.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            name = "%s %s" % (operation, collection_func(*args, **kwargs))
+            start = time.time()
+            result = None
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                if isinstance(result, tornado.concurrent.Future):
+                    result.add_done_callback(
+                        functools.partial(
+                            observe_since, DB_OPERATIONS, name, start))
+                else:
+                    observe_since(DB_OPERATIONS, name, start)
+            return result
+        return wrapper
+    return decorator
+
+
+def save_snapshot(database, source):
+    """Save the metrics of this process in the database.
+
+    :param database: The database where to save.
+    :param source: The unique name of this process.
+    :type source: str
+    """
+    document = METRICS.to_dict()
+    document[models.ID_KEY] = source
+    document[models.UPDATED_KEY] = datetime.datetime.now(
+        tz=bson.tz_util.utc)
+
+    database[models.METRICS_COLLECTION].save(document)
+
+
+def get_snapshots(database):
+    """Retrieve the metrics snapshots saved in the database.
+
+    :param database: The database where the snapshots are saved.
+    :return A list with the snapshots, sorted by process name.
+    """
+    return [
+        s for s in database[models.METRICS_COLLECTION].find(
+            sort=[(models.ID_KEY, 1)])
+    ]
@@ -0,0 +1,226 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Pre-fork multi-process mode for the Tornado server.
+
+The listening sockets are bound once in the master process, then the worker
+processes are forked and all accept connections on the same sockets.
+
+The master process supervises the workers:
+- a worker that dies unexpectedly is restarted;
+- on SIGHUP, all the workers are replaced: the new ones are started before
+  the old ones are gracefully stopped;
+- on SIGTERM or SIGINT, all the workers are gracefully stopped and the master
+  exits.
+
+Everything that holds sockets or threads (database clients, thread pool
+executors, the IOLoop) must be created in the workers, after the fork.
+"""
+
+import errno
+import os
+import random
+import signal
+import sys
+import time
+
+import tornado.ioloop
+import tornado.process
+
+import utils
+
+# How many times, in total, workers can die unexpectedly before the master
+# gives up.
+DEFAULT_MAX_RESTARTS = 100
+# How long, in seconds, a worker waits for the in-flight requests to
+# complete before stopping.
+DEFAULT_SHUTDOWN_TIMEOUT = 5
+
+
+def num_processes(processes):
+    """Calculate the number of worker processes to use.
+
+    :param processes: The requested number of processes, 0 or a negative
+    value to use the number of CPUs.
+    :type processes: int
+    :return The number of processes.
+    """
+    if processes is None or processes <= 0:
+        processes = tornado.process.cpu_count()
+    return processes
+
+
+def _is_abnormal_exit(status):
+    """If a child process exited because of a signal or an error.
+
+    :param status: The exit status as returned by `os.wait`.
+    :type status: int
+    :return True or False.
+    """
+    return os.WIFSIGNALED(status) or os.WEXITSTATUS(status) != 0
+
+
+def fork_workers(processes, max_restarts=DEFAULT_MAX_RESTARTS):
+    """Fork the worker processes and supervise them.
+
+    This function returns only in the worker processes, with the ID of the
+    worker (a number between 0 and `processes` - 1). The master process
+    exits when all the workers have been stopped.
+
+    :param processes: The number of worker processes.
+    :type processes: int
+    :param max_restarts: How many times workers can die unexpectedly before
+    the master gives up.
+    :type max_restarts: int
+    :return The ID of the worker.
+    """
+    # PID -> worker ID of the running workers.
+    children = {}
+    # PIDs of the workers that have been replaced and are stopping.
+    retiring = set()
+    state = {"stopping": False, "reload": False}
+
+    def _signal_children(pids, signum):
+        for pid in pids:
+            try:
+                os.kill(pid, signum)
+            except OSError, ex:
+                if ex.errno != errno.ESRCH:
+                    raise
+
+    def _stop(signum, frame):
+        utils.LOG.info("Stopping %d worker processes", len(children))
+        state["stopping"] = True
+        _signal_children(children.keys(), signal.SIGTERM)
+
+    def _reload(signum, frame):
+        # Workers cannot be forked from the signal handler, the main loop
+        # takes care of that.
+        state["reload"] = True
+
+    def _start_child(worker_id):
+        pid = os.fork()
+        if pid == 0:
+            # The workers handle their own signals.
+            for signum in [signal.SIGTERM, signal.SIGINT, signal.SIGHUP]:
+                signal.signal(signum, signal.SIG_DFL)
+            # Do not share the random state with the other processes.
+            random.seed(os.urandom(16))
+            return worker_id
+
+        children[pid] = worker_id
+        return None
+
+    utils.LOG.info("Starting %d worker processes", processes)
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGHUP, _reload)
+
+    for worker_id in range(processes):
+        if _start_child(worker_id) is not None:
+            return worker_id
+
+    num_restarts = 0
+    while children:
+        if state["reload"] and not state["stopping"]:
+            state["reload"] = False
+            old_children = [
+                (pid, worker_id) for pid, worker_id in children.iteritems()
+                if pid not in retiring
+            ]
+            utils.LOG.info(
+                "Restarting %d worker processes", len(old_children))
+
+            # Start the new workers first, so that there is always someone
+            # accepting connections.
+            for pid, worker_id in old_children:
+                retiring.add(pid)
+                if _start_child(worker_id) is not None:
+                    return worker_id
+            _signal_children(
+                [pid for pid, _ in old_children], signal.SIGTERM)
+
+        try:
+            pid, status = os.wait()
+        except OSError, ex:
+            # Interrupted by one of the signal handlers.
+            if ex.errno == errno.EINTR:
+                continue
+            raise
+
+        if pid not in children:
+            continue
+
+        worker_id = children.pop(pid)
+
+        if pid in retiring:
+            retiring.discard(pid)
+            continue
+
+        if state["stopping"]:
+            continue
+
+        if _is_abnormal_exit(status):
+            utils.LOG.warn(
+                "Worker %d (pid %d) exited unexpectedly with status %d",
+                worker_id, pid, status)
+
+            num_restarts += 1
+            if num_restarts > max_restarts:
+                utils.LOG.error("Too many worker restarts, giving up")
+                state["stopping"] = True
+                _signal_children(children.keys(), signal.SIGTERM)
+                continue
+
+        if _start_child(worker_id) is not None:
+            return worker_id
+
+    # All the workers are gone.
+    sys.exit(0)
+
+
+def install_shutdown_handler(
+        server, executor=None, timeout=DEFAULT_SHUTDOWN_TIMEOUT, io_loop=None):
+    """Gracefully stop the server on SIGTERM.
+
+    The server stops accepting new connections, the requests already in
+    progress have `timeout` seconds to complete, then the IOLoop is stopped
+    and the executor shut down.
+
+    :param server: The HTTP server.
+    :type server: tornado.httpserver.HTTPServer
+    :param executor: The executor used by the handlers.
+    :type executor: concurrent.futures.Executor
+    :param timeout: How long to wait for the requests in progress, in
+    seconds.
+    :type timeout: int
+    :param io_loop: The IOLoop running the server.
+    """
+    io_loop = io_loop or tornado.ioloop.IOLoop.instance()
+
+    def _stop_loop():
+        io_loop.stop()
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _shutdown():
+        utils.LOG.info(
+            "Stopping server process %d in %d seconds", os.getpid(), timeout)
+        server.stop()
+        io_loop.add_timeout(time.time() + timeout, _stop_loop)
+
+    def _handle_signal(signum, frame):
+        io_loop.add_callback_from_signal(_shutdown)
+
+    signal.signal(signal.SIGTERM, _handle_signal)
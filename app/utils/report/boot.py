@@ -19,6 +19,7 @@ import pymongo
 import models
 import utils.db
 import utils.report.common as rcommon
+import utils.summary
 
 # Register normal Unicode gettext.
 G_ = rcommon.L10N.ugettext
@@ -106,52 +107,39 @@ def create_boot_report(job,
 
     spec = {
         models.JOB_KEY: job,
-        models.KERNEL_KEY: kernel,
-        models.STATUS_KEY: models.OFFLINE_STATUS
+        models.KERNEL_KEY: kernel
     }
 
     if lab_name is not None:
         spec[models.LAB_NAME_KEY] = lab_name
 
     database = utils.db.get_db_connection(db_options)
-    offline_results, offline_count = utils.db.find_and_count(
-        database[models.BOOT_COLLECTION],
-        0,
-        0,
-        spec=spec,
-        fields=BOOT_SEARCH_FIELDS,
-        sort=BOOT_SEARCH_SORT
-    )
 
-    spec[models.STATUS_KEY] = {
-        "$in": [models.UNTRIED_STATUS, models.UNKNOWN_STATUS]
-    }
-    untried_count = 0
-    _, untried_count = utils.db.find_and_count(
-        database[models.BOOT_COLLECTION],
-        0,
-        0,
-        spec=spec,
-        fields=BOOT_SEARCH_FIELDS,
-        sort=BOOT_SEARCH_SORT
-    )
+    # Read the counts from the pre-computed summary, if available.
+    summary = rcommon.get_summary(
+        database, models.BOOT_COLLECTION, job, kernel, lab_name)
+    if summary:
+        offline_count = utils.summary.status_count(
+            summary, [models.OFFLINE_STATUS])
+        untried_count = utils.summary.status_count(
+            summary, [models.UNTRIED_STATUS, models.UNKNOWN_STATUS])
+        fail_count = utils.summary.status_count(
+            summary, [models.FAIL_STATUS])
+    else:
+        offline_count = _count_boots(
+            database, spec, [models.OFFLINE_STATUS])
+        untried_count = _count_boots(
+            database, spec, [models.UNTRIED_STATUS, models.UNKNOWN_STATUS])
+        fail_count = _count_boots(database, spec, [models.FAIL_STATUS])
 
-    # MongoDB cursor gets overwritten somehow by the next query. Extract the
-    # data before this happens.
     offline_data = None
     if offline_count > 0:
-        offline_data, _, _, _ = _parse_boot_results(offline_results.clone())
+        spec[models.STATUS_KEY] = models.OFFLINE_STATUS
+        offline_data, _, _, _ = _parse_boot_results(
+            _find_boots(database, spec))
 
     spec[models.STATUS_KEY] = models.FAIL_STATUS
-
-    fail_results, fail_count = utils.db.find_and_count(
-        database[models.BOOT_COLLECTION],
-        0,
-        0,
-        spec=spec,
-        fields=BOOT_SEARCH_FIELDS,
-        sort=BOOT_SEARCH_SORT
-    )
+    fail_results = _find_boots(database, spec)
 
     failed_data = None
     conflict_data = None
@@ -216,16 +204,6 @@ def create_boot_report(job,
             if pass_count > 0:
                 # If we have such boot reports, filter and aggregate them
                 # together.
-                def _conflicting_data():
-                    """Local generator function to search conflicting data.
-
-                    This is used to provide a filter mechanism during the list
-                    comprehension in order to exclude `None` values.
-                    """
-                    for failed, passed in itertools.product(
-                            fail_results, pass_results.clone()):
-                        yield _search_conflicts(failed, passed)
-
                 pass_results = utils.db.find(
                     database[models.BOOT_COLLECTION],
                     0,
@@ -239,10 +217,8 @@ def create_boot_report(job,
                 # We get back (failed,passed) tuples during the list
                 # comprehension, but we need a list of values not tuples.
                 # unzip it, and then chain the two resulting tuples together.
-                conflicting_tuples = zip(*(
-                    x for x in _conflicting_data()
-                    if x is not None
-                ))
+                conflicting_tuples = zip(
+                    *_find_conflicts(fail_results, pass_results))
 
                 # Make sure we do not have an empty list here after filtering.
                 if conflicting_tuples:
@@ -268,6 +244,41 @@ def create_boot_report(job,
     return txt_body, html_body, subject, custom_headers
 
 
+def _count_boots(database, spec, statuses):
+    """Count the boot reports with the provided statuses.
+
+    :param database: The database connection.
+    :param spec: The spec of the boot reports to count.
+    :type spec: dict
+    :param statuses: The statuses to count.
+    :type statuses: list
+    :return The number of boot reports.
+    """
+    count_spec = dict(spec)
+    count_spec[models.STATUS_KEY] = {"$in": statuses}
+
+    return utils.db.count(
+        database[models.BOOT_COLLECTION], count_spec) or 0
+
+
+def _find_boots(database, spec):
+    """Search the boot reports needed for the report.
+
+    :param database: The database connection.
+    :param spec: The spec of the boot reports to search.
+    :type spec: dict
+    :return A cursor with the boot reports.
+    """
+    return utils.db.find(
+        database[models.BOOT_COLLECTION],
+        0,
+        0,
+        spec=spec,
+        fields=BOOT_SEARCH_FIELDS,
+        sort=BOOT_SEARCH_SORT
+    )
+
+
 # pylint: disable=too-many-branches
 # pylint: disable=too-many-statements
 def _parse_boot_results(results, intersect_results=None, get_unique=False):
@@ -352,6 +363,49 @@ def _parse_boot_results(results, intersect_results=None, get_unique=False):
     return parsed_data, intersect_results, intersections, unique_data
 
 
+def _conflict_key(result):
+    """The values that two results must share to be a conflict.
+
+    :param result: The boot result.
+    :type result: dict
+    :return A tuple with the board, defconfig_full and arch values.
+    """
+    res_get = result.get
+    return (
+        res_get(models.BOARD_KEY),
+        res_get(models.DEFCONFIG_FULL_KEY), res_get(models.ARCHITECTURE_KEY))
+
+
+def _find_conflicts(fail_results, pass_results):
+    """Find all the conflicting failed and passed results.
+
+    The passed results are indexed on their board, defconfig_full and arch
+    values, so that each failed result is compared only with the passed
+    ones that share the same values.
+
+    The conflicts are returned in the same order as if each failed result
+    was compared with all the passed ones.
+
+    :param fail_results: The failed results.
+    :type fail_results: list
+    :param pass_results: The passed results.
+    :type pass_results: `pymongo.cursor.Cursor` or a list of dict
+    :return A list of (failed, passed) tuples.
+    """
+    pass_index = {}
+    for passed in pass_results:
+        pass_index.setdefault(_conflict_key(passed), []).append(passed)
+
+    conflicts = []
+    for failed in fail_results:
+        for passed in pass_index.get(_conflict_key(failed), []):
+            conflict = _search_conflicts(failed, passed)
+            if conflict is not None:
+                conflicts.append(conflict)
+
+    return conflicts
+
+
 def _search_conflicts(failed, passed):
     """Make sure the failed and passed results are a conflict and return it.
 
@@ -18,6 +18,7 @@ import pymongo
 import models
 import utils.db
 import utils.report.common as rcommon
+import utils.summary
 
 # Register normal Unicode gettext.
 G_ = rcommon.L10N.ugettext
@@ -109,35 +110,61 @@ def create_build_report(job,
     }
 
     database = utils.db.get_db_connection(db_options)
-    total_results, total_count = utils.db.find_and_count(
-        database[models.DEFCONFIG_COLLECTION],
-        0,
-        0,
-        spec=spec,
-        fields=BUILD_SEARCH_FIELDS
+
+    total_count, total_unique_data = rcommon.get_total_results(
+        job,
+        kernel,
+        models.DEFCONFIG_COLLECTION,
+        db_options, unique_keys=[models.ARCHITECTURE_KEY]
     )
 
+    # Only the builds with errors or warnings are needed to count them.
+    errors_spec = {
+        models.JOB_KEY: job,
+        models.KERNEL_KEY: kernel,
+        "$or": [
+            {models.ERRORS_KEY: {"$gt": 0}},
+            {models.WARNINGS_KEY: {"$gt": 0}}
+        ]
+    }
     err_data, errors_count, warnings_count = _get_errors_count(
-        total_results.clone())
-
-    unique_keys = [models.ARCHITECTURE_KEY]
-    total_unique_data = rcommon.get_unique_data(
-        total_results.clone(), unique_keys=unique_keys)
+        utils.db.find(
+            database[models.DEFCONFIG_COLLECTION],
+            0,
+            0,
+            spec=errors_spec,
+            fields=BUILD_SEARCH_FIELDS)
+    )
 
     git_commit, git_url, git_branch = rcommon.get_git_data(
         job, kernel, db_options)
 
     spec[models.STATUS_KEY] = models.FAIL_STATUS
 
-    fail_results, fail_count = utils.db.find_and_count(
-        database[models.DEFCONFIG_COLLECTION],
-        0,
-        0,
-        spec=spec,
-        fields=BUILD_SEARCH_FIELDS,
-        sort=BUILD_SEARCH_SORT)
-
-    failed_data = _parse_build_data(fail_results.clone())
+    summary = rcommon.get_summary(
+        database, models.DEFCONFIG_COLLECTION, job, kernel)
+    if summary:
+        fail_results = utils.db.find(
+            database[models.DEFCONFIG_COLLECTION],
+            0,
+            0,
+            spec=spec,
+            fields=BUILD_SEARCH_FIELDS,
+            sort=BUILD_SEARCH_SORT)
+        fail_count = utils.summary.status_count(
+            summary, [models.FAIL_STATUS])
+    else:
+        fail_results, fail_count = utils.db.find_and_count(
+            database[models.DEFCONFIG_COLLECTION],
+            0,
+            0,
+            spec=spec,
+            fields=BUILD_SEARCH_FIELDS,
+            sort=BUILD_SEARCH_SORT)
+
+    failed_data = {}
+    if fail_count > 0:
+        failed_data = _parse_build_data(fail_results.clone())
 
     # Retrieve the parsed errors/warnings/mismatches summary and then
     # the details.
@@ -24,6 +24,8 @@ import urlparse
 import models
 import models.report as mreport
 import utils
+import utils.db
+import utils.summary
 
 # Register the translation domain and fallback safely, at the moment we do
 # not care if we have translations or not, we just use gettext to exploit its
@@ -246,12 +248,19 @@ def get_git_data(job, kernel, db_options):
 
     database = utils.db.get_db_connection(db_options)
 
-    git_results = utils.db.find(
-        database[models.JOB_COLLECTION],
-        0,
-        0,
-        spec=spec,
-        fields=JOB_SEARCH_FIELDS)
+    # The build summary holds the git data of the job.
+    summary = utils.summary.get_summary(
+        database, utils.summary.BUILD_SUMMARY, job, kernel)
+
+    if summary and summary.get(models.GIT_COMMIT_KEY):
+        git_results = [summary]
+    else:
+        git_results = utils.db.find(
+            database[models.JOB_COLLECTION],
+            0,
+            0,
+            spec=spec,
+            fields=JOB_SEARCH_FIELDS)
 
     git_data = parse_job_results(git_results)
     if git_data:
@@ -264,6 +273,32 @@ def get_git_data(job, kernel, db_options):
     return (git_commit, git_url, git_branch)
 
 
+def get_summary(database, collection, job, kernel, lab_name=None):
+    """Retrieve the pre-computed summary of the documents of a job-kernel.
+
+    :param database: The database connection.
+    :param collection: The name of the collection the documents are in.
+    :type collection: string
+    :param job: The job name.
+    :type job: string
+    :param kernel: The kernel name.
+    :type kernel: string
+    :param lab_name: The lab name.
+    :type lab_name: string
+    :return The summary document, or None if the documents of the collection
+    are not summarized or the summary does not exist.
+    """
+    summary = None
+
+    for summary_type, source in utils.summary.SUMMARY_SOURCES.iteritems():
+        if source == collection:
+            summary = utils.summary.get_summary(
+                database, summary_type, job, kernel, lab_name or None)
+            break
+
+    return summary
+
+
 def get_total_results(
         job, kernel, collection, db_options, lab_name=None, unique_keys=None):
     """Retrieve the total count and the unique data for a collection.
@@ -292,6 +327,18 @@ def get_total_results(
 
     database = utils.db.get_db_connection(db_options)
 
+    summary = get_summary(database, collection, job, kernel, lab_name)
+    if summary:
+        unique = summary.get(utils.summary.UNIQUE_KEY) or {}
+        unique_keys = unique_keys or DEFAULT_UNIQUE_KEYS
+
+        # The summary does not keep the unique values of all the fields.
+        if all([key in unique for key in unique_keys]):
+            return (
+                summary[utils.summary.TOTAL_KEY],
+                dict((key, unique[key]) for key in unique_keys)
+            )
+
     total_results, total_count = utils.db.find_and_count(
         database[collection],
         0,
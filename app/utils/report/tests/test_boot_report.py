@@ -336,3 +336,59 @@ class TestBootReport(unittest.TestCase):
             "(a-kernel) - a-lab")
         self.assertIsNotNone(subj)
         self.assertEqual(expected, subj)
+
+    def _create_results(self):
+        fail_results = []
+        pass_results = []
+        idx = 0
+
+        for board in ["board-0", "board-1", "board-2"]:
+            for defconfig in ["defconfig-0", "defconfig-1"]:
+                for lab in ["lab-0", "lab-1", "lab-2"]:
+                    idx += 1
+                    result = {
+                        "_id": idx,
+                        "arch": "arm",
+                        "board": board,
+                        "defconfig_full": defconfig,
+                        "lab_name": lab,
+                        "status": "PASS"
+                    }
+                    if (idx % 4) == 0 or board == "board-2":
+                        result["status"] = "FAIL"
+                        fail_results.append(result)
+                    else:
+                        pass_results.append(result)
+
+        return fail_results, pass_results
+
+    def test_find_conflicts(self):
+        fail_results, pass_results = self._create_results()
+
+        conflicts = breport._find_conflicts(fail_results, pass_results)
+
+        self.assertEqual(6, len(conflicts))
+        for failed, passed in conflicts:
+            self.assertEqual("FAIL", failed["status"])
+            self.assertEqual("PASS", passed["status"])
+            self.assertEqual(failed["board"], passed["board"])
+            self.assertEqual(
+                failed["defconfig_full"], passed["defconfig_full"])
+            self.assertNotEqual(failed["lab_name"], passed["lab_name"])
+
+    def test_find_conflicts_same_as_all_pairs(self):
+        fail_results, pass_results = self._create_results()
+
+        expected = [
+            conflict for conflict in (
+                breport._search_conflicts(failed, passed)
+                for failed in fail_results for passed in pass_results)
+            if conflict is not None
+        ]
+
+        self.assertListEqual(
+            expected, breport._find_conflicts(fail_results, pass_results))
+
+    def test_find_conflicts_no_pass(self):
+        fail_results, _ = self._create_results()
+        self.assertListEqual([], breport._find_conflicts(fail_results, []))
@@ -0,0 +1,172 @@
+#!/usr/bin/python
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Load benchmark for the backend API.
+
+It sends GET requests with a configurable concurrency to a running backend
+and reports throughput and latency percentiles for each URL.
+
+To compare the thread-pool and the asynchronous database modes, start the
+backend once with `--async_db=false` and once with `--async_db=true` against
+the same local mongod, and run this script against both:
+
+    python utils/scripts/benchmark-api.py -t TOKEN -c 50 -n 2000 \\
+        /job /defconfig?limit=100 /boot?limit=100 /count
+"""
+
+import argparse
+import sys
+import time
+
+import tornado.gen
+import tornado.httpclient
+import tornado.ioloop
+
+
+def _percentile(values, percent):
+    """Calculate a percentile on a sorted list of values.
+
+    :param values: The sorted list of values.
+    :type values: list
+    :param percent: The percentile to calculate, between 0 and 100.
+    :type percent: int
+    :return The percentile value.
+    """
+    if not values:
+        return 0.0
+    index = int(round((len(values) - 1) * percent / 100.0))
+    return values[index]
+
+
+@tornado.gen.coroutine
+def run_url(client, url, token, requests, concurrency):
+    """Send the requests to a single URL.
+
+    :param client: The HTTP client.
+    :param url: The URL to test.
+    :type url: str
+    :param token: The API token.
+    :type token: str
+    :param requests: The total number of requests to send.
+    :type requests: int
+    :param concurrency: How many requests should be in-flight at once.
+    :type concurrency: int
+    :return A dictionary with the results.
+    """
+    latencies = []
+    errors = [0]
+    remaining = [requests]
+    headers = {"Authorization": token}
+
+    @tornado.gen.coroutine
+    def _worker():
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            start = time.time()
+            try:
+                yield client.fetch(url, headers=headers)
+            except tornado.httpclient.HTTPError:
+                errors[0] += 1
+            latencies.append(time.time() - start)
+
+    start = time.time()
+    yield [_worker() for _ in range(concurrency)]
+    elapsed = time.time() - start
+
+    latencies.sort()
+    raise tornado.gen.Return({
+        "url": url,
+        "requests": requests,
+        "errors": errors[0],
+        "elapsed": elapsed,
+        "rps": requests / elapsed if elapsed else 0.0,
+        "p50": _percentile(latencies, 50) * 1000,
+        "p90": _percentile(latencies, 90) * 1000,
+        "p99": _percentile(latencies, 99) * 1000
+    })
+
+
+@tornado.gen.coroutine
+def run(args):
+    """Run the benchmark for all the URLs.
+
+    :param args: The command line arguments.
+    """
+    client = tornado.httpclient.AsyncHTTPClient(
+        max_clients=args.concurrency)
+
+    sys.stdout.write(
+        "%-40s %8s %7s %9s %9s %9s %9s\n" %
+        ("url", "requests", "errors", "req/s", "p50 ms", "p90 ms", "p99 ms"))
+
+    for path in args.urls:
+        result = yield run_url(
+            client,
+            args.base_url.rstrip("/") + path,
+            args.token, args.requests, args.concurrency)
+
+        sys.stdout.write(
+            "%-40s %8d %7d %9.1f %9.2f %9.2f %9.2f\n" %
+            (
+                path, result["requests"], result["errors"], result["rps"],
+                result["p50"], result["p90"], result["p99"]
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load benchmark for the backend API",
+        version=0.1
+    )
+    parser.add_argument(
+        "--base-url", "-b",
+        type=str,
+        help="The base URL of the backend",
+        default="http://localhost:8888",
+        dest="base_url"
+    )
+    parser.add_argument(
+        "--token", "-t",
+        type=str,
+        help="The API token to use",
+        required=True,
+        dest="token"
+    )
+    parser.add_argument(
+        "--concurrency", "-c",
+        type=int,
+        help="How many requests should be in-flight at once",
+        default=10,
+        dest="concurrency"
+    )
+    parser.add_argument(
+        "--requests", "-n",
+        type=int,
+        help="How many requests to send for each URL",
+        default=500,
+        dest="requests"
+    )
+    parser.add_argument(
+        "urls",
+        metavar="URL",
+        nargs="+",
+        help="The URL paths to test, with their query strings"
+    )
+
+    args = parser.parse_args()
+    tornado.ioloop.IOLoop.instance().run_sync(lambda: run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/python
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Benchmark the defconfig bisection.
+
+A synthetic tree with thousands of builds per defconfig is created in a
+scratch database, then the bisection is executed for a sample of failed
+builds. For each one, the latency and the number of documents returned by
+the server are measured, both for the current bisection and for the
+previous unbounded scan.
+
+    python utils/scripts/benchmark-bisect.py --builds 5000
+
+The number of documents returned is read from the `serverStatus` metrics:
+the database should not be used by anything else while running.
+"""
+
+import argparse
+import datetime
+import random
+import sys
+import time
+
+import bson.tz_util
+import pymongo
+
+import handlers.dbindexes
+import models
+import utils.bisect.common as bcommon
+import utils.bisect.defconfig as defconfigb
+import utils.db
+
+ARCHS = ["arm", "arm64", "x86"]
+JOB = "benchmark"
+
+
+def populate(database, defconfigs, builds, fail_ratio, chunk_size=10000):
+    """Fill the defconfig collection with synthetic builds.
+
+    The builds of a defconfig fail in runs of random length, so that the
+    distance between a failed build and the previous passed one varies.
+
+    :param database: The database to fill.
+    :param defconfigs: How many defconfigs to create.
+    :type defconfigs: int
+    :param builds: How many builds to create for each defconfig.
+    :type builds: int
+    :param fail_ratio: The ratio of failed builds, between 0 and 1.
+    :type fail_ratio: float
+    :param chunk_size: How many documents to insert at once.
+    :type chunk_size: int
+    """
+    collection = database[models.DEFCONFIG_COLLECTION]
+    now = datetime.datetime.now(tz=bson.tz_util.utc)
+    created = 0
+    chunk = []
+
+    for defconfig_idx in range(defconfigs):
+        defconfig = "defconfig-%d" % defconfig_idx
+        arch = ARCHS[defconfig_idx % len(ARCHS)]
+        status = models.PASS_STATUS
+
+        for idx in range(builds):
+            if random.random() < 0.05:
+                if random.random() < fail_ratio:
+                    status = models.FAIL_STATUS
+                else:
+                    status = models.PASS_STATUS
+
+            chunk.append({
+                models.ARCHITECTURE_KEY: arch,
+                models.CREATED_KEY: now - datetime.timedelta(hours=idx),
+                models.DEFCONFIG_FULL_KEY: defconfig,
+                models.DEFCONFIG_KEY: defconfig,
+                models.GIT_COMMIT_KEY: "%040x" % random.getrandbits(160),
+                models.GIT_DESCRIBE_KEY: "v4.0-%d" % idx,
+                models.GIT_URL_KEY: "git://example.org/linux.git",
+                models.JOB_KEY: JOB,
+                models.KERNEL_KEY: "v4.0-%d" % idx,
+                models.STATUS_KEY: status
+            })
+
+            if len(chunk) == chunk_size:
+                collection.insert(chunk, w=0)
+                created += len(chunk)
+                chunk = []
+                sys.stdout.write("\rInserted %d documents" % created)
+                sys.stdout.flush()
+
+    if chunk:
+        collection.insert(chunk)
+        created += len(chunk)
+
+    sys.stdout.write("\rInserted %d documents\n" % created)
+    # pylint: disable=protected-access
+    handlers.dbindexes._ensure_defconfig_indexes(database)
+    handlers.dbindexes._ensure_bisect_indexes(database)
+
+
+def documents_returned(database):
+    """The number of documents returned by the server so far.
+
+    :param database: The database connection.
+    :return The counter value.
+    """
+    status = database.command("serverStatus")
+    return status["metrics"]["document"]["returned"]
+
+
+def unbounded_bisection(database, doc_id):
+    """The previous bisection scan, kept as a reference.
+
+    It searches for some passed builds, then walks all the older builds
+    until a passed one is found.
+
+    :param database: The database connection.
+    :param doc_id: The ID of the failed build.
+    :return The number of builds in the bisection.
+    """
+    collection = database[models.DEFCONFIG_COLLECTION]
+    start_doc = collection.find_one(
+        doc_id, fields=defconfigb.DEFCONFIG_SEARCH_FIELDS)
+
+    spec = dict(
+        (key, start_doc[key])
+        for key in [
+            models.ARCHITECTURE_KEY,
+            models.DEFCONFIG_FULL_KEY,
+            models.DEFCONFIG_KEY, models.JOB_KEY]
+    )
+
+    pass_spec = dict(spec)
+    pass_spec[models.STATUS_KEY] = models.PASS_STATUS
+    pass_spec[models.CREATED_KEY] = {"$lt": start_doc[models.CREATED_KEY]}
+
+    passed_builds = collection.find(
+        pass_spec,
+        limit=10,
+        fields=defconfigb.DEFCONFIG_SEARCH_FIELDS,
+        sort=defconfigb.DEFCONFIG_SORT)
+
+    passed_build = None
+    if passed_builds.count() > 0:
+        passed_build = passed_builds[0]
+
+    if passed_build is not None:
+        spec[models.CREATED_KEY] = {
+            "$gte": passed_build[models.CREATED_KEY],
+            "$lt": start_doc[models.CREATED_KEY]
+        }
+    else:
+        spec[models.CREATED_KEY] = {"$lt": start_doc[models.CREATED_KEY]}
+
+    all_prev_docs = collection.find(
+        spec,
+        fields=defconfigb.DEFCONFIG_SEARCH_FIELDS,
+        sort=defconfigb.DEFCONFIG_SORT)
+
+    return 1 + len([d for d in bcommon.get_docs_until_pass(all_prev_docs)])
+
+
+def current_bisection(database, doc_id):
+    """The current bisection.
+
+    :param database: The database connection.
+    :param doc_id: The ID of the failed build.
+    :return The number of builds in the bisection.
+    """
+    _, result = defconfigb.execute_defconfig_bisection(str(doc_id), {})
+    return len(result[0][models.BISECT_DATA_KEY])
+
+
+def run(database, samples):
+    """Time the bisections for a sample of failed builds.
+
+    :param database: The database connection.
+    :param samples: How many failed builds to bisect.
+    :type samples: int
+    """
+    failed = [
+        doc[models.ID_KEY]
+        for doc in database[models.DEFCONFIG_COLLECTION].find(
+            {models.STATUS_KEY: models.FAIL_STATUS},
+            fields=[models.ID_KEY])
+    ]
+    failed = random.sample(failed, min(samples, len(failed)))
+
+    sys.stdout.write("%-10s %10s %12s %10s %10s\n" % (
+        "scan", "bisects", "avg builds", "avg docs", "avg ms"))
+
+    for name, func in [
+            ("unbounded", unbounded_bisection),
+            ("bounded", current_bisection)]:
+        builds = 0
+        start_returned = documents_returned(database)
+        start = time.time()
+
+        for doc_id in failed:
+            builds += func(database, doc_id)
+
+        elapsed = (time.time() - start) * 1000
+        returned = documents_returned(database) - start_returned
+
+        # Do not count the saved bisect documents.
+        database[models.BISECT_COLLECTION].remove()
+
+        total = len(failed) or 1
+        sys.stdout.write("%-10s %10d %12.1f %10.1f %10.2f\n" % (
+            name,
+            len(failed),
+            float(builds) / total,
+            float(returned) / total, elapsed / total))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the defconfig bisection",
+        version=0.1
+    )
+    parser.add_argument(
+        "--database", "-d",
+        type=str,
+        help="The scratch database where to create the collections",
+        default="kernel-ci-benchmark",
+        dest="database"
+    )
+    parser.add_argument(
+        "--defconfigs", "-n",
+        type=int,
+        help="How many defconfigs to create",
+        default=50,
+        dest="defconfigs"
+    )
+    parser.add_argument(
+        "--builds", "-b",
+        type=int,
+        help="How many builds to create for each defconfig",
+        default=5000,
+        dest="builds"
+    )
+    parser.add_argument(
+        "--fail-ratio", "-f",
+        type=float,
+        help="The ratio of failed builds, between 0 and 1",
+        default=0.3,
+        dest="fail_ratio"
+    )
+    parser.add_argument(
+        "--samples", "-s",
+        type=int,
+        help="How many failed builds to bisect",
+        default=200,
+        dest="samples"
+    )
+    parser.add_argument(
+        "--reuse",
+        action="store_true",
+        default=False,
+        help="Do not re-create the collection if it already exists",
+        dest="reuse"
+    )
+
+    args = parser.parse_args()
+
+    database = pymongo.MongoClient()[args.database]
+    # The bisection functions use the shared connection.
+    utils.db.DB_CONNECTION = database
+
+    collection = database[models.DEFCONFIG_COLLECTION]
+    if not (args.reuse and collection.count() > 0):
+        collection.drop()
+        populate(database, args.defconfigs, args.builds, args.fail_ratio)
+
+    run(database, args.samples)
+
+if __name__ == "__main__":
+    main()
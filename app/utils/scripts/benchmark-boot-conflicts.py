@@ -0,0 +1,218 @@
+#!/usr/bin/python
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark the conflict detection of the boot email report.
+
+Synthetic boot results are created for a single job/kernel, with a
+configurable number of boards, defconfigs, architectures and labs. The
+conflicts are searched comparing all the failed/passed pairs, as it used to
+be done, and with `utils.report.boot._find_conflicts`: the resulting report
+data is compared and the time taken reported.
+
+    python utils/scripts/benchmark-boot-conflicts.py --boards 250 --labs 8
+"""
+
+import argparse
+import itertools
+import random
+import sys
+import time
+
+import models
+import utils.report.boot as breport
+
+
+def create_results(boards, defconfigs, archs, labs, fail_ratio, seed=None):
+    """Create synthetic boot results, sorted as the report does.
+
+    Each board is booted with a subset of the defconfigs of its architecture
+    in a subset of the labs.
+
+    :param boards: How many boards.
+    :type boards: int
+    :param defconfigs: How many defconfigs for each architecture.
+    :type defconfigs: int
+    :param archs: How many architectures.
+    :type archs: int
+    :param labs: How many labs.
+    :type labs: int
+    :param fail_ratio: The ratio of failed boots, between 0 and 1.
+    :type fail_ratio: float
+    :param seed: The seed of the random generator.
+    :return A 2-tuple: the list of failed and the list of passed results.
+    """
+    rand = random.Random(seed)
+    lab_names = ["lab-%d" % idx for idx in range(labs)]
+    fail_results = []
+    pass_results = []
+    doc_id = 0
+
+    for board_idx in range(boards):
+        board = "board-%d" % board_idx
+        arch = "arch-%d" % (board_idx % archs)
+        board_labs = rand.sample(lab_names, rand.randint(1, min(3, labs)))
+
+        for defconfig_idx in rand.sample(
+                range(defconfigs), rand.randint(1, min(10, defconfigs))):
+            for lab_name in board_labs:
+                doc_id += 1
+                result = {
+                    models.ID_KEY: doc_id,
+                    models.ARCHITECTURE_KEY: arch,
+                    models.BOARD_KEY: board,
+                    models.DEFCONFIG_FULL_KEY: "defconfig-%d" % defconfig_idx,
+                    models.LAB_NAME_KEY: lab_name,
+                    models.MACH_KEY: "mach"
+                }
+
+                if rand.random() < fail_ratio:
+                    result[models.STATUS_KEY] = models.FAIL_STATUS
+                    fail_results.append(result)
+                else:
+                    result[models.STATUS_KEY] = models.PASS_STATUS
+                    pass_results.append(result)
+
+    def _sort_key(result):
+        return (
+            result[models.ARCHITECTURE_KEY],
+            result[models.DEFCONFIG_FULL_KEY], result[models.BOARD_KEY])
+
+    fail_results.sort(key=_sort_key)
+    pass_results.sort(key=_sort_key)
+
+    return fail_results, pass_results
+
+
+def all_pairs_conflicts(fail_results, pass_results):
+    """Find the conflicts comparing all the failed and passed pairs."""
+    return [
+        conflict for conflict in (
+            breport._search_conflicts(failed, passed)
+            for failed, passed in itertools.product(
+                fail_results, pass_results))
+        if conflict is not None
+    ]
+
+
+def create_report_data(fail_results, conflicts):
+    """Create the conflicts data as in the boot report.
+
+    :return A 3-tuple: the conflict data, the failed data and the conflict
+    count.
+    """
+    failed_data, _, _, _ = breport._parse_boot_results(fail_results)
+    conflict_data = None
+    conflict_count = 0
+
+    conflicting_tuples = zip(*conflicts)
+    if conflicting_tuples:
+        conflict_data, failed_data, conflict_count, _ = \
+            breport._parse_boot_results(
+                itertools.chain(conflicting_tuples[0], conflicting_tuples[1]),
+                intersect_results=failed_data)
+
+    return conflict_data, failed_data, conflict_count
+
+
+def _time(func, *args):
+    start = time.time()
+    result = func(*args)
+    return result, time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the boot report conflict detection",
+        version=0.1
+    )
+    parser.add_argument(
+        "--boards", "-b",
+        type=int,
+        help="How many boards",
+        default=200,
+        dest="boards"
+    )
+    parser.add_argument(
+        "--defconfigs", "-d",
+        type=int,
+        help="How many defconfigs for each architecture",
+        default=60,
+        dest="defconfigs"
+    )
+    parser.add_argument(
+        "--archs", "-a",
+        type=int,
+        help="How many architectures",
+        default=4,
+        dest="archs"
+    )
+    parser.add_argument(
+        "--labs", "-l",
+        type=int,
+        help="How many labs",
+        default=6,
+        dest="labs"
+    )
+    parser.add_argument(
+        "--fail-ratio", "-f",
+        type=float,
+        help="The ratio of failed boots",
+        default=0.1,
+        dest="fail_ratio"
+    )
+    parser.add_argument(
+        "--seed", "-s",
+        type=int,
+        help="The seed of the random generator",
+        default=42,
+        dest="seed"
+    )
+    parser.add_argument(
+        "--skip-all-pairs",
+        action="store_true",
+        default=False,
+        help="Do not run the comparison of all the pairs (slow)",
+        dest="skip_all_pairs"
+    )
+
+    args = parser.parse_args()
+
+    fail_results, pass_results = create_results(
+        args.boards,
+        args.defconfigs,
+        args.archs, args.labs, args.fail_ratio, seed=args.seed)
+
+    sys.stdout.write(
+        "%d failed, %d passed boot results\n" %
+        (len(fail_results), len(pass_results)))
+
+    conflicts, elapsed = _time(
+        breport._find_conflicts, fail_results, pass_results)
+    sys.stdout.write(
+        "%-10s %8d conflicts %10.3f s\n" % ("indexed", len(conflicts), elapsed))
+
+    if not args.skip_all_pairs:
+        all_pairs, elapsed = _time(
+            all_pairs_conflicts, fail_results, pass_results)
+        sys.stdout.write(
+            "%-10s %8d conflicts %10.3f s\n" %
+            ("all pairs", len(all_pairs), elapsed))
+
+        if (create_report_data(fail_results, conflicts) !=
+                create_report_data(fail_results, all_pairs)):
+            sys.stderr.write("The report data is different\n")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
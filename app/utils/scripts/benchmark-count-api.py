@@ -0,0 +1,194 @@
+#!/usr/bin/python
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark the /count requests.
+
+Synthetic documents are created in all the counted collections of a scratch
+database, then all the collections are counted, with and without a
+`date_range` filter, with:
+- sequential: the collections counted one after the other, without caches;
+- parallel: the collections counted in parallel, without caches;
+- cached: the collections counted in parallel, with the caches.
+
+    python utils/scripts/benchmark-count-api.py --documents 500000
+"""
+
+import argparse
+import datetime
+import random
+import sys
+import time
+
+import bson.tz_util
+import pymongo
+
+import handlers.common as hcommon
+import handlers.count as hcount
+import models
+import utils.db
+
+BOARDS = ["board-%d" % x for x in range(200)]
+STATUSES = ["PASS"] * 8 + ["FAIL", "OFFLINE"]
+
+QUERIES = [
+    ("no filter", {}),
+    ("date_range=5", {models.DATE_RANGE_KEY: ["5"]}),
+    ("date_range+status", {
+        models.DATE_RANGE_KEY: ["5"], models.STATUS_KEY: ["FAIL"]})
+]
+
+MODES = ["sequential", "parallel", "cached"]
+
+
+def populate(database, documents, chunk_size=10000):
+    """Fill the counted collections with synthetic documents.
+
+    The documents are created over the last 30 days.
+
+    :param database: The database to fill.
+    :param documents: How many documents to create in each collection.
+    :type documents: int
+    :param chunk_size: How many documents to insert at once.
+    :type chunk_size: int
+    """
+    now = datetime.datetime.now(tz=bson.tz_util.utc)
+    step = datetime.timedelta(days=30).total_seconds() / documents
+
+    for name in hcommon.COLLECTIONS.itervalues():
+        collection = database[name]
+        collection.drop()
+        created = 0
+
+        while created < documents:
+            chunk = []
+            for idx in range(created, min(created + chunk_size, documents)):
+                chunk.append({
+                    models.JOB_KEY: "job-%d" % (idx % 20),
+                    models.BOARD_KEY: random.choice(BOARDS),
+                    models.STATUS_KEY: random.choice(STATUSES),
+                    models.CREATED_KEY: now - datetime.timedelta(
+                        seconds=idx * step)
+                })
+            collection.insert(chunk, w=0)
+            created += len(chunk)
+            sys.stdout.write("\r%s: inserted %d documents" % (name, created))
+            sys.stdout.flush()
+
+        sys.stdout.write("\n")
+
+        collection.ensure_index([(models.CREATED_KEY, pymongo.DESCENDING)])
+        collection.ensure_index(
+            [(models.STATUS_KEY, pymongo.ASCENDING),
+             (models.CREATED_KEY, pymongo.DESCENDING)])
+
+
+def run(database, repeat):
+    """Time `count_all_collections` for all the queries and modes.
+
+    :param database: The database to count.
+    :param repeat: How many times each query is executed.
+    :type repeat: int
+    """
+    valid_keys = hcommon.COUNT_VALID_KEYS["GET"]
+    count_ttl = hcommon.COUNT_CACHE.ttl
+    estimated_ttl = utils.db.ESTIMATED_COUNT_CACHE.ttl
+    count_workers = hcount.COUNT_WORKERS
+
+    sys.stdout.write("%-18s %-10s %10s %10s\n" % (
+        "query", "mode", "total", "avg ms"))
+
+    try:
+        for name, query in QUERIES:
+            query_args_func = lambda key: query.get(key, [])
+
+            for mode in MODES:
+                hcommon.COUNT_CACHE.clear()
+                utils.db.ESTIMATED_COUNT_CACHE.clear()
+
+                if mode == "cached":
+                    hcommon.COUNT_CACHE.configure(ttl=count_ttl)
+                    utils.db.ESTIMATED_COUNT_CACHE.configure(
+                        ttl=estimated_ttl)
+                else:
+                    hcommon.COUNT_CACHE.configure(ttl=0)
+                    utils.db.ESTIMATED_COUNT_CACHE.configure(ttl=0)
+
+                if mode == "sequential":
+                    hcount.COUNT_WORKERS = 1
+                else:
+                    hcount.COUNT_WORKERS = count_workers
+
+                total = 0
+                start = time.time()
+
+                for _ in range(repeat):
+                    result = hcount.count_all_collections(
+                        database, query_args_func, valid_keys)
+                    total = sum([r["count"] for r in result])
+
+                elapsed = (time.time() - start) / repeat * 1000
+                sys.stdout.write("%-18s %-10s %10d %10.2f\n" % (
+                    name, mode, total, elapsed))
+    finally:
+        hcommon.COUNT_CACHE.configure(ttl=count_ttl)
+        utils.db.ESTIMATED_COUNT_CACHE.configure(ttl=estimated_ttl)
+        hcount.COUNT_WORKERS = count_workers
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the /count requests",
+        version=0.1
+    )
+    parser.add_argument(
+        "--database", "-d",
+        type=str,
+        help="The scratch database where to create the collections",
+        default="kernel-ci-benchmark",
+        dest="database"
+    )
+    parser.add_argument(
+        "--documents", "-n",
+        type=int,
+        help="How many documents to create in each collection",
+        default=200000,
+        dest="documents"
+    )
+    parser.add_argument(
+        "--repeat", "-r",
+        type=int,
+        help="How many times each query is executed",
+        default=10,
+        dest="repeat"
+    )
+    parser.add_argument(
+        "--reuse",
+        action="store_true",
+        default=False,
+        help="Do not re-create the collections if they already exist",
+        dest="reuse"
+    )
+
+    args = parser.parse_args()
+
+    client = pymongo.MongoClient()
+    database = client[args.database]
+
+    if not (args.reuse and database[models.BOOT_COLLECTION].count() > 0):
+        populate(database, args.documents)
+
+    run(database, args.repeat)
+
+if __name__ == "__main__":
+    main()
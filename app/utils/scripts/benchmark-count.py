@@ -0,0 +1,181 @@
+#!/usr/bin/python
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark the `find_and_count` counting modes.
+
+A synthetic boot collection is created in a scratch database, then a page of
+results is retrieved for a set of queries with each of the counting modes.
+
+    python utils/scripts/benchmark-count.py --documents 2000000
+
+The COUNT_FACET mode requires MongoDB 3.4 or later.
+"""
+
+import argparse
+import datetime
+import random
+import sys
+import time
+
+import bson.tz_util
+import pymongo
+
+import models
+import utils.db
+
+BOARDS = ["board-%d" % x for x in range(200)]
+DEFCONFIGS = ["defconfig-%d" % x for x in range(150)]
+LABS = ["lab-%d" % x for x in range(10)]
+STATUSES = ["PASS"] * 8 + ["FAIL", "OFFLINE"]
+
+QUERIES = [
+    ("no spec", {}),
+    ("status=FAIL", {models.STATUS_KEY: "FAIL"}),
+    ("board", {models.BOARD_KEY: "board-42"}),
+    ("lab+status", {models.LAB_NAME_KEY: "lab-3", models.STATUS_KEY: "PASS"})
+]
+
+
+def populate(collection, documents, chunk_size=10000):
+    """Fill the collection with synthetic boot documents.
+
+    :param collection: The collection to fill.
+    :param documents: How many documents to create.
+    :type documents: int
+    :param chunk_size: How many documents to insert at once.
+    :type chunk_size: int
+    """
+    now = datetime.datetime.now(tz=bson.tz_util.utc)
+    created = 0
+
+    while created < documents:
+        chunk = []
+        for idx in range(created, min(created + chunk_size, documents)):
+            chunk.append({
+                models.JOB_KEY: "job-%d" % (idx % 20),
+                models.KERNEL_KEY: "kernel-%d" % (idx / 5000),
+                models.BOARD_KEY: random.choice(BOARDS),
+                models.DEFCONFIG_KEY: random.choice(DEFCONFIGS),
+                models.LAB_NAME_KEY: random.choice(LABS),
+                models.STATUS_KEY: random.choice(STATUSES),
+                models.CREATED_KEY: now - datetime.timedelta(seconds=idx)
+            })
+        collection.insert(chunk, w=0)
+        created += len(chunk)
+        sys.stdout.write("\rInserted %d documents" % created)
+        sys.stdout.flush()
+
+    sys.stdout.write("\n")
+
+    for key in [
+            models.STATUS_KEY, models.BOARD_KEY, models.LAB_NAME_KEY]:
+        collection.ensure_index(
+            [(key, pymongo.ASCENDING), (models.CREATED_KEY, -1)])
+
+
+def run(collection, modes, repeat, limit):
+    """Time `find_and_count` for all the queries and counting modes.
+
+    :param collection: The collection to query.
+    :param modes: The counting modes to test.
+    :type modes: list
+    :param repeat: How many times each query is executed.
+    :type repeat: int
+    :param limit: The page size.
+    :type limit: int
+    """
+    sort = [(models.CREATED_KEY, pymongo.DESCENDING)]
+
+    sys.stdout.write("%-14s %-10s %10s %10s\n" % (
+        "query", "mode", "count", "avg ms"))
+
+    for name, spec in QUERIES:
+        for mode in modes:
+            utils.db.ESTIMATED_COUNT_CACHE.clear()
+            res_count = None
+            start = time.time()
+
+            for _ in range(repeat):
+                result, res_count = utils.db.find_and_count(
+                    collection, limit, 0,
+                    spec=spec, sort=sort, count_mode=mode)
+                # Consume the results as the handlers do.
+                [r for r in result]
+
+            elapsed = (time.time() - start) / repeat * 1000
+            sys.stdout.write("%-14s %-10s %10s %10.2f\n" % (
+                name, mode, res_count, elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the find_and_count counting modes",
+        version=0.1
+    )
+    parser.add_argument(
+        "--database", "-d",
+        type=str,
+        help="The scratch database where to create the collection",
+        default="kernel-ci-benchmark",
+        dest="database"
+    )
+    parser.add_argument(
+        "--documents", "-n",
+        type=int,
+        help="How many boot documents to create",
+        default=1000000,
+        dest="documents"
+    )
+    parser.add_argument(
+        "--repeat", "-r",
+        type=int,
+        help="How many times each query is executed",
+        default=10,
+        dest="repeat"
+    )
+    parser.add_argument(
+        "--limit", "-l",
+        type=int,
+        help="The page size",
+        default=50,
+        dest="limit"
+    )
+    parser.add_argument(
+        "--mode", "-m",
+        action="append",
+        choices=utils.db.COUNT_MODES,
+        help="The counting mode to test, can be repeated (default all)",
+        dest="modes"
+    )
+    parser.add_argument(
+        "--reuse",
+        action="store_true",
+        default=False,
+        help="Do not re-create the collection if it already exists",
+        dest="reuse"
+    )
+
+    args = parser.parse_args()
+
+    client = pymongo.MongoClient()
+    collection = client[args.database][models.BOOT_COLLECTION]
+
+    if not (args.reuse and collection.count() > 0):
+        collection.drop()
+        populate(collection, args.documents)
+
+    run(collection, args.modes or utils.db.COUNT_MODES, args.repeat, args.limit)
+
+if __name__ == "__main__":
+    main()
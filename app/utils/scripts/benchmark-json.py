@@ -0,0 +1,196 @@
+#!/usr/bin/python
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark the JSON serialization of documents with BSON types.
+
+Synthetic boot documents are serialized and deserialized with `utils.kjson`
+and with the previous `json` + `bson.json_util` functions, both as a whole
+list (as for a normal response or a Celery message) and one document at a
+time (as for a streamed response).
+
+    python utils/scripts/benchmark-json.py --documents 5000
+
+No database is needed.
+"""
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+import argparse
+import datetime
+import random
+import sys
+import time
+
+import bson
+import bson.json_util
+import bson.tz_util
+
+import models
+import utils.kjson
+
+BOARDS = ["board-%d" % x for x in range(200)]
+LABS = ["lab-%d" % x for x in range(10)]
+STATUSES = ["PASS"] * 8 + ["FAIL", "OFFLINE"]
+
+
+def create_documents(documents):
+    """Create synthetic boot documents.
+
+    The documents of the same job share the job and build IDs, as the real
+    ones do.
+
+    :param documents: How many documents to create.
+    :type documents: int
+    :return A list of documents.
+    """
+    now = datetime.datetime.now(tz=bson.tz_util.utc)
+    job_ids = [bson.objectid.ObjectId() for _ in range(20)]
+    build_ids = [bson.objectid.ObjectId() for _ in range(500)]
+
+    return [
+        {
+            models.ID_KEY: bson.objectid.ObjectId(),
+            models.JOB_ID_KEY: random.choice(job_ids),
+            models.DEFCONFIG_ID_KEY: random.choice(build_ids),
+            models.JOB_KEY: "job-%d" % (idx % 20),
+            models.KERNEL_KEY: "kernel-%d" % (idx / 500),
+            models.BOARD_KEY: random.choice(BOARDS),
+            models.LAB_NAME_KEY: random.choice(LABS),
+            models.STATUS_KEY: random.choice(STATUSES),
+            models.CREATED_KEY: now - datetime.timedelta(seconds=idx),
+            models.TIME_KEY: datetime.datetime(
+                1970, 1, 1, 0, 0, random.randint(1, 59),
+                tzinfo=bson.tz_util.utc),
+            models.WARNINGS_KEY: random.randint(0, 5),
+            models.METADATA_KEY: {"dtb": "board-%d.dtb" % idx}
+        }
+        for idx in range(documents)
+    ]
+
+
+def bson_dumps(obj):
+    """Serialize with `bson.json_util`, as done before `utils.kjson`."""
+    return json.dumps(
+        obj,
+        default=bson.json_util.default,
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+
+
+def bson_loads(value):
+    """Deserialize with `bson.json_util`, as done before `utils.kjson`."""
+    return json.loads(value, object_hook=bson.json_util.object_hook)
+
+
+def _clear_caches():
+    """Empty the `ObjectId` caches, so that each run starts cold."""
+    utils.kjson._OBJECT_ID_CACHE.clear()
+    utils.kjson._OBJECT_ID_DECODE_CACHE.clear()
+
+
+def _time(func, repeat):
+    """The best time of a function, in milliseconds.
+
+    :param func: The function to time, without arguments.
+    :type func: function
+    :param repeat: How many times the function is executed.
+    :type repeat: int
+    :return The minimum time in milliseconds.
+    """
+    best = None
+
+    for _ in range(repeat):
+        _clear_caches()
+        start = time.time()
+        func()
+        elapsed = (time.time() - start) * 1000
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best
+
+
+def run(documents, repeat):
+    """Time the serialization and deserialization of the documents.
+
+    :param documents: The documents to serialize.
+    :type documents: list
+    :param repeat: How many times each operation is executed.
+    :type repeat: int
+    """
+    serialized = bson_dumps(documents)
+
+    if utils.kjson.dumps(documents) != serialized:
+        sys.stderr.write("The serialized documents are different\n")
+        sys.exit(1)
+
+    operations = [
+        (
+            "dumps list",
+            lambda: bson_dumps(documents),
+            lambda: utils.kjson.dumps(documents)
+        ),
+        (
+            "dumps each",
+            lambda: [bson_dumps(d) for d in documents],
+            lambda: [utils.kjson.dumps(d) for d in documents]
+        ),
+        (
+            "loads list",
+            lambda: bson_loads(serialized),
+            lambda: utils.kjson.loads(serialized)
+        )
+    ]
+
+    sys.stdout.write("Backend: %s\n" % utils.kjson.BACKEND)
+    sys.stdout.write("%-12s %12s %12s %8s\n" % (
+        "operation", "bson ms", "kjson ms", "speedup"))
+
+    for name, bson_func, kjson_func in operations:
+        bson_ms = _time(bson_func, repeat)
+        kjson_ms = _time(kjson_func, repeat)
+        sys.stdout.write("%-12s %12.2f %12.2f %7.2fx\n" % (
+            name, bson_ms, kjson_ms, bson_ms / kjson_ms))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the JSON serialization of BSON documents",
+        version=0.1
+    )
+    parser.add_argument(
+        "--documents", "-n",
+        type=int,
+        help="How many boot documents to serialize",
+        default=5000,
+        dest="documents"
+    )
+    parser.add_argument(
+        "--repeat", "-r",
+        type=int,
+        help="How many times each operation is executed",
+        default=10,
+        dest="repeat"
+    )
+
+    args = parser.parse_args()
+
+    run(create_documents(args.documents), args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/python
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark the build log classifier.
+
+Each build log found in the provided paths is parsed with the previous
+line-by-line parser and with `utils.log_parser.classify_build_log`: the
+results are compared and the parsing throughput reported.
+
+    python utils/scripts/benchmark-log-parser.py /var/www/images/kernel-ci
+"""
+
+import argparse
+import io
+import os
+import re
+import sys
+import time
+
+import utils
+import utils.log_parser as lparser
+
+
+def _clean(line):
+    line = line.strip()
+    if line.startswith("../"):
+        line = line[3:]
+    return line
+
+
+def legacy_classify(log_file):
+    """The line-by-line parser, with one regular expression search per pattern.
+
+    :param log_file: The path of the log file.
+    :type log_file: str
+    :return A 3-tuple with the errors, warnings and mismatches lines.
+    """
+    error_lines = []
+    warning_lines = []
+    mismatch_lines = []
+
+    with io.open(log_file, encoding="utf-8", errors="replace") as read_file:
+        for line in read_file:
+            has_err = False
+            for err_pattrn in lparser.ERROR_PATTERNS:
+                if re.search(err_pattrn, line):
+                    has_err = True
+                    error_lines.append(_clean(line))
+                    break
+
+            if not has_err:
+                if re.search(lparser.WARNING_PATTERN, line):
+                    for warn_pattrn in lparser.EXCLUDE_PATTERNS:
+                        if re.search(warn_pattrn, line):
+                            break
+                    else:
+                        warning_lines.append(_clean(line))
+
+            if re.search(lparser.MISMATCH_PATTERN, line):
+                mismatch_lines.append(_clean(line))
+
+    return error_lines, warning_lines, mismatch_lines
+
+
+def classify(log_file):
+    """Parse the log file with the block based classifier.
+
+    :param log_file: The path of the log file.
+    :type log_file: str
+    :return A 3-tuple with the errors, warnings and mismatches lines.
+    """
+    lines = {
+        lparser.ERROR_LINE: [],
+        lparser.WARNING_LINE: [],
+        lparser.MISMATCH_LINE: []
+    }
+
+    with io.open(log_file, mode="rb") as read_file:
+        for kind, line in lparser.classify_build_log(read_file):
+            lines[kind].append(line)
+
+    return (
+        lines[lparser.ERROR_LINE],
+        lines[lparser.WARNING_LINE], lines[lparser.MISMATCH_LINE])
+
+
+def find_logs(paths, log_name):
+    """Find all the build logs in the provided paths.
+
+    :param paths: Files or directories to search.
+    :type paths: list
+    :param log_name: The name of the build log files.
+    :type log_name: str
+    :return A list of file paths.
+    """
+    logs = []
+    for path in paths:
+        if os.path.isfile(path):
+            logs.append(path)
+        else:
+            for dirname, _, files in os.walk(path):
+                if log_name in files:
+                    logs.append(os.path.join(dirname, log_name))
+    return logs
+
+
+def _time(func, log_file, repeat):
+    result = None
+    start = time.time()
+    for _ in range(repeat):
+        result = func(log_file)
+    return result, (time.time() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the build log classifier",
+        version=0.1
+    )
+    parser.add_argument(
+        "--log-name", "-l",
+        type=str,
+        help="The name of the build log files to search for",
+        default=utils.BUILD_LOG_FILE,
+        dest="log_name"
+    )
+    parser.add_argument(
+        "--repeat", "-r",
+        type=int,
+        help="How many times each log is parsed",
+        default=3,
+        dest="repeat"
+    )
+    parser.add_argument(
+        "paths",
+        metavar="PATH",
+        nargs="+",
+        help="Build log files or directories containing them"
+    )
+
+    args = parser.parse_args()
+
+    logs = find_logs(args.paths, args.log_name)
+    if not logs:
+        sys.stderr.write("No build logs found\n")
+        sys.exit(1)
+
+    total_size = 0
+    total_legacy = total_new = 0.0
+    mismatches = 0
+
+    for log_file in logs:
+        total_size += os.path.getsize(log_file)
+
+        legacy, legacy_time = _time(legacy_classify, log_file, args.repeat)
+        new, new_time = _time(classify, log_file, args.repeat)
+
+        total_legacy += legacy_time
+        total_new += new_time
+
+        if legacy != new:
+            mismatches += 1
+            sys.stderr.write("Different results for %s\n" % log_file)
+
+    size_mb = total_size / (1024.0 * 1024.0)
+    sys.stdout.write("%d logs, %.1f MiB\n" % (len(logs), size_mb))
+    for name, elapsed in [("line-by-line", total_legacy), ("block", total_new)]:
+        sys.stdout.write("%-14s %8.3f s %9.1f MiB/s\n" % (
+            name, elapsed, size_mb / elapsed if elapsed else 0.0))
+
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/python
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Measure how the backend throughput scales with the number of processes.
+
+For each requested number of processes, the backend is started with
+`--processes=N` on a dedicated port, `benchmark-api.py` is run against it,
+and the backend is stopped. A local mongod and a valid API token are needed.
+
+    python utils/scripts/benchmark-workers.py -t TOKEN -w 1 -w 2 -w 4 \\
+        -- -c 50 -n 5000 /job /boot?limit=100 /count
+"""
+
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+APP_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+
+
+def wait_for_port(port, timeout=30):
+    """Wait until something is listening on the port.
+
+    :param port: The port number.
+    :type port: int
+    :param timeout: How long to wait, in seconds.
+    :type timeout: int
+    :return True if the port is open, False otherwise.
+    """
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("localhost", port), 1).close()
+            return True
+        except socket.error:
+            time.sleep(0.2)
+    return False
+
+
+def run(processes, args):
+    """Start the backend and run the API benchmark against it.
+
+    :param processes: The number of backend processes.
+    :type processes: int
+    :param args: The command line arguments.
+    :return The exit code of the API benchmark.
+    """
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.join(APP_DIR, "server.py"),
+            "--port=%d" % args.port,
+            "--processes=%d" % processes,
+            "--debug=false",
+            "--autoreload=false",
+            "--logging=warning"
+        ],
+        cwd=APP_DIR
+    )
+
+    try:
+        if not wait_for_port(args.port):
+            sys.stderr.write("Backend not started\n")
+            return 1
+
+        # Give all the processes the time to start.
+        time.sleep(1)
+
+        sys.stdout.write("\n== %d process(es)\n" % processes)
+        sys.stdout.flush()
+
+        return subprocess.call(
+            [
+                sys.executable,
+                os.path.join(APP_DIR, "utils", "scripts", "benchmark-api.py"),
+                "-b", "http://localhost:%d" % args.port,
+                "-t", args.token
+            ] + args.benchmark_args,
+            cwd=APP_DIR
+        )
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure how the throughput scales with the processes",
+        version=0.1
+    )
+    parser.add_argument(
+        "--token", "-t",
+        type=str,
+        help="The API token to use",
+        required=True,
+        dest="token"
+    )
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        action="append",
+        help="The number of processes to test, can be repeated",
+        dest="workers"
+    )
+    parser.add_argument(
+        "--port", "-p",
+        type=int,
+        help="The port where to start the backend",
+        default=18888,
+        dest="port"
+    )
+    parser.add_argument(
+        "benchmark_args",
+        metavar="ARGS",
+        nargs=argparse.REMAINDER,
+        help="The arguments for benchmark-api.py (URLs and options)"
+    )
+
+    args = parser.parse_args()
+    if args.benchmark_args and args.benchmark_args[0] == "--":
+        args.benchmark_args = args.benchmark_args[1:]
+
+    status = 0
+    for processes in args.workers or [1, 2, 4]:
+        status = run(processes, args) or status
+
+    sys.exit(status)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/python
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Remove the blobs that are not referenced anymore from the blob store."""
+
+import argparse
+import sys
+
+import utils.upload
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Remove the unreferenced blobs from the blob store",
+        version=0.1
+    )
+    parser.add_argument(
+        "--blob-path", "-b",
+        type=str,
+        help="The path of the blob store",
+        required=True,
+        dest="blob_path"
+    )
+    parser.add_argument(
+        "--min-age", "-a",
+        type=int,
+        help="How old, in seconds, a blob must be to be removed",
+        default=utils.upload.BLOB_GC_MIN_AGE,
+        dest="min_age"
+    )
+    parser.add_argument(
+        "--dry-run", "-n",
+        action="store_true",
+        default=False,
+        help="Only report what would be removed",
+        dest="dry_run"
+    )
+
+    args = parser.parse_args()
+
+    removed, freed = utils.upload.collect_blobs(
+        args.blob_path, min_age=args.min_age, dry_run=args.dry_run)
+
+    sys.stdout.write(
+        "%s %d blobs, %d bytes\n" %
+        ("Would remove" if args.dry_run else "Removed", removed, freed))
+
+if __name__ == "__main__":
+    main()
@@ -22,6 +22,7 @@ import sys
 import utils
 import utils.db
 import utils.docimport as docimport
+import utils.summary
 
 
 def _is_dir(path):
@@ -44,7 +45,11 @@ def import_all(database, base_path=utils.BASE_PATH):
                     docs.extend(all_docs)
 
     if docs:
-        utils.db.save_all(database, docs, manipulate=True)
+        docimport.save_documents(database, docs)
+        # The documents of all the jobs are saved together: rebuild all the
+        # build summaries at once.
+        utils.summary.rebuild_all_summaries(
+            database, utils.summary.BUILD_SUMMARY)
     else:
         utils.LOG.error("No jobs found to be imported")
         sys.exit(1)
@@ -59,7 +64,7 @@ def import_with_job(job, database, base_path=utils.BASE_PATH):
                 job, kernel, database, base_path=base_path)
 
             if docs:
-                utils.db.save_all(database, docs, manipulate=True)
+                docimport.save_documents_and_summaries(database, docs)
             else:
                 utils.LOG.info("No jobs/defconfigs to save")
     else:
@@ -78,7 +83,7 @@ def import_with_job_and_kernel(
             job, kernel, database, base_path=base_path)
 
         if docs:
-            utils.db.save_all(database, docs, manipulate=True)
+            docimport.save_documents_and_summaries(database, docs)
         else:
             utils.LOG.info("No jobs/defconfigs to save")
     else:
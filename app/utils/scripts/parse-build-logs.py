@@ -19,6 +19,7 @@ except ImportError:
     import json
 
 import argparse
+import multiprocessing
 import os
 import sys
 
@@ -28,7 +29,7 @@ import utils.db
 import utils.log_parser
 
 
-def main(job, kernel=None):
+def main(job, kernel=None, processes=1):
     status = 0
 
     database = utils.db.get_db_connection({})
@@ -52,7 +53,7 @@ def main(job, kernel=None):
                 models.KERNEL_KEY: kernel
             }
             utils.log_parser.parse_build_log(
-                job_id, json_obj, {})
+                job_id, json_obj, {}, processes=processes)
         else:
             utils.LOG.error("Cannot find job ID for %s-%s", job, kernel)
             status = 1
@@ -112,7 +113,7 @@ def main(job, kernel=None):
                                 models.KERNEL_KEY: kernel
                             }
                             utils.log_parser.parse_build_log(
-                                job_id, json_obj, {})
+                                job_id, json_obj, {}, processes=processes)
                             visited_dir.add(kernel)
                         else:
                             status = 1
@@ -149,9 +150,18 @@ if __name__ == "__main__":
         dest="kernel",
         default=None,
     )
+    parser.add_argument(
+        "--processes", "-p",
+        type=int,
+        help=(
+            "How many processes should parse the build logs of a kernel "
+            "(default: number of CPUs)"),
+        dest="processes",
+        default=multiprocessing.cpu_count(),
+    )
 
     args = parser.parse_args()
     job = args.job
     kernel = args.kernel
 
-    sys.exit(main(job, kernel))
+    sys.exit(main(job, kernel, processes=args.processes))
@@ -0,0 +1,61 @@
+#!/usr/bin/python
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Rebuild the pre-computed job-kernel summaries from the saved documents.
+
+Use it to create the summaries of the documents saved before they were
+introduced, or to fix them after the documents have been changed directly
+in the database.
+"""
+
+import argparse
+import sys
+
+import utils.db
+import utils.summary
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rebuild the job-kernel summaries",
+        version=0.1
+    )
+    parser.add_argument(
+        "--type", "-t",
+        type=str,
+        action="append",
+        choices=utils.summary.SUMMARY_SOURCES.keys(),
+        help="The type of the summaries to rebuild, can be repeated "
+        "(default all)",
+        dest="types"
+    )
+    parser.add_argument(
+        "--job", "-j",
+        type=str,
+        help="Rebuild only the summaries of this job",
+        dest="job"
+    )
+
+    args = parser.parse_args()
+
+    database = utils.db.get_db_connection({})
+    for summary_type in args.types or utils.summary.SUMMARY_SOURCES.keys():
+        rebuilt = utils.summary.rebuild_all_summaries(
+            database, summary_type, job=args.job)
+        sys.stdout.write(
+            "Rebuilt %d %s summaries\n" % (rebuilt, summary_type))
+
+if __name__ == "__main__":
+    main()
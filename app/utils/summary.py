@@ -0,0 +1,556 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Pre-computed result summaries of each job-kernel.
+
+A summary holds, for a job-kernel and optionally a lab, the number of boot
+reports or builds by status and the unique values of some of their fields.
+The build summaries hold also the git data of the job-kernel.
+
+The summaries are updated incrementally every time boot reports or builds
+are saved. A summary that does not exist yet, or that has been invalidated
+because some of its documents have been deleted, is rebuilt from the saved
+documents.
+"""
+
+import bson.tz_util
+import datetime
+import pymongo.errors
+import types
+
+import models
+import utils
+import utils.db
+
+BOOT_SUMMARY = "boot"
+BUILD_SUMMARY = "build"
+
+TOTAL_KEY = "total"
+UNIQUE_KEY = "unique"
+
+# The collection the summaries are computed from.
+SUMMARY_SOURCES = {
+    BOOT_SUMMARY: models.BOOT_COLLECTION,
+    BUILD_SUMMARY: models.DEFCONFIG_COLLECTION
+}
+
+# The fields whose unique values are kept.
+UNIQUE_KEYS = {
+    BOOT_SUMMARY: [
+        models.ARCHITECTURE_KEY,
+        models.BOARD_KEY,
+        models.DEFCONFIG_FULL_KEY,
+        models.MACH_KEY
+    ],
+    BUILD_SUMMARY: [
+        models.ARCHITECTURE_KEY,
+        models.DEFCONFIG_FULL_KEY
+    ]
+}
+
+GIT_KEYS = [
+    models.GIT_BRANCH_KEY,
+    models.GIT_COMMIT_KEY,
+    models.GIT_URL_KEY
+]
+
+# The fields of the saved documents needed to build the summaries.
+SUMMARY_FIELDS = [
+    models.ARCHITECTURE_KEY,
+    models.BOARD_KEY,
+    models.DEFCONFIG_FULL_KEY,
+    models.GIT_BRANCH_KEY,
+    models.GIT_COMMIT_KEY,
+    models.GIT_URL_KEY,
+    models.JOB_KEY,
+    models.KERNEL_KEY,
+    models.LAB_NAME_KEY,
+    models.MACH_KEY,
+    models.STATUS_KEY
+]
+
+# The fields of a count spec that can be answered with a summary.
+COUNT_KEYS = {
+    BOOT_SUMMARY: [
+        models.JOB_KEY,
+        models.KERNEL_KEY, models.LAB_NAME_KEY, models.STATUS_KEY],
+    BUILD_SUMMARY: [models.JOB_KEY, models.KERNEL_KEY, models.STATUS_KEY]
+}
+
+# How many summaries are inserted at once when rebuilding all of them.
+REBUILD_CHUNK_SIZE = 1000
+
+
+def summary_spec(summary_type, job, kernel, lab_name=None):
+    """Create the spec that identifies a summary.
+
+    :param summary_type: The type of the summary.
+    :type summary_type: str
+    :param job: The job name.
+    :type job: str
+    :param kernel: The kernel name.
+    :type kernel: str
+    :param lab_name: The lab name, None for the summary of all the labs.
+    :type lab_name: str
+    :return The spec as a dictionary.
+    """
+    return {
+        models.TYPE_KEY: summary_type,
+        models.JOB_KEY: job,
+        models.KERNEL_KEY: kernel,
+        models.LAB_NAME_KEY: lab_name
+    }
+
+
+def _summary_keys(summary_type, doc_get):
+    """The keys of the summaries a document is counted in.
+
+    Boot reports are counted in the summary of their job-kernel, and in the
+    one of their lab.
+
+    :param summary_type: The type of the summary.
+    :type summary_type: str
+    :param doc_get: The `get` function of the document.
+    :type doc_get: function
+    :return A list of (job, kernel, lab_name) tuples.
+    """
+    job = doc_get(models.JOB_KEY)
+    kernel = doc_get(models.KERNEL_KEY)
+
+    keys = [(job, kernel, None)]
+    if summary_type == BOOT_SUMMARY:
+        lab_name = doc_get(models.LAB_NAME_KEY)
+        if lab_name:
+            keys.append((job, kernel, lab_name))
+
+    return keys
+
+
+def status_count(summary, statuses):
+    """Count the documents of a summary with the provided statuses.
+
+    :param summary: The summary document.
+    :type summary: dict
+    :param statuses: The statuses to count.
+    :type statuses: list
+    :return The number of documents.
+    """
+    counts = summary.get(models.STATUS_KEY) or {}
+    return sum([counts.get(status, 0) for status in statuses])
+
+
+def count_spec(collection, spec):
+    """Check if the documents matching a spec can be counted with a summary.
+
+    Only the specs on a single job-kernel, optionally with the lab name and
+    the statuses, can be counted with a summary.
+
+    :param collection: The name of the collection to count.
+    :type collection: str
+    :param spec: The spec of the documents to count.
+    :type spec: dict
+    :return None if a summary cannot be used, otherwise a tuple with the spec
+    of the summary and the list of statuses to count, None to count all the
+    documents.
+    """
+    summary_type = None
+    for s_type, source in SUMMARY_SOURCES.iteritems():
+        if source == collection:
+            summary_type = s_type
+            break
+
+    if summary_type is None:
+        return None
+
+    if not all([models.JOB_KEY in spec, models.KERNEL_KEY in spec]):
+        return None
+    if set(spec.keys()) - set(COUNT_KEYS[summary_type]):
+        return None
+
+    spec_get = spec.get
+    for key in [models.JOB_KEY, models.KERNEL_KEY, models.LAB_NAME_KEY]:
+        if not isinstance(spec_get(key, ""), types.StringTypes):
+            return None
+
+    statuses = spec_get(models.STATUS_KEY, None)
+    if isinstance(statuses, types.StringTypes):
+        statuses = [statuses]
+    elif isinstance(statuses, types.DictionaryType):
+        if statuses.keys() != ["$in"]:
+            return None
+        statuses = statuses["$in"]
+
+    return (
+        summary_spec(
+            summary_type,
+            spec_get(models.JOB_KEY),
+            spec_get(models.KERNEL_KEY), spec_get(models.LAB_NAME_KEY, None)),
+        statuses
+    )
+
+
+def summary_count(summary, statuses=None):
+    """Count the documents of a summary.
+
+    :param summary: The summary document.
+    :type summary: dict
+    :param statuses: The statuses to count, None to count all the documents.
+    :type statuses: list
+    :return The number of documents.
+    """
+    if statuses is None:
+        return summary.get(TOTAL_KEY, 0)
+    return status_count(summary, statuses)
+
+
+def get_summary(database, summary_type, job, kernel, lab_name=None):
+    """Retrieve a summary.
+
+    :param database: The database connection.
+    :param summary_type: The type of the summary.
+    :type summary_type: str
+    :param job: The job name.
+    :type job: str
+    :param kernel: The kernel name.
+    :type kernel: str
+    :param lab_name: The lab name, None for the summary of all the labs.
+    :type lab_name: str
+    :return The summary document or None.
+    """
+    return utils.db.find_one2(
+        database[models.SUMMARY_COLLECTION],
+        summary_spec(summary_type, job, kernel, lab_name))
+
+
+def summary_updates(summary_type, documents, prev_statuses=None):
+    """Create the incremental updates of the summaries.
+
+    :param summary_type: The type of the summaries.
+    :type summary_type: str
+    :param documents: The saved documents, as dictionaries.
+    :type documents: list
+    :param prev_statuses: The statuses of the documents before they were
+    saved, by document ID. The documents not included are new ones.
+    :type prev_statuses: dict
+    :return A dictionary: the (job, kernel, lab_name) keys of the summaries
+    and their update.
+    """
+    prev_statuses = prev_statuses or {}
+    unique_keys = UNIQUE_KEYS[summary_type]
+    deltas = {}
+
+    for document in documents:
+        doc_get = document.get
+        doc_id = doc_get(models.ID_KEY)
+        status = doc_get(models.STATUS_KEY)
+
+        for key in _summary_keys(summary_type, doc_get):
+            inc, unique, git_data = deltas.setdefault(key, ({}, {}, {}))
+
+            if doc_id in prev_statuses:
+                prev_status = prev_statuses[doc_id]
+                if prev_status != status:
+                    prev_key = "%s.%s" % (models.STATUS_KEY, prev_status)
+                    inc[prev_key] = inc.get(prev_key, 0) - 1
+                    status_key = "%s.%s" % (models.STATUS_KEY, status)
+                    inc[status_key] = inc.get(status_key, 0) + 1
+            else:
+                inc[TOTAL_KEY] = inc.get(TOTAL_KEY, 0) + 1
+                status_key = "%s.%s" % (models.STATUS_KEY, status)
+                inc[status_key] = inc.get(status_key, 0) + 1
+
+            for unique_key in unique_keys:
+                value = doc_get(unique_key)
+                if value is not None:
+                    unique.setdefault(unique_key, set()).add(value)
+
+            if summary_type == BUILD_SUMMARY:
+                git_data.update(
+                    (git_key, doc_get(git_key))
+                    for git_key in GIT_KEYS if doc_get(git_key) is not None
+                )
+
+    now = datetime.datetime.now(tz=bson.tz_util.utc)
+    updates = {}
+    for key, (inc, unique, git_data) in deltas.iteritems():
+        to_set = {models.UPDATED_KEY: now}
+        to_set.update(git_data)
+        update = {"$set": to_set}
+
+        inc = dict((k, v) for k, v in inc.iteritems() if v)
+        if inc:
+            update["$inc"] = inc
+
+        if unique:
+            add_to_set = {}
+            for unique_key, values in unique.iteritems():
+                values = sorted(values)
+                if len(values) == 1:
+                    values = values[0]
+                else:
+                    values = {"$each": values}
+                add_to_set["%s.%s" % (UNIQUE_KEY, unique_key)] = values
+            update["$addToSet"] = add_to_set
+
+        updates[key] = update
+
+    return updates
+
+
+def get_statuses(database, summary_type, doc_ids):
+    """Retrieve the status of the saved documents.
+
+    :param database: The database connection.
+    :param summary_type: The type of the summaries the documents are counted
+    in.
+    :type summary_type: str
+    :param doc_ids: The IDs of the documents.
+    :type doc_ids: list
+    :return A dictionary with the status of the documents found, by ID.
+    """
+    statuses = {}
+
+    if doc_ids:
+        for document in utils.db.find(
+                database[SUMMARY_SOURCES[summary_type]],
+                0,
+                0,
+                spec={models.ID_KEY: {"$in": doc_ids}},
+                fields=[models.ID_KEY, models.STATUS_KEY]):
+            statuses[document[models.ID_KEY]] = document.get(
+                models.STATUS_KEY)
+
+    return statuses
+
+
+def update_summaries(database, summary_type, documents, prev_statuses=None):
+    """Update the summaries with the saved documents.
+
+    The summaries that do not exist are rebuilt from the saved documents.
+
+    :param database: The database connection.
+    :param summary_type: The type of the summaries.
+    :type summary_type: str
+    :param documents: The saved documents, as dictionaries.
+    :type documents: list
+    :param prev_statuses: The statuses of the documents before they were
+    saved, by document ID. The documents not included are new ones.
+    :type prev_statuses: dict
+    """
+    collection = database[models.SUMMARY_COLLECTION]
+    updates = summary_updates(summary_type, documents, prev_statuses)
+
+    for (job, kernel, lab_name), update in updates.iteritems():
+        try:
+            result = collection.update(
+                summary_spec(summary_type, job, kernel, lab_name), update)
+        except pymongo.errors.OperationFailure, ex:
+            utils.LOG.error(
+                "Error updating %s summary of '%s-%s'",
+                summary_type, job, kernel)
+            utils.LOG.exception(ex)
+            continue
+
+        if not (result and result.get("updatedExisting", False)):
+            rebuild_summary(database, summary_type, job, kernel, lab_name)
+
+
+def _new_summary(summary_type, job, kernel, lab_name):
+    """Create an empty summary document.
+
+    :return A tuple: the summary document and the sets of unique values by
+    field.
+    """
+    summary = summary_spec(summary_type, job, kernel, lab_name)
+    summary[TOTAL_KEY] = 0
+    summary[models.STATUS_KEY] = {}
+
+    return summary, dict((key, set()) for key in UNIQUE_KEYS[summary_type])
+
+
+def _add_to_summary(summary, unique, doc_get):
+    """Count a document in a summary.
+
+    :param summary: The summary document.
+    :type summary: dict
+    :param unique: The sets of unique values by field.
+    :type unique: dict
+    :param doc_get: The `get` function of the document.
+    :type doc_get: function
+    """
+    status = doc_get(models.STATUS_KEY)
+    counts = summary[models.STATUS_KEY]
+
+    summary[TOTAL_KEY] += 1
+    counts[status] = counts.get(status, 0) + 1
+
+    for unique_key, values in unique.iteritems():
+        value = doc_get(unique_key)
+        if value is not None:
+            values.add(value)
+
+    if summary[models.TYPE_KEY] == BUILD_SUMMARY:
+        for git_key in GIT_KEYS:
+            if doc_get(git_key) is not None:
+                summary[git_key] = doc_get(git_key)
+
+
+def _finish_summary(summary, unique, now):
+    """Store the unique values in the summary document.
+
+    :return The summary document.
+    """
+    summary[UNIQUE_KEY] = dict(
+        (key, sorted(values)) for key, values in unique.iteritems())
+    summary[models.UPDATED_KEY] = now
+
+    return summary
+
+
+def rebuild_summary(database, summary_type, job, kernel, lab_name=None):
+    """Rebuild a summary from the saved documents.
+
+    :param database: The database connection.
+    :param summary_type: The type of the summary.
+    :type summary_type: str
+    :param job: The job name.
+    :type job: str
+    :param kernel: The kernel name.
+    :type kernel: str
+    :param lab_name: The lab name, None for the summary of all the labs.
+    :type lab_name: str
+    :return The summary document.
+    """
+    spec = {
+        models.JOB_KEY: job,
+        models.KERNEL_KEY: kernel
+    }
+    if lab_name is not None:
+        spec[models.LAB_NAME_KEY] = lab_name
+
+    summary, unique = _new_summary(summary_type, job, kernel, lab_name)
+    for document in utils.db.find(
+            database[SUMMARY_SOURCES[summary_type]],
+            0, 0, spec=spec, fields=SUMMARY_FIELDS):
+        _add_to_summary(summary, unique, document.get)
+
+    summary = _finish_summary(
+        summary, unique, datetime.datetime.now(tz=bson.tz_util.utc))
+
+    try:
+        database[models.SUMMARY_COLLECTION].update(
+            summary_spec(summary_type, job, kernel, lab_name),
+            summary, upsert=True)
+    except pymongo.errors.OperationFailure, ex:
+        # Most likely rebuilt at the same time by someone else.
+        utils.LOG.error(
+            "Error saving %s summary of '%s-%s'", summary_type, job, kernel)
+        utils.LOG.exception(ex)
+
+    return summary
+
+
+def rebuild_all_summaries(database, summary_type, job=None):
+    """Rebuild all the summaries of a type from the saved documents.
+
+    The saved documents are read once, all the summaries are then replaced.
+
+    :param database: The database connection.
+    :param summary_type: The type of the summaries.
+    :type summary_type: str
+    :param job: Rebuild only the summaries of this job.
+    :type job: str
+    :return The number of summaries rebuilt.
+    """
+    spec = {}
+    if job is not None:
+        spec[models.JOB_KEY] = job
+
+    summaries = {}
+    for document in utils.db.find(
+            database[SUMMARY_SOURCES[summary_type]],
+            0, 0, spec=spec, fields=SUMMARY_FIELDS):
+        doc_get = document.get
+        for key in _summary_keys(summary_type, doc_get):
+            if key not in summaries:
+                summaries[key] = _new_summary(summary_type, *key)
+            summary, unique = summaries[key]
+            _add_to_summary(summary, unique, doc_get)
+
+    now = datetime.datetime.now(tz=bson.tz_util.utc)
+    to_save = [
+        _finish_summary(summary, unique, now)
+        for summary, unique in summaries.itervalues()
+    ]
+
+    collection = database[models.SUMMARY_COLLECTION]
+    spec[models.TYPE_KEY] = summary_type
+    collection.remove(spec)
+
+    for idx in range(0, len(to_save), REBUILD_CHUNK_SIZE):
+        collection.insert(to_save[idx:idx + REBUILD_CHUNK_SIZE])
+
+    return len(to_save)
+
+
+def get_job_kernels(database, summary_type, spec_or_id):
+    """Get the job-kernel pairs of the documents that are going to be deleted.
+
+    Must be called before the documents are deleted, and the returned pairs
+    passed to `invalidate_summaries` after.
+
+    :param database: The database connection.
+    :param summary_type: The type of the summaries.
+    :type summary_type: str
+    :param spec_or_id: The spec or the ID of the documents.
+    :type spec_or_id: dict or str
+    :return A set of (job, kernel) tuples.
+    """
+    if not isinstance(spec_or_id, types.DictionaryType):
+        spec_or_id = {models.ID_KEY: spec_or_id}
+
+    job_kernels = set()
+    for document in utils.db.find(
+            database[SUMMARY_SOURCES[summary_type]],
+            0,
+            0,
+            spec=spec_or_id, fields=[models.JOB_KEY, models.KERNEL_KEY]):
+        job_kernels.add(
+            (document.get(models.JOB_KEY), document.get(models.KERNEL_KEY)))
+
+    return job_kernels
+
+
+def invalidate_summaries(database, summary_type, job_kernels):
+    """Remove the summaries of deleted documents.
+
+    Must be called after the documents have been deleted: a summary removed
+    before could be rebuilt, by a concurrent save, from documents that are
+    then deleted. The removed summaries are rebuilt the next time one of
+    their documents is saved.
+
+    :param database: The database connection.
+    :param summary_type: The type of the summaries.
+    :type summary_type: str
+    :param job_kernels: The (job, kernel) tuples of the summaries, as
+    returned by `get_job_kernels`.
+    :type job_kernels: set
+    """
+    collection = database[models.SUMMARY_COLLECTION]
+    for job, kernel in job_kernels:
+        collection.remove({
+            models.TYPE_KEY: summary_type,
+            models.JOB_KEY: job,
+            models.KERNEL_KEY: kernel
+        })
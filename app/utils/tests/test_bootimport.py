@@ -365,3 +365,99 @@ class TestParseBoot(unittest.TestCase):
             self.assertEqual(doc.dtb, "tmp/board.dtb")
         finally:
             os.remove(boot_log.name)
+
+    @patch("utils.bootimport.save_to_disk")
+    @patch("utils.db.bulk_save")
+    @patch("utils.db.get_db_connection")
+    def test_import_and_save_boots(self, mock_db, mock_bulk, mock_disk):
+        mock_db.return_value = self.db
+        mock_bulk.return_value = (201, ["id0", "id1"])
+
+        self.db["job"].insert({"_id": "job-id", "name": "job-kernel"})
+        self.db["defconfig"].insert(
+            {
+                "_id": "defconfig-id",
+                "name": "job-kernel-defconfig",
+                "git_branch": "branch"
+            }
+        )
+
+        other_board = dict(self.boot_report)
+        other_board["board"] = "other-board"
+
+        code, doc_ids = utils.bootimport.import_and_save_boots(
+            [self.boot_report, other_board], {}, base_path=self.base_path)
+
+        self.assertEqual(201, code)
+        self.assertListEqual(["id0", "id1"], doc_ids)
+        self.assertEqual(1, mock_bulk.call_count)
+        self.assertEqual(2, mock_disk.call_count)
+
+        saved = mock_bulk.call_args[0][1]
+        self.assertListEqual(
+            ["board", "other-board"], sorted([doc.board for doc in saved]))
+        for doc in saved:
+            self.assertEqual("job-id", doc.job_id)
+            self.assertEqual("defconfig-id", doc.defconfig_id)
+            self.assertEqual("branch", doc.git_branch)
+            self.assertIsNone(doc.id)
+
+    @patch("utils.bootimport.save_to_disk")
+    @patch("utils.db.bulk_save")
+    @patch("utils.db.get_db_connection")
+    def test_import_and_save_boots_update(
+            self, mock_db, mock_bulk, mock_disk):
+        mock_db.return_value = self.db
+        mock_bulk.return_value = (201, ["boot-id"])
+
+        created_on = datetime.datetime(2015, 1, 1)
+        self.db["boot"].insert(
+            {
+                "_id": "boot-id",
+                "name": "board-job-kernel-defconfig-arm",
+                "lab_name": "lab_name",
+                "created_on": created_on
+            }
+        )
+
+        # The same boot report twice: it is saved only once.
+        code, doc_ids = utils.bootimport.import_and_save_boots(
+            [self.boot_report, self.boot_report], {},
+            base_path=self.base_path)
+
+        self.assertEqual(201, code)
+        self.assertListEqual(["boot-id"], doc_ids)
+
+        saved = mock_bulk.call_args[0][1]
+        self.assertEqual(1, len(saved))
+        self.assertEqual("boot-id", saved[0].id)
+        self.assertEqual(created_on, saved[0].created_on)
+
+    @patch("utils.bootimport.save_to_disk")
+    @patch("utils.db.bulk_save")
+    @patch("utils.db.get_db_connection")
+    def test_import_and_save_boots_not_saved(
+            self, mock_db, mock_bulk, mock_disk):
+        mock_db.return_value = self.db
+        mock_bulk.return_value = (500, [None])
+
+        code, doc_ids = utils.bootimport.import_and_save_boots(
+            [self.boot_report, {"board": "null"}], {},
+            base_path=self.base_path)
+
+        self.assertEqual(500, code)
+        self.assertListEqual([None], doc_ids)
+        self.assertEqual(1, len(mock_bulk.call_args[0][1]))
+        self.assertFalse(mock_disk.called)
+
+    @patch("utils.db.bulk_save")
+    @patch("utils.db.get_db_connection")
+    def test_import_and_save_boots_no_doc(self, mock_db, mock_bulk):
+        mock_db.return_value = self.db
+
+        code, doc_ids = utils.bootimport.import_and_save_boots(
+            [{"board": "null"}], {})
+
+        self.assertIsNone(code)
+        self.assertListEqual([], doc_ids)
+        self.assertFalse(mock_bulk.called)
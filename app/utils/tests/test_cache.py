@@ -0,0 +1,108 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+import utils.cache
+
+
+class FakeTimer(object):
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def setUp(self):
+        self.timer = FakeTimer()
+        self.cache = utils.cache.LRUCache(
+            max_size=2, ttl=10, timer=self.timer)
+
+    def test_get_miss(self):
+        self.assertIsNone(self.cache.get("foo"))
+        self.assertEqual("bar", self.cache.get("foo", "bar"))
+        self.assertEqual(0, self.cache.hits)
+        self.assertEqual(2, self.cache.misses)
+
+    def test_get_hit(self):
+        self.cache.set("foo", {"token": "foo"})
+
+        self.assertDictEqual({"token": "foo"}, self.cache.get("foo"))
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(0, self.cache.misses)
+
+    def test_get_expired(self):
+        self.cache.set("foo", "bar")
+        self.timer.now = 11
+
+        self.assertIsNone(self.cache.get("foo"))
+        self.assertEqual(0, len(self.cache))
+        self.assertEqual(1, self.cache.misses)
+
+    def test_set_evicts_lru(self):
+        self.cache.set("foo", 1)
+        self.cache.set("bar", 2)
+        # Mark foo as recently used.
+        self.cache.get("foo")
+        self.cache.set("baz", 3)
+
+        self.assertEqual(2, len(self.cache))
+        self.assertEqual(1, self.cache.get("foo"))
+        self.assertIsNone(self.cache.get("bar"))
+        self.assertEqual(3, self.cache.get("baz"))
+        self.assertEqual(1, self.cache.evictions)
+
+    def test_invalidate(self):
+        self.cache.set("foo", 1)
+        self.cache.invalidate("foo")
+        self.cache.invalidate("bar")
+
+        self.assertIsNone(self.cache.get("foo"))
+
+    def test_invalidate_if(self):
+        self.cache.set(("boot", 1), 1)
+        self.cache.set(("job", 1), 2)
+        self.cache.invalidate_if(lambda key: key[0] == "boot")
+
+        self.assertIsNone(self.cache.get(("boot", 1)))
+        self.assertEqual(2, self.cache.get(("job", 1)))
+
+    def test_disabled(self):
+        self.cache.configure(max_size=0)
+        self.cache.set("foo", 1)
+
+        self.assertFalse(self.cache.enabled)
+        self.assertIsNone(self.cache.get("foo"))
+
+    def test_stats(self):
+        self.cache.set("foo", 1)
+        self.cache.get("foo")
+        self.cache.get("bar")
+
+        stats = self.cache.stats
+        self.assertEqual(1, stats["size"])
+        self.assertEqual(1, stats["hits"])
+        self.assertEqual(1, stats["misses"])
+        self.assertEqual(0.5, stats["hit_ratio"])
+
+    def test_clear(self):
+        self.cache.set("foo", 1)
+        self.cache.get("foo")
+        self.cache.clear()
+
+        self.assertEqual(0, len(self.cache))
+        self.assertEqual(0, self.cache.hits)
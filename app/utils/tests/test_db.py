@@ -0,0 +1,431 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import mock
+import mongomock
+import pymongo.errors
+import unittest
+
+import models.error_log as merrl
+import utils.db
+
+
+class TestFindAndCount(unittest.TestCase):
+
+    def setUp(self):
+        self.collection = mongomock.Connection()["kernel-ci"]["boot"]
+        for idx in range(10):
+            self.collection.insert(
+                {"board": "board-%d" % (idx % 2), "idx": idx})
+
+        utils.db.ESTIMATED_COUNT_CACHE.clear()
+        self.addCleanup(utils.db.ESTIMATED_COUNT_CACHE.clear)
+
+    def test_exact(self):
+        result, count = utils.db.find_and_count(
+            self.collection, 2, 0, spec={"board": "board-0"})
+
+        self.assertEqual(5, count)
+        self.assertEqual(2, len([r for r in result]))
+
+    def test_skip(self):
+        result, count = utils.db.find_and_count(
+            self.collection, 2, 0,
+            spec={"board": "board-0"}, count_mode=utils.db.COUNT_SKIP)
+
+        self.assertIsNone(count)
+        self.assertEqual(2, len([r for r in result]))
+
+    def test_estimated_no_spec(self):
+        _, count = utils.db.find_and_count(
+            self.collection, 2, 0, count_mode=utils.db.COUNT_ESTIMATED)
+        self.assertEqual(10, count)
+
+        # The cached value is used.
+        self.collection.insert({"board": "board-0", "idx": 10})
+        _, count = utils.db.find_and_count(
+            self.collection, 2, 0, count_mode=utils.db.COUNT_ESTIMATED)
+        self.assertEqual(10, count)
+        self.assertEqual(1, utils.db.ESTIMATED_COUNT_CACHE.hits)
+
+    def test_estimated_with_spec(self):
+        _, count = utils.db.find_and_count(
+            self.collection, 2, 0,
+            spec={"board": "board-1"}, count_mode=utils.db.COUNT_ESTIMATED)
+
+        self.assertEqual(5, count)
+        self.assertEqual(0, len(utils.db.ESTIMATED_COUNT_CACHE))
+
+    def test_count(self):
+        self.assertEqual(10, utils.db.count(self.collection))
+        self.assertEqual(
+            5, utils.db.count(self.collection, {"board": "board-1"}))
+
+    def test_facet(self):
+        collection = mock.MagicMock()
+        collection.aggregate.return_value = iter(
+            [{"result": [{"idx": 1}], "count": [{"count": 5}]}])
+
+        result, count = utils.db.find_and_count(
+            collection, 1, 2,
+            spec={"board": "board-1"},
+            fields=["idx"],
+            sort=[("idx", -1)], count_mode=utils.db.COUNT_FACET)
+
+        self.assertEqual([{"idx": 1}], result)
+        self.assertEqual(5, count)
+
+        pipeline = collection.aggregate.call_args[0][0]
+        self.assertDictEqual({"$match": {"board": "board-1"}}, pipeline[0])
+        self.assertDictEqual({"$sort": {"idx": -1}}, pipeline[1])
+        facet = pipeline[2]["$facet"]
+        self.assertEqual([{"$count": "count"}], facet["count"])
+        self.assertEqual(
+            [{"$skip": 2}, {"$limit": 1}, {"$project": {"idx": 1}}],
+            facet["result"]
+        )
+        self.assertTrue(collection.aggregate.call_args[1]["allowDiskUse"])
+        self.assertFalse(collection.find.called)
+
+    def test_facet_no_limit(self):
+        result, count = utils.db.find_and_count(
+            self.collection, 0, 0,
+            spec={"board": "board-1"}, count_mode=utils.db.COUNT_FACET)
+
+        self.assertEqual(5, count)
+        self.assertEqual(5, len([r for r in result]))
+
+    def test_facet_limit_too_big(self):
+        collection = mock.MagicMock()
+        collection.find.return_value.count.return_value = 5
+
+        _, count = utils.db.find_and_count(
+            collection, utils.db.FACET_MAX_LIMIT + 1, 0,
+            spec={"board": "board-1"}, count_mode=utils.db.COUNT_FACET)
+
+        self.assertEqual(5, count)
+        self.assertFalse(collection.aggregate.called)
+
+    def test_facet_no_results(self):
+        collection = mock.MagicMock()
+        collection.aggregate.return_value = iter(
+            [{"result": [], "count": []}])
+
+        result, count = utils.db.find_and_count(
+            collection, 10, 0,
+            spec={"board": "foo"}, count_mode=utils.db.COUNT_FACET)
+
+        self.assertEqual([], result)
+        self.assertEqual(0, count)
+
+    def test_fields_to_projection(self):
+        self.assertIsNone(utils.db._fields_to_projection(None))
+        self.assertDictEqual(
+            {"foo": 1}, utils.db._fields_to_projection("foo"))
+        self.assertDictEqual(
+            {"foo": 1, "bar": 0},
+            utils.db._fields_to_projection({"foo": True, "bar": False}))
+
+
+class TestFindPage(unittest.TestCase):
+
+    def setUp(self):
+        self.collection = mongomock.Connection()["kernel-ci"]["boot"]
+        for idx in range(10):
+            self.collection.insert(
+                {"_id": idx, "board": "board-%d" % (idx % 2), "idx": idx % 3})
+
+    def _all_pages(self, limit, **kwargs):
+        ids = []
+        after = None
+        while True:
+            result, _, after = utils.db.find_page(
+                self.collection, limit, after, **kwargs)
+            ids.extend([r["_id"] for r in result])
+            if after is None:
+                break
+        return ids
+
+    def test_keyset_sort(self):
+        self.assertEqual([("_id", -1)], utils.db.keyset_sort(None))
+        self.assertEqual(
+            [("idx", 1), ("_id", 1)], utils.db.keyset_sort([("idx", 1)]))
+        self.assertEqual(
+            [("_id", 1)], utils.db.keyset_sort([("_id", 1), ("idx", -1)]))
+
+    def test_page_token(self):
+        sort = [("idx", 1), ("_id", 1)]
+        token = utils.db.encode_page_token({"_id": 3, "idx": 0}, sort)
+
+        self.assertNotIn("=", token)
+        self.assertEqual([0, 3], utils.db.decode_page_token(token, sort))
+        self.assertRaises(
+            ValueError,
+            utils.db.decode_page_token, token, [("_id", 1)])
+        self.assertRaises(
+            ValueError, utils.db.decode_page_token, "foo", sort)
+
+    def test_keyset_spec(self):
+        spec = utils.db.keyset_spec(
+            {"board": "foo"}, [("idx", 1), ("_id", -1)], [2, 5])
+
+        self.assertDictEqual(
+            {
+                "$and": [
+                    {"board": "foo"},
+                    {
+                        "$or": [
+                            {"idx": {"$gt": 2}},
+                            {"idx": 2, "_id": {"$lt": 5}}
+                        ]
+                    }
+                ]
+            },
+            spec
+        )
+
+    def test_keyset_fields(self):
+        sort = [("idx", 1), ("_id", 1)]
+        self.assertIsNone(utils.db.keyset_fields(None, sort))
+        self.assertEqual(
+            ["board", "idx", "_id"], utils.db.keyset_fields(["board"], sort))
+        self.assertDictEqual(
+            {"board": True, "idx": True, "_id": True},
+            utils.db.keyset_fields({"board": True}, sort))
+        self.assertDictEqual(
+            {"board": False},
+            utils.db.keyset_fields({"board": False, "idx": False}, sort))
+
+    def test_first_page(self):
+        result, count, after = utils.db.find_page(
+            self.collection, 3, None, spec={"board": "board-0"})
+
+        self.assertEqual([8, 6, 4], [r["_id"] for r in result])
+        self.assertEqual(5, count)
+        self.assertIsNotNone(after)
+
+    def test_all_pages(self):
+        self.assertEqual(range(9, -1, -1), self._all_pages(3))
+        self.assertEqual(range(10), self._all_pages(4, sort=[("_id", 1)]))
+
+    def test_all_pages_duplicate_sort_values(self):
+        ids = self._all_pages(2, sort=[("idx", -1)])
+        expected = [
+            r["_id"] for r in
+            self.collection.find(sort=[("idx", -1), ("_id", -1)])]
+
+        self.assertEqual(expected, ids)
+
+    def test_keyset_spec_null_value(self):
+        sort = [("lab_name", 1), ("_id", 1)]
+        self.assertDictEqual(
+            {
+                "$or": [
+                    {"lab_name": {"$ne": None}},
+                    {"lab_name": None, "_id": {"$gt": 5}}
+                ]
+            },
+            utils.db.keyset_spec(None, sort, [None, 5])
+        )
+
+        sort = [("lab_name", -1), ("_id", -1)]
+        self.assertDictEqual(
+            {
+                "$or": [
+                    {"lab_name": {"$lt": "lab"}},
+                    {"lab_name": None},
+                    {"lab_name": "lab", "_id": {"$lt": 5}}
+                ]
+            },
+            utils.db.keyset_spec(None, sort, ["lab", 5])
+        )
+        self.assertDictEqual(
+            {"$or": [{"lab_name": None, "_id": {"$lt": 5}}]},
+            utils.db.keyset_spec(None, sort, [None, 5])
+        )
+
+    def test_all_pages_sparse_sort_field(self):
+        # mongomock does not match and sort missing fields as null, MongoDB
+        # does: only null values are used.
+        for idx in range(10, 16):
+            self.collection.insert(
+                {"_id": idx, "board": "board-2", "idx": None})
+
+        for order in [1, -1]:
+            ids = self._all_pages(2, sort=[("idx", order)])
+            expected = [
+                r["_id"] for r in
+                self.collection.find(sort=[("idx", order), ("_id", order)])]
+
+            self.assertEqual(16, len(ids))
+            self.assertEqual(expected, ids)
+
+    def test_skip_count(self):
+        _, count, _ = utils.db.find_page(
+            self.collection, 3, "", count_mode=utils.db.COUNT_SKIP)
+        self.assertIsNone(count)
+
+
+class TestSlowOperationLog(unittest.TestCase):
+
+    def setUp(self):
+        self.collection = mock.MagicMock()
+        self.collection.name = "boot"
+        self.collection.find.return_value.explain.return_value = {
+            "queryPlanner": {"winningPlan": {"stage": "IXSCAN"}}}
+
+        patched_log = mock.patch("utils.LOG")
+        self.log = patched_log.start()
+        self.addCleanup(patched_log.stop)
+        self.addCleanup(utils.db.set_slow_operation_threshold, None)
+
+    def test_disabled(self):
+        utils.db.set_slow_operation_threshold(0)
+        utils.db.find_one2(self.collection, {"board": "foo"})
+
+        self.assertIsNone(utils.db.SLOW_OPERATION_THRESHOLD)
+        self.assertFalse(self.collection.find.called)
+        self.assertFalse(self.log.warn.called)
+
+    def test_below_threshold(self):
+        utils.db.set_slow_operation_threshold(60000)
+        utils.db.find_one2(self.collection, {"board": "foo"})
+
+        self.assertEqual(60, utils.db.SLOW_OPERATION_THRESHOLD)
+        self.assertFalse(self.log.warn.called)
+
+    def test_slow_find_one2(self):
+        utils.db.SLOW_OPERATION_THRESHOLD = 0.0
+        utils.db.find_one2(self.collection, "doc-id", fields=["board"])
+
+        self.collection.find.assert_called_once_with(
+            spec={"_id": "doc-id"}, sort=None)
+        args = self.log.warn.call_args[0]
+        self.assertEqual("find_one2", args[1])
+        self.assertEqual("boot", args[2])
+        self.assertEqual('{"_id": "doc-id"}', args[4])
+        self.assertEqual('["board"]', args[6])
+        self.assertEqual('{"stage": "IXSCAN"}', args[7])
+
+    def test_slow_find_one(self):
+        utils.db.SLOW_OPERATION_THRESHOLD = 0.0
+        utils.db.find_one(self.collection, ["foo"], field="job")
+
+        self.collection.find.assert_called_once_with(
+            spec={"job": {"$in": ["foo"]}}, sort=None)
+
+    def test_slow_aggregate(self):
+        utils.db.SLOW_OPERATION_THRESHOLD = 0.0
+        self.collection.find.return_value.explain.return_value = {
+            "cursor": "BtreeCursor job_1"}
+        self.collection.aggregate.return_value = {"result": []}
+
+        utils.db.aggregate(
+            self.collection, "job",
+            match={"job": "foo"}, sort=[("created_on", -1)])
+
+        self.collection.find.assert_called_once_with(
+            spec={"job": "foo"}, sort=[("created_on", -1)])
+        self.assertEqual(
+            '"BtreeCursor job_1"', self.log.warn.call_args[0][7])
+
+    def test_explain_error(self):
+        utils.db.SLOW_OPERATION_THRESHOLD = 0.0
+        self.collection.find.return_value.explain.side_effect = \
+            pymongo.errors.OperationFailure("error")
+
+        utils.db.find_one2(self.collection, {"board": "foo"})
+
+        self.assertIn("not available", self.log.warn.call_args[0][7])
+
+
+class TestBulkSave(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+        self.database = mock.MagicMock()
+        self.bulk_op = \
+            self.database.__getitem__.return_value \
+            .initialize_unordered_bulk_op.return_value
+
+    def test_insert_and_replace(self):
+        new_doc = merrl.ErrorLogDocument("job_id", "1.0")
+        old_doc = merrl.ErrorLogDocument("job_id", "1.0")
+        old_doc.id = "old-id"
+
+        ret_val, doc_ids = utils.db.bulk_save(
+            self.database, [new_doc, old_doc])
+
+        self.assertEqual(201, ret_val)
+        self.assertEqual(2, len(doc_ids))
+        self.assertIsNotNone(doc_ids[0])
+        self.assertEqual("old-id", doc_ids[1])
+
+        # A single bulk operation for the collection.
+        self.database.__getitem__.assert_called_once_with("error_logs")
+        self.bulk_op.execute.assert_called_once_with()
+
+        inserted = self.bulk_op.insert.call_args[0][0]
+        self.assertEqual(doc_ids[0], inserted["_id"])
+        self.bulk_op.find.assert_called_once_with({"_id": "old-id"})
+
+    def test_execute_error(self):
+        self.bulk_op.execute.side_effect = pymongo.errors.BulkWriteError({})
+
+        ret_val, doc_ids = utils.db.bulk_save(
+            self.database, [merrl.ErrorLogDocument("job_id", "1.0")])
+
+        self.assertEqual(500, ret_val)
+
+    def test_wrong_document(self):
+        ret_val, doc_ids = utils.db.bulk_save(
+            self.database, [{"foo": "bar"}])
+
+        self.assertEqual(500, ret_val)
+        self.assertListEqual([None], doc_ids)
+
+    def test_write_errors(self):
+        docs = [
+            merrl.ErrorLogDocument("job_id", "1.0"),
+            merrl.ErrorLogDocument("job_id", "1.0"),
+            merrl.ErrorLogDocument("job_id", "1.0")
+        ]
+        self.bulk_op.execute.side_effect = pymongo.errors.BulkWriteError(
+            {"writeErrors": [{"index": 1, "errmsg": "error"}]})
+
+        ret_val, doc_ids = utils.db.bulk_save(self.database, docs)
+
+        self.assertEqual(500, ret_val)
+        self.assertIsNotNone(doc_ids[0])
+        self.assertIsNone(doc_ids[1])
+        self.assertIsNotNone(doc_ids[2])
+
+
+class TestCacheVersions(unittest.TestCase):
+
+    def setUp(self):
+        self.database = mongomock.Connection()["kernel-ci"]
+
+    def test_get_no_versions(self):
+        self.assertDictEqual({}, utils.db.get_cache_versions(self.database))
+
+    def test_bump_versions(self):
+        self.assertEqual(
+            200, utils.db.bump_cache_versions(self.database, ["job", "boot"]))
+        utils.db.bump_cache_versions(self.database, ["job"])
+
+        self.assertDictEqual(
+            {"job": 2, "boot": 1}, utils.db.get_cache_versions(self.database))
@@ -17,6 +17,7 @@ import logging
 import mock
 import mongomock
 import os
+import shutil
 import tempfile
 import types
 import unittest
@@ -251,3 +252,107 @@ class TestDocImport(unittest.TestCase):
         self.assertEqual(
             "defconfig+FRAGMENTS",
             utils._extrapolate_defconfig_full_from_dirname(dirname))
+
+    def _create_build_dir(self, kernel_dir, defconfig, arch="arm"):
+        build_dir = os.path.join(kernel_dir, "%s-%s" % (arch, defconfig))
+        os.makedirs(build_dir)
+        with open(os.path.join(build_dir, "build.json"), "w") as w_file:
+            w_file.write(json.dumps({
+                "arch": arch,
+                "defconfig": defconfig,
+                "defconfig_full": defconfig,
+                "git_commit": "1234",
+                "git_describe": "kernel"
+            }))
+
+    def test_import_job_no_writes(self):
+        base_path = tempfile.mkdtemp()
+        try:
+            kernel_dir = os.path.join(base_path, "job", "kernel")
+            self._create_build_dir(kernel_dir, "defconfig-0")
+            self._create_build_dir(kernel_dir, "defconfig-1")
+
+            created = datetime.datetime(2015, 1, 1, tzinfo=tz_util.utc)
+            self.db["defconfig"].insert({
+                "_id": "prev-id",
+                "name": "job-kernel-defconfig-1",
+                "job": "job",
+                "kernel": "kernel",
+                "defconfig": "defconfig-1",
+                "defconfig_full": "defconfig-1",
+                "arch": "arm",
+                "created_on": created
+            })
+
+            docs, job_id = docimport._import_job(
+                "job", "kernel", self.db, base_path=base_path)
+
+            self.assertIsNotNone(job_id)
+            self.assertEqual(3, len(docs))
+
+            job_doc = docs[0]
+            self.assertEqual(job_id, job_doc.id)
+            self.assertEqual("1234", job_doc.git_commit)
+
+            defconfigs = dict([(d.defconfig, d) for d in docs[1:]])
+            self.assertEqual(job_id, defconfigs["defconfig-0"].job_id)
+            self.assertIsNone(defconfigs["defconfig-0"].id)
+            self.assertEqual(
+                job_doc.created_on, defconfigs["defconfig-0"].created_on)
+            self.assertEqual("prev-id", defconfigs["defconfig-1"].id)
+            self.assertEqual(created, defconfigs["defconfig-1"].created_on)
+
+            # Nothing has been written yet.
+            self.assertEqual(0, self.db["job"].count())
+            self.assertEqual(1, self.db["defconfig"].count())
+        finally:
+            shutil.rmtree(base_path, ignore_errors=True)
+
+    @mock.patch("utils.docimport.save_documents")
+    @mock.patch("utils.db.get_db_connection")
+    def test_import_and_save_job(self, mock_db, mock_save):
+        mock_db.return_value = self.db
+        base_path = tempfile.mkdtemp()
+        try:
+            self._create_build_dir(
+                os.path.join(base_path, "job", "kernel"), "defconfig")
+
+            mock_save.return_value = (201, ["job-id", "defconfig-id"])
+            job_id = docimport.import_and_save_job(
+                {"job": "job", "kernel": "kernel"}, {}, base_path=base_path)
+
+            self.assertIsNotNone(job_id)
+            self.assertEqual(1, mock_save.call_count)
+            self.assertEqual(2, len(mock_save.call_args[0][1]))
+
+            mock_save.return_value = (500, [None, "defconfig-id"])
+            job_id = docimport.import_and_save_job(
+                {"job": "job", "kernel": "kernel"}, {}, base_path=base_path)
+
+            self.assertIsNone(job_id)
+        finally:
+            shutil.rmtree(base_path, ignore_errors=True)
+
+    @mock.patch("utils.summary.update_summaries")
+    @mock.patch("utils.docimport.save_documents")
+    def test_save_documents_and_summaries(self, mock_save, mock_update):
+        base_path = tempfile.mkdtemp()
+        try:
+            self._create_build_dir(
+                os.path.join(base_path, "job", "kernel"), "defconfig")
+            docs, _ = docimport._import_job(
+                "job", "kernel", self.db, base_path=base_path)
+
+            mock_save.return_value = (201, ["job-id", "defconfig-id"])
+            ret_val, doc_ids = docimport.save_documents_and_summaries(
+                self.db, docs)
+
+            self.assertEqual(201, ret_val)
+            self.assertListEqual(["job-id", "defconfig-id"], doc_ids)
+            self.assertEqual(1, mock_update.call_count)
+
+            saved_docs = mock_update.call_args[0][2]
+            self.assertEqual(1, len(saved_docs))
+            self.assertEqual("defconfig-id", saved_docs[0]["_id"])
+        finally:
+            shutil.rmtree(base_path, ignore_errors=True)
@@ -0,0 +1,103 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+
+from tornado import (
+    gen,
+    testing,
+    web,
+)
+
+import utils.httpserver
+
+
+@utils.httpserver.stream_request_body
+class StreamedHandler(web.RequestHandler):
+
+    @gen.coroutine
+    def prepare(self):
+        self.streamed = utils.httpserver.body_streamed(self.request)
+        self.chunks = []
+        if self.streamed:
+            yield utils.httpserver.read_body(self.request, self.chunks.append)
+
+    def put(self):
+        self.write({
+            "streamed": self.streamed,
+            "request_body": self.request.body,
+            "body": b"".join(self.chunks)
+        })
+
+
+@utils.httpserver.stream_request_body
+class RejectHandler(web.RequestHandler):
+
+    def prepare(self):
+        self.send_error(403)
+
+
+class BufferedHandler(web.RequestHandler):
+
+    def put(self):
+        self.write({
+            "streamed": utils.httpserver.body_streamed(self.request),
+            "body": self.request.body
+        })
+
+
+class TestHTTPServer(testing.AsyncHTTPTestCase, testing.LogTrapTestCase):
+
+    def get_app(self):
+        return web.Application([
+            (r"/streamed", StreamedHandler),
+            (r"/reject", RejectHandler),
+            (r"/buffered", BufferedHandler)
+        ])
+
+    def get_http_server(self):
+        return utils.httpserver.HTTPServer(
+            self._app, io_loop=self.io_loop, **self.get_httpserver_options())
+
+    def test_streamed_body(self):
+        body = "x" * (1024 * 1024)
+        response = self.fetch("/streamed", method="PUT", body=body)
+
+        self.assertEqual(200, response.code)
+        result = json.loads(response.body)
+        self.assertTrue(result["streamed"])
+        self.assertEqual("", result["request_body"])
+        self.assertEqual(body, result["body"])
+
+    def test_streamed_empty_body(self):
+        response = self.fetch("/streamed", method="PUT", body="")
+
+        self.assertEqual(200, response.code)
+        self.assertFalse(json.loads(response.body)["streamed"])
+
+    def test_buffered_body(self):
+        response = self.fetch("/buffered", method="PUT", body="foo")
+
+        self.assertEqual(200, response.code)
+        result = json.loads(response.body)
+        self.assertFalse(result["streamed"])
+        self.assertEqual("foo", result["body"])
+
+    def test_body_not_read(self):
+        response = self.fetch("/reject", method="PUT", body="foo")
+        self.assertEqual(403, response.code)
+
+        # The connection has been closed, the server is still working.
+        response = self.fetch("/buffered", method="PUT", body="bar")
+        self.assertEqual(200, response.code)
+        self.assertEqual("bar", json.loads(response.body)["body"])
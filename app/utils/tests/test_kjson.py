@@ -0,0 +1,122 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+import bson
+import bson.json_util
+import bson.tz_util
+import datetime
+import re
+import unittest
+
+import utils.kjson
+
+
+def _bson_dumps(obj):
+    return json.dumps(
+        obj,
+        default=bson.json_util.default,
+        ensure_ascii=False,
+        separators=(",", ":")
+    )
+
+
+def _bson_loads(value):
+    return json.loads(value, object_hook=bson.json_util.object_hook)
+
+
+class TestKJson(unittest.TestCase):
+
+    def setUp(self):
+        self.now = datetime.datetime(
+            2015, 8, 13, 10, 20, 30, 123000, tzinfo=bson.tz_util.utc)
+        self.document = {
+            "_id": bson.objectid.ObjectId(),
+            "job_id": bson.objectid.ObjectId(),
+            "created_on": self.now,
+            "board": u"board\xe9",
+            "retries": 0,
+            "boots": [
+                {"_id": bson.objectid.ObjectId(), "created_on": self.now}
+            ],
+            "metadata": {"foo": "bar"}
+        }
+
+    def test_dumps_same_format(self):
+        self.assertEqual(
+            _bson_dumps(self.document), utils.kjson.dumps(self.document))
+
+    def test_dumps_datetimes(self):
+        values = [
+            datetime.datetime(1960, 1, 1, 0, 0, 0, 999999),
+            datetime.datetime(
+                1960, 1, 1, 0, 0, 0, 999999, tzinfo=bson.tz_util.utc),
+            datetime.datetime(2015, 8, 13, 10, 20, 30, 999),
+            datetime.datetime(
+                2015, 8, 13, 1, 2, 3, 456789,
+                tzinfo=bson.tz_util.FixedOffset(120, "+2"))
+        ]
+
+        for value in values:
+            self.assertEqual(_bson_dumps(value), utils.kjson.dumps(value))
+
+    def test_dumps_other_bson_types(self):
+        document = {
+            "regex": re.compile("^foo", re.IGNORECASE),
+            "timestamp": bson.timestamp.Timestamp(10, 1),
+            "min": bson.min_key.MinKey()
+        }
+
+        self.assertEqual(_bson_dumps(document), utils.kjson.dumps(document))
+
+    def test_dumps_not_serializable(self):
+        self.assertRaises(TypeError, utils.kjson.dumps, {"foo": object()})
+
+    def test_dumps_object_id_cached(self):
+        obj_id = bson.objectid.ObjectId()
+
+        self.assertIs(
+            utils.kjson.default(obj_id), utils.kjson.default(obj_id))
+
+    def test_loads_round_trip(self):
+        value = utils.kjson.dumps(self.document)
+
+        self.assertEqual(self.document, utils.kjson.loads(value))
+        self.assertEqual(_bson_loads(value), utils.kjson.loads(value))
+
+    def test_loads_other_bson_types(self):
+        value = (
+            '{"a":{"$numberLong":"10"},'
+            '"b":{"$date":"2015-08-13T10:20:30.123+0200"},'
+            '"c":{"$regex":"^foo","$options":"i"},"d":{"$minKey":1}}'
+        )
+
+        self.assertEqual(
+            _bson_loads(value)["a"], utils.kjson.loads(value)["a"])
+        self.assertEqual(
+            _bson_loads(value)["b"], utils.kjson.loads(value)["b"])
+        self.assertEqual(
+            _bson_loads(value)["c"].pattern,
+            utils.kjson.loads(value)["c"].pattern)
+        self.assertIsInstance(
+            utils.kjson.loads(value)["d"], bson.min_key.MinKey)
+
+    def test_loads_plain_objects(self):
+        value = '{"a":{"b":1,"c":[{"d":"e"}]},"f":{"1":1,"2":2,"3":3,"4":4}}'
+
+        self.assertEqual(json.loads(value), utils.kjson.loads(value))
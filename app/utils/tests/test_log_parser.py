@@ -11,8 +11,15 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+import io
 import logging
 import mock
+import mongomock
 import os
 import shutil
 import tempfile
@@ -168,3 +175,310 @@ class TestBuildLogParser(unittest.TestCase):
             self.assertEqual(0, len(m_l))
         finally:
             shutil.rmtree(build_dir, ignore_errors=True)
+
+    def test_parse_build_log_writes_files(self):
+        build_dir = None
+        try:
+            build_dir = tempfile.mkdtemp()
+            log_file = os.path.join(build_dir, "build.log")
+            with io.open(log_file, mode="wb") as w_file:
+                w_file.write(
+                    "../drivers/foo.c:1: error: foo\n"
+                    "drivers/bar.c:2: warning: bar\n"
+                    "WARNING: Section mismatch in baz\n")
+
+            status, errors, e_l, w_l, m_l = lparser._parse_log(
+                "job", "kernel", "defconfig", log_file, build_dir)
+
+            self.assertEqual(200, status)
+            self.assertListEqual([], errors)
+
+            with io.open(
+                    os.path.join(build_dir, "build-errors.log")) as r_file:
+                self.assertEqual(u"drivers/foo.c:1: error: foo\n",
+                                 r_file.read())
+            with io.open(
+                    os.path.join(build_dir, "build-warnings.log")) as r_file:
+                self.assertEqual(
+                    u"drivers/bar.c:2: warning: bar\n"
+                    u"WARNING: Section mismatch in baz\n", r_file.read())
+            with io.open(
+                    os.path.join(
+                        build_dir, "build-mismatches.log")) as r_file:
+                self.assertEqual(
+                    u"WARNING: Section mismatch in baz\n", r_file.read())
+        finally:
+            shutil.rmtree(build_dir, ignore_errors=True)
+
+    def test_parse_build_log_no_lines_no_files(self):
+        build_dir = None
+        try:
+            build_dir = tempfile.mkdtemp()
+            log_file = os.path.join(build_dir, "build.log")
+            with io.open(log_file, mode="wb") as w_file:
+                w_file.write("  CC      drivers/foo.o\n")
+
+            status, errors, e_l, w_l, m_l = lparser._parse_log(
+                "job", "kernel", "defconfig", log_file, build_dir)
+
+            self.assertEqual(200, status)
+            self.assertListEqual(["build.log"], os.listdir(build_dir))
+        finally:
+            shutil.rmtree(build_dir, ignore_errors=True)
+
+
+class TestClassifyBuildLog(unittest.TestCase):
+
+    def _classify(self, data, block_size=lparser.LOG_BLOCK_SIZE):
+        return list(
+            lparser.classify_build_log(
+                io.BytesIO(data), block_size=block_size))
+
+    def test_classify_errors(self):
+        result = self._classify(
+            "foo.c:1: error: foo\n"
+            "foo.c:2: Error: foo\n"
+            "ERROR: \"foo\" undefined!\n"
+            "foo.c:3: ERROR: not an error\n"
+            "  ERROR not an error\n"
+            "error without colon\n")
+
+        self.assertListEqual(
+            [
+                (lparser.ERROR_LINE, u"foo.c:1: error: foo"),
+                (lparser.ERROR_LINE, u"foo.c:2: Error: foo"),
+                (lparser.ERROR_LINE, u"ERROR: \"foo\" undefined!")
+            ],
+            result
+        )
+
+    def test_classify_warnings_and_excluded(self):
+        result = self._classify(
+            "foo.c:1: warning: foo\n"
+            "foo.c:2: Warning foo\n"
+            "#warning TODO: return_address should use unwind tables\n"
+            "#warning NPTL on non MMU needs fixing\n"
+            "warning: Sparse checking disabled for this file\n"
+            "foo.c:3: error: with a warning\n")
+
+        self.assertListEqual(
+            [
+                (lparser.WARNING_LINE, u"foo.c:1: warning: foo"),
+                (lparser.WARNING_LINE, u"foo.c:2: Warning foo"),
+                (lparser.ERROR_LINE, u"foo.c:3: error: with a warning")
+            ],
+            result
+        )
+
+    def test_classify_mismatches(self):
+        result = self._classify(
+            "WARNING: ../vmlinux.o(.text+0x0): Section mismatch in foo\n"
+            "error: section mismatch\n"
+            "section MISMATCH only\n")
+
+        self.assertListEqual(
+            [
+                (lparser.WARNING_LINE,
+                    u"WARNING: ../vmlinux.o(.text+0x0): Section mismatch in foo"),
+                (lparser.MISMATCH_LINE,
+                    u"WARNING: ../vmlinux.o(.text+0x0): Section mismatch in foo"),
+                (lparser.ERROR_LINE, u"error: section mismatch"),
+                (lparser.MISMATCH_LINE, u"error: section mismatch"),
+                (lparser.MISMATCH_LINE, u"section MISMATCH only")
+            ],
+            result
+        )
+
+    def test_classify_clean_path(self):
+        result = self._classify("  ../foo.c:1: error: foo  \n")
+        self.assertListEqual([(lparser.ERROR_LINE, u"foo.c:1: error: foo")],
+                             result)
+
+    def test_classify_line_terminators(self):
+        result = self._classify(
+            "foo.c:1: error: foo\r\n"
+            "  CC foo.o\rERROR: bar\r"
+            "foo.c:2: warning: baz")
+
+        self.assertListEqual(
+            [
+                (lparser.ERROR_LINE, u"foo.c:1: error: foo"),
+                (lparser.ERROR_LINE, u"ERROR: bar"),
+                (lparser.WARNING_LINE, u"foo.c:2: warning: baz")
+            ],
+            result
+        )
+
+    def test_classify_invalid_encoding(self):
+        result = self._classify("foo.c:1: error: \xff\n")
+        self.assertListEqual(
+            [(lparser.ERROR_LINE, u"foo.c:1: error: \ufffd")], result)
+
+    def test_classify_block_size_does_not_change_result(self):
+        log_file = os.path.join(
+            os.path.abspath(os.path.dirname(__file__)),
+            "assets", "build_log_0.log")
+        with io.open(log_file, mode="rb") as read_file:
+            data = read_file.read()
+
+        expected = self._classify(data)
+        self.assertEqual(11, len(expected))
+
+        for block_size in [1, 7, 64, 1000]:
+            self.assertListEqual(
+                expected, self._classify(data, block_size=block_size))
+
+
+class TestTraverseDirAndParse(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+
+        self.base_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base_path, ignore_errors=True)
+
+        kernel_dir = os.path.join(self.base_path, "job", "kernel")
+        for idx in range(4):
+            build_dir = os.path.join(kernel_dir, "arm-defconfig-%d" % idx)
+            os.makedirs(build_dir)
+
+            with io.open(
+                    os.path.join(build_dir, "build.json"), mode="wb") as w_f:
+                w_f.write(json.dumps({
+                    "arch": "arm",
+                    "defconfig": "defconfig-%d" % idx,
+                    "defconfig_full": "defconfig-%d" % idx,
+                    "build_result": "PASS"
+                }))
+
+            with io.open(
+                    os.path.join(build_dir, "build.log"), mode="wb") as w_f:
+                w_f.write("foo.c:1: error: common\n")
+                if idx % 2:
+                    w_f.write("foo.c:%d: warning: odd\n" % idx)
+
+        # Hidden directories are skipped.
+        os.makedirs(os.path.join(kernel_dir, ".hidden"))
+
+        patcher = mock.patch("utils.log_parser.save_all_defconfig_errors")
+        self.mock_save_all = patcher.start()
+        self.mock_save_all.return_value = 201
+        self.addCleanup(patcher.stop)
+
+        patcher = mock.patch("utils.log_parser._save_summary")
+        self.mock_summary = patcher.start()
+        self.mock_summary.return_value = 201
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def _traverse(self, processes):
+        status, errors = lparser._traverse_dir_and_parse(
+            "job_id", "job", "kernel", self.base_path, "build.log",
+            processes=processes)
+
+        self.assertEqual(200, status)
+        self.assertDictEqual({}, errors)
+
+        parsed = self.mock_save_all.call_args[0][3]
+        summary = self.mock_summary.call_args[0][:3]
+
+        return parsed, summary
+
+    def test_traverse(self):
+        parsed, summary = self._traverse(1)
+
+        self.assertEqual(1, self.mock_save_all.call_count)
+        self.assertEqual(4, len(parsed))
+        self.assertListEqual(
+            ["defconfig-%d" % idx for idx in range(4)],
+            sorted([p["defconfig"] for p in parsed]))
+
+        errors, warnings, mismatches = summary
+        self.assertDictEqual({u"foo.c:1: error: common": 4}, errors)
+        self.assertDictEqual(
+            {u"foo.c:1: warning: odd": 1, u"foo.c:3: warning: odd": 1},
+            warnings)
+        self.assertDictEqual({}, mismatches)
+
+    def test_traverse_parallel(self):
+        parsed, summary = self._traverse(1)
+        parallel_parsed, parallel_summary = self._traverse(3)
+
+        self.assertListEqual(parsed, parallel_parsed)
+        self.assertEqual(summary, parallel_summary)
+
+
+class TestSaveAllDefconfigErrors(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+        self.database = mongomock.Connection()["kernel-ci"]
+
+        patcher = mock.patch("utils.db.get_db_connection")
+        patcher.start().return_value = self.database
+        self.addCleanup(patcher.stop)
+
+        patcher = mock.patch("utils.db.bulk_save")
+        self.mock_bulk = patcher.start()
+        self.mock_bulk.return_value = (201, [])
+        self.addCleanup(patcher.stop)
+
+    def _parsed(self, defconfig, status="PASS"):
+        return {
+            "arch": "arm",
+            "build_status": status,
+            "defconfig": defconfig,
+            "defconfig_full": defconfig,
+            "error_lines": ["error"],
+            "mismatch_lines": [],
+            "warning_lines": []
+        }
+
+    def test_save_all(self):
+        for idx in range(2):
+            self.database["defconfig"].insert({
+                "_id": "defconfig-id-%d" % idx,
+                "job_id": "job_id",
+                "job": "job",
+                "kernel": "kernel",
+                "arch": "arm",
+                "defconfig": "defconfig-%d" % idx,
+                "defconfig_full": "defconfig-%d" % idx
+            })
+        self.database["error_logs"].insert({
+            "_id": "error-log-id",
+            "job": "job",
+            "kernel": "kernel",
+            "arch": "arm",
+            "defconfig": "defconfig-1",
+            "defconfig_full": "defconfig-1",
+            "status": "PASS"
+        })
+
+        ret_val = lparser.save_all_defconfig_errors(
+            "job_id", "job", "kernel",
+            [
+                self._parsed("defconfig-0"),
+                self._parsed("defconfig-1"),
+                self._parsed("defconfig-2")
+            ],
+            {}
+        )
+
+        self.assertEqual(201, ret_val)
+        self.assertEqual(1, self.mock_bulk.call_count)
+
+        docs = self.mock_bulk.call_args[0][1]
+        self.assertEqual(3, len(docs))
+
+        self.assertEqual("defconfig-id-0", docs[0].defconfig_id)
+        self.assertIsNone(docs[0].id)
+        self.assertEqual("defconfig-id-1", docs[1].defconfig_id)
+        self.assertEqual("error-log-id", docs[1].id)
+        self.assertIsNone(docs[2].defconfig_id)
+        self.assertIsNone(docs[2].id)
+        self.assertListEqual(["error"], docs[2].errors)
@@ -0,0 +1,118 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import mock
+import tornado.concurrent
+import unittest
+
+import utils.metrics
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_observe(self):
+        histogram = utils.metrics.Histogram(buckets=[10, 100])
+        for value in [1, 5, 10, 50, 500]:
+            histogram.observe(value)
+
+        data = histogram.to_dict()
+        self.assertEqual(5, data["count"])
+        self.assertEqual(566, data["sum_ms"])
+        self.assertEqual(500, data["max_ms"])
+        self.assertDictEqual({"10": 3, "100": 1, "inf": 1}, data["buckets"])
+
+    def test_percentile(self):
+        histogram = utils.metrics.Histogram(buckets=[10, 100])
+        self.assertEqual(0.0, histogram.percentile(50))
+
+        for value in [1] * 90 + [50] * 9 + [500]:
+            histogram.observe(value)
+
+        self.assertEqual(10.0, histogram.percentile(50))
+        self.assertEqual(10.0, histogram.percentile(90))
+        self.assertEqual(100.0, histogram.percentile(99))
+        self.assertEqual(500.0, histogram.percentile(100))
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        utils.metrics.METRICS.clear()
+        self.addCleanup(utils.metrics.METRICS.clear)
+
+    def _histogram(self, group, name):
+        return utils.metrics.METRICS.to_dict()["metrics"][group][name]
+
+    def test_observe(self):
+        metrics = utils.metrics.Metrics(buckets=[10])
+        metrics.observe("group", "name", 0.005)
+        metrics.observe("group", "name", 0.02)
+
+        data = metrics.to_dict()
+        self.assertEqual(2, data["metrics"]["group"]["name"]["count"])
+        self.assertEqual(
+            {"10": 1, "inf": 1}, data["metrics"]["group"]["name"]["buckets"])
+
+        metrics.clear()
+        self.assertDictEqual({}, metrics.to_dict()["metrics"])
+
+    def test_executor_call(self):
+        result = utils.metrics.executor_call("op", 0, lambda: "foo")
+
+        self.assertEqual("foo", result)
+        self.assertEqual(
+            1, self._histogram(utils.metrics.EXECUTOR_QUEUE, "op")["count"])
+        self.assertEqual(
+            1, self._histogram(utils.metrics.EXECUTOR_RUN, "op")["count"])
+
+    def test_db_operation(self):
+        collection = mock.MagicMock()
+        collection.name = "boot"
+
+        @utils.metrics.db_operation("find")
+        def find(collection):
+            return "foo"
+
+        self.assertEqual("foo", find(collection))
+        self.assertEqual(
+            1, self._histogram(utils.metrics.DB_OPERATIONS, "find boot")[
+                "count"])
+
+    def test_db_operation_error(self):
+        @utils.metrics.db_operation("find")
+        def find(collection):
+            raise ValueError("error")
+
+        self.assertRaises(ValueError, find, None)
+        self.assertEqual(
+            1, self._histogram(utils.metrics.DB_OPERATIONS, "find unknown")[
+                "count"])
+
+    def test_db_operation_future(self):
+        future = tornado.concurrent.Future()
+
+        @utils.metrics.db_operation(
+            "save", collection_func=lambda database, document: "job")
+        def save(database, document):
+            return future
+
+        self.assertIs(future, save(None, None))
+        self.assertNotIn(
+            utils.metrics.DB_OPERATIONS,
+            utils.metrics.METRICS.to_dict()["metrics"])
+
+        future.set_result(None)
+        self.assertEqual(
+            1, self._histogram(utils.metrics.DB_OPERATIONS, "save job")[
+                "count"])
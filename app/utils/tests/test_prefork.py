@@ -0,0 +1,77 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import mock
+import os
+import signal
+import unittest
+
+import utils.prefork as prefork
+
+
+class TestPrefork(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    @mock.patch("tornado.process.cpu_count")
+    def test_num_processes(self, mock_cpu):
+        mock_cpu.return_value = 8
+
+        self.assertEqual(8, prefork.num_processes(0))
+        self.assertEqual(8, prefork.num_processes(-1))
+        self.assertEqual(8, prefork.num_processes(None))
+        self.assertEqual(3, prefork.num_processes(3))
+
+    def test_is_abnormal_exit(self):
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0)
+        _, status = os.waitpid(pid, 0)
+        self.assertFalse(prefork._is_abnormal_exit(status))
+
+        pid = os.fork()
+        if pid == 0:
+            os._exit(3)
+        _, status = os.waitpid(pid, 0)
+        self.assertTrue(prefork._is_abnormal_exit(status))
+
+    @mock.patch("signal.signal")
+    def test_shutdown_handler(self, mock_signal):
+        server = mock.MagicMock()
+        executor = mock.MagicMock()
+        io_loop = mock.MagicMock()
+
+        prefork.install_shutdown_handler(
+            server, executor=executor, timeout=7, io_loop=io_loop)
+
+        self.assertEqual(signal.SIGTERM, mock_signal.call_args[0][0])
+        handler = mock_signal.call_args[0][1]
+
+        # The signal handler only schedules the shutdown on the IOLoop.
+        handler(signal.SIGTERM, None)
+        self.assertFalse(server.stop.called)
+        shutdown = io_loop.add_callback_from_signal.call_args[0][0]
+
+        shutdown()
+        server.stop.assert_called_once_with()
+        self.assertFalse(io_loop.stop.called)
+
+        stop_loop = io_loop.add_timeout.call_args[0][1]
+        stop_loop()
+        io_loop.stop.assert_called_once_with()
+        executor.shutdown.assert_called_once_with(wait=True)
@@ -0,0 +1,219 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import logging
+import mock
+import mongomock
+import unittest
+
+import handlers.count as hcount
+import utils.report.common as rcommon
+import utils.summary
+
+
+class TestSummary(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.db = mongomock.Database(mongomock.Connection(), "kernel-ci")
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def _boot(self, boot_id, status, lab_name="lab", board="board"):
+        boot_doc = {
+            "_id": boot_id,
+            "arch": "arm",
+            "board": board,
+            "defconfig_full": "defconfig",
+            "job": "job",
+            "kernel": "kernel",
+            "lab_name": lab_name,
+            "mach": None,
+            "status": status
+        }
+        self.db["boot"].insert(boot_doc)
+        return boot_doc
+
+    def _summary(self, lab_name=None, summary_type="boot"):
+        return utils.summary.get_summary(
+            self.db, summary_type, "job", "kernel", lab_name)
+
+    def test_summary_updates_new(self):
+        updates = utils.summary.summary_updates(
+            "boot",
+            [
+                {"_id": 1, "job": "job", "kernel": "kernel",
+                 "lab_name": "lab", "status": "PASS", "board": "board-0"},
+                {"_id": 2, "job": "job", "kernel": "kernel",
+                 "lab_name": "lab", "status": "FAIL", "board": "board-1"}
+            ]
+        )
+
+        self.assertListEqual(
+            [("job", "kernel", None), ("job", "kernel", "lab")],
+            sorted(updates.keys()))
+
+        update = updates[("job", "kernel", None)]
+        self.assertDictEqual(
+            {"total": 2, "status.PASS": 1, "status.FAIL": 1}, update["$inc"])
+        self.assertDictEqual(
+            {"unique.board": {"$each": ["board-0", "board-1"]}},
+            update["$addToSet"])
+
+    def test_summary_updates_status_changed(self):
+        updates = utils.summary.summary_updates(
+            "build",
+            [
+                {"_id": 1, "job": "job", "kernel": "kernel",
+                 "status": "PASS", "arch": "arm", "git_commit": "1234"},
+                {"_id": 2, "job": "job", "kernel": "kernel",
+                 "status": "FAIL", "arch": "arm"}
+            ],
+            prev_statuses={1: "FAIL", 2: "FAIL"}
+        )
+
+        self.assertListEqual([("job", "kernel", None)], updates.keys())
+
+        update = updates[("job", "kernel", None)]
+        self.assertDictEqual({"status.PASS": 1, "status.FAIL": -1},
+                             update["$inc"])
+        self.assertDictEqual({"unique.arch": "arm"}, update["$addToSet"])
+        self.assertEqual("1234", update["$set"]["git_commit"])
+
+    def test_update_summaries_rebuilds_missing(self):
+        boot_doc = self._boot(1, "PASS")
+
+        utils.summary.update_summaries(self.db, "boot", [boot_doc])
+
+        summary = self._summary()
+        self.assertEqual(1, summary["total"])
+        self.assertDictEqual({"PASS": 1}, summary["status"])
+        self.assertListEqual(["board"], summary["unique"]["board"])
+        self.assertListEqual([], summary["unique"]["mach"])
+        self.assertEqual(1, self._summary(lab_name="lab")["total"])
+
+    def test_update_summaries_incremental(self):
+        utils.summary.update_summaries(
+            self.db, "boot", [self._boot(1, "PASS")])
+
+        self.db["boot"].update({"_id": 1}, {"$set": {"status": "FAIL"}})
+        boot_doc = self._boot(2, "OFFLINE", lab_name="other", board="other")
+
+        with mock.patch("utils.summary.rebuild_summary") as mock_rebuild:
+            utils.summary.update_summaries(
+                self.db,
+                "boot",
+                [{"_id": 1, "job": "job", "kernel": "kernel",
+                  "lab_name": "lab", "status": "FAIL"}, boot_doc],
+                prev_statuses={1: "PASS"})
+            # Only the summary of the new lab does not exist.
+            mock_rebuild.assert_called_once_with(
+                self.db, "boot", "job", "kernel", "other")
+
+        summary = self._summary()
+        self.assertEqual(2, summary["total"])
+        self.assertDictEqual(
+            {"PASS": 0, "FAIL": 1, "OFFLINE": 1}, summary["status"])
+
+    def test_rebuild_all_summaries(self):
+        self._boot(1, "PASS")
+        self._boot(2, "FAIL", lab_name="other")
+        self.db["summary"].insert(
+            {"type": "boot", "job": "job", "kernel": "kernel",
+             "lab_name": "gone", "total": 10})
+
+        self.assertEqual(
+            3, utils.summary.rebuild_all_summaries(self.db, "boot"))
+
+        self.assertIsNone(self._summary(lab_name="gone"))
+        self.assertEqual(2, self._summary()["total"])
+        self.assertDictEqual(
+            {"FAIL": 1}, self._summary(lab_name="other")["status"])
+
+    def test_invalidate_summaries(self):
+        self._boot(1, "PASS")
+        utils.summary.rebuild_all_summaries(self.db, "boot")
+
+        job_kernels = utils.summary.get_job_kernels(self.db, "boot", 1)
+        self.assertSetEqual(set([("job", "kernel")]), job_kernels)
+        # The summaries are kept until the documents have been deleted.
+        self.assertEqual(2, self.db["summary"].count())
+
+        utils.summary.invalidate_summaries(self.db, "boot", job_kernels)
+
+        self.assertEqual(0, self.db["summary"].count())
+
+    def test_count_spec(self):
+        self.assertTupleEqual(
+            (utils.summary.summary_spec("boot", "job", "kernel", "lab"),
+             ["PASS", "FAIL"]),
+            utils.summary.count_spec(
+                "boot",
+                {"job": "job", "kernel": "kernel", "lab_name": "lab",
+                 "status": {"$in": ["PASS", "FAIL"]}}))
+        self.assertTupleEqual(
+            (utils.summary.summary_spec("build", "job", "kernel"), None),
+            utils.summary.count_spec(
+                "defconfig", {"job": "job", "kernel": "kernel"}))
+
+        self.assertIsNone(
+            utils.summary.count_spec("boot", {"job": "job"}))
+        self.assertIsNone(
+            utils.summary.count_spec(
+                "boot", {"job": "job", "kernel": "kernel", "board": "b"}))
+        self.assertIsNone(
+            utils.summary.count_spec(
+                "boot",
+                {"job": {"$in": ["a", "b"]}, "kernel": "kernel"}))
+        self.assertIsNone(
+            utils.summary.count_spec(
+                "defconfig",
+                {"job": "job", "kernel": "kernel", "lab_name": "lab"}))
+        self.assertIsNone(
+            utils.summary.count_spec(
+                "job", {"job": "job", "kernel": "kernel"}))
+
+    def test_count_with_summary(self):
+        self._boot(1, "PASS")
+        self._boot(2, "FAIL")
+        utils.summary.rebuild_all_summaries(self.db, "boot")
+
+        query_args = {"job": ["job"], "kernel": ["kernel"], "status": ["FAIL"]}
+
+        with mock.patch("utils.db.count") as mock_count:
+            result = hcount.count_one_collection(
+                self.db["boot"],
+                "boot",
+                lambda key: query_args.get(key, []),
+                ["job", "kernel", "status"],
+                summaries=self.db["summary"])
+            self.assertFalse(mock_count.called)
+
+        self.assertListEqual([{"collection": "boot", "count": 1}], result)
+
+    def test_total_results_with_summary(self):
+        self._boot(1, "PASS")
+        utils.summary.rebuild_all_summaries(self.db, "boot")
+
+        with mock.patch("utils.db.get_db_connection") as mock_db:
+            mock_db.return_value = self.db
+            with mock.patch("utils.db.find_and_count") as mock_count:
+                total, unique = rcommon.get_total_results(
+                    "job", "kernel", "boot", {})
+                self.assertFalse(mock_count.called)
+
+        self.assertEqual(1, total)
+        self.assertListEqual(["arm"], unique["arch"])
+        self.assertListEqual(["board"], unique["board"])
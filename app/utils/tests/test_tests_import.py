@@ -529,11 +529,14 @@ class TestTestsImport(unittest.TestCase):
         self.assertEqual(2, len(errors[500]))
         self.assertListEqual(["id0", "id1"], ids)
 
+    @mock.patch("utils.db.bulk_save")
     @mock.patch("utils.db.save")
     @mock.patch("utils.db.get_db_connection")
-    def test_import_multi_test_sets_with_test_case(self, mock_db, mock_save):
+    def test_import_multi_test_sets_with_test_case(
+            self, mock_db, mock_save, mock_bulk):
         mock_db.return_value = self.db
         mock_save.side_effect = [(201, "test-set0-id")]
+        mock_bulk.return_value = (201, ["test-case0-id"])
 
         tests_list = [
             {
@@ -559,7 +562,7 @@ class TestTestsImport(unittest.TestCase):
 
     @mock.patch("utils.db.update")
     @mock.patch("utils.db.get_db_connection")
-    @mock.patch("utils.tests_import.import_multi_test_cases")
+    @mock.patch("utils.tests_import.import_multi_test_cases_bulk")
     def test_import_test_cases_from_test_set_ok(
             self, mock_import, mock_db, mock_update):
         mock_import.return_value = (["12345", "123456"], {})
@@ -574,7 +577,7 @@ class TestTestsImport(unittest.TestCase):
 
     @mock.patch("utils.db.update")
     @mock.patch("utils.db.get_db_connection")
-    @mock.patch("utils.tests_import.import_multi_test_cases")
+    @mock.patch("utils.tests_import.import_multi_test_cases_bulk")
     def test_import_test_cases_from_test_set_with_error(
             self, mock_import, mock_db, mock_update):
         mock_import.return_value = (["12345", "123456"], {})
@@ -586,3 +589,94 @@ class TestTestsImport(unittest.TestCase):
 
         self.assertEqual(500, ret_val)
         self.assertListEqual([500], errors.keys())
+
+    @mock.patch("utils.db.update")
+    @mock.patch("utils.db.get_db_connection")
+    @mock.patch("utils.tests_import.import_multi_test_cases_bulk")
+    def test_import_test_cases_from_test_set_chunk_size(
+            self, mock_import, mock_db, mock_update):
+        mock_import.return_value = (["12345"], {})
+        mock_db.return_value = self.db
+        mock_update.return_value = 200
+
+        tests_import.import_test_cases_from_test_set(
+            "set-id", "suite-id", [{"name": "test-case"}], {}, chunk_size=10)
+
+        self.assertEqual(10, mock_import.call_args[1]["chunk_size"])
+
+    @mock.patch("utils.db.bulk_save")
+    @mock.patch("utils.db.get_db_connection")
+    def test_import_multi_test_cases_bulk_simple(self, mock_db, mock_bulk):
+        mock_db.return_value = self.db
+        mock_bulk.return_value = (201, ["id0", "id1"])
+
+        case_list = [
+            {"name": "test-case0", "version": "1.0"},
+            {"name": "test-case1", "version": "1.0"}
+        ]
+
+        ids, errors = tests_import.import_multi_test_cases_bulk(
+            case_list, "test-suite-id", {}, test_set_id="test-set-id")
+
+        self.assertDictEqual({}, errors)
+        self.assertListEqual(["id0", "id1"], ids)
+        self.assertEqual(1, mock_bulk.call_count)
+
+        saved = mock_bulk.call_args[0][1]
+        self.assertEqual(2, len(saved))
+        self.assertEqual("test-set-id", saved[0].test_set_id)
+        self.assertEqual("test-suite-id", saved[1].test_suite_id)
+
+    @mock.patch("utils.db.bulk_save")
+    @mock.patch("utils.db.get_db_connection")
+    def test_import_multi_test_cases_bulk_chunks(self, mock_db, mock_bulk):
+        mock_db.return_value = self.db
+        mock_bulk.side_effect = [(201, ["id0", "id1"]), (201, ["id2"])]
+
+        case_list = [
+            {"name": "test-case0", "version": "1.0"},
+            {"name": "test-case1", "version": "1.0"},
+            {"name": "test-case2", "version": "1.0"}
+        ]
+
+        ids, errors = tests_import.import_multi_test_cases_bulk(
+            case_list, "test-suite-id", {}, chunk_size=2)
+
+        self.assertDictEqual({}, errors)
+        self.assertListEqual(["id0", "id1", "id2"], ids)
+        self.assertEqual(2, mock_bulk.call_count)
+
+    @mock.patch("utils.db.bulk_save")
+    @mock.patch("utils.db.get_db_connection")
+    def test_import_multi_test_cases_bulk_with_errors(
+            self, mock_db, mock_bulk):
+        mock_db.return_value = self.db
+        mock_bulk.return_value = (500, ["id0", None])
+
+        case_list = [
+            {"name": "test-case0", "version": "1.0"},
+            "not-a-test-case",
+            {"name": "test-case1"},
+            {"name": "test-case2", "version": "1.0"}
+        ]
+
+        ids, errors = tests_import.import_multi_test_cases_bulk(
+            case_list, "test-suite-id", {})
+
+        self.assertListEqual(["id0"], ids)
+        self.assertListEqual([400, 500], sorted(errors.keys()))
+        self.assertEqual(2, len(errors[400]))
+        self.assertListEqual(
+            ["Error saving test case 'test-case2'"], errors[500])
+
+    @mock.patch("utils.db.bulk_save")
+    @mock.patch("utils.db.get_db_connection")
+    def test_import_multi_test_cases_bulk_empty(self, mock_db, mock_bulk):
+        mock_db.return_value = self.db
+
+        ids, errors = tests_import.import_multi_test_cases_bulk(
+            [], "test-suite-id", {})
+
+        self.assertDictEqual({}, errors)
+        self.assertListEqual([], ids)
+        self.assertFalse(mock_bulk.called)
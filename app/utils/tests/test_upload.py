@@ -11,6 +11,8 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import errno
+import hashlib
 import io
 import logging
 import mock
@@ -227,3 +229,195 @@ class TestUpload(unittest.TestCase):
         self.assertEqual(ret_dict["status"], 200)
         self.assertEqual(ret_dict["filename"], filename)
         self.assertIsNone(ret_dict["error"])
+
+    def test_create_or_update_checksum(self):
+        content = ""
+        with io.open(self.upload_file, mode="rb") as f:
+            content = f.read()
+
+        ret_dict = upload.create_or_update_file(
+            "", "foo-file.txt", None, content, base_path=self.temp_dir)
+
+        self.assertEqual(ret_dict["bytes"], len(content))
+        self.assertEqual(
+            ret_dict["sha256"], hashlib.sha256(content).hexdigest())
+        self.assertListEqual(["foo-file.txt"], os.listdir(self.temp_dir))
+
+    def test_upload_file_chunks(self):
+        os.makedirs(os.path.join(self.temp_dir, "dest-path/"), mode=0775)
+        upload_file = upload.UploadFile(
+            "dest-path/", "foo-file.txt", base_path=self.temp_dir)
+        file_path = os.path.join(self.temp_dir, "dest-path", "foo-file.txt")
+
+        self.assertTrue(upload_file.open())
+        for chunk in ["foo", "bar", "baz"]:
+            self.assertTrue(upload_file.write(chunk))
+
+        # Nothing is visible at the destination before the upload completes.
+        self.assertFalse(os.path.exists(file_path))
+
+        ret_dict = upload_file.close()
+
+        self.assertEqual(ret_dict["status"], 201)
+        self.assertEqual(ret_dict["bytes"], 9)
+        self.assertEqual(
+            ret_dict["sha256"], hashlib.sha256("foobarbaz").hexdigest())
+        with io.open(file_path, mode="rb") as f:
+            self.assertEqual(f.read(), "foobarbaz")
+        self.assertListEqual(
+            ["foo-file.txt"],
+            os.listdir(os.path.join(self.temp_dir, "dest-path")))
+
+    def test_upload_file_replace(self):
+        file_path = os.path.join(self.temp_dir, "foo-file.txt")
+        with io.open(file_path, mode="wb") as f:
+            f.write("old")
+
+        upload_file = upload.UploadFile(
+            "", "foo-file.txt", base_path=self.temp_dir)
+        upload_file.open()
+        upload_file.write("new")
+
+        # The old content is readable until the upload completes.
+        with io.open(file_path, mode="rb") as f:
+            self.assertEqual(f.read(), "old")
+
+        ret_dict = upload_file.close()
+
+        self.assertEqual(ret_dict["status"], 200)
+        with io.open(file_path, mode="rb") as f:
+            self.assertEqual(f.read(), "new")
+
+    def test_upload_file_abort(self):
+        upload_file = upload.UploadFile(
+            "", "foo-file.txt", base_path=self.temp_dir)
+        upload_file.open()
+        upload_file.write("foo")
+        upload_file.abort()
+
+        self.assertListEqual([], os.listdir(self.temp_dir))
+
+    def test_upload_file_write_error(self):
+        upload_file = upload.UploadFile(
+            "", "foo-file.txt", base_path=self.temp_dir)
+        upload_file.open()
+        upload_file._stream = mock.MagicMock()
+        upload_file._stream.write.side_effect = IOError
+
+        self.assertFalse(upload_file.write("foo"))
+        self.assertFalse(upload_file.write("bar"))
+
+        ret_dict = upload_file.close()
+
+        self.assertEqual(ret_dict["status"], 500)
+        self.assertIsNotNone(ret_dict["error"])
+        self.assertIsNone(ret_dict["sha256"])
+        self.assertListEqual([], os.listdir(self.temp_dir))
+
+    def test_create_or_update_blob_store(self):
+        blob_path = os.path.join(self.temp_dir, ".blobs")
+        checksum = hashlib.sha256("foo").hexdigest()
+
+        ret_dict = upload.create_or_update_file(
+            "", "foo-file.txt", None, "foo",
+            base_path=self.temp_dir, blob_path=blob_path)
+
+        file_path = os.path.join(self.temp_dir, "foo-file.txt")
+        blob_file = upload.blob_file_path(blob_path, checksum)
+
+        self.assertEqual(ret_dict["status"], 201)
+        self.assertEqual(ret_dict["sha256"], checksum)
+        self.assertTrue(os.path.samefile(file_path, blob_file))
+
+    @mock.patch("utils.upload.UploadFile.write")
+    def test_create_or_update_blob_store_dedup(self, mock_write):
+        blob_path = os.path.join(self.temp_dir, ".blobs")
+        checksum = hashlib.sha256("foo").hexdigest()
+        blob_file = upload.blob_file_path(blob_path, checksum)
+
+        os.makedirs(os.path.dirname(blob_file))
+        with io.open(blob_file, mode="wb") as f:
+            f.write("foo")
+
+        ret_dict = upload.create_or_update_file(
+            "", "foo-file.txt", None, "foo",
+            base_path=self.temp_dir, blob_path=blob_path)
+
+        file_path = os.path.join(self.temp_dir, "foo-file.txt")
+
+        self.assertFalse(mock_write.called)
+        self.assertEqual(ret_dict["status"], 201)
+        self.assertEqual(ret_dict["bytes"], 3)
+        self.assertEqual(ret_dict["sha256"], checksum)
+        self.assertTrue(os.path.samefile(file_path, blob_file))
+        self.assertListEqual(
+            [".blobs", "foo-file.txt"], sorted(os.listdir(self.temp_dir)))
+
+    def test_upload_file_blob_store_existing_blob(self):
+        blob_path = os.path.join(self.temp_dir, ".blobs")
+
+        for filename in ["foo-file.txt", "bar-file.txt"]:
+            upload_file = upload.UploadFile(
+                "", filename, base_path=self.temp_dir, blob_path=blob_path)
+            upload_file.open()
+            upload_file.write("foo")
+            upload_file.close()
+
+        blob_file = upload.blob_file_path(
+            blob_path, hashlib.sha256("foo").hexdigest())
+
+        self.assertEqual(os.stat(blob_file).st_nlink, 3)
+        self.assertListEqual(
+            [".blobs", "bar-file.txt", "foo-file.txt"],
+            sorted(os.listdir(self.temp_dir)))
+
+    @mock.patch("os.link")
+    def test_upload_file_blob_store_link_error(self, mock_link):
+        mock_link.side_effect = OSError(errno.EXDEV, "Cross-device link")
+        blob_path = os.path.join(self.temp_dir, ".blobs")
+
+        ret_dict = upload.create_or_update_file(
+            "", "foo-file.txt", None, "foo",
+            base_path=self.temp_dir, blob_path=blob_path)
+
+        self.assertEqual(ret_dict["status"], 201)
+        with io.open(os.path.join(self.temp_dir, "foo-file.txt")) as f:
+            self.assertEqual(f.read(), "foo")
+
+    def test_unshare_file(self):
+        file_path = os.path.join(self.temp_dir, "foo-file.txt")
+        link_path = os.path.join(self.temp_dir, "bar-file.txt")
+
+        with io.open(file_path, mode="wb") as f:
+            f.write("foo")
+
+        upload.unshare_file(file_path)
+        self.assertTrue(os.path.isfile(file_path))
+
+        os.link(file_path, link_path)
+        upload.unshare_file(link_path)
+
+        self.assertFalse(os.path.exists(link_path))
+        self.assertEqual(os.stat(file_path).st_nlink, 1)
+
+        upload.unshare_file(link_path)
+
+    def test_collect_blobs(self):
+        blob_path = os.path.join(self.temp_dir, ".blobs")
+
+        for filename, content in [("foo.txt", "foo"), ("bar.txt", "bar")]:
+            upload.create_or_update_file(
+                "", filename, None, content,
+                base_path=self.temp_dir, blob_path=blob_path)
+        os.unlink(os.path.join(self.temp_dir, "bar.txt"))
+
+        self.assertTupleEqual((0, 0), upload.collect_blobs(blob_path))
+        self.assertTupleEqual(
+            (1, 3), upload.collect_blobs(blob_path, min_age=0, dry_run=True))
+        self.assertTupleEqual(
+            (1, 3), upload.collect_blobs(blob_path, min_age=0))
+
+        self.assertFalse(os.path.exists(upload.blob_file_path(
+            blob_path, hashlib.sha256("bar").hexdigest())))
+        self.assertTrue(os.path.exists(upload.blob_file_path(
+            blob_path, hashlib.sha256("foo").hexdigest())))
@@ -24,6 +24,9 @@ import models.test_set as mtset
 import utils
 import utils.db
 
+# How many test cases are saved with a single bulk write.
+BULK_CHUNK_SIZE = 1000
+
 
 def _add_error_message(errors_dict, error_code, error_msg):
     """Update an error data structure.
@@ -427,12 +430,12 @@ def import_test_cases_from_test_set(
     # Inject the test_set_id so that if we have test cases they will use it.
     kwargs[models.TEST_SET_ID_KEY] = test_set_id
 
-    case_ids, errors = import_multi_test_cases(
+    case_ids, errors = import_multi_test_cases_bulk(
         cases_list, suite_id, db_options, **kwargs)
 
     if case_ids:
         # Update the test set with the test case IDs.
-        database = utils.db.get_db_connection()
+        database = utils.db.get_db_connection(db_options)
         ret_val = utils.db.update(
             database[models.TEST_SET_COLLECTION],
             test_set_id,
@@ -444,7 +447,7 @@ def import_test_cases_from_test_set(
             _add_error_message(errors, ret_val, error_msg)
     else:
         ret_val = 500
-        error_msg = "No test cases imported for test set '%s'", test_set_id
+        error_msg = "No test cases imported for test set '%s'" % test_set_id
         utils.LOG.error(error_msg)
         _add_error_message(errors, ret_val, error_msg)
 
@@ -466,6 +469,7 @@ def import_multi_test_sets(set_list, suite_id, db_options, **kwargs):
     * board
     * board_instance
     * mail_options
+    * chunk_size (see `import_multi_test_cases_bulk`)
 
     :param set_list: The list with the test sets to import.
     :type set_list: list
@@ -509,9 +513,35 @@ def import_test_case(json_obj, suite_id, database, db_options, **kwargs):
     an error message in case of error or None.
     """
     ret_val = 400
-    error = None
     doc_id = None
 
+    test_case, error = _parse_test_case(json_obj, suite_id, **kwargs)
+    if test_case:
+        utils.LOG.info("Saving test case '%s'", test_case.name)
+        ret_val, doc_id = utils.db.save(database, test_case, manipulate=True)
+
+        if ret_val != 201:
+            error = "Error saving test case '%s'" % test_case.name
+            utils.LOG.error(error)
+
+    return ret_val, doc_id, error
+
+
+def _parse_test_case(json_obj, suite_id, **kwargs):
+    """Validate a test case and create its document.
+
+    The named arguments are the same of `import_test_case`.
+
+    :param json_obj: The JSON data structure of the test case.
+    :type json_obj: dict
+    :param suite_id: The ID of the test suite the test case belongs to.
+    :type suite_id: bson.objectid.ObjectId
+    :return The `TestCaseDocument` or None if it is not valid; an error
+    message in case of error or None.
+    """
+    test_case = None
+    error = None
+
     if isinstance(json_obj, types.DictionaryType):
         j_get = json_obj.get
         json_suite_id = j_get(models.TEST_SUITE_ID_KEY, None)
@@ -532,22 +562,14 @@ def import_test_case(json_obj, suite_id, database, db_options, **kwargs):
             test_case = mtcase.TestCaseDocument.from_json(json_obj)
 
             if test_case:
-                k_get = kwargs.get
-
                 test_case.created_on = datetime.datetime.now(
                     tz=bson.tz_util.utc)
-                test_case.test_set_id = k_get(models.TEST_SET_ID_KEY, None)
-
-                utils.LOG.info("Saving test case '%s'", test_name)
-                ret_val, doc_id = utils.db.save(
-                    database, test_case, manipulate=True)
-
-                if ret_val != 201:
-                    error = "Error saving test case '%s'" % test_name
-                    utils.LOG.error(error)
+                test_case.test_set_id = kwargs.get(
+                    models.TEST_SET_ID_KEY, None)
             else:
                 error = "Missing mandatory key in JSON object"
         except ValueError, ex:
+            test_case = None
             error = (
                 "Error parsing test case '%s': %s" % (test_name, ex.message))
             utils.LOG.exception(ex)
@@ -555,7 +577,7 @@ def import_test_case(json_obj, suite_id, database, db_options, **kwargs):
     else:
         error = "Test case is not a valid JSON object"
 
-    return ret_val, doc_id, error
+    return test_case, error
 
 
 def import_multi_test_cases(case_list, suite_id, db_options, **kwargs):
@@ -587,3 +609,56 @@ def import_multi_test_cases(case_list, suite_id, db_options, **kwargs):
     """
     return _import_multi_base(
         import_test_case, case_list, suite_id, db_options, **kwargs)
+
+
+def import_multi_test_cases_bulk(
+        case_list,
+        suite_id, db_options, chunk_size=BULK_CHUNK_SIZE, **kwargs):
+    """Import all the test cases provided with bulk writes.
+
+    All the test cases are validated first, then they are saved with
+    unordered bulk writes of `chunk_size` documents: a test case that cannot
+    be saved does not stop the others.
+
+    The additional named arguments are the same of `import_multi_test_cases`,
+    and so are the return values.
+
+    :param case_list: The list with the test cases to import.
+    :type case_list: list
+    :param suite_id: The ID of the test suite these test cases belong to.
+    :param suite_id: string
+    :param db_options: Options for connecting to the database.
+    :type db_options: dict
+    :param chunk_size: How many test cases to save with a single bulk write.
+    :type chunk_size: int
+    :return A list with the saved test case IDs or an empty list; a dictionary
+    with keys the error codes and value a list of error messages, or an empty
+    dictionary.
+    """
+    database = utils.db.get_db_connection(db_options)
+    err_results = {}
+    test_ids = []
+    test_cases = []
+
+    for json_obj in case_list:
+        test_case, error = _parse_test_case(json_obj, suite_id, **kwargs)
+        if test_case:
+            test_cases.append(test_case)
+        else:
+            _add_error_message(err_results, 400, error)
+
+    for start in range(0, len(test_cases), chunk_size):
+        chunk = test_cases[start:start + chunk_size]
+
+        utils.LOG.info("Saving %d test cases", len(chunk))
+        _, doc_ids = utils.db.bulk_save(database, chunk)
+
+        for test_case, doc_id in zip(chunk, doc_ids):
+            if doc_id:
+                test_ids.append(doc_id)
+            else:
+                _add_error_message(
+                    err_results,
+                    500, "Error saving test case '%s'" % test_case.name)
+
+    return test_ids, err_results
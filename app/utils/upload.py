@@ -11,14 +11,32 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-"""Utility functions to handle file uploads."""
+"""Utility functions to handle file uploads.
 
+Uploaded files can be deduplicated with a content-addressed blob store: each
+distinct content is kept once in the store, named after its SHA-256 checksum,
+and the files in the storage are hard links to it. The blob store must be on
+the same file system of the storage.
+
+Since the files might be shared, they must always be replaced and never
+modified in place: see `unshare_file`.
+"""
+
+import binascii
 import errno
+import hashlib
 import io
 import os
+import tempfile
+import time
 
 import utils
 
+# The permissions of the uploaded files.
+FILE_MODE = 0644
+# How old, in seconds, an unreferenced blob must be before it is removed.
+BLOB_GC_MIN_AGE = 60 * 60
+
 
 def is_valid_dir_path(path, base_path=utils.BASE_PATH):
     """Verify if the provided path is a valid directory.
@@ -95,11 +113,330 @@ def check_or_create_upload_dir(path, base_path=utils.BASE_PATH):
     return ret_val, error
 
 
+def blob_file_path(blob_path, checksum):
+    """Get the path of a blob in the store.
+
+    Blobs are stored in subdirectories named after the first two characters
+    of their checksum.
+
+    :param blob_path: The path of the blob store.
+    :type blob_path: str
+    :param checksum: The SHA-256 checksum of the blob.
+    :type checksum: str
+    :return The path of the blob.
+    """
+    return os.path.join(blob_path, checksum[:2], checksum)
+
+
+def link_file(src_path, dst_path):
+    """Atomically replace a file with a hard link to another one.
+
+    :param src_path: The file to link.
+    :type src_path: str
+    :param dst_path: The file to create or replace.
+    :type dst_path: str
+    :return True if the link has been created, False otherwise (the files
+    are on different file systems, the source has too many links...).
+    """
+    linked = False
+    temp_path = os.path.join(
+        os.path.dirname(dst_path),
+        ".%s.%s.tmp" % (
+            os.path.basename(dst_path), binascii.hexlify(os.urandom(8))))
+
+    try:
+        os.link(src_path, temp_path)
+        try:
+            os.rename(temp_path, dst_path)
+            linked = True
+        except OSError, ex:
+            utils.LOG.exception(ex)
+            os.unlink(temp_path)
+    except OSError, ex:
+        utils.LOG.warn(
+            "Unable to link '%s' to '%s': %s", src_path, dst_path, ex)
+
+    return linked
+
+
+def unshare_file(path):
+    """Remove a file if it is a hard link shared with other files.
+
+    It must be called before opening an existing file for writing, otherwise
+    all the files linked to the same blob are modified.
+
+    :param path: The path of the file.
+    :type path: str
+    """
+    try:
+        if os.stat(path).st_nlink > 1:
+            os.unlink(path)
+    except OSError, ex:
+        if ex.errno != errno.ENOENT:
+            raise
+
+
+def collect_blobs(blob_path, min_age=BLOB_GC_MIN_AGE, dry_run=False):
+    """Remove the blobs that are not referenced anymore.
+
+    A blob is not referenced when the only link to it is the one in the
+    store. Recent blobs are kept since they might belong to uploads that are
+    still in progress.
+
+    :param blob_path: The path of the blob store.
+    :type blob_path: str
+    :param min_age: How old, in seconds, a blob must be to be removed.
+    :type min_age: int
+    :param dry_run: If True, do not remove anything.
+    :type dry_run: bool
+    :return A tuple: the number of removed blobs and their size in bytes.
+    """
+    removed = 0
+    freed = 0
+    max_ctime = time.time() - min_age
+
+    for dir_path, _, files in os.walk(blob_path):
+        for name in files:
+            file_path = os.path.join(dir_path, name)
+            try:
+                stat = os.lstat(file_path)
+                if all([stat.st_nlink == 1, stat.st_ctime < max_ctime]):
+                    if not dry_run:
+                        os.unlink(file_path)
+                    utils.LOG.debug("Removed blob '%s'", name)
+                    removed += 1
+                    freed += stat.st_size
+            except OSError, ex:
+                utils.LOG.exception(ex)
+                utils.LOG.error("Unable to remove blob '%s'", file_path)
+
+    return removed, freed
+
+
+class UploadFile(object):
+    """A file being uploaded.
+
+    The content is written in chunks to a temporary file in the destination
+    directory while its SHA-256 checksum is calculated: when the request body
+    is streamed, see `utils.httpserver`, each chunk is written as it arrives.
+    When the upload is complete, the temporary file is atomically renamed into
+    place: readers never see a partially written file.
+
+    If a blob store is used, the file is added to it. If the same content is
+    already there, the file is linked to the existing blob instead.
+
+    The result of the upload is available in the `result` dictionary: it
+    contains the status code of the operation, an error string if it
+    occurred, the bytes written, the file name and its checksum.
+    """
+
+    def __init__(
+            self, path, filename, base_path=utils.BASE_PATH, blob_path=None):
+        """
+        :param path: The path where the file should be saved.
+        :type path: str
+        :param filename: The name of the file to save.
+        :type filename: str
+        :param base_path: The base path of the storage.
+        :type base_path: str
+        :param blob_path: The path of the blob store, None to not use it.
+        :type blob_path: str
+        """
+        self.path = path
+        self.filename = filename
+        self.base_path = base_path
+        self.blob_path = blob_path
+        self.file_path = os.path.join(path, filename)
+        self.real_path = os.path.join(base_path, self.file_path)
+
+        self.result = {
+            "status": 201,
+            "error": None,
+            "bytes": 0,
+            "filename": filename,
+            "sha256": None
+        }
+
+        self._checksum = hashlib.sha256()
+        self._stream = None
+        self._temp_path = None
+
+    @property
+    def failed(self):
+        """If an error occurred during the upload."""
+        return self.result["status"] == 500
+
+    def _set_error(self, error):
+        self.result["status"] = 500
+        self.result["error"] = error
+        self.abort()
+
+    def open(self):
+        """Create the destination directory and the temporary file.
+
+        :return True if the file can be written, False otherwise.
+        """
+        # Check if the file to upload is in a subdirectory of the provided
+        # path.
+        file_dir = os.path.dirname(self.file_path)
+        if self.path and all([self.path[-1] == "/", file_dir[-1] != "/"]):
+            file_dir += "/"
+
+        ret_val = 200
+        if file_dir != self.path:
+            ret_val, _ = check_or_create_upload_dir(
+                file_dir, base_path=self.base_path)
+
+        if ret_val == 200:
+            if os.path.exists(self.real_path):
+                # 201 means created anew, 200 means just OK, as in HTTP.
+                self.result["status"] = 200
+
+            utils.LOG.info("Writing file '%s'", self.real_path)
+
+            fd = None
+            try:
+                fd, self._temp_path = tempfile.mkstemp(
+                    prefix=".%s." % os.path.basename(self.real_path),
+                    suffix=".tmp", dir=os.path.dirname(self.real_path))
+                os.fchmod(fd, FILE_MODE)
+                self._stream = io.open(fd, mode="wb")
+            except (IOError, OSError), ex:
+                utils.LOG.exception(ex)
+                utils.LOG.error("Unable to open file '%s'", self.file_path)
+                if fd is not None and self._stream is None:
+                    os.close(fd)
+                self._set_error("Error writing file '%s'" % self.filename)
+        else:
+            self._set_error("Error creating upload dir '%s'" % file_dir)
+
+        return not self.failed
+
+    def write(self, chunk):
+        """Write a chunk of the file content.
+
+        :param chunk: The content to write.
+        :type chunk: str
+        :return True if the chunk has been written, False otherwise.
+        """
+        if self._stream is not None:
+            try:
+                self._stream.write(chunk)
+                self._checksum.update(chunk)
+                self.result["bytes"] += len(chunk)
+            except IOError, ex:
+                utils.LOG.exception(ex)
+                utils.LOG.error(
+                    "Unable to write file '%s'", self.file_path)
+                self._set_error("Error writing file '%s'" % self.filename)
+
+        return not self.failed
+
+    def link_blob(self, checksum):
+        """Complete the upload with a blob already in the store.
+
+        If the content of the file is known in advance, and it is already in
+        the store, it does not need to be written.
+
+        :param checksum: The SHA-256 checksum of the file content.
+        :type checksum: str
+        :return True if the blob has been linked into place, False otherwise.
+        """
+        linked = False
+
+        if all([self.blob_path, self._stream is not None]):
+            blob_file = blob_file_path(self.blob_path, checksum)
+            if os.path.isfile(blob_file):
+                if link_file(blob_file, self.real_path):
+                    utils.LOG.info(
+                        "File '%s' linked to blob '%s'",
+                        self.real_path, checksum)
+                    self.abort()
+                    self.result["bytes"] = os.path.getsize(self.real_path)
+                    self.result["sha256"] = checksum
+                    linked = True
+
+        return linked
+
+    def _store_blob(self, checksum):
+        """Add the written file to the blob store.
+
+        If the blob already exists, the written file is discarded and the
+        blob is linked into place.
+
+        :param checksum: The SHA-256 checksum of the file content.
+        :type checksum: str
+        """
+        blob_file = blob_file_path(self.blob_path, checksum)
+
+        ret_val, _ = check_or_create_upload_dir(
+            os.path.dirname(blob_file), base_path="")
+        if ret_val == 200:
+            try:
+                os.link(self._temp_path, blob_file)
+            except OSError, ex:
+                if ex.errno == errno.EEXIST:
+                    if link_file(blob_file, self.real_path):
+                        os.unlink(self._temp_path)
+                        self._temp_path = None
+                else:
+                    utils.LOG.warn(
+                        "Unable to add '%s' to the blob store: %s",
+                        self.real_path, ex)
+
+    def close(self):
+        """Complete the upload and move the file into place.
+
+        :return The `result` dictionary.
+        """
+        if self._stream is not None:
+            try:
+                self._stream.close()
+                self._stream = None
+                checksum = self._checksum.hexdigest()
+
+                if self.blob_path:
+                    self._store_blob(checksum)
+                if self._temp_path is not None:
+                    os.rename(self._temp_path, self.real_path)
+                    self._temp_path = None
+
+                self.result["sha256"] = checksum
+            except (IOError, OSError), ex:
+                utils.LOG.exception(ex)
+                utils.LOG.error(
+                    "Unable to save file '%s'", self.file_path)
+                self._set_error("Error writing file '%s'" % self.filename)
+
+        return self.result
+
+    def abort(self):
+        """Stop the upload and remove the temporary file."""
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except IOError:
+                pass
+            self._stream = None
+
+        if self._temp_path is not None:
+            try:
+                os.unlink(self._temp_path)
+            except OSError, ex:
+                if ex.errno != errno.ENOENT:
+                    utils.LOG.exception(ex)
+            self._temp_path = None
+
+
 def create_or_update_file(path,
                           filename,
-                          content_type, content, base_path=utils.BASE_PATH):
+                          content_type,
+                          content, base_path=utils.BASE_PATH, blob_path=None):
     """Create or replace a file.
 
+    The file is written with an `UploadFile`: it is replaced atomically. If
+    the content is already in the blob store, it is not written again.
+
     :param path: The path where the file should be saved.
     :type path: str
     :param filename: The name of the file to save.
@@ -108,51 +445,18 @@ def create_or_update_file(path,
     :type content_type: str
     :param content: The content of the file.
     :type content: str
+    :param blob_path: The path of the blob store, None to not use it.
+    :type blob_path: str
     :return A dictionary that contains the status code of the operation, an
-    error string if it occurred, the bytes written and the file name.
+    error string if it occurred, the bytes written, the file name and its
+    SHA-256 checksum.
     """
-    ret_dict = {
-        "status": 201,
-        "error": None,
-        "bytes": 0,
-        "filename": filename
-    }
-
-    file_path = os.path.join(path, filename)
-    real_path = os.path.join(base_path, file_path)
-
-    # Check if the file to upload is in a subdirectory of the provided path.
-    file_dir = os.path.dirname(file_path)
-    if path and all([path[-1] == "/", file_dir[-1] != "/"]):
-        file_dir += "/"
-
-    ret_val = 200
-    if file_dir != path:
-        ret_val, err = check_or_create_upload_dir(
-            file_dir, base_path=base_path)
+    upload_file = UploadFile(
+        path, filename, base_path=base_path, blob_path=blob_path)
 
-    if ret_val == 200:
-        if os.path.exists(real_path):
-            # 201 means created anew, 200 means just OK, as in HTTP.
-            ret_dict["status"] = 200
-
-        utils.LOG.info("Writing file '%s'", real_path)
-
-        w_stream = None
-        try:
-            w_stream = io.open(real_path, mode="bw")
-            ret_dict["bytes"] = w_stream.write(content)
-            w_stream.flush()
-        except IOError, ex:
-            utils.LOG.exception(ex)
-            utils.LOG.error("Unable to open file '%s'", file_path)
-            ret_dict["status"] = 500
-            ret_dict["error"] = "Error writing file '%s'" % filename
-        finally:
-            if w_stream:
-                w_stream.close()
-    else:
-        ret_dict["status"] = 500
-        ret_dict["error"] = "Error creating upload dir '%s'" % file_dir
+    if upload_file.open():
+        if blob_path is None or \
+                not upload_file.link_blob(hashlib.sha256(content).hexdigest()):
+            upload_file.write(content)
 
-    return ret_dict
+    return upload_file.close()